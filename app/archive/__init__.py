@@ -0,0 +1,15 @@
+"""
+Archivado de reservas antiguas a reservations_archive y mantenimiento de las particiones
+mensuales de reservations. CLI: python -m app.archive --help
+"""
+from app.archive.partitions import ensure_partitions, drop_empty_partitions, planned_partitions
+from app.archive.reservations import ArchiveResult, archive_cutoff, archive_reservations
+
+__all__ = [
+    "ArchiveResult",
+    "archive_cutoff",
+    "archive_reservations",
+    "drop_empty_partitions",
+    "ensure_partitions",
+    "planned_partitions",
+]
@@ -0,0 +1,70 @@
+"""
+CLI de archivado de reservas:
+
+    python -m app.archive run --months 12 --batch-size 1000
+    python -m app.archive partitions --ahead 3
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from typing import List, Optional
+
+from app.archive import archive_reservations, ensure_partitions
+from app.config import settings
+from app.database import SessionLocal, engine
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.archive", description="Archivado de reservas de GastroEje")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Mover las reservas antiguas a reservations_archive")
+    run.add_argument("--months", type=int, default=settings.RESERVATIONS_ARCHIVE_AFTER_MONTHS,
+                     help="Archivar las reservas de hace más de N meses")
+    run.add_argument("--batch-size", type=int, default=settings.RESERVATIONS_ARCHIVE_BATCH_SIZE)
+    run.add_argument("--pause", type=float, default=0.0, help="Segundos de pausa entre lotes")
+    run.add_argument("--max-batches", type=int, default=None, help="Detenerse tras N lotes (se puede repetir)")
+
+    partitions = commands.add_parser("partitions", help="Crear las particiones de los próximos meses")
+    partitions.add_argument("--ahead", type=int, default=settings.RESERVATIONS_PARTITION_MONTHS_AHEAD)
+    return parser.parse_args(argv)
+
+
+async def run_command(args: argparse.Namespace) -> int:
+    try:
+        if args.command == "run":
+            result = await archive_reservations(
+                SessionLocal, older_than_months=args.months, batch_size=args.batch_size,
+                pause_seconds=args.pause, max_batches=args.max_batches,
+                partitions_ahead=settings.RESERVATIONS_PARTITION_MONTHS_AHEAD,
+            )
+            state = "completado" if result.completed else "detenido (repetir para continuar)"
+            print(
+                f"Archivado {state}: {result.rows} reservas anteriores a {result.cutoff} "
+                f"en {result.batches} lotes, {result.elapsed_seconds:.1f}s"
+            )
+            if result.dropped_partitions:
+                print(f"Particiones vacías eliminadas: {', '.join(result.dropped_partitions)}")
+
+        elif args.command == "partitions":
+            async with SessionLocal() as db:
+                created = await ensure_partitions(db, args.ahead)
+            if engine.dialect.name != "postgresql":
+                print(f"{engine.dialect.name} no usa particiones; en PostgreSQL serían: {', '.join(created)}")
+            else:
+                print(f"Particiones creadas: {', '.join(created)}" if created else "No faltaba ninguna partición")
+    finally:
+        await engine.dispose()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    engine.echo = False
+    return asyncio.run(run_command(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Particiones mensuales de `reservations` por `date` (PARTITION BY RANGE en PostgreSQL).
+
+La migración 0007 convierte la tabla en particionada: lo que ya existía queda como la
+partición reservations_legacy (hasta el mes siguiente a la última reserva), más una
+partición DEFAULT y una por mes. Las de los próximos meses se crean al arrancar y al
+archivar, cada una en su transacción; las de meses ya archivados se quedan vacías y se
+eliminan.
+
+PostgreSQL no deja crear una partición si la DEFAULT tiene filas de su rango (una reserva
+hecha con más de RESERVATIONS_PARTITION_MONTHS_AHEAD meses de antelación): en ese caso se
+separa la DEFAULT, se crea la partición, se le pasan esas filas y se vuelve a adjuntar.
+
+En SQLite (desarrollo y tests) no hay particiones: `reservations` es una tabla normal y
+estas funciones solo calculan el plan (nombres y rangos) sin ejecutar nada.
+"""
+import logging
+import re
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger("app.archive")
+
+PARENT = "reservations"
+DEFAULT = f"{PARENT}_default"
+_MONTHLY = re.compile(rf"^{PARENT}_(\d{{4}})_(\d{{2}})$")
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(day: date, months: int) -> date:
+    """Primer día del mes `months` meses después (o antes, si es negativo)"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_{month:%Y_%m}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Mes de una partición mensual por su nombre (None para legacy/default)"""
+    match = _MONTHLY.match(name)
+    if match is None:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def planned_partitions(start: date, months: int) -> List[Tuple[str, date, date]]:
+    """(nombre, desde, hasta) de las particiones mensuales desde el mes de `start`"""
+    first = month_start(start)
+    return [
+        (partition_name(add_months(first, i)), add_months(first, i), add_months(first, i + 1))
+        for i in range(months)
+    ]
+
+
+def partition_ddl(name: str, start: date, end: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def partition_steps(name: str, start: date, end: date, move_from_default: bool = False) -> List[str]:
+    """Sentencias para crear una partición; con `move_from_default`, sacando antes de la DEFAULT sus filas"""
+    if not move_from_default:
+        return [partition_ddl(name, start, end)]
+    in_range = f"date >= '{start.isoformat()}' AND date < '{end.isoformat()}'"
+    return [
+        f"ALTER TABLE {PARENT} DETACH PARTITION {DEFAULT}",
+        partition_ddl(name, start, end),
+        f"INSERT INTO {PARENT} SELECT * FROM {DEFAULT} WHERE {in_range}",
+        f"DELETE FROM {DEFAULT} WHERE {in_range}",
+        f"ALTER TABLE {PARENT} ATTACH PARTITION {DEFAULT} DEFAULT",
+    ]
+
+
+async def is_partitioned(db: AsyncSession) -> bool:
+    if db.bind.dialect.name != "postgresql":
+        return False
+    relkind = await db.scalar(text("SELECT relkind FROM pg_class WHERE relname = :name"), {"name": PARENT})
+    return relkind == "p"
+
+
+async def existing_partitions(db: AsyncSession) -> List[str]:
+    result = await db.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :name ORDER BY child.relname"
+    ), {"name": PARENT})
+    return list(result.scalars())
+
+
+async def ensure_partitions(db: AsyncSession, months_ahead: int = 3, today: Optional[date] = None) -> List[str]:
+    """
+    Crear las particiones del mes actual y de los `months_ahead` siguientes que falten.
+    Devuelve las creadas (en SQLite, las que se crearían).
+    """
+    today = today or datetime.now().date()
+    plan = planned_partitions(today, months_ahead + 1)
+    if db.bind.dialect.name != "postgresql":
+        # Emulado: una sola tabla, solo se devuelve el plan
+        return [name for name, _, _ in plan]
+    if not await is_partitioned(db):
+        return []
+
+    existing = set(await existing_partitions(db))
+    created = []
+    for name, start, end in plan:
+        if name in existing:
+            continue
+        # Una transacción por partición: si una falla, las demás se crean igualmente
+        try:
+            move = False
+            if DEFAULT in existing:
+                # Sin altas nuevas en la DEFAULT entre la comprobación y la creación
+                await db.execute(text(f"LOCK TABLE {DEFAULT} IN SHARE ROW EXCLUSIVE MODE"))
+                move = await db.scalar(text(
+                    f"SELECT EXISTS (SELECT 1 FROM {DEFAULT} WHERE date >= :start AND date < :end)"
+                ), {"start": start, "end": end})
+            for statement in partition_steps(name, start, end, move):
+                await db.execute(text(statement))
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            logger.exception("No se pudo crear la partición %s", name)
+            continue
+        if move:
+            logger.info("Reservas de %s movidas de %s a su partición", name, DEFAULT)
+        created.append(name)
+    if created:
+        logger.info("Particiones creadas: %s", ", ".join(created))
+    return created
+
+
+async def drop_empty_partitions(db: AsyncSession, before: date) -> List[str]:
+    """Eliminar las particiones mensuales que terminan antes de `before` y ya están vacías"""
+    if not await is_partitioned(db):
+        return []
+
+    dropped = []
+    for name in await existing_partitions(db):
+        month = partition_month(name)
+        if month is None or add_months(month, 1) > before:
+            continue
+        if await db.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {name})")):
+            continue
+        await db.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+        await db.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+    await db.commit()
+    if dropped:
+        logger.info("Particiones vacías eliminadas: %s", ", ".join(dropped))
+    return dropped
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import DateTime, delete, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.archive.partitions import add_months, drop_empty_partitions, ensure_partitions, month_start
+from app.models.reservations import Reservation
+from app.models.reservations_archive import ReservationArchive
+from app.utils import metrics
+
+logger = logging.getLogger("app.archive")
+
+ARCHIVED_ROWS = metrics.counter("reservations_archived_total", "Reservas movidas a reservations_archive")
+
+# Columnas que se copian tal cual de reservations a reservations_archive
+COLUMNS = ["reservation_id", "user_id", "establishment_id", "date", "people_count", "status", "created_at", "updated_at"]
+
+
+@dataclass
+class ArchiveResult:
+    cutoff: date
+    rows: int = 0
+    batches: int = 0
+    completed: bool = False
+    elapsed_seconds: float = 0.0
+    created_partitions: List[str] = field(default_factory=list)
+    dropped_partitions: List[str] = field(default_factory=list)
+
+
+def archive_cutoff(older_than_months: int, today: Optional[date] = None) -> date:
+    """Primer día del mes de hace `older_than_months` meses: se archivan las reservas anteriores a esa fecha"""
+    today = today or datetime.now().date()
+    return add_months(month_start(today), -older_than_months)
+
+
+async def archive_batch(db: AsyncSession, cutoff: date, batch_size: int) -> int:
+    """Mover hasta batch_size reservas anteriores al corte (en una transacción); devuelve cuántas"""
+    cutoff_at = datetime(cutoff.year, cutoff.month, cutoff.day)
+    ids = (
+        select(Reservation.reservation_id)
+        .where(Reservation.date < cutoff_at)
+        .order_by(Reservation.date)
+        .limit(batch_size)
+    )
+    batch = list((await db.execute(ids)).scalars())
+    if not batch:
+        return 0
+
+    archived_at = literal(datetime.now(timezone.utc), DateTime(timezone=True))
+    await db.execute(
+        insert(ReservationArchive).from_select(
+            COLUMNS + ["archived_at"],
+            select(*[getattr(Reservation, column) for column in COLUMNS], archived_at)
+            .where(Reservation.reservation_id.in_(batch)),
+        )
+    )
+    await db.execute(
+        delete(Reservation).where(Reservation.reservation_id.in_(batch)).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    ARCHIVED_ROWS.inc(len(batch))
+    return len(batch)
+
+
+async def archive_reservations(
+    sessions: async_sessionmaker,
+    older_than_months: int = 12,
+    batch_size: int = 1000,
+    pause_seconds: float = 0.0,
+    max_batches: Optional[int] = None,
+    partitions_ahead: int = 3,
+    today: Optional[date] = None,
+) -> ArchiveResult:
+    """
+    Mover a reservations_archive las reservas (ya pasadas o canceladas) con fecha anterior
+    al corte, por lotes con un commit cada uno; después crear las particiones de los próximos
+    meses y eliminar las que hayan quedado vacías.
+    """
+    result = ArchiveResult(cutoff=archive_cutoff(older_than_months, today))
+    started = time.monotonic()
+    async with sessions() as db:
+        while max_batches is None or result.batches < max_batches:
+            moved = await archive_batch(db, result.cutoff, batch_size)
+            if not moved:
+                result.completed = True
+                break
+            result.rows += moved
+            result.batches += 1
+            logger.info("Archivado: %s reservas en %s lotes", result.rows, result.batches)
+            if pause_seconds:
+                await asyncio.sleep(pause_seconds)
+
+        result.created_partitions = await ensure_partitions(db, partitions_ahead, today)
+        if result.completed:
+            result.dropped_partitions = await drop_empty_partitions(db, result.cutoff)
+    result.elapsed_seconds = time.monotonic() - started
+    return result
@@ -0,0 +1,20 @@
+"""
+Backfills por lotes para tablas grandes: recorrido por clave primaria (keyset), commit por
+lote junto con un checkpoint para reanudar, y pausas mientras las réplicas van atrasadas
+o el servidor tiene demasiadas consultas activas. CLI: python -m app.backfill --help
+"""
+from app.backfill.runner import Backfill, BackfillProgress, BackfillRunner, get_checkpoint, reset_checkpoint
+from app.backfill.throttle import Throttle
+from app.backfill.jobs import JOBS, register, get_job
+
+__all__ = [
+    "Backfill",
+    "BackfillProgress",
+    "BackfillRunner",
+    "JOBS",
+    "Throttle",
+    "get_checkpoint",
+    "get_job",
+    "register",
+    "reset_checkpoint",
+]
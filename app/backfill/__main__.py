@@ -0,0 +1,107 @@
+"""
+CLI de backfills:
+
+    python -m app.backfill list
+    python -m app.backfill run dish_search_documents --batch-size 500
+    python -m app.backfill status dish_search_documents
+    python -m app.backfill reset dish_search_documents
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from typing import List, Optional
+
+from app.backfill import JOBS, BackfillRunner, Throttle, get_checkpoint, get_job, reset_checkpoint
+from app.config import settings
+from app.database import SessionLocal, engine
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.backfill", description="Backfills por lotes de GastroEje")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="Listar los backfills disponibles")
+
+    run = commands.add_parser("run", help="Ejecutar o reanudar un backfill")
+    run.add_argument("name")
+    run.add_argument("--batch-size", type=int, default=settings.BACKFILL_BATCH_SIZE)
+    run.add_argument("--restart", action="store_true", help="Ignorar el checkpoint y empezar desde el principio")
+    run.add_argument("--pause", type=float, default=0.0, help="Segundos de pausa entre lotes")
+    run.add_argument("--max-batches", type=int, default=None, help="Detenerse tras N lotes (se puede reanudar)")
+    run.add_argument("--max-lag", type=float, default=settings.BACKFILL_MAX_REPLICATION_LAG,
+                     help="Retraso máximo de réplicas en segundos antes de pausar")
+    run.add_argument("--max-connection-usage", type=float, default=settings.BACKFILL_MAX_CONNECTION_USAGE,
+                     help="Fracción máxima de max_connections con consultas activas antes de pausar")
+    run.add_argument("--max-wait", type=float, default=300.0, help="Segundos máximos en pausa antes de abortar")
+
+    status = commands.add_parser("status", help="Mostrar el progreso guardado")
+    status.add_argument("name", nargs="?")
+
+    reset = commands.add_parser("reset", help="Borrar el progreso guardado")
+    reset.add_argument("name")
+    return parser.parse_args(argv)
+
+
+def _print_checkpoint(name: str, checkpoint) -> None:
+    if checkpoint is None:
+        print(f"{name}: sin ejecutar")
+        return
+    state = "completado" if checkpoint.completed_at else "en curso"
+    print(
+        f"{name}: {state}, {checkpoint.rows_processed} filas en {checkpoint.batches} lotes, "
+        f"última clave {checkpoint.last_key}, actualizado {checkpoint.updated_at}"
+    )
+
+
+async def run_command(args: argparse.Namespace) -> int:
+    try:
+        if args.command == "list":
+            for name, job in sorted(JOBS.items()):
+                print(f"{name:40} {job.model.__tablename__:25} {job.description}")
+
+        elif args.command == "run":
+            job = get_job(args.name)
+            throttle = Throttle(
+                max_replication_lag=args.max_lag, max_connection_usage=args.max_connection_usage,
+                max_wait_seconds=args.max_wait,
+            )
+            runner = BackfillRunner(
+                SessionLocal, batch_size=args.batch_size, throttle=throttle,
+                pause_seconds=args.pause, max_batches=args.max_batches,
+            )
+            progress = await runner.run(job, restart=args.restart)
+            state = "completado" if progress.completed else "detenido (reanudable)"
+            print(
+                f"{job.name}: {state}, {progress.rows_processed} filas en {progress.batches} lotes, "
+                f"{progress.elapsed_seconds:.1f}s ({progress.throttled_seconds:.1f}s en pausa)"
+            )
+
+        elif args.command == "status":
+            names = [get_job(args.name).name] if args.name else sorted(JOBS)
+            for name in names:
+                _print_checkpoint(name, await get_checkpoint(SessionLocal, name))
+
+        elif args.command == "reset":
+            if await reset_checkpoint(SessionLocal, get_job(args.name).name):
+                print(f"{args.name}: progreso borrado")
+            else:
+                print(f"{args.name}: no tenía progreso guardado")
+    except KeyError as exc:
+        print(exc.args[0], file=sys.stderr)
+        return 2
+    finally:
+        await engine.dispose()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    # Sin el eco de SQL del motor: un backfill emite miles de sentencias
+    engine.echo = False
+    return asyncio.run(run_command(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
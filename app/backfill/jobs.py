@@ -0,0 +1,80 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy import inspect, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backfill.runner import Backfill
+from app.controllers import dish_search as dish_search_controller
+from app.models import Dish, Establishment, Reservation, Review
+from app.models.reservations import ReservationStatus
+
+# Backfills disponibles en la CLI (python -m app.backfill run <nombre>)
+JOBS: Dict[str, Backfill] = {}
+
+
+def register(job: Backfill) -> Backfill:
+    if job.name in JOBS:
+        raise ValueError(f"Ya existe un backfill llamado '{job.name}'")
+    JOBS[job.name] = job
+    return job
+
+
+def get_job(name: str) -> Backfill:
+    try:
+        return JOBS[name]
+    except KeyError:
+        raise KeyError(f"Backfill desconocido: '{name}' (disponibles: {', '.join(sorted(JOBS))})") from None
+
+
+def key_filter(model: Any, keys: List[Any]):
+    """Condición WHERE pk IN (...) para las claves de un lote (PK simple o compuesta)"""
+    pk = list(inspect(model).primary_key)
+    if len(pk) == 1:
+        return pk[0].in_(keys)
+    return tuple_(*pk).in_(keys)
+
+
+async def update_keys(db: AsyncSession, model: Any, keys: List[Any], values: dict) -> int:
+    """UPDATE de las filas del lote; devuelve las filas modificadas"""
+    result = await db.execute(
+        update(model).where(key_filter(model, keys)).values(**values).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+# ---------- BACKFILLS ----------
+async def _refresh_dish_documents(db: AsyncSession, dish_ids: List[int]) -> int:
+    await dish_search_controller.refresh_dish_documents(db, dish_ids)
+    return len(dish_ids)
+
+register(Backfill(
+    name="dish_search_documents",
+    model=Dish,
+    apply=_refresh_dish_documents,
+    description="Reconstruir los documentos de búsqueda de platos",
+))
+
+register(Backfill(
+    name="establishment_sustainability_points",
+    model=Establishment,
+    apply=lambda db, keys: update_keys(db, Establishment, keys, {"sustainability_points": 0}),
+    where=lambda: Establishment.sustainability_points.is_(None),
+    description="Puntos de sostenibilidad a 0 donde son NULL",
+))
+
+register(Backfill(
+    name="reservation_status",
+    model=Reservation,
+    apply=lambda db, keys: update_keys(db, Reservation, keys, {"status": ReservationStatus.pending}),
+    where=lambda: Reservation.status.is_(None),
+    description="Estado 'pending' en las reservas sin estado",
+))
+
+register(Backfill(
+    name="review_created_at",
+    model=Review,
+    apply=lambda db, keys: update_keys(db, Review, keys, {"created_at": datetime.now(timezone.utc)}),
+    where=lambda: Review.created_at.is_(None),
+    description="Fecha de creación en las reseñas sin ella",
+))
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, List, Optional
+
+from sqlalchemy import inspect, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.backfill.throttle import Throttle
+from app.models.backfill_checkpoints import BackfillCheckpoint
+
+logger = logging.getLogger("app.backfill")
+
+
+@dataclass
+class Backfill:
+    """
+    Un backfill sobre la tabla de un modelo.
+
+    `apply(db, keys)` recibe las claves primarias de un lote (escalares, o tuplas si la PK es
+    compuesta), hace los cambios sin commit y puede devolver el número de filas modificadas.
+    `where` (opcional) limita el recorrido a las filas pendientes.
+    """
+    name: str
+    model: Any
+    apply: Callable[[AsyncSession, List[Any]], Awaitable[Optional[int]]]
+    where: Optional[Callable[[], Any]] = None
+    description: str = ""
+
+
+@dataclass
+class BackfillProgress:
+    name: str
+    rows_processed: int = 0
+    batches: int = 0
+    last_key: Optional[List[Any]] = None
+    completed: bool = False
+    throttled_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+    started_at: Optional[datetime] = field(default=None, repr=False)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class BackfillRunner:
+    """
+    Recorre la tabla del backfill por lotes de clave primaria (keyset, sin OFFSET) y hace
+    commit por lote junto con el checkpoint, de modo que un fallo o una interrupción
+    se reanuda desde el último lote confirmado.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        batch_size: int = 1000,
+        throttle: Optional[Throttle] = None,
+        pause_seconds: float = 0.0,
+        max_batches: Optional[int] = None,
+    ):
+        if batch_size < 1:
+            raise ValueError("batch_size debe ser mayor que 0")
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.throttle = throttle
+        self.pause_seconds = pause_seconds
+        self.max_batches = max_batches
+
+    async def _load_checkpoint(self, db: AsyncSession, job: Backfill, restart: bool) -> BackfillCheckpoint:
+        checkpoint = await db.get(BackfillCheckpoint, job.name)
+        if checkpoint is None:
+            checkpoint = BackfillCheckpoint(name=job.name, rows_processed=0, batches=0, started_at=_now())
+            db.add(checkpoint)
+        elif restart or checkpoint.completed_at is not None:
+            # Un backfill terminado vuelve a empezar desde el principio
+            checkpoint.last_key = None
+            checkpoint.rows_processed = 0
+            checkpoint.batches = 0
+            checkpoint.started_at = _now()
+            checkpoint.completed_at = None
+        checkpoint.updated_at = _now()
+        await db.commit()
+        return checkpoint
+
+    async def _next_keys(self, db: AsyncSession, job: Backfill, last_key: Optional[List[Any]]) -> List[tuple]:
+        pk = list(inspect(job.model).primary_key)
+        query = select(*pk).order_by(*pk).limit(self.batch_size)
+        if job.where is not None:
+            query = query.where(job.where())
+        if last_key is not None:
+            if len(pk) == 1:
+                query = query.where(pk[0] > last_key[0])
+            else:
+                query = query.where(tuple_(*pk) > tuple_(*last_key))
+        result = await db.execute(query)
+        return [tuple(row) for row in result.all()]
+
+    async def run(self, job: Backfill, restart: bool = False) -> BackfillProgress:
+        """Ejecutar (o reanudar) el backfill hasta el final o hasta max_batches lotes"""
+        started = time.monotonic()
+        single_key = len(inspect(job.model).primary_key) == 1
+
+        async with self.session_factory() as db:
+            checkpoint = await self._load_checkpoint(db, job, restart)
+            progress = BackfillProgress(
+                name=job.name,
+                rows_processed=checkpoint.rows_processed,
+                batches=checkpoint.batches,
+                last_key=json.loads(checkpoint.last_key) if checkpoint.last_key else None,
+                started_at=checkpoint.started_at,
+            )
+            if progress.last_key is not None:
+                logger.info("Backfill %s: reanudando tras la clave %s", job.name, progress.last_key)
+
+            batches_this_run = 0
+            while self.max_batches is None or batches_this_run < self.max_batches:
+                if self.throttle is not None:
+                    progress.throttled_seconds += await self.throttle.wait(db)
+
+                keys = await self._next_keys(db, job, progress.last_key)
+                if not keys:
+                    checkpoint.completed_at = _now()
+                    checkpoint.updated_at = checkpoint.completed_at
+                    await db.commit()
+                    progress.completed = True
+                    break
+
+                changed = await job.apply(db, [key[0] for key in keys] if single_key else keys)
+
+                progress.last_key = list(keys[-1])
+                progress.rows_processed += changed if changed is not None else len(keys)
+                progress.batches += 1
+                batches_this_run += 1
+                checkpoint.last_key = json.dumps(progress.last_key, default=str)
+                checkpoint.rows_processed = progress.rows_processed
+                checkpoint.batches = progress.batches
+                checkpoint.updated_at = _now()
+                # El lote y su checkpoint se confirman juntos
+                await db.commit()
+
+                logger.info(
+                    "Backfill %s: lote %s, %s filas, última clave %s",
+                    job.name, progress.batches, progress.rows_processed, progress.last_key,
+                )
+                if self.pause_seconds:
+                    await asyncio.sleep(self.pause_seconds)
+
+        progress.elapsed_seconds = time.monotonic() - started
+        return progress
+
+
+async def get_checkpoint(session_factory: async_sessionmaker, name: str) -> Optional[BackfillCheckpoint]:
+    async with session_factory() as db:
+        return await db.get(BackfillCheckpoint, name)
+
+
+async def reset_checkpoint(session_factory: async_sessionmaker, name: str) -> bool:
+    """Borrar el progreso guardado de un backfill; devuelve False si no existía"""
+    async with session_factory() as db:
+        checkpoint = await db.get(BackfillCheckpoint, name)
+        if checkpoint is None:
+            return False
+        await db.delete(checkpoint)
+        await db.commit()
+        return True
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger("app.backfill")
+
+
+class Throttle:
+    """Frenar el backfill entre lotes mientras las réplicas van atrasadas o el servidor está cargado"""
+
+    def __init__(
+        self,
+        max_replication_lag: Optional[float] = 5.0,
+        max_connection_usage: Optional[float] = 0.5,
+        poll_seconds: float = 1.0,
+        max_wait_seconds: float = 300.0,
+    ):
+        self.max_replication_lag = max_replication_lag
+        self.max_connection_usage = max_connection_usage
+        self.poll_seconds = poll_seconds
+        self.max_wait_seconds = max_wait_seconds
+
+    async def connection_usage(self, db: AsyncSession) -> Optional[float]:
+        """Fracción de max_connections con una consulta en curso en el servidor, de cualquier proceso
+        (solo PostgreSQL; el pool de este proceso no dice nada de la carga de la API)"""
+        if db.bind.dialect.name != "postgresql":
+            return None
+        result = await db.execute(text(
+            "SELECT count(*) FILTER (WHERE state = 'active' AND pid <> pg_backend_pid())::float "
+            "/ current_setting('max_connections')::float FROM pg_stat_activity"
+        ))
+        await db.commit()
+        return float(result.scalar_one())
+
+    async def replication_lag(self, db: AsyncSession) -> Optional[float]:
+        """Segundos de retraso de la réplica más atrasada (solo PostgreSQL)"""
+        if db.bind.dialect.name != "postgresql":
+            return None
+        result = await db.execute(text(
+            "SELECT COALESCE(EXTRACT(EPOCH FROM MAX(replay_lag)), 0) FROM pg_stat_replication"
+        ))
+        # Cerrar la transacción de solo lectura: no debe quedar abierta mientras se espera
+        await db.commit()
+        return float(result.scalar_one())
+
+    async def reasons(self, db: AsyncSession) -> List[str]:
+        """Motivos por los que ahora mismo no se debe lanzar otro lote"""
+        reasons = []
+        if self.max_connection_usage is not None:
+            usage = await self.connection_usage(db)
+            if usage is not None and usage > self.max_connection_usage:
+                reasons.append(
+                    f"conexiones activas al {usage:.0%} de max_connections (máx. {self.max_connection_usage:.0%})"
+                )
+        if self.max_replication_lag is not None:
+            lag = await self.replication_lag(db)
+            if lag is not None and lag > self.max_replication_lag:
+                reasons.append(f"réplicas con {lag:.1f}s de retraso (máx. {self.max_replication_lag:.1f}s)")
+        return reasons
+
+    async def wait(self, db: AsyncSession) -> float:
+        """Esperar hasta que se pueda lanzar el siguiente lote; devuelve los segundos esperados"""
+        waited = 0.0
+        while True:
+            reasons = await self.reasons(db)
+            if not reasons:
+                return waited
+            if waited >= self.max_wait_seconds:
+                raise TimeoutError(
+                    f"Backfill detenido tras esperar {waited:.0f}s: {'; '.join(reasons)}"
+                )
+            logger.info("Backfill en pausa: %s", "; ".join(reasons))
+            await asyncio.sleep(self.poll_seconds)
+            waited += self.poll_seconds
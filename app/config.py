@@ -4,6 +4,120 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Back My Events"
     DATABASE_URL: str
 
+    # Réplicas de lectura (URLs separadas por comas); vacío = todo va al primario
+    READ_DATABASE_URLS: str = ""
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+    REPLICA_HEALTH_CHECK_SECONDS: float = 10.0
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+
+    # Cachés de sentencias: compiladas de SQLAlchemy (por motor) y prepared statements de asyncpg (por conexión)
+    DB_QUERY_CACHE_SIZE: int = 1200
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500
+
+    # Compresión de respuestas (gzip 1-9, brotli 0-11)
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    # Rutas de catálogo cuyas respuestas GET se guardan ya comprimidas
+    COMPRESSION_CACHE_PATHS: str = "/platos,/establishments,/menu,/categorias,/allergen,/accessibilidad"
+    COMPRESSION_CACHE_ENTRIES: int = 256
+
+    # Multi-get (GET /platos?ids=, POST /establishments/batch): máximo de IDs por petición
+    MULTI_GET_MAX_IDS: int = 100
+
+    # Peticiones compuestas (POST /batch): máximo de subpeticiones GET, cuántas a la vez y tiempo total
+    BATCH_MAX_REQUESTS: int = 20
+    BATCH_CONCURRENCY: int = 4
+    BATCH_TIMEOUT_SECONDS: float = 5.0
+
+    # Cachés con TTL (app/utils/cache.py): variación aleatoria del TTL (±fracción) y agresividad
+    # del refresco anticipado probabilístico (XFetch; 0 = solo al caducar)
+    CACHE_TTL_JITTER: float = 0.1
+    CACHE_XFETCH_BETA: float = 1.0
+    # Caché de dos niveles de GET /platos/{id} y /establishments/{id} (app/utils/tiered_cache.py):
+    # L1 en cada proceso (0 = sin caché) y L2 compartida "local" (un solo proceso, tests) o "redis"
+    CACHE_L1_TTL_SECONDS: float = 0.0
+    CACHE_L1_STALE_SECONDS: float = 5.0
+    CACHE_L1_MAX_ENTRIES: int = 10000
+    CACHE_L2_BACKEND: str = "local"
+    CACHE_L2_URL: str = "redis://localhost:6379/0"
+    CACHE_L2_TTL_SECONDS: float = 300.0
+
+    # Calentamiento al arrancar (app/controllers/warmup.py): conexiones abiertas por motor, sentencias
+    # frecuentes preparadas en ellas y catálogos precargados; GET /health/ready da 503 hasta terminar
+    WARMUP_ON_STARTUP: bool = True
+    WARMUP_POOL_CONNECTIONS: int = 5
+    WARMUP_TOP_ESTABLISHMENTS: int = 20
+    WARMUP_TIMEOUT_SECONDS: float = 60.0
+
+    # Filtros de existencia (Bloom) para IDs de platos y establecimientos y emails de usuarios:
+    # se cargan al arrancar y se recargan cada N segundos (0 = sin filtros, solo la caché negativa)
+    EXISTENCE_FILTER_REFRESH_SECONDS: float = 600.0
+    EXISTENCE_FILTER_ERROR_RATE: float = 0.01
+    # Caché negativa de 404 confirmados por la base de datos (0 = desactivada)
+    EXISTENCE_NEGATIVE_TTL_SECONDS: float = 30.0
+    EXISTENCE_NEGATIVE_MAX_ENTRIES: int = 10000
+
+    # Idempotency-Key en POST /reservas/ y /resenas/
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    # Plazo de una petición con Idempotency-Key en curso: pasado, un reintento puede repetirla
+    IDEMPOTENCY_LEASE_SECONDS: int = 30
+
+    # Lecturas calientes agrupadas (single-flight); >0 reutiliza el resultado esos segundos
+    SINGLEFLIGHT_GRACE_SECONDS: float = 0.0
+
+    # Borrados en cascada: por encima de este número de filas hijas se borra por lotes en segundo plano
+    DELETE_SYNC_MAX_ROWS: int = 5000
+    DELETE_BATCH_SIZE: int = 1000
+    DELETE_BATCH_PAUSE_SECONDS: float = 0.05
+    # Al parar la app se espera hasta N segundos a los borrados por lotes en curso; los que queden se cancelan
+    DELETE_SHUTDOWN_WAIT_SECONDS: float = 10.0
+
+    # Reservas: particiones mensuales y archivado (python -m app.archive)
+    RESERVATIONS_ARCHIVE_AFTER_MONTHS: int = 12
+    RESERVATIONS_ARCHIVE_BATCH_SIZE: int = 1000
+    RESERVATIONS_PARTITION_MONTHS_AHEAD: int = 3
+
+    # Tareas en segundo plano (tabla jobs): pool de workers en el proceso de la API y/o python -m app.worker
+    JOBS_WORKER_IN_PROCESS: bool = True
+    JOBS_WORKERS: int = 2
+    JOBS_BATCH_SIZE: int = 50
+    JOBS_POLL_SECONDS: float = 1.0
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_RETRY_BASE_SECONDS: float = 2.0
+    JOBS_RETRY_MAX_SECONDS: float = 300.0
+    # Una tarea reservada más tiempo que esto (worker caído) vuelve a la cola
+    JOBS_LOCK_TIMEOUT_SECONDS: float = 300.0
+
+    # Recomendaciones de platos: top-N precalculado por usuario, reconstruido cada N segundos
+    # (0 = se calcula en la primera petición y no se renueva)
+    RECOMMENDATIONS_TOP_N: int = 50
+    RECOMMENDATIONS_NEIGHBORS: int = 50
+    RECOMMENDATIONS_CATEGORY_BOOST: float = 0.5
+    RECOMMENDATIONS_REFRESH_SECONDS: float = 900.0
+
+    # Ranking de sostenibilidad en memoria: se carga al arrancar y se recarga cada N segundos
+    # para recoger cambios hechos por otros procesos (0 = se carga en la primera petición)
+    LEADERBOARD_REFRESH_SECONDS: float = 300.0
+
+    # Eventos en vivo (SSE por establecimiento): "local" (un worker) o "postgres" (LISTEN/NOTIFY entre workers)
+    EVENTS_BACKEND: str = "local"
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+
+    # Sincronización incremental (GET /sync): cada cuánto se compacta change_log
+    SYNC_COMPACT_SECONDS: float = 3600.0
+
+    # Migraciones (Alembic)
+    SCHEMA_CHECK_ON_STARTUP: bool = True
+    MIGRATION_LOCK_TIMEOUT: str = "5s"
+
+    # Backfills por lotes (python -m app.backfill)
+    BACKFILL_BATCH_SIZE: int = 1000
+    BACKFILL_MAX_REPLICATION_LAG: float = 5.0
+    # Fracción de max_connections de PostgreSQL con consultas activas (de todos los procesos)
+    BACKFILL_MAX_CONNECTION_USAGE: float = 0.5
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8"
@@ -1,10 +1,15 @@
+from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from fastapi import HTTPException
+from app import queries
 from app.models.allergens import Allergens
 from app.models.user_allergen import UserAllergen
 from app.models.dish_allergen import DishAllergen
-from app.schemas.allergens import AllergenCreate, AllergenUpdate
+from app.controllers.dish_search import dish_ids_with_allergen
+from app.schemas.allergens import AllergenCreate, AllergenOut, AllergenUpdate
+from app.utils.tiered_cache import TieredCache
+from app import worker
 
 
 async def create_allergen(db: AsyncSession, data: AllergenCreate):
@@ -13,20 +18,27 @@ async def create_allergen(db: AsyncSession, data: AllergenCreate):
     db.add(allergen)
     await db.commit()
     await db.refresh(allergen)
+    await ALLERGENS_CACHE.invalidate()
     return allergen
 
 
-async def get_allergens(db: AsyncSession):
-    """Obtener todos los alérgenos"""
+async def _select_allergens(db: AsyncSession, key: str):
     result = await db.execute(select(Allergens))
     return result.scalars().all()
 
 
+# Caché de dos niveles del listado completo (GET /allergen/), precargada al arrancar
+ALLERGENS_CACHE = TieredCache("allergens", _select_allergens, List[AllergenOut])
+
+
+async def get_allergens(db: AsyncSession):
+    """Obtener todos los alérgenos"""
+    return await ALLERGENS_CACHE.get("all", db)
+
+
 async def get_allergen_by_id(db: AsyncSession, allergen_id: int):
     """Obtener un alérgeno por ID"""
-    result = await db.execute(
-        select(Allergens).where(Allergens.allergen_id == allergen_id)
-    )
+    result = await db.execute(queries.ALLERGEN_BY_ID, {"allergen_id": allergen_id})
     allergen = result.scalar_one_or_none()
     if not allergen:
         raise HTTPException(status_code=404, detail="Allergen not found")
@@ -79,9 +91,7 @@ async def remove_allergen_from_user(db: AsyncSession, user_id: int, allergen_id:
 
 async def update_allergen(db: AsyncSession, allergen_id: int, data: AllergenUpdate):
     """Actualizar un alérgeno"""
-    result = await db.execute(
-        select(Allergens).where(Allergens.allergen_id == allergen_id)
-    )
+    result = await db.execute(queries.ALLERGEN_BY_ID, {"allergen_id": allergen_id})
     allergen = result.scalar_one_or_none()
     if not allergen:
         raise HTTPException(status_code=404, detail="Allergen not found")
@@ -92,18 +102,21 @@ async def update_allergen(db: AsyncSession, allergen_id: int, data: AllergenUpda
     
     await db.commit()
     await db.refresh(allergen)
+    await ALLERGENS_CACHE.invalidate()
     return allergen
 
 
 async def delete_allergen(db: AsyncSession, allergen_id: int):
     """Eliminar un alérgeno"""
-    result = await db.execute(
-        select(Allergens).where(Allergens.allergen_id == allergen_id)
-    )
+    result = await db.execute(queries.ALLERGEN_BY_ID, {"allergen_id": allergen_id})
     allergen = result.scalar_one_or_none()
     if not allergen:
         raise HTTPException(status_code=404, detail="Allergen not found")
     
+    # Los documentos de búsqueda de sus platos guardan su ID: se reconstruyen en segundo plano, ya sin los enlaces
+    dish_ids = await dish_ids_with_allergen(db, allergen_id)
     await db.delete(allergen)
+    worker.refresh_dish_search_later(db, dish_ids)
     await db.commit()
+    await ALLERGENS_CACHE.invalidate()
     return True
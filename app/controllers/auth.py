@@ -1,15 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 from fastapi import HTTPException
-from app.models.users import User
+from app import queries
 from app.schemas.users import UserLogin
 from app.utils.hashing import verify_password
 from app.utils.jwt import create_access_token
 
 async def authenticate_user(db: AsyncSession, user: UserLogin):
     """Autenticar al usuario y devolver el token JWT"""
-    query = select(User).where(User.email == user.email)
-    result = await db.execute(query)
+    result = await db.execute(queries.USER_BY_EMAIL, {"email": user.email})
     findUser = result.scalar_one_or_none()
 
     if not findUser or not verify_password(user.password, findUser.password):
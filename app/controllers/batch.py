@@ -0,0 +1,134 @@
+"""
+POST /batch: varias lecturas GET en una sola petición HTTP.
+
+Cada subpetición se ejecuta contra la propia app (rutas, dependencias, validación y errores
+como si llegara sola) con las cabeceras del lote, así que la autenticación y read-your-writes
+se aplican igual. Se reparten entre BATCH_CONCURRENCY carriles concurrentes; cada carril abre
+una sola sesión de lectura y la comparte entre las subpeticiones que ejecuta una tras otra
+(una AsyncSession no admite consultas concurrentes, así que nunca se comparte entre carriles).
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database
+from app.config import settings
+from app.schemas.batch import SubRequest
+from app.utils import metrics
+
+logger = logging.getLogger("app.batch")
+
+SUBREQUESTS = metrics.counter("batch_subrequests_total", "Subpeticiones de POST /batch por código de estado", ["status"])
+
+# Describen el cuerpo del POST o piden compresión (se comprime la respuesta del lote entera)
+_SKIPPED_HEADERS = {b"content-length", b"content-type", b"accept-encoding", b"transfer-encoding"}
+
+
+async def _open_read_session(request: Request) -> AsyncSession:
+    """Misma elección que get_read_db: primario tras una escritura reciente, si no una réplica"""
+    if database.wants_primary(request):
+        return database.session_router.write_sessions()
+    return await database.session_router.read_session()
+
+
+async def _dispatch(request: Request, sub: SubRequest, session: AsyncSession) -> dict:
+    """Ejecutar una subpetición contra la app y recoger su estado y su cuerpo"""
+    target = urlsplit(sub.path)
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": request.url.scheme,
+        "root_path": request.scope.get("root_path", ""),
+        "path": target.path,
+        "raw_path": target.path.encode(),
+        "query_string": target.query.encode(),
+        "headers": [(name, value) for name, value in request.scope["headers"] if name not in _SKIPPED_HEADERS],
+        "client": request.scope.get("client"),
+        "server": request.scope.get("server"),
+        "state": {database.BATCH_READ_SESSION: session},
+    }
+    received = False
+    response = {"status": 500, "content_type": b""}
+    chunks = []
+
+    async def receive():
+        nonlocal received
+        if received:
+            # Sin más cuerpo: un stream (SSE) termina en lugar de quedarse abierto
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["content_type"] = dict(message.get("headers", [])).get(b"content-type", b"")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        logger.exception("Subpetición de /batch fallida: GET %s", sub.path)
+        response["status"] = 500
+    body = b"".join(chunks)
+    if response["content_type"].startswith(b"application/json") and body:
+        content = json.loads(body)
+    else:
+        content = body.decode("utf-8", errors="replace") or None
+    return {"id": sub.id, "status": response["status"], "body": content}
+
+
+async def run_batch(request: Request, requests: List[SubRequest]) -> dict:
+    """Ejecutar las subpeticiones con concurrencia y tiempo total acotados; resultados en su orden"""
+    if len(requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BATCH_MAX_REQUESTS} sub-requests per batch",
+        )
+    for sub in requests:
+        if sub.method.upper() != "GET":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Only GET sub-requests are allowed (got {sub.method} {sub.path})",
+            )
+
+    results: List[Optional[dict]] = [None] * len(requests)
+    pending = deque(enumerate(requests))
+
+    async def lane():
+        session = await _open_read_session(request)
+        async with session:
+            while pending:
+                index, sub = pending.popleft()
+                results[index] = await _dispatch(request, sub, session)
+                if results[index]["status"] >= 500:
+                    # La consulta fallida puede dejar la transacción abortada para las siguientes
+                    await session.rollback()
+
+    lanes = [asyncio.create_task(lane()) for _ in range(min(settings.BATCH_CONCURRENCY, len(requests)))]
+    _, unfinished = await asyncio.wait(lanes, timeout=settings.BATCH_TIMEOUT_SECONDS)
+    for task in unfinished:
+        task.cancel()
+    for outcome in await asyncio.gather(*lanes, return_exceptions=True):
+        if isinstance(outcome, Exception):
+            logger.error("Carril de /batch fallido", exc_info=outcome)
+
+    for index, sub in enumerate(requests):
+        if results[index] is None:
+            # No llegó a terminar dentro de BATCH_TIMEOUT_SECONDS (o su carril no pudo abrir sesión)
+            results[index] = {
+                "id": sub.id,
+                "status": status.HTTP_504_GATEWAY_TIMEOUT,
+                "body": {"detail": "Sub-request did not complete within the batch time limit"},
+            }
+        SUBREQUESTS.inc(status=str(results[index]["status"]))
+    return {"results": results}
@@ -1,17 +1,22 @@
+from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import update, delete
 from fastapi import HTTPException, status
+from app import queries
 from app.models.categories import Category
 from app.models.establishment_category import EstablishmentCategory
 from app.models.dish_category import DishCategory
 from app.models.establishments import Establishment
 from app.models.dishes import Dish
-from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.schemas.category import CategoryCreate, CategoryOut, CategoryUpdate
+from app.controllers.dish_search import dish_ids_in_category
+from app.controllers import leaderboard
+from app import worker
+from app.utils.tiered_cache import TieredCache
 
 # Obtener todas las categorías
-async def get_all_categories(db: AsyncSession):
-    """Obtener lista de todas las categorías"""
+async def _select_categories(db: AsyncSession, key: str):
     try:
         query = select(Category)
         result = await db.execute(query)
@@ -23,12 +28,18 @@ async def get_all_categories(db: AsyncSession):
             detail=f"Error al obtener categorías: {str(e)}"
         )
 
+# Caché de dos niveles del listado completo (GET /categorias/list), precargada al arrancar
+CATEGORIES_CACHE = TieredCache("categories", _select_categories, List[CategoryOut])
+
+async def get_all_categories(db: AsyncSession):
+    """Obtener lista de todas las categorías"""
+    return await CATEGORIES_CACHE.get("all", db)
+
 # Obtener una categoría por ID
 async def get_category_by_id(db: AsyncSession, category_id: int):
     """Obtener una categoría específica por su ID"""
     try:
-        query = select(Category).where(Category.category_id == category_id)
-        result = await db.execute(query)
+        result = await db.execute(queries.CATEGORY_BY_ID, {"category_id": category_id})
         category = result.scalar_one_or_none()
 
         if not category:
@@ -68,6 +79,7 @@ async def create_category(db: AsyncSession, category_data: CategoryCreate):
         db.add(new_category)
         await db.commit()
         await db.refresh(new_category)
+        await CATEGORIES_CACHE.invalidate()
         return new_category
         
     except HTTPException:
@@ -84,8 +96,7 @@ async def update_category(db: AsyncSession, category_id: int, category_data: Cat
     """Actualizar una categoría existente"""
     try:
         # Verificar si la categoría existe
-        query_exists = select(Category).where(Category.category_id == category_id)
-        result_exists = await db.execute(query_exists)
+        result_exists = await db.execute(queries.CATEGORY_BY_ID, {"category_id": category_id})
         existing_category = result_exists.scalar_one_or_none()
         
         if not existing_category:
@@ -123,11 +134,14 @@ async def update_category(db: AsyncSession, category_id: int, category_data: Cat
             .execution_options(synchronize_session="fetch")
         )
         await db.execute(query)
+        # El nombre de la categoría forma parte del texto de búsqueda de sus platos (en segundo plano)
+        if 'name' in update_data:
+            worker.refresh_dish_search_later(db, await dish_ids_in_category(db, category_id))
         await db.commit()
+        await CATEGORIES_CACHE.invalidate()
 
         # Obtener la categoría actualizada
-        query_updated = select(Category).where(Category.category_id == category_id)
-        result_updated = await db.execute(query_updated)
+        result_updated = await db.execute(queries.CATEGORY_BY_ID, {"category_id": category_id})
         updated_category = result_updated.scalar_one()
         
         return updated_category
@@ -146,8 +160,7 @@ async def delete_category(db: AsyncSession, category_id: int):
     """Eliminar una categoría de la base de datos"""
     try:
         # Verificar si la categoría existe
-        query_exists = select(Category).where(Category.category_id == category_id)
-        result_exists = await db.execute(query_exists)
+        result_exists = await db.execute(queries.CATEGORY_BY_ID, {"category_id": category_id})
         existing_category = result_exists.scalar_one_or_none()
         
         if not existing_category:
@@ -156,10 +169,14 @@ async def delete_category(db: AsyncSession, category_id: int):
                 detail=f"Categoría con ID {category_id} no encontrada"
             )
 
-        # Eliminar la categoría
+        # Eliminar la categoría; los documentos de sus platos se reconstruyen en segundo plano, ya sin el enlace
+        dish_ids = await dish_ids_in_category(db, category_id)
         query = delete(Category).where(Category.category_id == category_id)
         await db.execute(query)
+        worker.refresh_dish_search_later(db, dish_ids)
         await db.commit()
+        leaderboard.track_category_deleted(category_id)
+        await CATEGORIES_CACHE.invalidate()
 
         return {"message": f"Categoría con ID {category_id} eliminada correctamente"}
         
@@ -192,8 +209,7 @@ async def get_establishments_by_category(db: AsyncSession, category_id: int):
     """Obtener todos los establecimientos de una categoría"""
     try:
         # Verificar que la categoría existe
-        category_query = select(Category).where(Category.category_id == category_id)
-        category_result = await db.execute(category_query)
+        category_result = await db.execute(queries.CATEGORY_BY_ID, {"category_id": category_id})
         category = category_result.scalar_one_or_none()
         
         if not category:
@@ -225,8 +241,7 @@ async def add_category_to_establishment(db: AsyncSession, establishment_id: int,
     """Asociar una categoría a un establecimiento"""
     try:
         # Verificar que el establecimiento existe
-        est_query = select(Establishment).where(Establishment.establishment_id == establishment_id)
-        est_result = await db.execute(est_query)
+        est_result = await db.execute(queries.ESTABLISHMENT_BY_ID, {"establishment_id": establishment_id})
         establishment = est_result.scalar_one_or_none()
         
         if not establishment:
@@ -236,8 +251,7 @@ async def add_category_to_establishment(db: AsyncSession, establishment_id: int,
             )
         
         # Verificar que la categoría existe
-        cat_query = select(Category).where(Category.category_id == category_id)
-        cat_result = await db.execute(cat_query)
+        cat_result = await db.execute(queries.CATEGORY_BY_ID, {"category_id": category_id})
         category = cat_result.scalar_one_or_none()
         
         if not category:
@@ -264,6 +278,7 @@ async def add_category_to_establishment(db: AsyncSession, establishment_id: int,
         est_cat = EstablishmentCategory(establishment_id=establishment_id, category_id=category_id)
         db.add(est_cat)
         await db.commit()
+        leaderboard.track_category_added(establishment_id, category_id)
         return True
     except HTTPException:
         raise
@@ -294,6 +309,7 @@ async def remove_category_from_establishment(db: AsyncSession, establishment_id:
         
         await db.delete(est_cat)
         await db.commit()
+        leaderboard.track_category_removed(establishment_id, category_id)
         return True
     except HTTPException:
         raise
@@ -310,8 +326,7 @@ async def get_dishes_by_category(db: AsyncSession, category_id: int):
     """Obtener todos los platos de una categoría"""
     try:
         # Verificar que la categoría existe
-        category_query = select(Category).where(Category.category_id == category_id)
-        category_result = await db.execute(category_query)
+        category_result = await db.execute(queries.CATEGORY_BY_ID, {"category_id": category_id})
         category = category_result.scalar_one_or_none()
         
         if not category:
@@ -343,8 +358,7 @@ async def add_category_to_dish(db: AsyncSession, dish_id: int, category_id: int)
     """Asociar una categoría a un plato"""
     try:
         # Verificar que el plato existe
-        dish_query = select(Dish).where(Dish.dish_id == dish_id)
-        dish_result = await db.execute(dish_query)
+        dish_result = await db.execute(queries.DISH_BY_ID, {"dish_id": dish_id})
         dish = dish_result.scalar_one_or_none()
         
         if not dish:
@@ -354,8 +368,7 @@ async def add_category_to_dish(db: AsyncSession, dish_id: int, category_id: int)
             )
         
         # Verificar que la categoría existe
-        cat_query = select(Category).where(Category.category_id == category_id)
-        cat_result = await db.execute(cat_query)
+        cat_result = await db.execute(queries.CATEGORY_BY_ID, {"category_id": category_id})
         category = cat_result.scalar_one_or_none()
         
         if not category:
@@ -381,6 +394,7 @@ async def add_category_to_dish(db: AsyncSession, dish_id: int, category_id: int)
         # Crear la asociación
         dish_cat = DishCategory(dish_id=dish_id, category_id=category_id)
         db.add(dish_cat)
+        worker.refresh_dish_search_later(db, [dish_id])
         await db.commit()
         return True
     except HTTPException:
@@ -411,6 +425,7 @@ async def remove_category_from_dish(db: AsyncSession, dish_id: int, category_id:
             )
         
         await db.delete(dish_cat)
+        worker.refresh_dish_search_later(db, [dish_id])
         await db.commit()
         return True
     except HTTPException:
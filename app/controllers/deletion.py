@@ -0,0 +1,197 @@
+"""
+Borrado de establecimientos, menús y usuarios junto con todo lo que cuelga de ellos.
+
+Las claves foráneas llevan ON DELETE CASCADE (migración 0006) y las relaciones passive_deletes:
+borrar la fila padre basta y la base de datos borra las hijas sin que el ORM las cargue.
+
+Si el subárbol supera DELETE_SYNC_MAX_ROWS filas, un único DELETE mantendría los locks durante
+minutos: entonces se borra en segundo plano por lotes de DELETE_BATCH_SIZE, de las hojas hacia
+la raíz y con un commit por lote; la fila padre se borra al final. Un borrado interrumpido se
+completa repitiendo la petición (cada lote solo ve las filas que quedan).
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database
+from app.backfill.throttle import Throttle
+from app.config import settings
+from app.models import Dish, Establishment, Menu, Reservation, ReservationArchive, Review, User
+from app.utils import metrics, singleflight, tiered_cache
+
+logger = logging.getLogger("app.deletion")
+
+DELETED_ROWS = metrics.counter(
+    "deletion_rows_total", "Filas borradas por los borrados en cascada por lotes", ["table"]
+)
+
+# (tipo, id) -> tarea de borrado en segundo plano
+_running: Dict[Tuple[str, int], asyncio.Task] = {}
+
+metrics.gauge(
+    "deletion_jobs_running", "Borrados por lotes en curso en este worker",
+    function=lambda: {(): len(_running)},
+)
+
+
+@dataclass
+class Step:
+    """Hijas de la raíz que se borran por lotes: filas de `model` que cumplen `where(id)`"""
+    model: Any
+    key: Any  # columna única dentro de `where` (la PK, o la otra columna de una PK compuesta)
+    where: Callable[[int], Any]
+
+
+@dataclass
+class Tree:
+    root: Any
+    root_key: Any
+    # De las hojas hacia la raíz; lo que no aparece (enlaces de un plato, categorías...) es
+    # pequeño por cada fila y lo borra el ON DELETE CASCADE del lote
+    steps: List[Step]
+    # Lecturas compartidas (single-flight) y cachés de dos niveles que dejan de valer al borrar
+    invalidates: Tuple[str, ...] = ()
+
+
+TREES: Dict[str, Tree] = {
+    "establishment": Tree(Establishment, Establishment.establishment_id, [
+        Step(Dish, Dish.dish_id, lambda establishment_id: Dish.menu_id.in_(
+            select(Menu.menu_id).where(Menu.establishment_id == establishment_id)
+        )),
+        Step(Reservation, Reservation.reservation_id, lambda establishment_id: Reservation.establishment_id == establishment_id),
+        Step(ReservationArchive, ReservationArchive.reservation_id,
+             lambda establishment_id: ReservationArchive.establishment_id == establishment_id),
+        Step(Review, Review.user_id, lambda establishment_id: Review.establishment_id == establishment_id),
+    ], invalidates=("establishments", "menus", "dishes")),
+    "menu": Tree(Menu, Menu.menu_id, [
+        Step(Dish, Dish.dish_id, lambda menu_id: Dish.menu_id == menu_id),
+    ], invalidates=("menus", "dishes")),
+    "user": Tree(User, User.user_id, [
+        Step(Reservation, Reservation.reservation_id, lambda user_id: Reservation.user_id == user_id),
+        Step(ReservationArchive, ReservationArchive.reservation_id, lambda user_id: ReservationArchive.user_id == user_id),
+        Step(Review, Review.establishment_id, lambda user_id: Review.user_id == user_id),
+    ]),
+}
+
+
+async def count_subtree(db: AsyncSession, kind: str, root_id: int) -> int:
+    """Filas que se borrarían en cascada con la raíz (sin contar los enlaces de cada plato)"""
+    total = 0
+    for step in TREES[kind].steps:
+        total += await db.scalar(select(func.count()).select_from(step.model).where(step.where(root_id)))
+    return total
+
+
+async def delete_batch(db: AsyncSession, step: Step, root_id: int, batch_size: int) -> int:
+    """Borrar hasta batch_size filas del paso; devuelve cuántas"""
+    condition = step.where(root_id)
+    batch = select(step.key).where(condition).limit(batch_size)
+    result = await db.execute(
+        delete(step.model).where(condition, step.key.in_(batch)).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if result.rowcount:
+        DELETED_ROWS.inc(result.rowcount, table=step.model.__tablename__)
+    return result.rowcount
+
+
+async def delete_root(db: AsyncSession, kind: str, root_id: int) -> bool:
+    """DELETE de la raíz; la base de datos borra lo que quede colgando de ella"""
+    tree = TREES[kind]
+    result = await db.execute(
+        delete(tree.root).where(tree.root_key == root_id).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    singleflight.invalidate(*tree.invalidates)
+    await tiered_cache.invalidate(*tree.invalidates)
+    if result.rowcount:
+        DELETED_ROWS.inc(result.rowcount, table=tree.root.__tablename__)
+    return result.rowcount > 0
+
+
+async def delete_in_batches(
+    sessions,
+    kind: str,
+    root_id: int,
+    batch_size: int = 1000,
+    pause_seconds: float = 0.0,
+    throttle: Optional[Throttle] = None,
+) -> None:
+    """Borrar el subárbol por lotes (un commit por lote) y después la raíz"""
+    async with sessions() as db:
+        for step in TREES[kind].steps:
+            while True:
+                if throttle is not None:
+                    await throttle.wait(db)
+                if not await delete_batch(db, step, root_id, batch_size):
+                    break
+                if pause_seconds:
+                    await asyncio.sleep(pause_seconds)
+        await delete_root(db, kind, root_id)
+    logger.info("Borrado por lotes de %s %s completado", kind, root_id)
+
+
+def schedule_delete(kind: str, root_id: int) -> asyncio.Task:
+    """Lanzar (o reutilizar, si ya está en curso) el borrado por lotes en segundo plano"""
+    job = (kind, root_id)
+    task = _running.get(job)
+    if task is not None:
+        return task
+
+    sessions = database.session_router.write_sessions
+    throttle = Throttle(
+        max_replication_lag=settings.BACKFILL_MAX_REPLICATION_LAG,
+        max_connection_usage=settings.BACKFILL_MAX_CONNECTION_USAGE,
+    )
+
+    async def run() -> None:
+        try:
+            await delete_in_batches(
+                sessions, kind, root_id, settings.DELETE_BATCH_SIZE, settings.DELETE_BATCH_PAUSE_SECONDS, throttle
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Falló el borrado por lotes de %s %s (repetir la petición lo reanuda)", kind, root_id)
+        finally:
+            _running.pop(job, None)
+
+    task = _running[job] = asyncio.create_task(run())
+    return task
+
+
+async def delete_tree(db: AsyncSession, kind: str, root_id: int) -> bool:
+    """
+    Borrar la raíz y su subárbol: en la petición si es pequeño, por lotes en segundo plano si no.
+    Devuelve True si el borrado queda programado en segundo plano.
+    """
+    if (kind, root_id) not in _running and await count_subtree(db, kind, root_id) <= settings.DELETE_SYNC_MAX_ROWS:
+        await delete_root(db, kind, root_id)
+        return False
+    # Cerrar la transacción de lectura antes de que el borrado empiece a tomar locks
+    await db.commit()
+    schedule_delete(kind, root_id)
+    return True
+
+
+async def wait_for_deletes() -> None:
+    """Esperar a los borrados en curso (tests y apagado ordenado)"""
+    if _running:
+        await asyncio.gather(*_running.values(), return_exceptions=True)
+
+
+async def stop(timeout: float) -> None:
+    """Al parar la app: esperar hasta `timeout` a los borrados en curso y cancelar los que queden"""
+    tasks = list(_running.values())
+    if not tasks:
+        return
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning("%s borrados por lotes sin terminar al parar (repetir la petición los reanuda)", len(pending))
+        await asyncio.gather(*pending, return_exceptions=True)
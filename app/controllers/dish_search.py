@@ -0,0 +1,260 @@
+from datetime import time
+from typing import Iterable, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, func, case, cast, type_coerce, and_, or_, not_, Integer, Text
+from sqlalchemy.dialects.postgresql import ARRAY
+from fastapi import HTTPException, status
+from app.models.dishes import Dish
+from app.models.menus import Menu
+from app.models.establishments import Establishment
+from app.models.categories import Category
+from app.models.dish_category import DishCategory
+from app.models.dish_allergen import DishAllergen
+from app.models.dish_search_documents import DishSearchDocument
+
+
+# ---------- MANTENIMIENTO INCREMENTAL ----------
+async def refresh_dish_documents(db: AsyncSession, dish_ids: Iterable[int]) -> None:
+    """Reconstruir los documentos de búsqueda de los platos indicados (sin hacer commit)"""
+    dish_ids = sorted(set(dish_ids))
+    if not dish_ids:
+        return
+
+    # Los cambios pendientes de la sesión deben ser visibles para las consultas de abajo
+    await db.flush()
+
+    dishes_result = await db.execute(
+        select(
+            Dish.dish_id,
+            Dish.menu_id,
+            Dish.name,
+            Dish.description,
+            Dish.price,
+            Dish.img,
+            Menu.establishment_id,
+            Establishment.name.label("establishment_name"),
+            Establishment.opening_hour,
+            Establishment.closing_hour,
+        )
+        .outerjoin(Menu, Menu.menu_id == Dish.menu_id)
+        .outerjoin(Establishment, Establishment.establishment_id == Menu.establishment_id)
+        .where(Dish.dish_id.in_(dish_ids))
+    )
+    dishes = dishes_result.all()
+
+    categories_result = await db.execute(
+        select(DishCategory.dish_id, Category.category_id, Category.name)
+        .join(Category, Category.category_id == DishCategory.category_id)
+        .where(DishCategory.dish_id.in_(dish_ids))
+    )
+    categories = {}
+    for dish_id, category_id, category_name in categories_result.all():
+        categories.setdefault(dish_id, []).append((category_id, category_name))
+
+    allergens_result = await db.execute(
+        select(DishAllergen.dish_id, DishAllergen.allergen_id)
+        .where(DishAllergen.dish_id.in_(dish_ids))
+    )
+    allergens = {}
+    for dish_id, allergen_id in allergens_result.all():
+        allergens.setdefault(dish_id, []).append(allergen_id)
+
+    documents = []
+    for dish in dishes:
+        dish_categories = categories.get(dish.dish_id, [])
+        text_parts = [dish.name, dish.description, dish.establishment_name]
+        text_parts.extend(name for _, name in dish_categories)
+        documents.append({
+            "dish_id": dish.dish_id,
+            "menu_id": dish.menu_id,
+            "establishment_id": dish.establishment_id,
+            "name": dish.name,
+            "description": dish.description,
+            "price": dish.price,
+            "img": dish.img,
+            "search_text": " ".join(part for part in text_parts if part).lower(),
+            "category_ids": [category_id for category_id, _ in dish_categories],
+            "allergen_ids": allergens.get(dish.dish_id, []),
+            "opening_hour": dish.opening_hour,
+            "closing_hour": dish.closing_hour,
+        })
+
+    # Reemplazar los documentos (los platos que ya no existen quedan sin documento)
+    await db.execute(delete(DishSearchDocument).where(DishSearchDocument.dish_id.in_(dish_ids)))
+    if documents:
+        await db.execute(insert(DishSearchDocument), documents)
+
+
+async def refresh_dish_document(db: AsyncSession, dish_id: int) -> None:
+    """Reconstruir el documento de búsqueda de un plato (sin hacer commit)"""
+    await refresh_dish_documents(db, [dish_id])
+
+
+async def delete_dish_document(db: AsyncSession, dish_id: int) -> None:
+    """Eliminar el documento de búsqueda de un plato (sin hacer commit)"""
+    await db.execute(delete(DishSearchDocument).where(DishSearchDocument.dish_id == dish_id))
+
+
+async def dish_ids_in_establishment(db: AsyncSession, establishment_id: int) -> List[int]:
+    """Platos de todos los menús de un establecimiento"""
+    result = await db.execute(
+        select(Dish.dish_id)
+        .join(Menu, Menu.menu_id == Dish.menu_id)
+        .where(Menu.establishment_id == establishment_id)
+    )
+    return list(result.scalars().all())
+
+
+async def dish_ids_in_category(db: AsyncSession, category_id: int) -> List[int]:
+    """Platos asociados a una categoría (leerlos antes de borrarla: el borrado se lleva los enlaces)"""
+    result = await db.execute(
+        select(DishCategory.dish_id).where(DishCategory.category_id == category_id)
+    )
+    return list(result.scalars().all())
+
+
+async def dish_ids_with_allergen(db: AsyncSession, allergen_id: int) -> List[int]:
+    """Platos asociados a un alérgeno (leerlos antes de borrarlo: el borrado se lleva los enlaces)"""
+    result = await db.execute(
+        select(DishAllergen.dish_id).where(DishAllergen.allergen_id == allergen_id)
+    )
+    return list(result.scalars().all())
+
+
+async def rebuild_dish_documents(db: AsyncSession, batch_size: int = 500) -> int:
+    """Reconstruir todos los documentos de búsqueda (carga inicial); devuelve los platos procesados"""
+    processed = 0
+    last_id = 0
+    while True:
+        result = await db.execute(
+            select(Dish.dish_id).where(Dish.dish_id > last_id).order_by(Dish.dish_id).limit(batch_size)
+        )
+        dish_ids = result.scalars().all()
+        if not dish_ids:
+            return processed
+        await refresh_dish_documents(db, dish_ids)
+        await db.commit()
+        processed += len(dish_ids)
+        last_id = dish_ids[-1]
+
+
+# ---------- BÚSQUEDA ----------
+def _has_any(column, ids: Iterable[int], dialect: str):
+    """La lista de IDs de `column` contiene alguno de `ids` (&& con índice GIN en PostgreSQL)"""
+    ids = sorted(set(ids))
+    if dialect == "postgresql":
+        return column.op("&&")(cast(ids, ARRAY(Integer)))
+    # Otros motores: texto ",1,4,"
+    text_column = type_coerce(column, Text)
+    return or_(*(text_column.contains(f",{i},") for i in ids))
+
+
+def _open_at_clause(open_at: time):
+    """Establecimientos abiertos a la hora indicada (incluye horarios que cruzan medianoche)"""
+    doc = DishSearchDocument
+    return or_(
+        and_(doc.opening_hour <= doc.closing_hour, doc.opening_hour <= open_at, doc.closing_hour >= open_at),
+        and_(doc.opening_hour > doc.closing_hour, or_(doc.opening_hour <= open_at, doc.closing_hour >= open_at)),
+    )
+
+
+async def search_dishes(
+    db: AsyncSession,
+    q: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    category_ids: Optional[List[int]] = None,
+    exclude_allergen_ids: Optional[List[int]] = None,
+    establishment_id: Optional[int] = None,
+    open_at: Optional[time] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> dict:
+    """Buscar platos combinando filtros; resultados ordenados por relevancia y paginados en una sola consulta"""
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El precio mínimo no puede ser mayor al precio máximo"
+        )
+
+    doc = DishSearchDocument
+    conditions = []
+
+    text = (q or "").strip().lower()
+    for term in text.split():
+        conditions.append(doc.search_text.contains(term, autoescape=True))
+    if min_price is not None:
+        conditions.append(doc.price >= min_price)
+    if max_price is not None:
+        conditions.append(doc.price <= max_price)
+    dialect = db.get_bind().dialect.name
+    if category_ids:
+        conditions.append(_has_any(doc.category_ids, category_ids, dialect))
+    if exclude_allergen_ids:
+        conditions.append(not_(_has_any(doc.allergen_ids, exclude_allergen_ids, dialect)))
+    if establishment_id is not None:
+        conditions.append(doc.establishment_id == establishment_id)
+    if open_at is not None:
+        conditions.append(_open_at_clause(open_at))
+
+    # Relevancia: coincidencia al inicio del nombre > dentro del nombre > resto del documento
+    if text:
+        name = func.lower(doc.name)
+        score = case(
+            (name.startswith(text, autoescape=True), 3),
+            (name.contains(text, autoescape=True), 2),
+            else_=1,
+        )
+        ordering = [score.desc(), doc.price, doc.dish_id]
+    else:
+        ordering = [doc.price, doc.dish_id]
+
+    query = (
+        select(
+            doc.dish_id,
+            doc.menu_id,
+            doc.establishment_id,
+            doc.name,
+            doc.description,
+            doc.price,
+            doc.img,
+            doc.category_ids,
+            doc.allergen_ids,
+            func.count().over().label("total"),
+        )
+        .where(*conditions)
+        .order_by(*ordering)
+        .limit(limit)
+        .offset(offset)
+    )
+    try:
+        result = await db.execute(query)
+        rows = result.all()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error en la búsqueda: {str(e)}"
+        )
+
+    items = [
+        {
+            "dish_id": row.dish_id,
+            "menu_id": row.menu_id,
+            "establishment_id": row.establishment_id,
+            "name": row.name,
+            "description": row.description,
+            "price": row.price,
+            "img": row.img,
+            "category_ids": row.category_ids,
+            "allergen_ids": row.allergen_ids,
+        }
+        for row in rows
+    ]
+    # El total viaja en cada fila (función de ventana); si la página está vacía se cuenta aparte
+    if rows:
+        total = rows[0].total
+    elif offset:
+        total = (await db.execute(select(func.count()).select_from(doc).where(*conditions))).scalar_one()
+    else:
+        total = 0
+    return {"items": items, "total": total, "limit": limit, "offset": offset}
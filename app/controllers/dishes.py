@@ -1,35 +1,60 @@
+from typing import List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import update, delete
 from fastapi import HTTPException, status
+from app import queries
 from app.models.dishes import Dish
 from app.models.dish_allergen import DishAllergen
 from app.models.allergens import Allergens
-from app.schemas.dishes import DishCreate, DishUpdate
+from app.models.menus import Menu
+from app.schemas.dishes import DishCreate, DishUpdate, DishOut
+from app.controllers.dish_search import delete_dish_document
+from app.controllers import existence, multi_get
+from app.config import settings
+from app.utils import singleflight
+from app.utils.tiered_cache import TieredCache
+from app import worker
+
+
+async def _publish(db: AsyncSession, event_type: str, menu_ids, data: dict) -> None:
+    """Encolar el evento en vivo para los establecimientos de los menús indicados (sin hacer commit)"""
+    result = await db.execute(select(Menu.establishment_id).where(Menu.menu_id.in_(menu_ids)).distinct())
+    for establishment_id in result.scalars().all():
+        worker.publish_later(db, establishment_id, event_type, data)
+
 
 # Obtener todos los platos
-async def get_all_dishes(db: AsyncSession):
+async def get_all_dishes(db: AsyncSession, fields: Optional[Tuple[str, ...]] = None):
     """Obtener lista de todos los platos"""
     try:
-        query = select(Dish)
-        result = await db.execute(query)
-        dishes = result.scalars().all()
-        return dishes
+        return queries.as_dicts(await db.execute(queries.narrow(queries.DISHES_ROWS, fields)))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener platos: {str(e)}"
         )
 
+# Obtener varios platos por ID (una sola consulta)
+async def get_dishes_by_ids(db: AsyncSession, ids: List[int], fields: Optional[Tuple[str, ...]] = None):
+    """Platos de una lista de IDs, en ese orden, y los IDs que no existen"""
+    return await multi_get.get_many(db, queries.narrow(queries.DISHES_BY_IDS, fields), "dish_id", ids)
+
 # Obtener un plato por ID
 async def get_dish_by_id(db: AsyncSession, dish_id: int):
     """Obtener un plato específico por su ID"""
+    # IDs que seguro no existen (filtro de Bloom o 404 reciente): sin consulta
+    if not existence.dishes.might_exist(dish_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Plato con ID {dish_id} no encontrado"
+        )
     try:
-        query = select(Dish).where(Dish.dish_id == dish_id)
-        result = await db.execute(query)
+        result = await db.execute(queries.DISH_BY_ID, {"dish_id": dish_id})
         dish = result.scalar_one_or_none()
 
         if not dish:
+            existence.dishes.remember_missing(dish_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Plato con ID {dish_id} no encontrado"
@@ -43,6 +68,13 @@ async def get_dish_by_id(db: AsyncSession, dish_id: int):
             detail=f"Error al obtener plato: {str(e)}"
         )
 
+# Caché de dos niveles (L1 por worker, L2 compartida) de GET /platos/{id}
+DISH_CACHE = TieredCache("dishes", get_dish_by_id, DishOut)
+
+async def get_dish_by_id_cached(db: AsyncSession, dish_id: int):
+    """Obtener un plato por su ID pasando por la caché"""
+    return await DISH_CACHE.get(dish_id, db)
+
 # Crear un nuevo plato
 async def create_dish(db: AsyncSession, dish_data: DishCreate):
     """Crear un nuevo plato en la base de datos"""
@@ -63,8 +95,14 @@ async def create_dish(db: AsyncSession, dish_data: DishCreate):
         )
         
         db.add(new_dish)
+        await db.flush()
+        # El documento de búsqueda se genera en segundo plano
+        worker.refresh_dish_search_later(db, [new_dish.dish_id])
+        await _publish(db, "dish.created", [new_dish.menu_id], DishOut.model_validate(new_dish).model_dump(mode="json"))
         await db.commit()
         await db.refresh(new_dish)
+        singleflight.invalidate("dishes")
+        await existence.track_created(existence.dishes, new_dish.dish_id)
         return new_dish
         
     except HTTPException:
@@ -81,8 +119,7 @@ async def update_dish(db: AsyncSession, dish_id: int, dish_data: DishUpdate):
     """Actualizar un plato existente"""
     try:
         # Verificar si el plato existe
-        query_exists = select(Dish).where(Dish.dish_id == dish_id)
-        result_exists = await db.execute(query_exists)
+        result_exists = await db.execute(queries.DISH_BY_ID, {"dish_id": dish_id})
         existing_dish = result_exists.scalar_one_or_none()
         
         if not existing_dish:
@@ -111,6 +148,8 @@ async def update_dish(db: AsyncSession, dish_id: int, dish_data: DishUpdate):
         if dish_data.img is not None:
             update_data['img'] = dish_data.img
 
+        previous_menu_id = existing_dish.menu_id
+
         # Ejecutar actualización
         query = (
             update(Dish)
@@ -119,12 +158,20 @@ async def update_dish(db: AsyncSession, dish_id: int, dish_data: DishUpdate):
             .execution_options(synchronize_session="fetch")
         )
         await db.execute(query)
-        await db.commit()
+        # El documento de búsqueda se regenera en segundo plano
+        worker.refresh_dish_search_later(db, [dish_id])
 
         # Obtener el plato actualizado
-        query_updated = select(Dish).where(Dish.dish_id == dish_id)
-        result_updated = await db.execute(query_updated)
+        result_updated = await db.execute(queries.DISH_BY_ID, {"dish_id": dish_id})
         updated_dish = result_updated.scalar_one()
+        # Si cambia de menú, también se entera el establecimiento de antes
+        await _publish(
+            db, "dish.updated", {previous_menu_id, updated_dish.menu_id},
+            DishOut.model_validate(updated_dish).model_dump(mode="json"),
+        )
+        await db.commit()
+        singleflight.invalidate("dishes")
+        await DISH_CACHE.invalidate(dish_id)
         
         return updated_dish
         
@@ -142,8 +189,7 @@ async def delete_dish(db: AsyncSession, dish_id: int):
     """Eliminar un plato de la base de datos"""
     try:
         # Verificar si el plato existe
-        query_exists = select(Dish).where(Dish.dish_id == dish_id)
-        result_exists = await db.execute(query_exists)
+        result_exists = await db.execute(queries.DISH_BY_ID, {"dish_id": dish_id})
         existing_dish = result_exists.scalar_one_or_none()
         
         if not existing_dish:
@@ -152,10 +198,14 @@ async def delete_dish(db: AsyncSession, dish_id: int):
                 detail=f"Plato con ID {dish_id} no encontrado"
             )
 
-        # Eliminar el plato
+        # Eliminar el plato (y su documento de búsqueda)
+        await delete_dish_document(db, dish_id)
         query = delete(Dish).where(Dish.dish_id == dish_id)
         await db.execute(query)
+        await _publish(db, "dish.deleted", [existing_dish.menu_id], {"dish_id": dish_id, "menu_id": existing_dish.menu_id})
         await db.commit()
+        singleflight.invalidate("dishes")
+        await DISH_CACHE.invalidate(dish_id)
 
         return {"msg": f"Plato con ID {dish_id} eliminado correctamente"}
         
@@ -172,8 +222,7 @@ async def delete_dish(db: AsyncSession, dish_id: int):
 async def get_dishes_by_menu(db: AsyncSession, menu_id: int):
     """Obtener todos los platos de un menú específico"""
     try:
-        query = select(Dish).where(Dish.menu_id == menu_id)
-        result = await db.execute(query)
+        result = await db.execute(queries.DISHES_BY_MENU, {"menu_id": menu_id})
         dishes = result.scalars().all()
         return dishes
     except Exception as e:
@@ -182,6 +231,11 @@ async def get_dishes_by_menu(db: AsyncSession, menu_id: int):
             detail=f"Error al obtener platos del menú: {str(e)}"
         )
 
+# Lectura compartida entre peticiones concurrentes (GET /platos/menu/{id})
+get_dishes_by_menu_shared = singleflight.coalesce(
+    get_dishes_by_menu, List[DishOut], "dishes", settings.SINGLEFLIGHT_GRACE_SECONDS
+)
+
 # Obtener platos con precio mayor a (ejemplo con filtro)
 async def get_dishes_price_gt(db: AsyncSession, min_price: float):
     """Obtener platos con precio mayor al especificado"""
@@ -202,8 +256,7 @@ async def get_allergens_by_dish(db: AsyncSession, dish_id: int):
     """Obtener todos los alérgenos de un plato específico"""
     try:
         # Verificar que el plato existe
-        dish_query = select(Dish).where(Dish.dish_id == dish_id)
-        dish_result = await db.execute(dish_query)
+        dish_result = await db.execute(queries.DISH_BY_ID, {"dish_id": dish_id})
         dish = dish_result.scalar_one_or_none()
         
         if not dish:
@@ -235,8 +288,7 @@ async def add_allergen_to_dish(db: AsyncSession, dish_id: int, allergen_id: int)
     """Asociar un alérgeno a un plato"""
     try:
         # Verificar que el plato existe
-        dish_query = select(Dish).where(Dish.dish_id == dish_id)
-        dish_result = await db.execute(dish_query)
+        dish_result = await db.execute(queries.DISH_BY_ID, {"dish_id": dish_id})
         dish = dish_result.scalar_one_or_none()
         
         if not dish:
@@ -246,8 +298,7 @@ async def add_allergen_to_dish(db: AsyncSession, dish_id: int, allergen_id: int)
             )
         
         # Verificar que el alérgeno existe
-        allergen_query = select(Allergens).where(Allergens.allergen_id == allergen_id)
-        allergen_result = await db.execute(allergen_query)
+        allergen_result = await db.execute(queries.ALLERGEN_BY_ID, {"allergen_id": allergen_id})
         allergen = allergen_result.scalar_one_or_none()
         
         if not allergen:
@@ -273,6 +324,7 @@ async def add_allergen_to_dish(db: AsyncSession, dish_id: int, allergen_id: int)
         # Crear la asociación
         dish_allergen = DishAllergen(dish_id=dish_id, allergen_id=allergen_id)
         db.add(dish_allergen)
+        worker.refresh_dish_search_later(db, [dish_id])
         await db.commit()
         return True
     except HTTPException:
@@ -303,6 +355,7 @@ async def remove_allergen_from_dish(db: AsyncSession, dish_id: int, allergen_id:
             )
         
         await db.delete(dish_allergen)
+        worker.refresh_dish_search_later(db, [dish_id])
         await db.commit()
         return True
     except HTTPException:
@@ -1,9 +1,17 @@
-from typing import Optional, Sequence
+from typing import List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import update
 from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from app import queries
+from app.config import settings
 from app.models.establishments import Establishment
-from app.schemas.establishment import EstablishmentCreate, EstablishmentUpdate
+from app.schemas.establishment import EstablishmentCreate, EstablishmentUpdate, EstablishmentOut
+from app.controllers.dish_search import dish_ids_in_establishment
+from app.controllers import deletion, existence, leaderboard, multi_get
+from app.utils import singleflight
+from app.utils.tiered_cache import TieredCache
+from app import worker
 
 
 # ---------- CREAR ----------
@@ -13,23 +21,46 @@ async def create_establishment(db: AsyncSession, data: EstablishmentCreate) -> E
     await db.flush()       # asigna ID
     await db.refresh(est)  # trae valores por defecto
     await db.commit()
+    leaderboard.track_points(est.establishment_id, est.sustainability_points)
+    await existence.track_created(existence.establishments, est.establishment_id)
     return est
 
 
 # ---------- LEER ----------
 async def get_establishment_by_id(db: AsyncSession, establishment_id: int) -> Establishment:
-    query = select(Establishment).where(Establishment.establishment_id == establishment_id)
-    result = await db.execute(query)
+    # IDs que seguro no existen (filtro de Bloom o 404 reciente): sin consulta
+    if not existence.establishments.might_exist(establishment_id):
+        raise HTTPException(status_code=404, detail="Establishment not found")
+    result = await db.execute(queries.ESTABLISHMENT_BY_ID, {"establishment_id": establishment_id})
     establishment = result.scalar_one_or_none()
     if not establishment:
+        existence.establishments.remember_missing(establishment_id)
         raise HTTPException(status_code=404, detail="Establishment not found")
     return establishment
 
 
-async def get_establishments(db: AsyncSession) -> Sequence[Establishment]:
-    query = select(Establishment)
-    result = await db.execute(query)
-    return result.scalars().all()
+# Lectura compartida entre peticiones concurrentes (GET /establishments/{id})
+get_establishment_by_id_shared = singleflight.coalesce(
+    get_establishment_by_id, EstablishmentOut, "establishments", settings.SINGLEFLIGHT_GRACE_SECONDS
+)
+
+# Caché de dos niveles (L1 por worker, L2 compartida) por encima de la lectura compartida
+ESTABLISHMENT_CACHE = TieredCache("establishments", get_establishment_by_id_shared, EstablishmentOut)
+
+
+async def get_establishment_by_id_cached(db: AsyncSession, establishment_id: int) -> EstablishmentOut:
+    return await ESTABLISHMENT_CACHE.get(establishment_id, db)
+
+
+async def get_establishments(db: AsyncSession, fields: Optional[Tuple[str, ...]] = None) -> List[dict]:
+    return queries.as_dicts(await db.execute(queries.narrow(queries.ESTABLISHMENTS_ROWS, fields)))
+
+
+async def get_establishments_by_ids(
+    db: AsyncSession, ids: List[int], fields: Optional[Tuple[str, ...]] = None
+) -> dict:
+    """Establecimientos de una lista de IDs, en ese orden, y los IDs que no existen"""
+    return await multi_get.get_many(db, queries.narrow(queries.ESTABLISHMENTS_BY_IDS, fields), "establishment_id", ids)
 
 
 # ---------- ACTUALIZAR ----------
@@ -50,7 +81,14 @@ async def update_establishment(
         .execution_options(synchronize_session="fetch")
     )
     await db.execute(query)
+    # Nombre y horario del establecimiento están copiados en los documentos de búsqueda (en segundo plano)
+    if payload.keys() & {"name", "opening_hour", "closing_hour"}:
+        worker.refresh_dish_search_later(db, await dish_ids_in_establishment(db, establishment_id))
     await db.commit()
+    singleflight.invalidate("establishments")
+    await ESTABLISHMENT_CACHE.invalidate(establishment_id)
+    if "sustainability_points" in payload:
+        leaderboard.track_points(establishment_id, payload["sustainability_points"])
     return await get_establishment_by_id(db, establishment_id)
 
 
@@ -59,7 +97,9 @@ async def delete_establishment(db: AsyncSession, establishment_id: int) -> dict:
     # Verificar que exista
     await get_establishment_by_id(db, establishment_id)
     
-    query = delete(Establishment).where(Establishment.establishment_id == establishment_id)
-    await db.execute(query)
-    await db.commit()
+    # Menús, platos, reservas y reseñas se borran en cascada (por lotes si son muchos)
+    scheduled = await deletion.delete_tree(db, "establishment", establishment_id)
+    leaderboard.track_establishment_deleted(establishment_id)
+    if scheduled:
+        return JSONResponse(status_code=202, content={"message": "Establishment deletion scheduled"})
     return {"message": "Establishment deleted successfully"}
@@ -0,0 +1,179 @@
+"""
+Filtros de existencia: responder a IDs y emails que no existen sin ir a la base de datos.
+
+Cada filtro combina:
+- un filtro de Bloom con todas las claves vivas, cargado al arrancar y recargado cada
+  EXISTENCE_FILTER_REFRESH_SECONDS, al que se añade cada alta. Si dice que no, la clave no existe;
+- una caché negativa con TTL corto de los 404 ya confirmados por la base de datos (también
+  cubre los falsos positivos del Bloom y las claves borradas, que el Bloom no puede quitar).
+
+Las altas se publican en el hub de eventos (canal "existence"), así los demás workers las
+añaden a sus filtros y olvidan sus 404. Un filtro solo responde "no existe" a claves cuyas
+altas en otros procesos le llegan:
+- IDs autoincrementales: todo ID mayor que el máximo de la última carga va a la base de
+  datos (sin Bloom ni caché negativa), aunque el evento de su alta aún no haya llegado;
+- emails: solo con EVENTS_BACKEND=postgres (con "local" no se enteraría de las altas de otros
+  workers). Un alta protegida por UNIQUE puede usarlo siempre (`allow_stale=True`): si se
+  equivoca, la restricción la frena.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database
+from app.config import settings
+from app.models.dishes import Dish
+from app.models.establishments import Establishment
+from app.models.users import User
+from app.utils import events, metrics
+from app.utils.bloom import BloomFilter
+
+logger = logging.getLogger("app.existence")
+
+CHANNEL = "existence"
+
+CHECKS = metrics.counter(
+    "existence_checks_total",
+    "Consultas a los filtros de existencia (bloom / negative = respondidas sin base de datos, database = pasan)",
+    ["filter", "result"],
+)
+
+# Margen sobre el número de claves al cargar: las altas hasta la siguiente recarga no disparan los falsos positivos
+CAPACITY_FACTOR = 2
+MIN_CAPACITY = 1024
+
+
+class ExistenceFilter:
+    def __init__(self, name: str, keys: Select, ordered: bool = False):
+        self.name = name
+        self.keys = keys
+        # Claves autoincrementales: las mayores que high_water no estaban en la última carga
+        self.ordered = ordered
+        self.bloom: Optional[BloomFilter] = None
+        self.high_water = None
+        # clave -> caduca, en orden LRU
+        self._missing: "OrderedDict[Hashable, float]" = OrderedDict()
+        # Altas mientras se recarga: se añaden también al filtro nuevo
+        self._added_while_loading: Optional[List[Hashable]] = None
+
+    def _sees_every_insert(self, key: Hashable) -> bool:
+        """Si un alta de esta clave en otro proceso ya estaría en el filtro (o no hay filtro cargado)"""
+        if self.ordered:
+            return self.high_water is None or key <= self.high_water
+        return settings.EVENTS_BACKEND == "postgres"
+
+    def might_exist(self, key: Hashable, allow_stale: bool = False) -> bool:
+        """False si seguro que no existe; True si hay que preguntar a la base de datos.
+
+        allow_stale=True acepta un "no existe" que aún no vea un alta de otro proceso.
+        """
+        if not (allow_stale or self._sees_every_insert(key)):
+            CHECKS.inc(filter=self.name, result="database")
+            return True
+        expires = self._missing.get(key)
+        if expires is not None:
+            if expires > time.monotonic():
+                CHECKS.inc(filter=self.name, result="negative")
+                return False
+            del self._missing[key]
+        bloom = self.bloom
+        if bloom is not None and key not in bloom:
+            CHECKS.inc(filter=self.name, result="bloom")
+            return False
+        CHECKS.inc(filter=self.name, result="database")
+        return True
+
+    def remember_missing(self, key: Hashable) -> None:
+        """La base de datos confirmó que no existe: no volver a preguntar durante el TTL"""
+        if settings.EXISTENCE_NEGATIVE_TTL_SECONDS <= 0 or not self._sees_every_insert(key):
+            return
+        self._missing[key] = time.monotonic() + settings.EXISTENCE_NEGATIVE_TTL_SECONDS
+        self._missing.move_to_end(key)
+        while len(self._missing) > settings.EXISTENCE_NEGATIVE_MAX_ENTRIES:
+            self._missing.popitem(last=False)
+
+    def add(self, key: Hashable) -> None:
+        self._missing.pop(key, None)
+        if self.bloom is not None:
+            self.bloom.add(key)
+        if self._added_while_loading is not None:
+            self._added_while_loading.append(key)
+
+    async def load(self, db: AsyncSession) -> None:
+        """Sustituir el filtro por uno nuevo con todas las claves actuales"""
+        self._added_while_loading = []
+        try:
+            keys = (await db.execute(self.keys)).scalars().all()
+            bloom = BloomFilter(
+                max(len(keys) * CAPACITY_FACTOR, MIN_CAPACITY), settings.EXISTENCE_FILTER_ERROR_RATE, keys
+            )
+            for key in self._added_while_loading:
+                bloom.add(key)
+            if self.ordered:
+                self.high_water = max(keys, default=0)
+            self.bloom = bloom
+        finally:
+            self._added_while_loading = None
+
+    def reset(self) -> None:
+        self.bloom = None
+        self.high_water = None
+        self._missing.clear()
+
+
+dishes = ExistenceFilter("dishes", select(Dish.dish_id), ordered=True)
+establishments = ExistenceFilter("establishments", select(Establishment.establishment_id), ordered=True)
+user_emails = ExistenceFilter("user_emails", select(User.email))
+
+FILTERS: Dict[str, ExistenceFilter] = {f.name: f for f in (dishes, establishments, user_emails)}
+
+metrics.gauge(
+    "existence_filter_keys", "Claves cargadas en cada filtro de existencia", ["filter"],
+    function=lambda: {(name,): len(f.bloom) for name, f in FILTERS.items() if f.bloom is not None},
+)
+
+
+async def rebuild(db: AsyncSession) -> None:
+    for existence_filter in FILTERS.values():
+        await existence_filter.load(db)
+    logger.info(
+        "Filtros de existencia cargados: %s",
+        ", ".join(f"{name}={len(f.bloom)}" for name, f in FILTERS.items()),
+    )
+
+
+async def run_refresh_loop(interval: float) -> None:
+    """Carga al arrancar y recarga periódica desde el primario (quita las claves borradas)"""
+    while True:
+        try:
+            async with database.session_router.write_sessions() as session:
+                await rebuild(session)
+        except Exception:
+            logger.exception("No se pudieron cargar los filtros de existencia")
+        await asyncio.sleep(interval)
+
+
+def reset() -> None:
+    for existence_filter in FILTERS.values():
+        existence_filter.reset()
+
+
+# ---------- ALTAS (tras el commit) ----------
+def _on_event(event: dict) -> None:
+    existence_filter = FILTERS.get(event["type"].removeprefix(f"{CHANNEL}."))
+    if existence_filter is not None:
+        existence_filter.add(event["data"])
+
+
+events.hub.add_listener(CHANNEL, _on_event)
+
+
+async def track_created(existence_filter: ExistenceFilter, key: Hashable) -> None:
+    """Añadir el alta a este worker ya mismo y avisar a los demás"""
+    existence_filter.add(key)
+    await events.hub.publish(CHANNEL, f"{CHANNEL}.{existence_filter.name}", key)
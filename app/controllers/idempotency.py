@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.idempotency_keys import IdempotencyKey
+from app.utils import metrics
+
+logger = logging.getLogger("app.idempotency")
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+IDEMPOTENT_REQUESTS = metrics.counter(
+    "idempotency_requests_total",
+    "Peticiones con Idempotency-Key según el resultado (new, replayed, conflict, mismatch)",
+    ["scope", "result"],
+)
+
+# Un lock por (endpoint, usuario, clave): los duplicados concurrentes del mismo worker esperan
+# a la petición original y repiten su respuesta
+_locks: Dict[Tuple[str, int, str], asyncio.Lock] = {}
+_waiters: Dict[Tuple[str, int, str], int] = {}
+
+
+@asynccontextmanager
+async def _key_lock(lock_key: Tuple[str, int, str]):
+    lock = _locks.setdefault(lock_key, asyncio.Lock())
+    _waiters[lock_key] = _waiters.get(lock_key, 0) + 1
+    try:
+        async with lock:
+            yield
+    finally:
+        _waiters[lock_key] -= 1
+        if not _waiters[lock_key]:
+            del _waiters[lock_key]
+            del _locks[lock_key]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite devuelve las fechas sin zona horaria
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def request_fingerprint(payload: BaseModel) -> str:
+    body = json.dumps(payload.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def _key_filter(scope: str, user_id: int, key: str):
+    return (
+        IdempotencyKey.scope == scope,
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+    )
+
+
+async def _store_response(
+    db: AsyncSession, scope: str, user_id: int, key: str, reserved_at: datetime, status_code: int, content: Any
+) -> None:
+    # Solo si la reserva sigue siendo la nuestra (otro reintento pudo quedársela al vencer el plazo)
+    await db.execute(
+        update(IdempotencyKey)
+        .where(*_key_filter(scope, user_id, key), IdempotencyKey.created_at == reserved_at)
+        .values(status_code=status_code, response_body=json.dumps(content))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+def _replay(row: IdempotencyKey) -> JSONResponse:
+    return JSONResponse(
+        status_code=row.status_code,
+        content=json.loads(row.response_body),
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+async def run_idempotent(
+    db: AsyncSession,
+    scope: str,
+    key: Optional[str],
+    user_id: int,
+    payload: BaseModel,
+    create: Callable[[], Awaitable[Any]],
+    response_model: Type[BaseModel],
+    status_code: int = 201,
+):
+    """
+    Ejecutar `create` una sola vez por (scope, usuario, Idempotency-Key): los reintentos
+    reciben la respuesta guardada (también los errores 4xx) con la cabecera Idempotent-Replayed.
+    Sin clave se ejecuta `create` sin más.
+
+    Mientras la petición original está en curso los reintentos reciben 409, pero solo durante
+    IDEMPOTENCY_LEASE_SECONDS desde que reservó la clave: si el proceso cayó sin guardar la
+    respuesta, pasado ese plazo el siguiente reintento se queda con la clave y la ejecuta.
+    """
+    if key is None:
+        return await create()
+
+    fingerprint = request_fingerprint(payload)
+    async with _key_lock((scope, user_id, key)):
+        result = await db.execute(
+            select(IdempotencyKey).where(*_key_filter(scope, user_id, key), IdempotencyKey.expires_at > _now())
+        )
+        row = result.scalar_one_or_none()
+        if row is not None:
+            if row.request_hash != fingerprint:
+                IDEMPOTENT_REQUESTS.inc(scope=scope, result="mismatch")
+                raise HTTPException(
+                    status_code=422, detail="Idempotency-Key already used with a different request body"
+                )
+            if row.status_code is not None:
+                IDEMPOTENT_REQUESTS.inc(scope=scope, result="replayed")
+                return _replay(row)
+            lease_left = settings.IDEMPOTENCY_LEASE_SECONDS - (_now() - _aware(row.created_at)).total_seconds()
+            if lease_left > 0:
+                # La petición original sigue en curso en otro worker
+                IDEMPOTENT_REQUESTS.inc(scope=scope, result="conflict")
+                raise HTTPException(
+                    status_code=409, detail="A request with this Idempotency-Key is in progress",
+                    headers={"Retry-After": str(math.ceil(lease_left))},
+                )
+            logger.warning("Idempotency-Key %s/%s sin respuesta tras el plazo: se vuelve a ejecutar", scope, key)
+
+        # Reservar la clave antes de hacer el trabajo (sustituye a una entrada caducada o abandonada;
+        # si otro reintento acaba de reservarla, no se borra y el INSERT falla con 409)
+        now = _now()
+        replaceable = or_(
+            IdempotencyKey.expires_at <= now,
+            and_(
+                IdempotencyKey.status_code.is_(None),
+                IdempotencyKey.created_at <= now - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+            ),
+        )
+        await db.execute(
+            delete(IdempotencyKey)
+            .where(*_key_filter(scope, user_id, key), replaceable)
+            .execution_options(synchronize_session="fetch")
+        )
+        db.add(IdempotencyKey(
+            scope=scope, user_id=user_id, key=key, request_hash=fingerprint,
+            created_at=now, expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+        ))
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            IDEMPOTENT_REQUESTS.inc(scope=scope, result="conflict")
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+        IDEMPOTENT_REQUESTS.inc(scope=scope, result="new")
+
+        try:
+            created = await create()
+        except HTTPException as exc:
+            # Los errores del cliente se guardan y se repiten igual que las respuestas correctas
+            await db.rollback()
+            if exc.status_code < 500:
+                await _store_response(db, scope, user_id, key, now, exc.status_code, {"detail": exc.detail})
+            else:
+                await _release_key(db, scope, user_id, key, now)
+            raise
+        except Exception:
+            await db.rollback()
+            await _release_key(db, scope, user_id, key, now)
+            raise
+
+        content = response_model.model_validate(created).model_dump(mode="json")
+        await _store_response(db, scope, user_id, key, now, status_code, content)
+        return JSONResponse(status_code=status_code, content=content)
+
+
+async def _release_key(db: AsyncSession, scope: str, user_id: int, key: str, reserved_at: datetime) -> None:
+    """Liberar la clave tras un fallo inesperado: el reintento debe poder ejecutarse"""
+    await db.execute(
+        delete(IdempotencyKey)
+        .where(*_key_filter(scope, user_id, key), IdempotencyKey.created_at == reserved_at)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+async def purge_expired_keys(db: AsyncSession) -> int:
+    """Borrar las claves caducadas; devuelve cuántas"""
+    result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= _now()))
+    await db.commit()
+    return result.rowcount
+
+
+async def run_purge_loop(interval: float = 3600.0) -> None:
+    while True:
+        try:
+            async with SessionLocal() as db:
+                await purge_expired_keys(db)
+        except Exception:
+            logger.exception("No se pudieron borrar las Idempotency-Key caducadas")
+        await asyncio.sleep(interval)
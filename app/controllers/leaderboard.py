@@ -0,0 +1,193 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database, queries
+from app.models.establishment_category import EstablishmentCategory
+from app.models.establishments import Establishment
+from app.utils import metrics
+from app.utils.leaderboard import Leaderboard
+
+logger = logging.getLogger("app.leaderboard")
+
+
+class SustainabilityRanking:
+    """Ranking global de puntos de sostenibilidad y uno por categoría de establecimiento"""
+
+    def __init__(self, points: Dict[int, int], categories: Iterable[Tuple[int, int]] = ()):
+        self.global_board = Leaderboard(points.items())
+        self.by_category: Dict[int, Leaderboard] = {}
+        self.categories_of: Dict[int, Set[int]] = {}
+        for establishment_id, category_id in categories:
+            if establishment_id in points:
+                self.add_category(establishment_id, category_id)
+
+    def board(self, category_id: Optional[int] = None) -> Leaderboard:
+        if category_id is None:
+            return self.global_board
+        return self.by_category.get(category_id) or Leaderboard()
+
+    def set_points(self, establishment_id: int, points: int) -> None:
+        self.global_board.update(establishment_id, points)
+        for category_id in self.categories_of.get(establishment_id, ()):
+            self.by_category[category_id].update(establishment_id, points)
+
+    def add_category(self, establishment_id: int, category_id: int) -> None:
+        points = self.global_board.points(establishment_id)
+        if points is None:
+            return
+        self.categories_of.setdefault(establishment_id, set()).add(category_id)
+        self.by_category.setdefault(category_id, Leaderboard()).update(establishment_id, points)
+
+    def remove_category(self, establishment_id: int, category_id: int) -> None:
+        self.categories_of.get(establishment_id, set()).discard(category_id)
+        board = self.by_category.get(category_id)
+        if board is not None:
+            board.remove(establishment_id)
+
+    def drop_category(self, category_id: int) -> None:
+        self.by_category.pop(category_id, None)
+        for categories in self.categories_of.values():
+            categories.discard(category_id)
+
+    def remove(self, establishment_id: int) -> None:
+        self.global_board.remove(establishment_id)
+        for category_id in self.categories_of.pop(establishment_id, ()):
+            self.by_category[category_id].remove(establishment_id)
+
+
+_ranking: Optional[SustainabilityRanking] = None
+_lock = asyncio.Lock()
+
+
+def _board_sizes() -> dict:
+    if _ranking is None:
+        return {}
+    sizes = {("global",): len(_ranking.global_board)}
+    sizes.update({(f"category:{category_id}",): len(board) for category_id, board in _ranking.by_category.items()})
+    return sizes
+
+
+metrics.gauge("leaderboard_entries", "Establecimientos en cada ranking de sostenibilidad", ["board"], function=_board_sizes)
+
+
+def _points(value: Optional[int]) -> int:
+    return value if value is not None else 0
+
+
+async def rebuild(db: AsyncSession) -> SustainabilityRanking:
+    """Cargar los puntos y las categorías de todos los establecimientos y sustituir el ranking"""
+    global _ranking
+    points = {
+        establishment_id: _points(value)
+        for establishment_id, value in (await db.execute(
+            select(Establishment.establishment_id, Establishment.sustainability_points)
+        )).all()
+    }
+    categories = (await db.execute(
+        select(EstablishmentCategory.establishment_id, EstablishmentCategory.category_id)
+    )).all()
+    _ranking = SustainabilityRanking(points, categories)
+    logger.info("Ranking de sostenibilidad: %s establecimientos, %s categorías", len(points), len(_ranking.by_category))
+    return _ranking
+
+
+async def get_ranking(db: AsyncSession) -> SustainabilityRanking:
+    """Ranking vigente; si aún no existe se carga (una sola vez aunque lleguen varias peticiones)"""
+    if _ranking is not None:
+        return _ranking
+    async with _lock:
+        if _ranking is None:
+            await rebuild(db)
+    return _ranking
+
+
+async def run_refresh_loop(interval: float) -> None:
+    """Carga al arrancar y recarga periódica desde el primario (corrige cambios hechos por otros procesos)"""
+    while True:
+        try:
+            async with database.session_router.write_sessions() as session:
+                await rebuild(session)
+        except Exception:
+            logger.exception("No se pudo reconstruir el ranking de sostenibilidad")
+        await asyncio.sleep(interval)
+
+
+def reset() -> None:
+    global _ranking
+    _ranking = None
+
+
+# ---------- CAMBIOS (tras el commit; si el ranking aún no está cargado no hay nada que actualizar) ----------
+def track_points(establishment_id: int, points: Optional[int]) -> None:
+    if _ranking is not None:
+        _ranking.set_points(establishment_id, _points(points))
+
+
+def track_category_added(establishment_id: int, category_id: int) -> None:
+    if _ranking is not None:
+        _ranking.add_category(establishment_id, category_id)
+
+
+def track_category_removed(establishment_id: int, category_id: int) -> None:
+    if _ranking is not None:
+        _ranking.remove_category(establishment_id, category_id)
+
+
+def track_category_deleted(category_id: int) -> None:
+    if _ranking is not None:
+        _ranking.drop_category(category_id)
+
+
+def track_establishment_deleted(establishment_id: int) -> None:
+    if _ranking is not None:
+        _ranking.remove(establishment_id)
+
+
+# ---------- LEER ----------
+async def _check_category(db: AsyncSession, category_id: Optional[int]) -> None:
+    if category_id is None:
+        return
+    if (await db.execute(queries.CATEGORY_BY_ID, {"category_id": category_id})).scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+
+
+async def get_leaderboard(
+    db: AsyncSession, limit: int = 20, offset: int = 0, category_id: Optional[int] = None
+) -> dict:
+    await _check_category(db, category_id)
+    board = (await get_ranking(db)).board(category_id)
+    entries = board.top(limit, offset)
+    names = {}
+    if entries:
+        names = dict((await db.execute(
+            select(Establishment.establishment_id, Establishment.name)
+            .where(Establishment.establishment_id.in_([key for _, key, _ in entries]))
+        )).all())
+    return {
+        "category_id": category_id,
+        "total": len(board),
+        "items": [
+            {"rank": rank, "establishment_id": key, "name": names.get(key, ""), "sustainability_points": points}
+            for rank, key, points in entries
+        ],
+    }
+
+
+async def get_establishment_rank(db: AsyncSession, establishment_id: int, category_id: Optional[int] = None) -> dict:
+    await _check_category(db, category_id)
+    board = (await get_ranking(db)).board(category_id)
+    rank = board.rank(establishment_id)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="Establishment not ranked")
+    return {
+        "establishment_id": establishment_id,
+        "category_id": category_id,
+        "rank": rank,
+        "total": len(board),
+        "sustainability_points": board.points(establishment_id),
+    }
@@ -0,0 +1,18 @@
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.controllers.establishment import get_establishment_by_id
+from app.utils import events
+
+
+async def stream_establishment_events(db: AsyncSession, establishment_id: int) -> StreamingResponse:
+    """Reservas, menús y platos del establecimiento en vivo (text/event-stream)"""
+    await get_establishment_by_id(db, establishment_id)
+    # El stream puede durar horas: la sesión no debe retener una conexión del pool
+    await db.close()
+    return StreamingResponse(
+        events.sse_stream(events.establishment_channel(establishment_id), settings.EVENTS_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,20 +1,25 @@
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update
 from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from app import queries
+from app.config import settings
 from app.models.menus import Menu
-from app.models.establishments import Establishment
 from app.models.dishes import Dish
 from app.models.dish_category import DishCategory
 from app.schemas.menus import MenuCreate, MenuUpdate, MenuOut
+from app.schemas.dishes import DishOut
+from app.controllers import deletion
+from app.utils import singleflight
+from app import worker
 
 
 # ---------- CREAR ----------
 async def create_menu_controller(db: AsyncSession, data: MenuCreate, establishment_id: int) -> Menu:
     """Crear un nuevo menú para un establecimiento"""
     # Verificar que el establecimiento existe
-    query = select(Establishment).where(Establishment.establishment_id == establishment_id)
-    result = await db.execute(query)
+    result = await db.execute(queries.ESTABLISHMENT_BY_ID, {"establishment_id": establishment_id})
     establishment = result.scalar_one_or_none()
     
     if not establishment:
@@ -26,23 +31,24 @@ async def create_menu_controller(db: AsyncSession, data: MenuCreate, establishme
         establishment_id=establishment_id
     )
     db.add(menu)
+    await db.flush()
+    worker.publish_later(db, establishment_id, "menu.created", MenuOut.model_validate(menu).model_dump(mode="json"))
     await db.commit()
     await db.refresh(menu)
+    singleflight.invalidate("menus")
     return menu
 
 
 # ---------- LEER ----------
 async def get_menu_by_id(db: AsyncSession, menu_id: int) -> Optional[Menu]:
     """Obtener un menú por su ID"""
-    query = select(Menu).where(Menu.menu_id == menu_id)
-    result = await db.execute(query)
+    result = await db.execute(queries.MENU_BY_ID, {"menu_id": menu_id})
     return result.scalar_one_or_none()
 
 
 async def get_menus_by_establishment(db: AsyncSession, establishment_id: int) -> List[Menu]:
     """Obtener todos los menús de un establecimiento"""
-    query = select(Menu).where(Menu.establishment_id == establishment_id)
-    result = await db.execute(query)
+    result = await db.execute(queries.MENUS_BY_ESTABLISHMENT, {"establishment_id": establishment_id})
     return list(result.scalars().all())
 
 
@@ -53,11 +59,19 @@ async def get_dishes_by_menu(db: AsyncSession, menu_id: int) -> List[Dish]:
     if not menu:
         raise HTTPException(status_code=404, detail="Menu not found")
     
-    query = select(Dish).where(Dish.menu_id == menu_id)
-    result = await db.execute(query)
+    result = await db.execute(queries.DISHES_BY_MENU, {"menu_id": menu_id})
     return list(result.scalars().all())
 
 
+# Lecturas compartidas entre peticiones concurrentes (GET /menu/establecimiento/{id} y GET /menu/{id})
+get_menus_by_establishment_shared = singleflight.coalesce(
+    get_menus_by_establishment, List[MenuOut], "menus", settings.SINGLEFLIGHT_GRACE_SECONDS
+)
+get_dishes_by_menu_shared = singleflight.coalesce(
+    get_dishes_by_menu, List[DishOut], "dishes", settings.SINGLEFLIGHT_GRACE_SECONDS
+)
+
+
 async def get_dishes_by_menu_and_category(db: AsyncSession, menu_id: int, category_id: int) -> List[Dish]:
     """Obtener platos de un menú filtrados por categoría"""
     # Verificar que el menú existe
@@ -107,19 +121,26 @@ async def update_menu_controller(db: AsyncSession, menu_id: int, data: MenuUpdat
         .execution_options(synchronize_session="fetch")
     )
     await db.execute(query)
+    menu = await get_menu_by_id(db, menu_id)
+    worker.publish_later(
+        db, menu.establishment_id, "menu.updated", MenuOut.model_validate(menu).model_dump(mode="json")
+    )
     await db.commit()
-    return await get_menu_by_id(db, menu_id)
+    singleflight.invalidate("menus")
+    return menu
 
 
 # ---------- ELIMINAR ----------
-async def delete_menu_controller(db: AsyncSession, menu_id: int) -> bool:
-    """Eliminar un menú"""
+async def delete_menu_controller(db: AsyncSession, menu_id: int):
+    """Eliminar un menú (sus platos se borran en cascada, por lotes si son muchos)"""
     # Verificar que el menú existe
     menu = await get_menu_by_id(db, menu_id)
     if not menu:
         raise HTTPException(status_code=404, detail="Menu not found")
     
-    query = delete(Menu).where(Menu.menu_id == menu_id)
-    result = await db.execute(query)
-    await db.commit()
-    return result.rowcount > 0
+    # delete_tree confirma la transacción en los dos casos (en la petición o antes de programarlo)
+    worker.publish_later(db, menu.establishment_id, "menu.deleted", {"menu_id": menu_id})
+    scheduled = await deletion.delete_tree(db, "menu", menu_id)
+    if scheduled:
+        return JSONResponse(status_code=202, content={"message": f"Eliminación del menú {menu_id} programada"})
+    return {"message": f"Menú {menu_id} eliminado exitosamente"}
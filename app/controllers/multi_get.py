@@ -0,0 +1,36 @@
+from typing import Iterable, List
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import queries
+from app.config import settings
+
+
+def parse_ids(values: Iterable[str]) -> List[int]:
+    """IDs de ?ids=1,2,3 (o ?ids=1&ids=2), sin repetidos y en el orden pedido"""
+    ids = []
+    try:
+        for value in values:
+            ids.extend(int(part) for part in value.split(",") if part.strip())
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must be integers")
+    return ids
+
+
+async def get_many(db: AsyncSession, statement: Select, id_column: str, ids: List[int]) -> dict:
+    """Una sola consulta WHERE id IN (...): filas en el orden pedido y los IDs que no existen"""
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="At least one id is required")
+    if len(ids) > settings.MULTI_GET_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MULTI_GET_MAX_IDS} ids per request",
+        )
+    rows = {row[id_column]: row for row in queries.as_dicts(await db.execute(statement, {"ids": ids}))}
+    return {
+        "items": [rows[item_id] for item_id in ids if item_id in rows],
+        "missing": [item_id for item_id in ids if item_id not in rows],
+    }
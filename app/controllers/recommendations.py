@@ -0,0 +1,54 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from app import queries
+from app.models.dish_allergen import DishAllergen
+from app.models.dishes import Dish
+from app.models.menus import Menu
+from app.models.user_allergen import UserAllergen
+from app.recommendations import service as recommendations
+
+
+async def get_dish_recommendations(db: AsyncSession, user_id: int, limit: int = 10):
+    """Platos recomendados para un usuario (del índice precalculado), sin los que tengan alguno de sus alérgenos"""
+    user_result = await db.execute(queries.USER_BY_ID, {"user_id": user_id})
+    if not user_result.scalar_one_or_none():
+        raise HTTPException(status_code=404, detail="User not found")
+
+    index = await recommendations.get_index(db)
+    source, ranked, scores = index.ranked(user_id)
+    response = {"user_id": user_id, "source": source, "items": [], "built_at": index.built_at}
+    recommendations.SERVED.inc(source=source)
+    if len(ranked) == 0:
+        return response
+
+    # Los alérgenos se comprueban con los datos actuales: el índice puede tener unos minutos
+    blocked = (
+        select(DishAllergen.dish_id)
+        .join(UserAllergen, UserAllergen.allergen_id == DishAllergen.allergen_id)
+        .where(UserAllergen.user_id == user_id)
+    )
+    result = await db.execute(
+        select(Dish, Menu.establishment_id)
+        .join(Menu, Menu.menu_id == Dish.menu_id)
+        .where(Dish.dish_id.in_([int(dish_id) for dish_id in ranked]), Dish.dish_id.not_in(blocked))
+    )
+    found = {dish.dish_id: (dish, establishment_id) for dish, establishment_id in result.all()}
+
+    for position, dish_id in enumerate(ranked):
+        if int(dish_id) not in found:
+            continue
+        dish, establishment_id = found[int(dish_id)]
+        response["items"].append({
+            "dish_id": dish.dish_id,
+            "menu_id": dish.menu_id,
+            "name": dish.name,
+            "description": dish.description,
+            "price": dish.price,
+            "img": dish.img,
+            "establishment_id": establishment_id,
+            "score": round(float(scores[position]), 4) if scores is not None else None,
+        })
+        if len(response["items"]) == limit:
+            break
+    return response
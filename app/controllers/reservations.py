@@ -1,25 +1,28 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 from fastapi import HTTPException
+from app import queries
 from app.models.reservations import Reservation, ReservationStatus
 from app.models.users import User
 from app.models.establishments import Establishment
-from app.schemas.reservations import ReservationsCreate, ReservationsUpdate
+from app.schemas.reservations import ReservationsCreate, ReservationsOut, ReservationsUpdate
+from app import worker
+
+
+def _publish(db: AsyncSession, event_type: str, reservation: Reservation) -> None:
+    """Encolar el evento en vivo con la escritura (sale por el outbox después del commit)"""
+    data = ReservationsOut.model_validate(reservation).model_dump(mode="json")
+    worker.publish_later(db, reservation.establishment_id, event_type, data)
 
 
 async def create_reservation(db: AsyncSession, reservation_data: ReservationsCreate):
     """Crear una nueva reserva"""
     # Verificar que el usuario existe
-    user_result = await db.execute(
-        select(User).where(User.user_id == reservation_data.user_id)
-    )
+    user_result = await db.execute(queries.USER_BY_ID, {"user_id": reservation_data.user_id})
     if not user_result.scalar_one_or_none():
         raise HTTPException(status_code=404, detail="User not found")
     
     # Verificar que el establecimiento existe
-    est_result = await db.execute(
-        select(Establishment).where(Establishment.establishment_id == reservation_data.establishment_id)
-    )
+    est_result = await db.execute(queries.ESTABLISHMENT_BY_ID, {"establishment_id": reservation_data.establishment_id})
     if not est_result.scalar_one_or_none():
         raise HTTPException(status_code=404, detail="Establishment not found")
     
@@ -33,6 +36,8 @@ async def create_reservation(db: AsyncSession, reservation_data: ReservationsCre
     )
     
     db.add(new_reservation)
+    await db.flush()
+    _publish(db, "reservation.created", new_reservation)
     await db.commit()
     await db.refresh(new_reservation)
     
@@ -41,15 +46,12 @@ async def create_reservation(db: AsyncSession, reservation_data: ReservationsCre
 
 async def get_all_reservations(db: AsyncSession):
     """Obtener todas las reservas"""
-    result = await db.execute(select(Reservation))
-    return result.scalars().all()
+    return queries.as_dicts(await db.execute(queries.RESERVATIONS_ROWS))
 
 
 async def get_reservation_by_id(db: AsyncSession, reservation_id: int):
     """Obtener una reserva específica por ID"""
-    result = await db.execute(
-        select(Reservation).where(Reservation.reservation_id == reservation_id)
-    )
+    result = await db.execute(queries.RESERVATION_BY_ID, {"reservation_id": reservation_id})
     reservation = result.scalar_one_or_none()
     
     if not reservation:
@@ -60,9 +62,7 @@ async def get_reservation_by_id(db: AsyncSession, reservation_id: int):
 
 async def update_reservation(db: AsyncSession, reservation_id: int, reservation_data: ReservationsUpdate):
     """Actualizar una reserva"""
-    result = await db.execute(
-        select(Reservation).where(Reservation.reservation_id == reservation_id)
-    )
+    result = await db.execute(queries.RESERVATION_BY_ID, {"reservation_id": reservation_id})
     reservation = result.scalar_one_or_none()
     
     if not reservation:
@@ -77,6 +77,8 @@ async def update_reservation(db: AsyncSession, reservation_id: int, reservation_
             value = ReservationStatus[value]
         setattr(reservation, field, value)
     
+    await db.flush()
+    _publish(db, "reservation.updated", reservation)
     await db.commit()
     await db.refresh(reservation)
     
@@ -85,9 +87,7 @@ async def update_reservation(db: AsyncSession, reservation_id: int, reservation_
 
 async def cancel_reservation(db: AsyncSession, reservation_id: int):
     """Cancelar una reserva (cambiar estado a cancelled)"""
-    result = await db.execute(
-        select(Reservation).where(Reservation.reservation_id == reservation_id)
-    )
+    result = await db.execute(queries.RESERVATION_BY_ID, {"reservation_id": reservation_id})
     reservation = result.scalar_one_or_none()
     
     if not reservation:
@@ -95,6 +95,8 @@ async def cancel_reservation(db: AsyncSession, reservation_id: int):
     
     reservation.status = ReservationStatus.cancelled
     
+    await db.flush()
+    _publish(db, "reservation.cancelled", reservation)
     await db.commit()
     await db.refresh(reservation)
     
@@ -103,31 +105,38 @@ async def cancel_reservation(db: AsyncSession, reservation_id: int):
 
 async def delete_reservation(db: AsyncSession, reservation_id: int):
     """Eliminar una reserva completamente"""
-    result = await db.execute(
-        select(Reservation).where(Reservation.reservation_id == reservation_id)
-    )
+    result = await db.execute(queries.RESERVATION_BY_ID, {"reservation_id": reservation_id})
     reservation = result.scalar_one_or_none()
     
     if not reservation:
         raise HTTPException(status_code=404, detail="Reservation not found")
     
     await db.delete(reservation)
+    worker.publish_later(db, reservation.establishment_id, "reservation.deleted", {"reservation_id": reservation_id})
     await db.commit()
     
     return {"message": "Reservation deleted successfully"}
 
 
-async def get_reservations_by_user(db: AsyncSession, user_id: int):
-    """Obtener todas las reservas de un usuario"""
-    result = await db.execute(
-        select(Reservation).where(Reservation.user_id == user_id)
-    )
-    return result.scalars().all()
+async def _with_history(db: AsyncSession, active, archived_query, params: dict, history: bool):
+    """Añadir las reservas archivadas (solo si se pide el historial), ordenado por fecha"""
+    if not history:
+        return active
+    archived = (await db.execute(archived_query, params)).scalars().all()
+    return sorted([*active, *archived], key=lambda reservation: reservation.date)
+
+
+async def get_reservations_by_user(db: AsyncSession, user_id: int, history: bool = False):
+    """Obtener todas las reservas de un usuario (con history, también las archivadas)"""
+    params = {"user_id": user_id}
+    result = await db.execute(queries.RESERVATIONS_BY_USER, params)
+    return await _with_history(db, result.scalars().all(), queries.ARCHIVED_RESERVATIONS_BY_USER, params, history)
 
 
-async def get_reservations_by_establishment(db: AsyncSession, establishment_id: int):
-    """Obtener todas las reservas de un establecimiento"""
-    result = await db.execute(
-        select(Reservation).where(Reservation.establishment_id == establishment_id)
+async def get_reservations_by_establishment(db: AsyncSession, establishment_id: int, history: bool = False):
+    """Obtener todas las reservas de un establecimiento (con history, también las archivadas)"""
+    params = {"establishment_id": establishment_id}
+    result = await db.execute(queries.RESERVATIONS_BY_ESTABLISHMENT, params)
+    return await _with_history(
+        db, result.scalars().all(), queries.ARCHIVED_RESERVATIONS_BY_ESTABLISHMENT, params, history
     )
-    return result.scalars().all()
@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from fastapi import HTTPException
+from app import queries
 from app.models.reviews import Review, RatingEnum
 from app.models.users import User
 from app.models.establishments import Establishment
@@ -10,25 +11,18 @@ from app.schemas.review import ReviewCreate, ReviewUpdate
 async def create_review(db: AsyncSession, review_data: ReviewCreate):
     """Crear una nueva reseña"""
     # Verificar que el usuario existe
-    user_result = await db.execute(
-        select(User).where(User.user_id == review_data.user_id)
-    )
+    user_result = await db.execute(queries.USER_BY_ID, {"user_id": review_data.user_id})
     if not user_result.scalar_one_or_none():
         raise HTTPException(status_code=404, detail="User not found")
     
     # Verificar que el establecimiento existe
-    est_result = await db.execute(
-        select(Establishment).where(Establishment.establishment_id == review_data.establishment_id)
-    )
+    est_result = await db.execute(queries.ESTABLISHMENT_BY_ID, {"establishment_id": review_data.establishment_id})
     if not est_result.scalar_one_or_none():
         raise HTTPException(status_code=404, detail="Establishment not found")
     
     # Verificar que el usuario no haya creado ya una reseña para este establecimiento
     existing_review = await db.execute(
-        select(Review).where(
-            Review.user_id == review_data.user_id,
-            Review.establishment_id == review_data.establishment_id
-        )
+        queries.REVIEW_BY_KEY, {"user_id": review_data.user_id, "establishment_id": review_data.establishment_id}
     )
     if existing_review.scalar_one_or_none():
         raise HTTPException(
@@ -67,10 +61,7 @@ async def get_all_reviews(db: AsyncSession):
 async def get_review_by_user_and_establishment(db: AsyncSession, user_id: int, establishment_id: int):
     """Obtener una reseña específica por usuario y establecimiento"""
     result = await db.execute(
-        select(Review).where(
-            Review.user_id == user_id,
-            Review.establishment_id == establishment_id
-        )
+        queries.REVIEW_BY_KEY, {"user_id": user_id, "establishment_id": establishment_id}
     )
     review = result.scalar_one_or_none()
     
@@ -82,27 +73,20 @@ async def get_review_by_user_and_establishment(db: AsyncSession, user_id: int, e
 
 async def get_reviews_by_establishment(db: AsyncSession, establishment_id: int):
     """Obtener todas las reseñas de un establecimiento"""
-    result = await db.execute(
-        select(Review).where(Review.establishment_id == establishment_id)
-    )
-    return result.scalars().all()
+    result = await db.execute(queries.REVIEWS_BY_ESTABLISHMENT_ROWS, {"establishment_id": establishment_id})
+    return queries.as_dicts(result)
 
 
 async def get_reviews_by_user(db: AsyncSession, user_id: int):
     """Obtener todas las reseñas de un usuario"""
-    result = await db.execute(
-        select(Review).where(Review.user_id == user_id)
-    )
+    result = await db.execute(queries.REVIEWS_BY_USER, {"user_id": user_id})
     return result.scalars().all()
 
 
 async def update_review(db: AsyncSession, user_id: int, establishment_id: int, review_data: ReviewUpdate):
     """Actualizar una reseña"""
     result = await db.execute(
-        select(Review).where(
-            Review.user_id == user_id,
-            Review.establishment_id == establishment_id
-        )
+        queries.REVIEW_BY_KEY, {"user_id": user_id, "establishment_id": establishment_id}
     )
     review = result.scalar_one_or_none()
     
@@ -130,10 +114,7 @@ async def update_review(db: AsyncSession, user_id: int, establishment_id: int, r
 async def delete_review(db: AsyncSession, user_id: int, establishment_id: int):
     """Eliminar una reseña"""
     result = await db.execute(
-        select(Review).where(
-            Review.user_id == user_id,
-            Review.establishment_id == establishment_id
-        )
+        queries.REVIEW_BY_KEY, {"user_id": user_id, "establishment_id": establishment_id}
     )
     review = result.scalar_one_or_none()
     
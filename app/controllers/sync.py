@@ -0,0 +1,173 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import and_, bindparam, delete, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app import queries
+from app.database import SessionLocal
+from app.models.allergens import Allergens
+from app.models.categories import Category
+from app.models.change_log import TRACKED, ChangeLog
+from app.models.dish_allergen import DishAllergen
+from app.models.dish_category import DishCategory
+from app.models.dishes import Dish
+from app.models.establishment_category import EstablishmentCategory
+from app.models.establishments import Establishment
+from app.models.menus import Menu
+from app.schemas.allergens import AllergenOut
+from app.schemas.category import CategoryOut
+from app.schemas.dishes import DishOut
+from app.schemas.establishment import EstablishmentOut
+from app.schemas.menus import MenuOut
+from app.utils import metrics
+
+logger = logging.getLogger("app.sync")
+
+COMPACTED = metrics.counter("sync_change_log_compacted_total", "Entradas de change_log superadas por otra más reciente y borradas")
+
+_ENTITIES = {
+    "establishments": (Establishment, EstablishmentOut),
+    "menus": (Menu, MenuOut),
+    "dishes": (Dish, DishOut),
+    "categories": (Category, CategoryOut),
+    "allergens": (Allergens, AllergenOut),
+}
+
+_ID_COLUMNS = {entity: column for entity, column in TRACKED.values()}
+
+# Estado actual de un lote de IDs de cada entidad (proyección con las columnas de su esquema)
+ROWS_BY_IDS = {
+    entity: queries.project(model, schema).where(
+        getattr(model, _ID_COLUMNS[entity]).in_(bindparam("ids", expanding=True))
+    )
+    for entity, (model, schema) in _ENTITIES.items()
+}
+# Asociaciones que viajan dentro de la entidad padre: (entidad, campo, columna padre, columna hija)
+LINKED_IDS = [
+    ("dishes", "category_ids", DishCategory.dish_id, DishCategory.category_id),
+    ("dishes", "allergen_ids", DishAllergen.dish_id, DishAllergen.allergen_id),
+    ("establishments", "category_ids", EstablishmentCategory.establishment_id, EstablishmentCategory.category_id),
+]
+
+
+async def _attach_links(db: AsyncSession, entity: str, rows: Dict[int, dict]) -> None:
+    for linked_entity, field, parent, child in LINKED_IDS:
+        if linked_entity != entity:
+            continue
+        for row in rows.values():
+            row[field] = []
+        result = await db.execute(select(parent, child).where(parent.in_(list(rows))).order_by(parent, child))
+        for parent_id, child_id in result.all():
+            rows[parent_id][field].append(child_id)
+
+
+def parse_cursor(since: str) -> Tuple[int, int]:
+    """"txid:change_id" (o solo "change_id", con txid 0) → posición en el registro"""
+    txid, _, change_id = since.rpartition(":")
+    return int(txid or 0), int(change_id)
+
+
+def format_cursor(txid: int, change_id: int) -> str:
+    return f"{txid}:{change_id}"
+
+
+def _after(txid: int, change_id: int):
+    """Entradas posteriores a esa posición en orden (txid, change_id)"""
+    return or_(ChangeLog.txid > txid, and_(ChangeLog.txid == txid, ChangeLog.change_id > change_id))
+
+
+async def _oldest_running_txid(db: AsyncSession) -> Optional[int]:
+    """PostgreSQL: xid de la transacción más antigua aún en curso. Las entradas con txid menor
+    son de transacciones terminadas y las nuevas tendrán uno mayor: esa parte ya no cambia"""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    return await db.scalar(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"))
+
+
+async def get_changes(db: AsyncSession, since: str = "0", limit: int = 500) -> dict:
+    """Cambios posteriores a `since`: estado actual de lo creado o modificado e IDs de lo borrado"""
+    position = parse_cursor(since)
+    # Antes de leer el registro: así todo lo que quede por debajo ya es visible en la lectura
+    horizon = await _oldest_running_txid(db)
+    query = select(ChangeLog.txid, ChangeLog.change_id, ChangeLog.entity, ChangeLog.entity_id).where(_after(*position))
+    if horizon is not None:
+        query = query.where(ChangeLog.txid < horizon)
+    result = await db.execute(query.order_by(ChangeLog.txid, ChangeLog.change_id).limit(limit + 1))
+    entries = result.all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    ids_by_entity: Dict[str, Set[int]] = defaultdict(set)
+    for _, _, entity, entity_id in entries:
+        ids_by_entity[entity].add(entity_id)
+
+    changes, deleted = {}, {}
+    for entity, ids in ids_by_entity.items():
+        if entity not in ROWS_BY_IDS:
+            continue
+        id_column = _ID_COLUMNS[entity]
+        rows = {
+            row[id_column]: row
+            for row in queries.as_dicts(await db.execute(ROWS_BY_IDS[entity], {"ids": list(ids)}))
+        }
+        if rows:
+            await _attach_links(db, entity, rows)
+        # Lo que ya no existe se da por borrado, aunque la entrada más reciente sea una modificación
+        changes[entity] = [rows[entity_id] for entity_id in sorted(rows)]
+        deleted[entity] = sorted(ids - rows.keys())
+
+    return {
+        "changes": changes,
+        "deleted": deleted,
+        "next_since": format_cursor(entries[-1].txid, entries[-1].change_id) if entries else format_cursor(*position),
+        "has_more": has_more,
+    }
+
+
+# ---------- COMPACTACIÓN ----------
+async def compact_change_log(db: AsyncSession, batch_size: int = 1000) -> int:
+    """Borrar las entradas de las que ya hay otra más reciente para la misma entidad (por lotes)"""
+    newer = aliased(ChangeLog)
+    superseded = (
+        select(ChangeLog.change_id)
+        .where(
+            select(newer.change_id)
+            .where(
+                newer.entity == ChangeLog.entity,
+                newer.entity_id == ChangeLog.entity_id,
+                # Más reciente en el mismo orden que recorre /sync
+                or_(
+                    newer.txid > ChangeLog.txid,
+                    and_(newer.txid == ChangeLog.txid, newer.change_id > ChangeLog.change_id),
+                ),
+            )
+            .exists()
+        )
+        .limit(batch_size)
+    )
+    total = 0
+    while True:
+        ids = (await db.execute(superseded)).scalars().all()
+        if not ids:
+            break
+        await db.execute(delete(ChangeLog).where(ChangeLog.change_id.in_(ids)))
+        await db.commit()
+        total += len(ids)
+        COMPACTED.inc(len(ids))
+        if len(ids) < batch_size:
+            break
+    return total
+
+
+async def run_compaction_loop(interval: float) -> None:
+    while True:
+        try:
+            async with SessionLocal() as db:
+                await compact_change_log(db)
+        except Exception:
+            logger.exception("No se pudo compactar change_log")
+        await asyncio.sleep(interval)
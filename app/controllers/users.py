@@ -1,9 +1,13 @@
 from typing import List
 import bcrypt
 from sqlalchemy import insert, update, delete, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
+from fastapi.responses import JSONResponse
 
+from app import queries
+from app.controllers import deletion, existence
 from app.models.users import User, UserRole, UserStatus
 from app.schemas.users import (
     UserCreate,
@@ -31,13 +35,12 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 async def register_user_controller(user_data: UserCreate, db: AsyncSession) -> UserLoginOut:
     """Registrar un nuevo usuario"""
-    # Verificar si el email ya está en uso
-    query = select(User).filter(User.email == user_data.email)
-    result = await db.execute(query)
-    user = result.scalar_one_or_none()
-    
-    if user:
-        raise HTTPException(status_code=400, detail="Email already registered")
+    # Verificar si el email ya está en uso (sin consulta si el filtro sabe que es nuevo;
+    # la restricción UNIQUE cubre igualmente las carreras entre dos altas y un filtro desfasado)
+    if existence.user_emails.might_exist(user_data.email, allow_stale=True):
+        result = await db.execute(queries.USER_BY_EMAIL, {"email": user_data.email})
+        if result.scalar_one_or_none():
+            raise HTTPException(status_code=400, detail="Email already registered")
     
     # Encriptar la contraseña antes de guardarla
     hashed_password = hash_password(user_data.password)
@@ -53,8 +56,13 @@ async def register_user_controller(user_data: UserCreate, db: AsyncSession) -> U
         status=user_data.status,  # user_data.status ya es un enum UserStatus
     )
     db.add(new_user)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
     await db.refresh(new_user)
+    await existence.track_created(existence.user_emails, new_user.email)
     
     from app.utils.jwt import create_access_token
     token = create_access_token({"sub": new_user.email})
@@ -63,8 +71,7 @@ async def register_user_controller(user_data: UserCreate, db: AsyncSession) -> U
 
 async def login_user_controller(login_data: UserLogin, db: AsyncSession) -> UserLoginOut:
     """Iniciar sesión de usuario y generar un token JWT"""
-    query = select(User).filter(User.email == login_data.email)
-    result = await db.execute(query)
+    result = await db.execute(queries.USER_BY_EMAIL, {"email": login_data.email})
     user = result.scalar_one_or_none()
     
     if not user or not verify_password(login_data.password, user.password):
@@ -86,8 +93,7 @@ async def list_users_controller(db: AsyncSession) -> List[UserOut]:
 
 async def get_user_by_id_controller(user_id: int, db: AsyncSession) -> UserOut:
     """Obtener un usuario por su ID"""
-    query = select(User).filter(User.user_id == user_id)
-    result = await db.execute(query)
+    result = await db.execute(queries.USER_BY_ID, {"user_id": user_id})
     user = result.scalar_one_or_none()
     
     if not user:
@@ -97,19 +103,20 @@ async def get_user_by_id_controller(user_id: int, db: AsyncSession) -> UserOut:
 
 async def get_user_by_email_controller(email: str, db: AsyncSession) -> UserOut:
     """Obtener un usuario por su email"""
-    query = select(User).filter(User.email == email)
-    result = await db.execute(query)
+    if not existence.user_emails.might_exist(email):
+        raise HTTPException(status_code=404, detail="User not found")
+    result = await db.execute(queries.USER_BY_EMAIL, {"email": email})
     user = result.scalar_one_or_none()
     
     if not user:
+        existence.user_emails.remember_missing(email)
         raise HTTPException(status_code=404, detail="User not found")
     
     return UserOut.model_validate(user)
 
 async def update_user_controller(user_data: UserUpdate, user_id: int, db: AsyncSession) -> UserOut:
     """Actualizar información de un usuario"""
-    query = select(User).filter(User.user_id == user_id)
-    result = await db.execute(query)
+    result = await db.execute(queries.USER_BY_ID, {"user_id": user_id})
     user = result.scalar_one_or_none()
     
     if not user:
@@ -131,8 +138,7 @@ async def update_user_controller(user_data: UserUpdate, user_id: int, db: AsyncS
 
 async def change_password_controller(password_data: ChangePassword, user_id: int, db: AsyncSession) -> UserMessageOut:
     """Cambiar la contraseña de un usuario"""
-    query = select(User).filter(User.user_id == user_id)
-    result = await db.execute(query)
+    result = await db.execute(queries.USER_BY_ID, {"user_id": user_id})
     user = result.scalar_one_or_none()
     
     if not user:
@@ -152,8 +158,7 @@ async def change_password_controller(password_data: ChangePassword, user_id: int
 
 async def update_allergens_controller(user_id: int, db: AsyncSession) -> UserMessageOut:
     """Actualizar alergias del usuario"""
-    query = select(User).filter(User.user_id == user_id)
-    result = await db.execute(query)
+    result = await db.execute(queries.USER_BY_ID, {"user_id": user_id})
     user = result.scalar_one_or_none()
     
     if not user:
@@ -168,8 +173,7 @@ async def update_allergens_controller(user_id: int, db: AsyncSession) -> UserMes
 
 async def change_role_controller(role_data: UpdateRole, user_id: int, db: AsyncSession) -> UserMessageOut:
     """Cambiar el rol de un usuario"""
-    query = select(User).filter(User.user_id == user_id)
-    result = await db.execute(query)
+    result = await db.execute(queries.USER_BY_ID, {"user_id": user_id})
     user = result.scalar_one_or_none()
     
     if not user:
@@ -183,8 +187,7 @@ async def change_role_controller(role_data: UpdateRole, user_id: int, db: AsyncS
 
 async def change_status_controller(status_data: UpdateStatus, user_id: int, db: AsyncSession) -> UserMessageOut:
     """Cambiar el estado de un usuario"""
-    query = select(User).filter(User.user_id == user_id)
-    result = await db.execute(query)
+    result = await db.execute(queries.USER_BY_ID, {"user_id": user_id})
     user = result.scalar_one_or_none()
     
     if not user:
@@ -198,14 +201,14 @@ async def change_status_controller(status_data: UpdateStatus, user_id: int, db:
 
 async def delete_user_controller(user_id: int, db: AsyncSession) -> UserMessageOut:
     """Eliminar un usuario"""
-    query = select(User).filter(User.user_id == user_id)
-    result = await db.execute(query)
+    result = await db.execute(queries.USER_BY_ID, {"user_id": user_id})
     user = result.scalar_one_or_none()
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    await db.delete(user)
-    await db.commit()
+    # Reservas, reseñas y alérgenos se borran en cascada (por lotes si son muchos)
+    if await deletion.delete_tree(db, "user", user_id):
+        return JSONResponse(status_code=202, content={"message": "User deletion scheduled"})
     
     return UserMessageOut(message="User deleted successfully")
@@ -0,0 +1,170 @@
+"""
+Calentamiento al arrancar: que las primeras peticiones tras un despliegue no paguen el arranque en frío.
+
+Fases, en orden (cada una se mide y un fallo no impide las siguientes):
+- pool: abrir a la vez WARMUP_POOL_CONNECTIONS conexiones en el primario y en cada réplica
+  (asyncpg conecta bajo demanda) y devolverlas al pool;
+- statements: ejecutar las sentencias frecuentes de app/queries.py en cada una de esas
+  conexiones, así quedan compiladas en SQLAlchemy y preparadas en asyncpg (la caché de
+  prepared statements es por conexión);
+- catalog: cargar categorías, alérgenos, el ranking de sostenibilidad y los
+  WARMUP_TOP_ESTABLISHMENTS primeros establecimientos en sus cachés.
+
+GET /health/ready responde 503 hasta que termina (o se agota WARMUP_TIMEOUT_SECONDS).
+"""
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app import database, queries
+from app.config import settings
+from app.controllers import leaderboard
+from app.controllers.allergens import get_allergens
+from app.controllers.categories import get_all_categories
+from app.controllers.establishment import ESTABLISHMENT_CACHE
+from app.utils import metrics
+
+logger = logging.getLogger("app.warmup")
+
+PHASE_SECONDS = metrics.gauge(
+    "warmup_phase_seconds", "Segundos de cada fase del calentamiento al arrancar", ["phase"]
+)
+
+# Sentencias frecuentes con parámetros que no devuelven filas: basta con ejecutarlas una vez por conexión
+HOT_STATEMENTS: List[Tuple[Any, dict]] = [
+    (queries.DISH_BY_ID, {"dish_id": 0}),
+    (queries.ESTABLISHMENT_BY_ID, {"establishment_id": 0}),
+    (queries.MENU_BY_ID, {"menu_id": 0}),
+    (queries.CATEGORY_BY_ID, {"category_id": 0}),
+    (queries.ALLERGEN_BY_ID, {"allergen_id": 0}),
+    (queries.USER_BY_ID, {"user_id": 0}),
+    (queries.USER_BY_EMAIL, {"email": ""}),
+    (queries.MENUS_BY_ESTABLISHMENT, {"establishment_id": 0}),
+    (queries.DISHES_BY_MENU, {"menu_id": 0}),
+    (queries.DISHES_BY_IDS, {"ids": [0]}),
+    (queries.ESTABLISHMENTS_BY_IDS, {"ids": [0]}),
+]
+
+
+class WarmupState:
+    def __init__(self):
+        self.ready = False
+        # fase -> {"seconds": ..., "ok": ...}
+        self.phases: Dict[str, dict] = {}
+
+    def as_dict(self) -> dict:
+        return {"ready": self.ready, "phases": self.phases}
+
+
+state = WarmupState()
+
+
+async def _with_connections(
+    engine: AsyncEngine, count: int, use: Callable[[AsyncConnection], Any]
+) -> int:
+    """Abrir `count` conexiones a la vez (sin pasar del tamaño del pool), aplicar `use` a cada una y devolverlas"""
+    size = getattr(engine.pool, "size", None)
+    if callable(size):
+        count = min(count, size())
+    async with AsyncExitStack() as stack:
+        connections = await asyncio.gather(*(stack.enter_async_context(engine.connect()) for _ in range(count)))
+        await asyncio.gather(*(use(connection) for connection in connections))
+    return len(connections)
+
+
+async def _ping(connection: AsyncConnection) -> None:
+    await connection.execute(text("SELECT 1"))
+
+
+async def _prepare_statements(connection: AsyncConnection) -> None:
+    for statement, parameters in HOT_STATEMENTS:
+        await connection.execute(statement, parameters)
+
+
+async def _load_catalog(db: AsyncSession, top: int) -> None:
+    await get_all_categories(db)
+    await get_allergens(db)
+    ranking = await leaderboard.get_ranking(db)
+    # Sin L1 (CACHE_L1_TTL_SECONDS=0) no hay dónde guardarlos
+    if ESTABLISHMENT_CACHE.enabled:
+        for _, establishment_id, _ in ranking.board().top(top, 0):
+            await ESTABLISHMENT_CACHE.get(establishment_id, db)
+
+
+async def _phase(name: str, work: Callable[[], Any]) -> None:
+    start = time.monotonic()
+    ok = True
+    try:
+        await work()
+    except Exception:
+        ok = False
+        logger.exception("Calentamiento: falló la fase %s", name)
+    seconds = time.monotonic() - start
+    state.phases[name] = {"seconds": round(seconds, 4), "ok": ok}
+    PHASE_SECONDS.set(seconds, phase=name)
+    logger.info("Calentamiento: %s en %.3fs%s", name, seconds, "" if ok else " (con errores)")
+
+
+async def run(
+    engines: Optional[Sequence[AsyncEngine]] = None,
+    sessions: Optional[Callable[[], AsyncSession]] = None,
+    connections: Optional[int] = None,
+    top: Optional[int] = None,
+) -> WarmupState:
+    """Calentar el pool, las sentencias y los catálogos; al terminar la app queda lista"""
+    engines = engines or [database.engine, *(replica.engine for replica in database.session_router.replicas)]
+    sessions = sessions or database.session_router.write_sessions
+    connections = settings.WARMUP_POOL_CONNECTIONS if connections is None else connections
+    top = settings.WARMUP_TOP_ESTABLISHMENTS if top is None else top
+
+    async def pool():
+        for engine in engines:
+            await _with_connections(engine, connections, _ping)
+
+    async def statements():
+        for engine in engines:
+            await _with_connections(engine, max(1, connections), _prepare_statements)
+
+    async def catalog():
+        async with sessions() as db:
+            await _load_catalog(db, top)
+
+    start = time.monotonic()
+    if connections > 0:
+        await _phase("pool", pool)
+    await _phase("statements", statements)
+    await _phase("catalog", catalog)
+    total = time.monotonic() - start
+    state.phases["total"] = {"seconds": round(total, 4), "ok": all(phase["ok"] for phase in state.phases.values())}
+    PHASE_SECONDS.set(total, phase="total")
+    state.ready = True
+    return state
+
+
+async def run_on_startup(timeout: float) -> None:
+    """Tarea del lifespan: si el calentamiento se alarga más de `timeout`, la app se da por lista igualmente"""
+    try:
+        await asyncio.wait_for(run(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Calentamiento sin terminar tras %.0fs: se sirve en frío", timeout)
+    state.ready = True
+
+
+def liveness() -> dict:
+    return {"status": "ok"}
+
+
+def readiness() -> JSONResponse:
+    """200 cuando el calentamiento ha terminado, 503 mientras tanto; con el tiempo de cada fase"""
+    return JSONResponse(status_code=200 if state.ready else 503, content=state.as_dict())
+
+
+def reset() -> None:
+    global state
+    state = WarmupState()
@@ -1,17 +1,253 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+import asyncio
+import itertools
+import logging
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.config import settings
+from app.utils import metrics
+
+logger = logging.getLogger("app.database")
 
 DATABASE_URL = settings.DATABASE_URL
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+def engine_options(url: str) -> dict:
+    """Tamaño de la caché de sentencias compiladas y, con asyncpg, de la de prepared statements"""
+    options = {"query_cache_size": settings.DB_QUERY_CACHE_SIZE}
+    if make_url(url).get_driver_name() == "asyncpg":
+        options["connect_args"] = {"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE}
+    return options
+
+
+# ---------- MÉTRICAS DE LA CACHÉ DE COMPILACIÓN ----------
+COMPILED_CACHE_EXECUTIONS = metrics.counter(
+    "db_compiled_cache_total",
+    "Sentencias ejecutadas según el resultado de la caché de compilación de SQLAlchemy",
+    ["engine", "result"],
+)
+_tracked_engines: dict = {}
+
+def _compiled_cache_sizes() -> dict:
+    # _compiled_cache es el LRU interno del motor (None si query_cache_size=0)
+    return {
+        (label,): len(tracked.sync_engine._compiled_cache or ())
+        for label, tracked in _tracked_engines.items()
+    }
+
+metrics.gauge(
+    "db_compiled_cache_entries", "Sentencias compiladas en la caché de cada motor", ["engine"],
+    function=_compiled_cache_sizes,
+)
+
+def track_compiled_cache(target: AsyncEngine, label: str) -> None:
+    """Contar aciertos y fallos de la caché de compilación de un motor"""
+    _tracked_engines[label] = target
+
+    @event.listens_for(target.sync_engine, "before_cursor_execute")
+    def count_cache_result(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            COMPILED_CACHE_EXECUTIONS.inc(engine=label, result=context.cache_hit.name.lower())
+
+
+def enable_sqlite_foreign_keys(target: AsyncEngine) -> None:
+    """SQLite solo aplica las claves foráneas (y ON DELETE CASCADE) si se activan en cada conexión"""
+    if target.dialect.name != "sqlite":
+        return
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+    @event.listens_for(target.sync_engine, "connect")
+    def set_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+engine = create_async_engine(DATABASE_URL, echo=True, **engine_options(DATABASE_URL))
+track_compiled_cache(engine, "primary")
+enable_sqlite_foreign_keys(engine)
 SessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
 Base = declarative_base()
 
+
+# ---------- ENRUTADO LECTURA / ESCRITURA ----------
+# Cookie y cabecera con la que un cliente pide leer del primario tras escribir (read-your-writes)
+READ_YOUR_WRITES_COOKIE = "rw_until"
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
+# Clave del estado de la petición con la sesión de lectura compartida de un lote (POST /batch)
+BATCH_READ_SESSION = "batch_read_session"
+
+
+class Replica:
+    """Réplica de lectura; si falla se aparta hasta down_until y se lee del primario"""
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+        self.down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+
+class SessionRouter:
+    """Sesiones de escritura contra el primario y de lectura repartidas entre las réplicas sanas"""
+
+    def __init__(
+        self,
+        write_sessions: async_sessionmaker,
+        read_engines: Sequence[AsyncEngine] = (),
+        retry_seconds: float = 10.0,
+        max_lag_seconds: Optional[float] = 5.0,
+    ):
+        self.write_sessions = write_sessions
+        self.replicas: List[Replica] = [Replica(read_engine) for read_engine in read_engines]
+        self.retry_seconds = retry_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self._turn = itertools.count()
+
+    def mark_down(self, replica: Replica, reason: str) -> None:
+        replica.down_until = time.monotonic() + self.retry_seconds
+        logger.warning("Réplica %s fuera de servicio (%s): lecturas al primario", replica.engine.url, reason)
+
+    def pick_replica(self) -> Optional[Replica]:
+        """Siguiente réplica disponible (round robin)"""
+        available = [replica for replica in self.replicas if replica.available]
+        if not available:
+            return None
+        return available[next(self._turn) % len(available)]
+
+    async def read_session(self) -> AsyncSession:
+        """Sesión sobre una réplica sana; el primario si no queda ninguna"""
+        for _ in range(len(self.replicas)):
+            replica = self.pick_replica()
+            if replica is None:
+                break
+            session = replica.sessions()
+            try:
+                # Abrir la conexión aquí: si la réplica no responde se pasa a la siguiente
+                await session.connection()
+            except (SQLAlchemyError, OSError) as exc:
+                await session.close()
+                self.mark_down(replica, str(exc))
+                continue
+            return session
+        return self.write_sessions()
+
+    async def replica_lag(self, replica: Replica) -> Optional[float]:
+        """Segundos de retraso de la réplica (solo PostgreSQL); falla si no responde"""
+        async with replica.engine.connect() as conn:
+            if conn.dialect.name != "postgresql":
+                await conn.execute(text("SELECT 1"))
+                return None
+            result = await conn.execute(text(
+                "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+            ))
+            return float(result.scalar_one())
+
+    async def check_health(self) -> None:
+        """Comprobar cada réplica: se aparta si no responde o va demasiado atrasada, se recupera si no"""
+        for replica in self.replicas:
+            try:
+                lag = await self.replica_lag(replica)
+            except (SQLAlchemyError, OSError) as exc:
+                self.mark_down(replica, str(exc))
+                continue
+            if lag is not None and self.max_lag_seconds is not None and lag > self.max_lag_seconds:
+                self.mark_down(replica, f"{lag:.1f}s de retraso")
+            elif not replica.available:
+                logger.info("Réplica %s de nuevo en servicio", replica.engine.url)
+                replica.down_until = 0.0
+
+    async def run_health_checks(self, interval: float) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(interval)
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+read_engines = [
+    create_async_engine(url.strip(), **engine_options(url.strip()))
+    for url in settings.READ_DATABASE_URLS.split(",") if url.strip()
+]
+for index, read_engine in enumerate(read_engines):
+    track_compiled_cache(read_engine, f"replica{index}")
+
+session_router = SessionRouter(
+    SessionLocal,
+    read_engines,
+    retry_seconds=settings.REPLICA_HEALTH_CHECK_SECONDS,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+)
+
+
+def wants_primary(request: Request) -> bool:
+    """El cliente escribió hace poco (cookie o cabecera con la marca de tiempo) y debe leer del primario"""
+    for value in (request.headers.get(READ_YOUR_WRITES_HEADER), request.cookies.get(READ_YOUR_WRITES_COOKIE)):
+        if not value:
+            continue
+        try:
+            if float(value) > time.time():
+                return True
+        except ValueError:
+            # Cabecera sin marca de tiempo ("1", "true"): leer siempre del primario
+            if value.lower() not in ("0", "false", "no"):
+                return True
+    return False
+
+
 async def get_db():
-    async with SessionLocal() as session:
+    async with session_router.write_sessions() as session:
+        yield session
+
+async def get_read_db(request: Request):
+    """Sesión para endpoints de solo lectura: réplica salvo read-your-writes o réplicas caídas"""
+    # Subpetición de POST /batch: sesión compartida que abre y cierra el propio lote
+    shared = request.scope.get("state", {}).get(BATCH_READ_SESSION)
+    if shared is not None:
+        yield shared
+        return
+    if wants_primary(request):
+        session = session_router.write_sessions()
+    else:
+        session = await session_router.read_session()
+    async with session:
         yield session
-        
-async def create_tables():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+
+
+# El esquema se gestiona con Alembic (migrations/): alembic upgrade head
+def get_alembic_config() -> Config:
+    return Config(str(ALEMBIC_INI))
+
+async def get_schema_revisions(bind: AsyncEngine = engine) -> tuple[set, set]:
+    """Revisiones aplicadas en la base de datos y heads disponibles en migrations/"""
+    heads = set(ScriptDirectory.from_config(get_alembic_config()).get_heads())
+    async with bind.connect() as conn:
+        current = await conn.run_sync(
+            lambda sync_conn: set(MigrationContext.configure(sync_conn).get_current_heads())
+        )
+    return current, heads
+
+async def check_schema_is_current(bind: AsyncEngine = engine) -> None:
+    """Fallar si la base de datos no está en la última migración (la app no debe servir así)"""
+    current, heads = await get_schema_revisions(bind)
+    if current != heads:
+        applied = ", ".join(sorted(current)) or "ninguna"
+        raise RuntimeError(
+            f"El esquema de la base de datos no está actualizado (aplicada: {applied}; "
+            f"esperada: {', '.join(sorted(heads))}). Ejecuta 'alembic upgrade head' "
+            f"(o 'alembic stamp 0001' si la base de datos se creó con create_all)."
+        )
@@ -1,24 +1,120 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
 
-from app.database import create_tables
+from app.archive.partitions import ensure_partitions
+from app.config import settings
+from app.controllers import deletion, warmup
+from app.controllers.existence import run_refresh_loop as run_existence_refresh_loop
+from app.controllers.idempotency import run_purge_loop as run_idempotency_purge_loop
+from app.controllers.leaderboard import run_refresh_loop as run_leaderboard_refresh_loop
+from app.controllers.sync import run_compaction_loop as run_change_log_compaction_loop
+from app.database import engine, session_router, check_schema_is_current, SessionLocal
 # Import all models so they're registered with SQLAlchemy Base
 from app.models import *
+from app.recommendations import run_refresh_loop as run_recommendations_refresh_loop
 from app.routes.accessibility_features import router as accessibility_router
 from app.routes.allergens import router as allergen_router
+from app.routes.batch import router as batch_router
 from app.routes.categories import router as category_router
 from app.routes.dishes import router as dish_router
 from app.routes.establishments import router as establishment_router
+from app.routes.health import router as health_router
 from app.routes.menu import router as menu_router
+from app.routes.metrics import router as metrics_router
 from app.routes.reservations import router as reservation_router
 from app.routes.reviews import router as review_router
+from app.routes.sync import router as sync_router
 from app.routes.users import router as user_router
+from app.utils.compression import CompressionMiddleware
+from app.utils.events import hub as events_hub
+from app.utils.job_dispatch import JobDispatchMiddleware
+from app.utils.read_your_writes import ReadYourWritesMiddleware
+from app.utils.tiered_cache import close as close_tiered_caches
+from app.worker import Worker
+
+logger = logging.getLogger("app")
 
 # Configuración de seguridad para Swagger
 security = HTTPBearer()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # No servir tráfico con un esquema atrasado: las migraciones van antes del despliegue
+    if settings.SCHEMA_CHECK_ON_STARTUP:
+        await check_schema_is_current()
+    # Particiones de reservas de los próximos meses (solo PostgreSQL)
+    try:
+        async with SessionLocal() as db:
+            await ensure_partitions(db, settings.RESERVATIONS_PARTITION_MONTHS_AHEAD)
+    except Exception:
+        logger.exception("No se pudieron crear las particiones de reservations (python -m app.archive partitions)")
+    # Comprobación periódica de las réplicas de lectura (aparta las caídas o atrasadas)
+    health_checks = None
+    if session_router.replicas:
+        health_checks = asyncio.create_task(
+            session_router.run_health_checks(settings.REPLICA_HEALTH_CHECK_SECONDS)
+        )
+    # Limpieza periódica de las Idempotency-Key caducadas
+    idempotency_purge = asyncio.create_task(run_idempotency_purge_loop())
+    # Eventos en vivo (SSE): con EVENTS_BACKEND=postgres abre las conexiones de LISTEN/NOTIFY
+    try:
+        await events_hub.start()
+    except Exception:
+        logger.exception("No se pudo iniciar el backend de eventos en vivo (%s)", settings.EVENTS_BACKEND)
+    # Compactación del registro de cambios de /sync
+    change_log_compaction = asyncio.create_task(run_change_log_compaction_loop(settings.SYNC_COMPACT_SECONDS))
+    # Pool de workers de la tabla jobs (desactivar si se usa python -m app.worker)
+    worker = Worker()
+    if settings.JOBS_WORKER_IN_PROCESS:
+        worker.start()
+    # Recomendaciones de platos: se calculan ya y se recalculan periódicamente
+    recommendations_refresh = None
+    if settings.RECOMMENDATIONS_REFRESH_SECONDS > 0:
+        recommendations_refresh = asyncio.create_task(
+            run_recommendations_refresh_loop(settings.RECOMMENDATIONS_REFRESH_SECONDS)
+        )
+    # Ranking de sostenibilidad: se carga ya desde la base de datos y se recarga periódicamente
+    leaderboard_refresh = None
+    if settings.LEADERBOARD_REFRESH_SECONDS > 0:
+        leaderboard_refresh = asyncio.create_task(run_leaderboard_refresh_loop(settings.LEADERBOARD_REFRESH_SECONDS))
+    # Filtros de existencia (Bloom) de IDs y emails: se cargan ya y se recargan periódicamente
+    existence_refresh = None
+    if settings.EXISTENCE_FILTER_REFRESH_SECONDS > 0:
+        existence_refresh = asyncio.create_task(run_existence_refresh_loop(settings.EXISTENCE_FILTER_REFRESH_SECONDS))
+    # Calentamiento del pool, las sentencias y los catálogos: GET /health/ready da 503 hasta que termina
+    warmup_task = None
+    if settings.WARMUP_ON_STARTUP:
+        warmup_task = asyncio.create_task(warmup.run_on_startup(settings.WARMUP_TIMEOUT_SECONDS))
+    else:
+        warmup.state.ready = True
+    yield
+    if warmup_task is not None:
+        warmup_task.cancel()
+    if existence_refresh is not None:
+        existence_refresh.cancel()
+    if leaderboard_refresh is not None:
+        leaderboard_refresh.cancel()
+    if recommendations_refresh is not None:
+        recommendations_refresh.cancel()
+    await worker.stop()
+    change_log_compaction.cancel()
+    await events_hub.stop()
+    # Refrescos de L1 pendientes y conexión con la caché compartida (L2)
+    await close_tiered_caches()
+    idempotency_purge.cancel()
+    if health_checks is not None:
+        health_checks.cancel()
+    # Borrados por lotes en segundo plano: terminar o cancelar antes de cerrar los motores
+    await deletion.stop(settings.DELETE_SHUTDOWN_WAIT_SECONDS)
+    await session_router.dispose()
+    await engine.dispose()
+
 app = FastAPI(
+    lifespan=lifespan,
     title="GastroEje API",
     description="API para la gestión de restaurantes y menús",
     version="1.0.0",
@@ -38,14 +134,28 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"]
 )
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(JobDispatchMiddleware)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    cache_paths=settings.COMPRESSION_CACHE_PATHS.split(","),
+    cache_entries=settings.COMPRESSION_CACHE_ENTRIES,
+)
 
 app.include_router(accessibility_router)
 app.include_router(allergen_router)
+app.include_router(batch_router)
 app.include_router(category_router)
 app.include_router(dish_router)
 app.include_router(establishment_router)
+app.include_router(health_router)
 app.include_router(menu_router)
+app.include_router(metrics_router)
 app.include_router(reservation_router)
 app.include_router(review_router)
+app.include_router(sync_router)
 app.include_router(user_router) 
 
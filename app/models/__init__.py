@@ -1,13 +1,19 @@
 from app.models.accessibility_features import AccessibilityFeature
 from app.models.allergens import Allergens
+from app.models.backfill_checkpoints import BackfillCheckpoint
 from app.models.categories import Category
+from app.models.change_log import ChangeLog
 from app.models.dish_allergen import DishAllergen
 from app.models.dish_category import DishCategory
+from app.models.dish_search_documents import DishSearchDocument
 from app.models.dishes import Dish
 from app.models.establishment_category import EstablishmentCategory
 from app.models.establishments import Establishment
+from app.models.idempotency_keys import IdempotencyKey
+from app.models.jobs import Job
 from app.models.menus import Menu
 from app.models.reservations import Reservation
+from app.models.reservations_archive import ReservationArchive
 from app.models.reviews import Review
 from app.models.user_allergen import UserAllergen
 from app.models.users import User
@@ -15,14 +21,20 @@ from app.models.users import User
 __all__ = [
     "AccessibilityFeature",
     "Allergens",
+    "BackfillCheckpoint",
     "Category",
+    "ChangeLog",
     "Dish",
     "DishAllergen",
     "DishCategory",
+    "DishSearchDocument",
     "Establishment",
     "EstablishmentCategory",
+    "IdempotencyKey",
+    "Job",
     "Menu",
     "Reservation",
+    "ReservationArchive",
     "Review",
     "User",
     "UserAllergen",
@@ -4,9 +4,12 @@ from app.database import Base
 
 class AccessibilityFeature(Base):
     __tablename__ = "accessibility_features"
+    __table_args__ = (
+        Index("ix_accessibility_features_establishment_id_name", "establishment_id", "name"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    establishment_id = Column(Integer, ForeignKey("establishments.establishment_id"), nullable=False)
+    establishment_id = Column(Integer, ForeignKey("establishments.establishment_id", ondelete="CASCADE"), nullable=False)
 
     name = Column(String(32), nullable=False)
     description = Column(Text)
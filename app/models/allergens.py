@@ -8,5 +8,5 @@ class Allergens(Base):
     allergen_id = Column(Integer, primary_key=True, index=True)
     name = Column(String(32), nullable=False)
 
-    dishes = relationship("DishAllergen", back_populates="allergen")
-    users = relationship("UserAllergen", back_populates="allergen")
+    dishes = relationship("DishAllergen", back_populates="allergen", cascade="save-update, merge, delete", passive_deletes=True)
+    users = relationship("UserAllergen", back_populates="allergen", cascade="save-update, merge, delete", passive_deletes=True)
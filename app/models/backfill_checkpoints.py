@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from app.database import Base
+
+class BackfillCheckpoint(Base):
+    """Progreso de un backfill por lotes: última clave procesada para poder reanudarlo"""
+    __tablename__ = "backfill_checkpoints"
+
+    name = Column(String(64), primary_key=True)
+    # Última clave primaria procesada, como lista JSON (la PK puede ser compuesta)
+    last_key = Column(Text, nullable=True)
+    rows_processed = Column(Integer, nullable=False, default=0)
+    batches = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    completed_at = Column(DateTime(timezone=True), nullable=True)
@@ -10,7 +10,7 @@ class Category(Base):
     description = Column(Text, nullable=True)
 
     # Relación con platos (dishes)
-    dishes = relationship("DishCategory", back_populates="category")
+    dishes = relationship("DishCategory", back_populates="category", cascade="save-update, merge, delete", passive_deletes=True)
 
     # Relación con establecimientos
-    establishments = relationship("EstablishmentCategory", back_populates="category")
+    establishments = relationship("EstablishmentCategory", back_populates="category", cascade="save-update, merge, delete", passive_deletes=True)
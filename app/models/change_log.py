@@ -0,0 +1,128 @@
+"""
+Registro de cambios del catálogo para la sincronización incremental (GET /sync?since=).
+
+Cada alta, modificación o baja de las tablas de TRACKED añade una fila con un change_id
+creciente; las bajas quedan como lápidas (deleted = true). La tabla la rellenan triggers de la
+base de datos, así que también se registran los UPDATE en bloque y los borrados en cascada.
+
+En PostgreSQL los change_id no se confirman en orden (dos transacciones concurrentes), así que
+cada fila guarda además el xid de la transacción que la escribió (txid) y /sync recorre el
+registro en orden (txid, change_id) sin pasar de la transacción más antigua aún en curso: lo
+que queda por debajo ya no puede cambiar. En SQLite las escrituras van de una en una y txid es 0.
+"""
+from typing import Dict, List, Tuple
+
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Index, Integer, String, event, func, text
+from app.database import Base
+
+# Tabla → (entidad, columna con su ID); la entidad es el nombre con el que sale en /sync.
+# La migración 0009 tiene su propia copia de estas tablas y triggers: un cambio aquí pide otra migración
+TRACKED: Dict[str, Tuple[str, str]] = {
+    "establishments": ("establishments", "establishment_id"),
+    "menus": ("menus", "menu_id"),
+    "dishes": ("dishes", "dish_id"),
+    "categories": ("categories", "category_id"),
+    "allergens": ("allergens", "allergen_id"),
+}
+# Tablas de asociación: cualquier cambio cuenta como modificación de la entidad padre
+LINKS: Dict[str, Tuple[str, str]] = {
+    "dish_category": ("dishes", "dish_id"),
+    "dish_allergen": ("dishes", "dish_id"),
+    "establishment_category": ("establishments", "establishment_id"),
+}
+
+
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+    __table_args__ = (
+        # Compactación: entradas anteriores de la misma entidad
+        Index("ix_change_log_entity_entity_id", "entity", "entity_id", "change_id"),
+        # Orden de /sync
+        Index("ix_change_log_txid_change_id", "txid", "change_id"),
+    )
+
+    change_id = Column(Integer, primary_key=True)
+    entity = Column(String(32), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False, server_default=text("false"))
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # xid de la transacción que escribió la fila (PostgreSQL; 0 en SQLite y en la carga inicial)
+    txid = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
+
+
+POSTGRESQL_FUNCTIONS = [
+    """
+    CREATE OR REPLACE FUNCTION change_log_row() RETURNS trigger AS $$
+    DECLARE
+        target jsonb;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            target := to_jsonb(OLD);
+        ELSE
+            target := to_jsonb(NEW);
+        END IF;
+        -- Tercer argumento 'link': tabla de asociación, la entidad padre sigue existiendo
+        INSERT INTO change_log (entity, entity_id, deleted, txid)
+        VALUES (
+            TG_ARGV[0], (target ->> TG_ARGV[1])::integer, TG_OP = 'DELETE' AND TG_NARGS = 2,
+            pg_current_xact_id()::text::bigint
+        );
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+
+def _targets() -> List[Tuple[str, str, str, bool]]:
+    return [(table, entity, column, False) for table, (entity, column) in TRACKED.items()] + [
+        (table, entity, column, True) for table, (entity, column) in LINKS.items()
+    ]
+
+
+def create_triggers_ddl(dialect: str) -> List[str]:
+    statements = []
+    if dialect == "postgresql":
+        statements.extend(POSTGRESQL_FUNCTIONS)
+        for table, entity, column, link in _targets():
+            arguments = f"'{entity}', '{column}'" + (", 'link'" if link else "")
+            statements.append(
+                f"CREATE TRIGGER {table}_change_log AFTER INSERT OR UPDATE OR DELETE ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION change_log_row({arguments})"
+            )
+    elif dialect == "sqlite":
+        for table, entity, column, link in _targets():
+            for operation, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+                deleted = int(operation == "DELETE" and not link)
+                statements.append(
+                    f"CREATE TRIGGER {table}_change_log_{operation.lower()} AFTER {operation} ON {table} "
+                    f"BEGIN INSERT INTO change_log (entity, entity_id, deleted) "
+                    f"VALUES ('{entity}', {row}.{column}, {deleted}); END"
+                )
+    return statements
+
+
+def drop_triggers_ddl(dialect: str) -> List[str]:
+    statements = []
+    if dialect == "postgresql":
+        for table, *_ in _targets():
+            statements.append(f"DROP TRIGGER IF EXISTS {table}_change_log ON {table}")
+        statements.append("DROP FUNCTION IF EXISTS change_log_row()")
+    elif dialect == "sqlite":
+        for table, *_ in _targets():
+            for operation in ("insert", "update", "delete"):
+                statements.append(f"DROP TRIGGER IF EXISTS {table}_change_log_{operation}")
+    return statements
+
+
+# create_all (tests, entornos sin Alembic): los triggers se crean después de todas las tablas
+@event.listens_for(Base.metadata, "after_create")
+def _create_triggers(target, connection, **kw):
+    for statement in create_triggers_ddl(connection.dialect.name):
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_triggers(target, connection, **kw):
+    for statement in drop_triggers_ddl(connection.dialect.name):
+        connection.exec_driver_sql(statement)
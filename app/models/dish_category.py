@@ -1,12 +1,16 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class DishCategory(Base):
   __tablename__ = "dish_category"
+  __table_args__ = (
+    # La PK (dish_id, category_id) no sirve para buscar por categoría
+    Index("ix_dish_category_category_id_dish_id", "category_id", "dish_id"),
+  )
 
-  dish_id = Column(Integer, ForeignKey("dishes.dish_id"), primary_key=True)
-  category_id = Column(Integer, ForeignKey("categories.category_id"), primary_key=True)
+  dish_id = Column(Integer, ForeignKey("dishes.dish_id", ondelete="CASCADE"), primary_key=True)
+  category_id = Column(Integer, ForeignKey("categories.category_id", ondelete="CASCADE"), primary_key=True)
 
   dish = relationship("Dish", back_populates="categories")
   category = relationship("Category", back_populates="dishes")
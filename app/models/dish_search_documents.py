@@ -0,0 +1,59 @@
+from sqlalchemy import Column, Index, Integer, String, Float, ForeignKey, Text, Time
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator
+from app.database import Base
+
+
+class IdList(TypeDecorator):
+    """
+    Lista de IDs enteros: integer[] en PostgreSQL (filtrable con && y un índice GIN) y texto
+    delimitado por comas (",1,4,", filtrable con LIKE '%,4,%', sin índice) en otros motores.
+    """
+    impl = Text
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.ARRAY(Integer))
+        return dialect.type_descriptor(Text())
+
+    def process_bind_param(self, value, dialect):
+        ids = sorted(set(value or []))
+        if dialect.name == "postgresql":
+            return ids
+        return "," + "".join(f"{i}," for i in ids)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return []
+        if dialect.name == "postgresql":
+            return list(value)
+        return [int(i) for i in value.split(",") if i]
+
+
+class DishSearchDocument(Base):
+    """Documento de búsqueda desnormalizado: una fila por plato con todo lo necesario para filtrar"""
+    __tablename__ = "dish_search_documents"
+    __table_args__ = (
+        # Filtros por categorías y alérgenos (&&) en PostgreSQL; en SQLite LIKE no usa el índice
+        Index("ix_dish_search_documents_category_ids", "category_ids", postgresql_using="gin"),
+        Index("ix_dish_search_documents_allergen_ids", "allergen_ids", postgresql_using="gin"),
+    )
+
+    dish_id = Column(Integer, ForeignKey("dishes.dish_id", ondelete="CASCADE"), primary_key=True)
+    menu_id = Column(Integer)
+    establishment_id = Column(Integer, index=True)
+    name = Column(String(32), nullable=False)
+    description = Column(Text, nullable=True)
+    price = Column(Float, nullable=False, index=True)
+    img = Column(String(255), nullable=True)
+
+    # Texto en minúsculas: plato + descripción + categorías + establecimiento
+    search_text = Column(Text, nullable=False, default="")
+    # Sin límite de tamaño: un plato puede tener cualquier número de categorías y alérgenos
+    category_ids = Column(IdList, nullable=False, default=list)
+    allergen_ids = Column(IdList, nullable=False, default=list)
+
+    # Horario del establecimiento (para "abiertos a esta hora")
+    opening_hour = Column(Time)
+    closing_hour = Column(Time)
@@ -6,7 +6,7 @@ class Dish(Base):
     __tablename__ = 'dishes'
 
     dish_id = Column(Integer, primary_key=True, index=True)
-    menu_id = Column(Integer, ForeignKey('menus.menu_id'))
+    menu_id = Column(Integer, ForeignKey('menus.menu_id', ondelete="CASCADE"), index=True)
     name = Column(String(32), nullable=False)
     description = Column(Text, nullable=True)
     price = Column(Float, nullable=False)
@@ -14,5 +14,5 @@ class Dish(Base):
 
     # Relaciones
     menu = relationship("Menu", back_populates="dishes")
-    categories = relationship("DishCategory", back_populates="dish")
-    allergens = relationship("DishAllergen", back_populates="dish")
+    categories = relationship("DishCategory", back_populates="dish", cascade="save-update, merge, delete", passive_deletes=True)
+    allergens = relationship("DishAllergen", back_populates="dish", cascade="save-update, merge, delete", passive_deletes=True)
@@ -1,12 +1,16 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class EstablishmentCategory(Base):
   __tablename__ = "establishment_category"
+  __table_args__ = (
+    # La PK (establishment_id, category_id) no sirve para buscar por categoría
+    Index("ix_establishment_category_category_id_establishment_id", "category_id", "establishment_id"),
+  )
 
-  establishment_id = Column(Integer, ForeignKey("establishments.establishment_id"), primary_key=True)
-  category_id = Column(Integer, ForeignKey("categories.category_id"), primary_key=True)
+  establishment_id = Column(Integer, ForeignKey("establishments.establishment_id", ondelete="CASCADE"), primary_key=True)
+  category_id = Column(Integer, ForeignKey("categories.category_id", ondelete="CASCADE"), primary_key=True)
 
   establishment = relationship("Establishment", back_populates="categories")
   category = relationship("Category", back_populates="establishments")
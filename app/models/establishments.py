@@ -19,8 +19,8 @@ class Establishment(Base):
   logo = Column(String(255))
 
   # Relaciones
-  menus = relationship("Menu", back_populates="establishment")
-  reservations = relationship("Reservation", back_populates="establishment")
-  reviews = relationship("Review", back_populates="establishment")
-  categories = relationship("EstablishmentCategory", back_populates="establishment")
-  accessibility_features = relationship("AccessibilityFeature", back_populates="establishment")
+  menus = relationship("Menu", back_populates="establishment", cascade="save-update, merge, delete", passive_deletes=True)
+  reservations = relationship("Reservation", back_populates="establishment", cascade="save-update, merge, delete", passive_deletes=True)
+  reviews = relationship("Review", back_populates="establishment", cascade="save-update, merge, delete", passive_deletes=True)
+  categories = relationship("EstablishmentCategory", back_populates="establishment", cascade="save-update, merge, delete", passive_deletes=True)
+  accessibility_features = relationship("AccessibilityFeature", back_populates="establishment", cascade="save-update, merge, delete", passive_deletes=True)
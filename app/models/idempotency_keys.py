@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from app.database import Base
+
+class IdempotencyKey(Base):
+    """Primera respuesta de una petición con Idempotency-Key, para repetirla en los reintentos"""
+    __tablename__ = "idempotency_keys"
+
+    # Endpoint ("reservas", "resenas") + usuario + clave enviada por el cliente
+    scope = Column(String(32), primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    key = Column(String(255), primary_key=True)
+
+    # Huella del cuerpo de la petición: la misma clave con otro cuerpo es un error del cliente
+    request_hash = Column(String(64), nullable=False)
+    # NULL mientras la petición original está en curso (como mucho IDEMPOTENCY_LEASE_SECONDS desde created_at)
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+
+    # Momento en que se reservó la clave: inicio del plazo de la petición en curso
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,31 @@
+import enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index
+from app.database import Base
+
+class JobStatus(enum.Enum):
+    pending = "pending"
+    running = "running"
+    failed = "failed"
+
+class Job(Base):
+    """Tarea en segundo plano (outbox): se escribe en la misma transacción que el cambio que la origina"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Siguientes tareas listas para ejecutarse
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+    job_id = Column(Integer, primary_key=True)
+    kind = Column(String(64), nullable=False)
+    # Datos de la tarea como JSON
+    payload = Column(Text, nullable=False)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.pending)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    # No se ejecuta antes de esta fecha (reintentos con espera)
+    run_at = Column(DateTime(timezone=True), nullable=False)
+    # Worker que la tiene reservada y desde cuándo (se libera si se queda colgada)
+    locked_by = Column(String(32), nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
@@ -6,9 +6,9 @@ class Menu(Base):
     __tablename__ = 'menus'
 
     menu_id = Column(Integer, primary_key=True, index=True)
-    establishment_id = Column(Integer, ForeignKey('establishments.establishment_id'))
+    establishment_id = Column(Integer, ForeignKey('establishments.establishment_id', ondelete="CASCADE"), index=True)
     title = Column(String(32), nullable=False)
 
     # Relaciones
     establishment = relationship("Establishment", back_populates="menus")
-    dishes = relationship("Dish", back_populates="menu")
+    dishes = relationship("Dish", back_populates="menu", cascade="save-update, merge, delete", passive_deletes=True)
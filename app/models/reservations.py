@@ -11,11 +11,15 @@ class ReservationStatus(enum.Enum):
 
 class Reservation(Base):
   __tablename__ = "reservations"
+  __table_args__ = (
+    # Reservas de un establecimiento, opcionalmente por rango de fechas
+    Index("ix_reservations_establishment_id_date", "establishment_id", "date"),
+  )
 
   reservation_id = Column(Integer, primary_key=True, index=True)
-  user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
-  establishment_id = Column(Integer, ForeignKey("establishments.establishment_id"), nullable=False)
-  date = Column(DateTime, nullable=False)
+  user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
+  establishment_id = Column(Integer, ForeignKey("establishments.establishment_id", ondelete="CASCADE"), nullable=False)
+  date = Column(DateTime, nullable=False, index=True)
   people_count = Column(Integer)
   status = Column(Enum(ReservationStatus), default=ReservationStatus.pending)
   created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
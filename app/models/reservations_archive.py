@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, DateTime, Enum, ForeignKey, Index
+from app.database import Base
+from app.models.reservations import ReservationStatus
+
+class ReservationArchive(Base):
+    """Reservas antiguas sacadas de `reservations` por el archivado (python -m app.archive)"""
+    __tablename__ = "reservations_archive"
+    __table_args__ = (
+        # Solo se consulta el historial de un usuario o de un establecimiento
+        Index("ix_reservations_archive_user_id_date", "user_id", "date"),
+        Index("ix_reservations_archive_establishment_id_date", "establishment_id", "date"),
+    )
+
+    # Mismo ID que tenía en reservations
+    reservation_id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    establishment_id = Column(Integer, ForeignKey("establishments.establishment_id", ondelete="CASCADE"), nullable=False)
+    date = Column(DateTime, nullable=False)
+    people_count = Column(Integer)
+    status = Column(Enum(ReservationStatus))
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), nullable=False)
+
+    # Para los esquemas de salida (ReservationsOut.archived)
+    archived = True
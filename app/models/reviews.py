@@ -16,8 +16,9 @@ class Review(Base):
     __tablename__ = "reviews"
 
     # Claves primarias compuestas (user_id + establishment_id)
-    user_id = Column(Integer, ForeignKey("users.user_id"), primary_key=True)
-    establishment_id = Column(Integer, ForeignKey("establishments.establishment_id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    # establishment_id es la segunda columna de la PK: necesita su propio índice
+    establishment_id = Column(Integer, ForeignKey("establishments.establishment_id", ondelete="CASCADE"), primary_key=True, index=True)
 
     rating = Column(Enum(RatingEnum), nullable=False)
     comment = Column(Text)
@@ -29,6 +29,6 @@ class User(Base):
   updated_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
 
   # Relaciones
-  reservations = relationship("Reservation", back_populates="user")
-  reviews = relationship("Review", back_populates="user")
-  allergens = relationship("UserAllergen", back_populates="user")
\ No newline at end of file
+  reservations = relationship("Reservation", back_populates="user", cascade="save-update, merge, delete", passive_deletes=True)
+  reviews = relationship("Review", back_populates="user", cascade="save-update, merge, delete", passive_deletes=True)
+  allergens = relationship("UserAllergen", back_populates="user", cascade="save-update, merge, delete", passive_deletes=True)
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+Sentencias precompiladas de las consultas más frecuentes.
+
+Se construyen una sola vez con bindparam, así SQLAlchemy reutiliza su clave de caché y la
+versión compilada en cada ejecución (y asyncpg su prepared statement) en lugar de volver a
+construir el select(...) en cada llamada. Uso:
+
+    await db.execute(queries.DISH_BY_ID, {"dish_id": dish_id})
+
+Los listados de solo lectura usan proyecciones: seleccionan solo las columnas del esquema *Out
+y devuelven dicts en lugar de entidades, sin identity map ni atributos instrumentados:
+
+    return queries.as_dicts(await db.execute(queries.DISHES_ROWS))
+"""
+from functools import lru_cache
+from typing import List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import Result, Select, bindparam, inspect, select
+
+from app.models.allergens import Allergens
+from app.models.categories import Category
+from app.models.dishes import Dish
+from app.models.establishments import Establishment
+from app.models.menus import Menu
+from app.models.reservations import Reservation
+from app.models.reservations_archive import ReservationArchive
+from app.models.reviews import Review
+from app.models.users import User
+from app.schemas.dishes import DishOut
+from app.schemas.establishment import EstablishmentOut
+from app.schemas.reservations import ReservationsOut
+from app.schemas.review import ReviewOut
+
+
+def project(model, schema: Type[BaseModel]) -> Select:
+    """select(...) de las columnas del modelo que aparecen en el esquema (las demás se quedan en su valor por defecto)"""
+    keys = [attr.key for attr in inspect(model).column_attrs if attr.key in schema.model_fields]
+    return select(*(getattr(model, key) for key in keys))
+
+
+@lru_cache(maxsize=256)
+def narrow(statement: Select, fields: Optional[Tuple[str, ...]]) -> Select:
+    """La misma proyección (con sus WHERE) reducida a las columnas de `fields` (sparse fieldsets)"""
+    if fields is None:
+        return statement
+    return statement.with_only_columns(*(column for column in statement.selected_columns if column.key in fields))
+
+
+def as_dicts(result: Result) -> List[dict]:
+    """Filas de una proyección como dicts: Pydantic los valida más rápido que leyendo atributos de un Row"""
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+# ---------- POR CLAVE PRIMARIA ----------
+ALLERGEN_BY_ID = select(Allergens).where(Allergens.allergen_id == bindparam("allergen_id"))
+CATEGORY_BY_ID = select(Category).where(Category.category_id == bindparam("category_id"))
+DISH_BY_ID = select(Dish).where(Dish.dish_id == bindparam("dish_id"))
+ESTABLISHMENT_BY_ID = select(Establishment).where(Establishment.establishment_id == bindparam("establishment_id"))
+MENU_BY_ID = select(Menu).where(Menu.menu_id == bindparam("menu_id"))
+RESERVATION_BY_ID = select(Reservation).where(Reservation.reservation_id == bindparam("reservation_id"))
+REVIEW_BY_KEY = select(Review).where(
+    Review.user_id == bindparam("user_id"),
+    Review.establishment_id == bindparam("establishment_id"),
+)
+USER_BY_ID = select(User).where(User.user_id == bindparam("user_id"))
+
+# ---------- BÚSQUEDAS FRECUENTES ----------
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+MENUS_BY_ESTABLISHMENT = select(Menu).where(Menu.establishment_id == bindparam("establishment_id"))
+DISHES_BY_MENU = select(Dish).where(Dish.menu_id == bindparam("menu_id"))
+RESERVATIONS_BY_USER = select(Reservation).where(Reservation.user_id == bindparam("user_id"))
+RESERVATIONS_BY_ESTABLISHMENT = select(Reservation).where(
+    Reservation.establishment_id == bindparam("establishment_id")
+)
+ARCHIVED_RESERVATIONS_BY_USER = select(ReservationArchive).where(ReservationArchive.user_id == bindparam("user_id"))
+ARCHIVED_RESERVATIONS_BY_ESTABLISHMENT = select(ReservationArchive).where(
+    ReservationArchive.establishment_id == bindparam("establishment_id")
+)
+REVIEWS_BY_USER = select(Review).where(Review.user_id == bindparam("user_id"))
+
+# ---------- LISTADOS (proyecciones: filas, no entidades) ----------
+DISHES_ROWS = project(Dish, DishOut)
+ESTABLISHMENTS_ROWS = project(Establishment, EstablishmentOut)
+RESERVATIONS_ROWS = project(Reservation, ReservationsOut)
+REVIEWS_BY_ESTABLISHMENT_ROWS = project(Review, ReviewOut).where(
+    Review.establishment_id == bindparam("establishment_id")
+)
+
+# ---------- VARIOS IDS DE UNA VEZ (multi-get) ----------
+DISHES_BY_IDS = DISHES_ROWS.where(Dish.dish_id.in_(bindparam("ids", expanding=True)))
+ESTABLISHMENTS_BY_IDS = ESTABLISHMENTS_ROWS.where(Establishment.establishment_id.in_(bindparam("ids", expanding=True)))
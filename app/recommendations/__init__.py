@@ -0,0 +1,19 @@
+"""
+Recomendaciones de platos por usuario ("platos que te pueden gustar") a partir de la
+co-ocurrencia de establecimientos en reseñas y reservas. El top-N de cada usuario se
+precalcula (al arrancar, cada RECOMMENDATIONS_REFRESH_SECONDS o con python -m app.recommendations)
+y GET /platos/recomendados/{user_id} solo lo consulta.
+"""
+from app.recommendations.model import Catalog, Interactions, RecommendationIndex, build_index
+from app.recommendations.service import get_index, rebuild, reset, run_refresh_loop
+
+__all__ = [
+    "Catalog",
+    "Interactions",
+    "RecommendationIndex",
+    "build_index",
+    "get_index",
+    "rebuild",
+    "reset",
+    "run_refresh_loop",
+]
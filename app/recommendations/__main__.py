@@ -0,0 +1,52 @@
+"""
+Reconstrucción de las recomendaciones fuera de la API (para medir cuánto tarda o revisar
+las de un usuario):
+
+    python -m app.recommendations
+    python -m app.recommendations --user 42 --limit 10
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from typing import List, Optional
+
+from app.database import SessionLocal, engine
+from app.recommendations import rebuild
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.recommendations", description="Recomendaciones de platos")
+    parser.add_argument("--user", type=int, default=None, help="Mostrar las recomendaciones de este usuario")
+    parser.add_argument("--limit", type=int, default=10)
+    return parser.parse_args(argv)
+
+
+async def run_command(args: argparse.Namespace) -> int:
+    try:
+        async with SessionLocal() as db:
+            index = await rebuild(db)
+        print(
+            f"{len(index.by_user)} usuarios con recomendaciones, {index.interactions} interacciones, "
+            f"{index.build_seconds:.2f}s"
+        )
+        if args.user is not None:
+            source, ranked, scores = index.ranked(args.user)
+            print(f"Usuario {args.user} ({source}):")
+            for position, dish_id in enumerate(ranked[: args.limit]):
+                score = f"{scores[position]:.4f}" if scores is not None else "-"
+                print(f"  plato {dish_id}: {score}")
+    finally:
+        await engine.dispose()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    engine.echo = False
+    return asyncio.run(run_command(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+Modelo de recomendación de platos (sin base de datos: recibe y devuelve arrays).
+
+- R: matriz dispersa usuarios x establecimientos con el peso de cada interacción
+  (reseñas altas y reservas no canceladas).
+- C = Rnᵀ·Rn: co-ocurrencia coseno establecimiento x establecimiento (Rn con las columnas
+  normalizadas), sin la diagonal y con solo los `neighbors` vecinos más fuertes por fila.
+- Puntuación de un plato para un usuario: la de su establecimiento (r·C + self_weight·r),
+  multiplicada por 1 + category_boost · afinidad del usuario con las categorías del plato
+  (las de los establecimientos con los que ha interactuado). Los platos con alguno de sus
+  alérgenos puntúan -inf.
+
+Las interacciones se registran por establecimiento, así que la matriz de co-ocurrencia es
+de establecimientos (miles de filas) y no de platos: cabe en memoria y se calcula rápido
+aunque haya millones de interacciones.
+"""
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+
+@dataclass
+class Interactions:
+    """Una fila por interacción (se suman las repetidas)"""
+    user_ids: np.ndarray
+    establishment_ids: np.ndarray
+    weights: np.ndarray
+
+
+@dataclass
+class Catalog:
+    dish_ids: np.ndarray
+    # Establecimiento de cada plato (a través de su menú)
+    dish_establishment_ids: np.ndarray
+    # Pares (plato, categoría), (plato, alérgeno) y (usuario, alérgeno)
+    dish_categories: Tuple[np.ndarray, np.ndarray]
+    dish_allergens: Tuple[np.ndarray, np.ndarray]
+    user_allergens: Tuple[np.ndarray, np.ndarray]
+
+
+@dataclass
+class RecommendationIndex:
+    """Top-N precalculado: IDs de plato ordenados por puntuación para cada usuario"""
+    by_user: Dict[int, np.ndarray]
+    scores: Dict[int, np.ndarray]
+    # Para usuarios sin interacciones: platos de los establecimientos con más interacciones
+    popular: np.ndarray
+    interactions: int = 0
+    build_seconds: float = 0.0
+    built_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def ranked(self, user_id: int) -> Tuple[str, np.ndarray, Optional[np.ndarray]]:
+        """("personal" | "popular", IDs de plato ordenados, puntuaciones)"""
+        dish_ids = self.by_user.get(user_id)
+        if dish_ids is None:
+            return "popular", self.popular, None
+        return "personal", dish_ids, self.scores[user_id]
+
+
+def _index_of(values: np.ndarray, universe: np.ndarray) -> np.ndarray:
+    """Posición de cada valor en `universe` (ordenado); -1 si no está"""
+    if len(universe) == 0:
+        return np.full(len(values), -1, dtype=np.int64)
+    positions = np.minimum(np.searchsorted(universe, values), len(universe) - 1)
+    return np.where(universe[positions] == values, positions, -1)
+
+
+def _pairs_matrix(rows: np.ndarray, cols: np.ndarray, shape: Tuple[int, int]) -> sparse.csr_matrix:
+    """Matriz binaria a partir de pares (fila, columna) ya convertidos a posiciones; ignora los -1"""
+    keep = (rows >= 0) & (cols >= 0)
+    matrix = sparse.csr_matrix(
+        (np.ones(int(keep.sum()), dtype=np.float32), (rows[keep], cols[keep])), shape=shape
+    )
+    matrix.data[:] = 1.0  # los pares repetidos cuentan una vez
+    return matrix
+
+
+def _top_per_row(rows: np.ndarray, values: np.ndarray, k: int) -> np.ndarray:
+    """Posiciones de los k mayores valores de cada fila, ordenadas por fila y valor descendente"""
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    # Una sola clave (fila, -valor) para ordenar con un argsort en vez de un lexsort de dos
+    top = values.max()
+    key = rows.astype(np.float64) * (top - values.min() + 1.0) + (top - values)
+    order = np.argsort(key, kind="stable")
+    sorted_rows = rows[order]
+    # Puesto dentro de su fila: posición menos la de la primera entrada de la fila
+    starts = np.flatnonzero(np.r_[True, sorted_rows[1:] != sorted_rows[:-1]])
+    rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    return order[rank < k]
+
+
+def _keep_top_per_row(matrix: sparse.csr_matrix, k: int) -> sparse.csr_matrix:
+    """Dejar solo los k valores mayores de cada fila"""
+    coo = matrix.tocoo()
+    keep = _top_per_row(coo.row, coo.data, k)
+    return sparse.csr_matrix((coo.data[keep], (coo.row[keep], coo.col[keep])), shape=matrix.shape)
+
+
+def cooccurrence(ratings: sparse.csr_matrix, neighbors: int) -> sparse.csr_matrix:
+    """Similitud coseno entre columnas (establecimientos), sin diagonal y podada a `neighbors` por fila"""
+    norms = np.sqrt(np.asarray(ratings.multiply(ratings).sum(axis=0)).ravel())
+    inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    normalized = ratings @ sparse.diags(inverse.astype(np.float32))
+    similarity = (normalized.T @ normalized).tocsr()
+    similarity.setdiag(0.0)
+    similarity.eliminate_zeros()
+    return _keep_top_per_row(similarity, neighbors)
+
+
+def build_index(
+    interactions: Interactions,
+    catalog: Catalog,
+    top_n: int = 50,
+    neighbors: int = 50,
+    category_boost: float = 0.5,
+    self_weight: float = 0.5,
+    candidates: int = 50,
+    chunk_size: int = 1024,
+) -> RecommendationIndex:
+    started = time.monotonic()
+    users = np.unique(interactions.user_ids)
+    establishments = np.unique(np.concatenate([interactions.establishment_ids, catalog.dish_establishment_ids]))
+    categories = np.unique(catalog.dish_categories[1])
+    allergens = np.unique(np.concatenate([catalog.dish_allergens[1], catalog.user_allergens[1]]))
+    dish_ids = catalog.dish_ids
+    n_users, n_establishments, n_dishes = len(users), len(establishments), len(dish_ids)
+
+    ratings = sparse.csr_matrix(
+        (
+            interactions.weights.astype(np.float32),
+            (_index_of(interactions.user_ids, users), _index_of(interactions.establishment_ids, establishments)),
+        ),
+        shape=(n_users, n_establishments),
+    )
+    similarity = cooccurrence(ratings, neighbors)
+
+    # Platos: establecimiento, categorías y alérgenos como posiciones
+    dish_order = np.argsort(dish_ids)
+    sorted_dishes = dish_ids[dish_order]
+
+    def dish_index(values: np.ndarray) -> np.ndarray:
+        positions = _index_of(values, sorted_dishes)
+        return np.where(positions >= 0, dish_order[np.maximum(positions, 0)], -1)
+
+    dish_establishment = _index_of(catalog.dish_establishment_ids, establishments)
+    dish_category = _pairs_matrix(
+        dish_index(catalog.dish_categories[0]), _index_of(catalog.dish_categories[1], categories),
+        (n_dishes, len(categories)),
+    )
+    dish_allergen = _pairs_matrix(
+        dish_index(catalog.dish_allergens[0]), _index_of(catalog.dish_allergens[1], allergens),
+        (n_dishes, len(allergens)),
+    )
+    user_allergen = _pairs_matrix(
+        _index_of(catalog.user_allergens[0], users), _index_of(catalog.user_allergens[1], allergens),
+        (n_users, len(allergens)),
+    )
+
+    # Categorías de cada establecimiento: proporción de sus platos en cada una
+    has_establishment = dish_establishment >= 0
+    establishment_dishes = sparse.csr_matrix(
+        (
+            np.ones(int(has_establishment.sum()), dtype=np.float32),
+            (dish_establishment[has_establishment], np.flatnonzero(has_establishment)),
+        ),
+        shape=(n_establishments, n_dishes),
+    )
+    establishment_category = establishment_dishes @ dish_category
+    dish_counts = np.asarray(establishment_dishes.sum(axis=1)).ravel()
+    establishment_category = sparse.diags(
+        np.divide(1.0, dish_counts, out=np.zeros_like(dish_counts), where=dish_counts > 0)
+    ) @ establishment_category
+    dish_category_count = np.maximum(np.asarray(dish_category.sum(axis=1)).ravel(), 1.0)
+    dish_category_mean = (sparse.diags(1.0 / dish_category_count) @ dish_category).tocsr()
+
+    # Se puntúan solo los pares (usuario, plato) de sus `candidates` mejores establecimientos:
+    # nunca se materializa una matriz densa usuarios x platos
+    by_user: Dict[int, np.ndarray] = {}
+    scores: Dict[int, np.ndarray] = {}
+    for start in range(0, n_users, chunk_size):
+        chunk = ratings[start:start + chunk_size]
+        establishment_scores = _keep_top_per_row((chunk @ similarity + self_weight * chunk).tocsr(), candidates)
+        pairs = (establishment_scores @ establishment_dishes).tocoo()
+        rows, dishes, values = pairs.row, pairs.col, pairs.data
+
+        # Afinidad del usuario con las categorías de cada plato candidato
+        affinity = (chunk @ establishment_category).toarray()
+        peak = affinity.max(axis=1, keepdims=True, initial=0.0)
+        affinity = np.divide(affinity, peak, out=np.zeros_like(affinity), where=peak > 0)
+        categories_of = dish_category_mean[dishes].tocoo()
+        match = np.bincount(
+            categories_of.row,
+            weights=categories_of.data * affinity[rows[categories_of.row], categories_of.col],
+            minlength=len(dishes),
+        )
+        values = values * (1.0 + category_boost * match)
+
+        # Fuera los platos con alguno de los alérgenos del usuario
+        user_blocks = user_allergen[start:start + chunk_size].toarray() > 0
+        allergens_of = dish_allergen[dishes].tocoo()
+        blocked = np.bincount(
+            allergens_of.row,
+            weights=user_blocks[rows[allergens_of.row], allergens_of.col],
+            minlength=len(dishes),
+        ) > 0
+        valid = ~blocked & (values > 0)
+        rows, dishes, values = rows[valid], dishes[valid], values[valid]
+
+        top = _top_per_row(rows, values, top_n)
+        rows, dishes, values = rows[top], dishes[top], values[top]
+        bounds = np.searchsorted(rows, np.arange(chunk.shape[0] + 1))
+        for row in range(chunk.shape[0]):
+            if bounds[row] == bounds[row + 1]:
+                continue
+            user_id = int(users[start + row])
+            by_user[user_id] = dish_ids[dishes[bounds[row]:bounds[row + 1]]]
+            scores[user_id] = values[bounds[row]:bounds[row + 1]].astype(np.float32)
+
+    # Populares: interacciones del establecimiento de cada plato
+    establishment_popularity = np.asarray(ratings.sum(axis=0)).ravel()
+    dish_popularity = np.where(has_establishment, establishment_popularity[np.maximum(dish_establishment, 0)], 0.0)
+    ranked = np.lexsort((dish_ids, -dish_popularity))
+    popular = dish_ids[ranked[dish_popularity[ranked] > 0]][: top_n * 4]
+
+    return RecommendationIndex(
+        by_user=by_user,
+        scores=scores,
+        popular=popular,
+        interactions=len(interactions.weights),
+        build_seconds=time.monotonic() - started,
+    )
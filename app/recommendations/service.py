@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database
+from app.config import settings
+from app.models.dish_allergen import DishAllergen
+from app.models.dish_category import DishCategory
+from app.models.dishes import Dish
+from app.models.menus import Menu
+from app.models.reservations import Reservation, ReservationStatus
+from app.models.reviews import Review, RatingEnum
+from app.models.user_allergen import UserAllergen
+from app.recommendations.model import Catalog, Interactions, RecommendationIndex, build_index
+from app.utils import metrics
+
+logger = logging.getLogger("app.recommendations")
+
+# Peso de cada interacción: solo cuentan las reseñas altas y las reservas no canceladas
+REVIEW_WEIGHTS = {RatingEnum.FOUR: 1.0, RatingEnum.FIVE: 2.0}
+RESERVATION_WEIGHT = 1.0
+
+BUILD_SECONDS = metrics.summary("recommendations_build_seconds", "Duración de cada reconstrucción de las recomendaciones")
+SERVED = metrics.counter("recommendations_served_total", "Recomendaciones servidas según su origen", ["source"])
+
+_index: Optional[RecommendationIndex] = None
+_lock = asyncio.Lock()
+
+metrics.gauge(
+    "recommendations_users", "Usuarios con recomendaciones personales precalculadas",
+    function=lambda: {(): len(_index.by_user) if _index is not None else 0},
+)
+
+
+def _array(values, dtype=np.int64) -> np.ndarray:
+    return np.fromiter(values, dtype=dtype)
+
+
+def _pairs(rows) -> tuple:
+    rows = list(rows)
+    return _array(row[0] for row in rows), _array(row[1] for row in rows)
+
+
+async def load_interactions(db: AsyncSession) -> Interactions:
+    reviews = (await db.execute(
+        select(Review.user_id, Review.establishment_id, Review.rating)
+        .where(Review.rating.in_(list(REVIEW_WEIGHTS)))
+    )).all()
+    reservations = (await db.execute(
+        select(Reservation.user_id, Reservation.establishment_id)
+        .where(or_(Reservation.status.is_(None), Reservation.status != ReservationStatus.cancelled))
+    )).all()
+    return Interactions(
+        user_ids=_array([row[0] for row in reviews] + [row[0] for row in reservations]),
+        establishment_ids=_array([row[1] for row in reviews] + [row[1] for row in reservations]),
+        weights=_array(
+            [REVIEW_WEIGHTS[row[2]] for row in reviews] + [RESERVATION_WEIGHT] * len(reservations), np.float32
+        ),
+    )
+
+
+async def load_catalog(db: AsyncSession) -> Catalog:
+    dishes = (await db.execute(
+        select(Dish.dish_id, Menu.establishment_id).join(Menu, Menu.menu_id == Dish.menu_id)
+    )).all()
+    return Catalog(
+        dish_ids=_array(row[0] for row in dishes),
+        dish_establishment_ids=_array(row[1] if row[1] is not None else -1 for row in dishes),
+        dish_categories=_pairs((await db.execute(select(DishCategory.dish_id, DishCategory.category_id))).all()),
+        dish_allergens=_pairs((await db.execute(select(DishAllergen.dish_id, DishAllergen.allergen_id))).all()),
+        user_allergens=_pairs((await db.execute(select(UserAllergen.user_id, UserAllergen.allergen_id))).all()),
+    )
+
+
+async def rebuild(db: AsyncSession) -> RecommendationIndex:
+    """Leer las interacciones y recalcular el top-N de todos los usuarios (el cálculo, en un hilo)"""
+    global _index
+    interactions = await load_interactions(db)
+    catalog = await load_catalog(db)
+    index = await asyncio.to_thread(
+        build_index,
+        interactions,
+        catalog,
+        top_n=settings.RECOMMENDATIONS_TOP_N,
+        neighbors=settings.RECOMMENDATIONS_NEIGHBORS,
+        category_boost=settings.RECOMMENDATIONS_CATEGORY_BOOST,
+    )
+    _index = index
+    BUILD_SECONDS.observe(index.build_seconds)
+    logger.info(
+        "Recomendaciones: %s usuarios, %s interacciones, %.2fs",
+        len(index.by_user), index.interactions, index.build_seconds,
+    )
+    return index
+
+
+async def get_index(db: AsyncSession) -> RecommendationIndex:
+    """Índice vigente; si aún no existe se construye (una sola vez aunque lleguen varias peticiones)"""
+    if _index is not None:
+        return _index
+    async with _lock:
+        if _index is None:
+            await rebuild(db)
+    return _index
+
+
+async def run_refresh_loop(interval: float) -> None:
+    """Reconstrucción periódica, leyendo de una réplica si hay"""
+    while True:
+        try:
+            session = await database.session_router.read_session()
+            async with session:
+                await rebuild(session)
+        except Exception:
+            logger.exception("No se pudieron reconstruir las recomendaciones")
+        await asyncio.sleep(interval)
+
+
+def reset() -> None:
+    global _index
+    _index = None
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, Path
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.accessibility_features import (
     AccessibilityFeatureCreate,
     AccessibilityFeatureUpdate,
@@ -20,14 +20,14 @@ router = APIRouter(prefix="/accessibilidad", tags=["Accesibilidad"])
 
 # Endpoints
 @router.get("/list", response_model=List[AccessibilityFeatureOut])
-async def list_accessibility_features(db: AsyncSession = Depends(get_db)):
+async def list_accessibility_features(db: AsyncSession = Depends(get_read_db)):
     """Listar todas las características de accesibilidad"""
     return await get_all_accessibility_features(db)
 
 @router.get("/{feature_id}", response_model=AccessibilityFeatureOut)
 async def get_accessibility_feature(
     feature_id: int = Path(..., description="ID de la característica de accesibilidad"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Mostrar información de una característica de accesibilidad específica"""
     return await get_accessibility_feature_by_id(db, feature_id)
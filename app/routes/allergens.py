@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, Path
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.allergens import AllergenCreate, AllergenUpdate, AllergenOut, AllergenMessageOut
 from app.controllers.allergens import *
 
@@ -17,7 +17,7 @@ async def create_allergen_route(
 
 @router.get("/", response_model=List[AllergenOut], summary="Listar todos los alérgenos")
 async def list_allergens(
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener lista de todos los alérgenos"""
     return await get_allergens(db)
@@ -25,7 +25,7 @@ async def list_allergens(
 @router.get("/{allergen_id}", response_model=AllergenOut, summary="Obtener alérgeno por ID")
 async def get_allergen(
     allergen_id: int = Path(..., title="ID del alérgeno"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener un alérgeno específico por su ID"""
     return await get_allergen_by_id(db, allergen_id)
@@ -33,7 +33,7 @@ async def get_allergen(
 @router.get("/dish/{dish_id}", response_model=List[AllergenOut], summary="Obtener alérgenos de un plato")
 async def get_dish_allergen(
     dish_id: int = Path(..., title="ID del plato"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener todos los alérgenos de un plato específico"""
     return await get_allergens_by_dish(db, dish_id)
@@ -41,7 +41,7 @@ async def get_dish_allergen(
 @router.get("/user/{user_id}", response_model=List[AllergenOut], summary="Obtener alérgenos de un usuario")
 async def get_user_allergen(
     user_id: int = Path(..., title="ID del usuario"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener todos los alérgenos asociados a un usuario"""
     return await get_allergens_by_user(db, user_id)
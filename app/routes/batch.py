@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Request
+
+from app.controllers.batch import run_batch
+from app.schemas.batch import BatchIn, BatchOut
+
+router = APIRouter(prefix="/batch", tags=["Batch"])
+
+
+# ---------- VARIAS LECTURAS EN UNA PETICIÓN ----------
+@router.post("/", response_model=BatchOut)
+async def batch(data: BatchIn, request: Request):
+    """Ejecutar varias subpeticiones GET de la API y devolver todas las respuestas juntas"""
+    return await run_batch(request, data.requests)
@@ -3,7 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.category import (
     CategoryCreate,
     CategoryUpdate,
@@ -32,7 +32,7 @@ from app.models.categories import Category
 router = APIRouter(prefix="/categorias", tags=["Categorías"])
 
 @router.get("/list", response_model=CategoryListOut)
-async def list_categorias(db: AsyncSession = Depends(get_db)):
+async def list_categorias(db: AsyncSession = Depends(get_read_db)):
     """Obtener lista de todas las categorías"""
     categories = await get_all_categories(db)
     return {"items": categories}
@@ -40,7 +40,7 @@ async def list_categorias(db: AsyncSession = Depends(get_db)):
 @router.get("/{categoria_id}", response_model=CategoryOut)
 async def get_categoria(
     categoria_id: int = Path(..., ge=1, description="ID de la categoría"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Obtener información de una categoría específica"""
     return await get_category_by_id(db, categoria_id)
@@ -88,7 +88,7 @@ async def delete_categoria(
 @router.get("/search/{name}", response_model=CategoryListOut)
 async def search_categorias(
     name: str = Path(..., description="Nombre o parte del nombre de la categoría"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Buscar categorías por nombre"""
     categories = await search_categories_by_name(db, name)
@@ -98,7 +98,7 @@ async def search_categorias(
 @router.get("/{categoria_id}/establecimientos", response_model=List[EstablishmentOut])
 async def get_establecimientos_by_categoria(
     categoria_id: int = Path(..., ge=1, description="ID de la categoría"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Obtener los establecimientos de una categoría"""
     return await get_establishments_by_category(db, categoria_id)
@@ -132,7 +132,7 @@ async def remove_categoria_from_establishment(
 @router.get("/{categoria_id}/platos", response_model=List[DishOut])
 async def get_platos_by_categoria(
     categoria_id: int = Path(..., ge=1, description="ID de la categoría"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Obtener los platos de una categoría"""
     return await get_dishes_by_category(db, categoria_id)
@@ -1,40 +1,99 @@
 from fastapi import APIRouter, Depends, Path, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
+from datetime import time
 
-from app.database import get_db
-from app.schemas.dishes import DishCreate, DishOut, DishUpdate
+from app.database import get_db, get_read_db
+from app.schemas.dishes import DishBatchOut, DishCreate, DishOut, DishUpdate, DishSearchOut, DishRecommendationsOut
 from app.schemas.category import MessageOut
 from app.schemas.allergens import AllergenOut
 from app.controllers.dishes import (
     get_all_dishes, 
-    get_dish_by_id, 
+    get_dish_by_id_cached, 
+    get_dishes_by_ids, 
     create_dish, 
     update_dish, 
     delete_dish,
-    get_dishes_by_menu,
+    get_dishes_by_menu_shared,
     get_dishes_price_gt,
     get_allergens_by_dish,
     add_allergen_to_dish,
     remove_allergen_from_dish
 ) 
+from app.controllers.dish_search import search_dishes
+from app.controllers.multi_get import parse_ids
+from app.controllers.recommendations import get_dish_recommendations
+from app.utils import fieldsets
 
 router = APIRouter(prefix="/platos", tags=["Platos"])
 
 # Listar platos → GET
 @router.get("/list", response_model=List[DishOut])
-async def list_platos(db: AsyncSession = Depends(get_db)):
+async def list_platos(
+    fields: Optional[str] = Query(None, description="Solo estos campos, separados por comas (p. ej. dish_id,name,price)"),
+    db: AsyncSession = Depends(get_read_db),
+):
     """Obtener lista de todos los platos"""
-    return await get_all_dishes(db)
+    selected = fieldsets.parse(fields, DishOut, "dish_id")
+    return fieldsets.respond(DishOut, selected, await get_all_dishes(db, selected))
+
+# Varios platos por ID → GET /platos?ids=1,2,3
+@router.get("/", response_model=DishBatchOut)
+async def get_platos_by_ids(
+    ids: List[str] = Query(..., description="IDs separados por comas (o ids repetido)"),
+    fields: Optional[str] = Query(None, description="Solo estos campos, separados por comas"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Obtener varios platos con una sola consulta, en el orden pedido"""
+    selected = fieldsets.parse(fields, DishOut, "dish_id")
+    return fieldsets.respond(DishOut, selected, await get_dishes_by_ids(db, parse_ids(ids), selected))
+
+# Buscar platos con filtros combinados → GET
+@router.get("/buscar", response_model=DishSearchOut)
+async def buscar_platos(
+    q: Optional[str] = Query(None, max_length=100, description="Texto a buscar en nombre, descripción, categorías y establecimiento"),
+    min_price: Optional[float] = Query(None, ge=0, description="Precio mínimo (inclusive)"),
+    max_price: Optional[float] = Query(None, ge=0, description="Precio máximo (inclusive)"),
+    category_ids: Optional[List[int]] = Query(None, description="Platos de cualquiera de estas categorías"),
+    exclude_allergen_ids: Optional[List[int]] = Query(None, description="Excluir platos con alguno de estos alérgenos"),
+    establishment_id: Optional[int] = Query(None, ge=1, description="ID del establecimiento"),
+    open_at: Optional[time] = Query(None, description="Solo establecimientos abiertos a esta hora (HH:MM)"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Buscar platos combinando precio, categorías, alérgenos, establecimiento y texto"""
+    return await search_dishes(
+        db,
+        q=q,
+        min_price=min_price,
+        max_price=max_price,
+        category_ids=category_ids,
+        exclude_allergen_ids=exclude_allergen_ids,
+        establishment_id=establishment_id,
+        open_at=open_at,
+        limit=limit,
+        offset=offset,
+    )
+
+# Platos recomendados para un usuario → GET
+@router.get("/recomendados/{user_id}", response_model=DishRecommendationsOut)
+async def recomendar_platos(
+    user_id: int = Path(..., ge=1, description="ID del usuario"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Platos que le pueden gustar al usuario según sus reseñas y reservas, sin sus alérgenos"""
+    return await get_dish_recommendations(db, user_id, limit)
 
 # Mostrar info de un plato → GET
 @router.get("/{plato_id}", response_model=DishOut)
 async def get_plato(
     plato_id: int = Path(..., ge=1, description="ID del plato"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Obtener información de un plato específico"""
-    return await get_dish_by_id(db, plato_id)
+    return await get_dish_by_id_cached(db, plato_id)
 
 # Crear platos → POST
 @router.post("/", response_model=DishOut, status_code=status.HTTP_201_CREATED)
@@ -68,16 +127,16 @@ async def delete_plato(
 @router.get("/menu/{menu_id}", response_model=List[DishOut])
 async def list_platos_by_menu(
     menu_id: int = Path(..., ge=1, description="ID del menú"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Obtener todos los platos de un menú específico"""
-    return await get_dishes_by_menu(db, menu_id)
+    return await get_dishes_by_menu_shared(db, menu_id)
 
 # Listar platos con precio mayor a → GET
 @router.get("/filter/price", response_model=List[DishOut])
 async def list_platos_price_gt(
     min_price: float = Query(..., ge=0, description="Precio mínimo"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Obtener platos con precio mayor al especificado"""
     return await get_dishes_price_gt(db, min_price)
@@ -86,7 +145,7 @@ async def list_platos_price_gt(
 @router.get("/{plato_id}/alergenos", response_model=List[AllergenOut])
 async def mostrar_alergenos(
     plato_id: int = Path(..., ge=1, description="ID del plato"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Obtener los alérgenos de un plato"""
     return await get_allergens_by_dish(db, plato_id)
@@ -120,7 +179,7 @@ async def eliminar_alergeno(
 @router.get("/search/{name}", response_model=List[DishOut])
 async def search_platos_by_name(
     name: str = Path(..., description="Nombre o parte del nombre del plato"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Buscar platos por nombre"""
     from app.controllers.dishes import search_dishes_by_name
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+from app.database import get_db, get_read_db
 from app.controllers.establishment import *
-from app.schemas.establishment import EstablishmentCreate, EstablishmentUpdate, EstablishmentOut
+from app.controllers.leaderboard import get_leaderboard, get_establishment_rank
+from app.controllers.live_events import stream_establishment_events
+from app.utils import fieldsets
+from app.schemas.establishment import (
+    EstablishmentCreate, EstablishmentUpdate, EstablishmentOut, LeaderboardOut, EstablishmentRankOut,
+    EstablishmentBatchIn, EstablishmentBatchOut,
+)
 
 router = APIRouter(prefix="/establishments", tags=["Establishments"])
 
@@ -15,13 +21,46 @@ async def create(data: EstablishmentCreate, db: AsyncSession = Depends(get_db)):
 
 # ---------- LEER ----------
 @router.get("/", response_model=List[EstablishmentOut])
-async def list_all(db: AsyncSession = Depends(get_db)):
-    return await get_establishments(db)
+async def list_all(
+    fields: Optional[str] = Query(None, description="Solo estos campos, separados por comas (p. ej. establishment_id,name,logo)"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    selected = fieldsets.parse(fields, EstablishmentOut, "establishment_id")
+    return fieldsets.respond(EstablishmentOut, selected, await get_establishments(db, selected))
+
+# ---------- LEER VARIOS (multi-get) ----------
+@router.post("/batch", response_model=EstablishmentBatchOut)
+async def get_batch(
+    data: EstablishmentBatchIn,
+    fields: Optional[str] = Query(None, description="Solo estos campos, separados por comas"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    selected = fieldsets.parse(fields, EstablishmentOut, "establishment_id")
+    return fieldsets.respond(EstablishmentOut, selected, await get_establishments_by_ids(db, data.ids, selected))
+
+# ---------- RANKING DE SOSTENIBILIDAD ----------
+@router.get("/ranking", response_model=LeaderboardOut)
+async def ranking(
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    category_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await get_leaderboard(db, limit, offset, category_id)
+
+@router.get("/{establishment_id}/ranking", response_model=EstablishmentRankOut)
+async def ranking_of(establishment_id: int, category_id: Optional[int] = None, db: AsyncSession = Depends(get_read_db)):
+    return await get_establishment_rank(db, establishment_id, category_id)
+
+# ---------- EVENTOS EN VIVO (SSE) ----------
+@router.get("/{establishment_id}/events")
+async def live_events(establishment_id: int, db: AsyncSession = Depends(get_read_db)):
+    return await stream_establishment_events(db, establishment_id)
 
 # ---------- LEER ----------
 @router.get("/{establishment_id}", response_model=EstablishmentOut)
-async def get_one(establishment_id: int, db: AsyncSession = Depends(get_db)):
-    return await get_establishment_by_id(db, establishment_id)
+async def get_one(establishment_id: int, db: AsyncSession = Depends(get_read_db)):
+    return await get_establishment_by_id_cached(db, establishment_id)
 
 # ---------- ACTUALIZAR ----------
 @router.patch("/{establishment_id}", response_model=EstablishmentOut)
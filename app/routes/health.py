@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+
+from app.controllers.warmup import liveness, readiness
+
+router = APIRouter(prefix="/health", tags=["Salud"])
+
+
+# ---------- SONDAS ----------
+@router.get("/live")
+async def live():
+    """El proceso responde"""
+    return liveness()
+
+@router.get("/ready")
+async def ready():
+    """La app terminó de calentarse y puede recibir tráfico (503 mientras tanto)"""
+    return readiness()
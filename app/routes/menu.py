@@ -1,14 +1,14 @@
 from fastapi import APIRouter, Depends, Path
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.menus import MenuCreate, MenuUpdate, MenuOut, MenuMessageOut
 from app.schemas.dishes import DishOut
 from app.controllers.menu import (
     create_menu_controller,
     get_menu_by_id,
-    get_menus_by_establishment,
-    get_dishes_by_menu,
+    get_menus_by_establishment_shared,
+    get_dishes_by_menu_shared,
     get_dishes_by_menu_and_category,
     get_dish_from_menu,
     update_menu_controller,
@@ -29,24 +29,24 @@ async def create_menu_item(
 @router.get("/{menu_id}", response_model=List[DishOut], summary="Listar todos los ítems de menú")
 async def list_all_menu_items(
     menu_id: int = Path(..., title="ID del menú"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener todos los platos de un menú específico"""
-    return await get_dishes_by_menu(db, menu_id)
+    return await get_dishes_by_menu_shared(db, menu_id)
 
 @router.get("/establecimiento/{establishment_id}", response_model=List[MenuOut], summary="Listar menus por establecimiento")
 async def list_items_by_establishment(
     establishment_id: int = Path(..., title="ID del establecimiento"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener todos los menús de un establecimiento"""
-    return await get_menus_by_establishment(db, establishment_id)
+    return await get_menus_by_establishment_shared(db, establishment_id)
 
 @router.get("/{menu_id}/categoria/{category_id}", response_model=List[DishOut], summary="Filtrar ítems por categoría")
 async def list_items_by_category(
     menu_id: int = Path(..., title="ID del menú"),
     category_id: int = Path(..., title="ID de la categoría"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Filtrar platos de un menú por categoría"""
     return await get_dishes_by_menu_and_category(db, menu_id, category_id)
@@ -55,7 +55,7 @@ async def list_items_by_category(
 async def get_menu_item(
     menu_id: int = Path(..., title="ID del menú"),
     item_id: int = Path(..., title="ID del ítem de menú"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Obtener detalle de un plato específico del menú"""
     return await get_dish_from_menu(db, menu_id, item_id)
@@ -77,5 +77,4 @@ async def delete_menu_item(
     db: AsyncSession = Depends(get_db)
 ):
     """Eliminar un menú"""
-    await delete_menu_controller(db, menu_id)
-    return {"message": f"Menú {menu_id} eliminado exitosamente"}
\ No newline at end of file
+    return await delete_menu_controller(db, menu_id)
\ No newline at end of file
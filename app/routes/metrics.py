@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.utils.metrics import REGISTRY
+
+router = APIRouter(tags=["Métricas"])
+
+
+# ---------- MÉTRICAS ----------
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Métricas del proceso en formato de texto de Prometheus"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
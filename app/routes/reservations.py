@@ -1,10 +1,11 @@
 # app/routers/reservas.py
-from fastapi import APIRouter, Depends, Path, HTTPException
+from fastapi import APIRouter, Depends, Header, Path, Query, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.reservations import ReservationsCreate, ReservationsUpdate, ReservationsOut, MessageOut
+from app.controllers import idempotency as idempotency_controller
 from app.controllers import reservations as reservations_controller
 
 router = APIRouter(prefix="/reservas", tags=["Reservas"])
@@ -13,14 +14,18 @@ router = APIRouter(prefix="/reservas", tags=["Reservas"])
 @router.post("/", response_model=ReservationsOut, status_code=201)
 async def registrar_reserva(
     reservation: ReservationsCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: AsyncSession = Depends(get_db)
 ):
     """Registrar una nueva reserva"""
-    return await reservations_controller.create_reservation(db, reservation)
+    return await idempotency_controller.run_idempotent(
+        db, "reservas", idempotency_key, reservation.user_id, reservation,
+        lambda: reservations_controller.create_reservation(db, reservation), ReservationsOut,
+    )
 
 # Listar reservas → GET
 @router.get("/list", response_model=List[ReservationsOut])
-async def list_reservas(db: AsyncSession = Depends(get_db)):
+async def list_reservas(db: AsyncSession = Depends(get_read_db)):
     """Obtener lista de todas las reservas"""
     return await reservations_controller.get_all_reservations(db)
 
@@ -28,7 +33,7 @@ async def list_reservas(db: AsyncSession = Depends(get_db)):
 @router.get("/{reserva_id}", response_model=ReservationsOut)
 async def get_reserva(
     reserva_id: int = Path(..., ge=1, description="ID de la reserva"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Obtener información de una reserva específica"""
     return await reservations_controller.get_reservation_by_id(db, reserva_id)
@@ -65,16 +70,18 @@ async def delete_reserva(
 @router.get("/usuario/{user_id}", response_model=List[ReservationsOut])
 async def get_reservas_by_user(
     user_id: int = Path(..., ge=1, description="ID del usuario"),
-    db: AsyncSession = Depends(get_db),
+    historial: bool = Query(False, description="Incluir las reservas archivadas"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Obtener todas las reservas de un usuario"""
-    return await reservations_controller.get_reservations_by_user(db, user_id)
+    return await reservations_controller.get_reservations_by_user(db, user_id, historial)
 
 # Obtener reservas por establecimiento
 @router.get("/establecimiento/{establishment_id}", response_model=List[ReservationsOut])
 async def get_reservas_by_establishment(
     establishment_id: int = Path(..., ge=1, description="ID del establecimiento"),
-    db: AsyncSession = Depends(get_db),
+    historial: bool = Query(False, description="Incluir las reservas archivadas"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Obtener todas las reservas de un establecimiento"""
-    return await reservations_controller.get_reservations_by_establishment(db, establishment_id)
+    return await reservations_controller.get_reservations_by_establishment(db, establishment_id, historial)
@@ -1,10 +1,11 @@
 # app/routers/resenas.py
-from fastapi import APIRouter, Depends, Path, Query
+from fastapi import APIRouter, Depends, Header, Path, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.review import ReviewCreate, ReviewUpdate, ReviewOut, MessageOut
+from app.controllers import idempotency as idempotency_controller
 from app.controllers import reviews as reviews_controller
 
 router = APIRouter(prefix="/resenas", tags=["Reseñas"])
@@ -13,14 +14,18 @@ router = APIRouter(prefix="/resenas", tags=["Reseñas"])
 @router.post("/", response_model=ReviewOut, status_code=201)
 async def create_resena(
     review: ReviewCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: AsyncSession = Depends(get_db)
 ):
     """Crear una nueva reseña"""
-    return await reviews_controller.create_review(db, review)
+    return await idempotency_controller.run_idempotent(
+        db, "resenas", idempotency_key, review.user_id, review,
+        lambda: reviews_controller.create_review(db, review), ReviewOut,
+    )
 
 # Obtener todas las reseñas → GET
 @router.get("/list", response_model=List[ReviewOut])
-async def list_resenas(db: AsyncSession = Depends(get_db)):
+async def list_resenas(db: AsyncSession = Depends(get_read_db)):
     """Obtener lista de todas las reseñas"""
     return await reviews_controller.get_all_reviews(db)
 
@@ -29,7 +34,7 @@ async def list_resenas(db: AsyncSession = Depends(get_db)):
 async def get_resena(
     user_id: int = Path(..., ge=1, description="ID del usuario"),
     establishment_id: int = Path(..., ge=1, description="ID del establecimiento"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Obtener una reseña específica por usuario y establecimiento"""
     return await reviews_controller.get_review_by_user_and_establishment(db, user_id, establishment_id)
@@ -38,7 +43,7 @@ async def get_resena(
 @router.get("/establecimiento/{establecimiento_id}", response_model=List[ReviewOut])
 async def get_resenas_by_establecimiento(
     establecimiento_id: int = Path(..., ge=1, description="ID del establecimiento"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Obtener todas las reseñas de un establecimiento específico"""
     return await reviews_controller.get_reviews_by_establishment(db, establecimiento_id)
@@ -47,7 +52,7 @@ async def get_resenas_by_establecimiento(
 @router.get("/usuario/{usuario_id}", response_model=List[ReviewOut])
 async def get_resenas_by_usuario(
     usuario_id: int = Path(..., ge=1, description="ID del usuario"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Obtener todas las reseñas de un usuario específico"""
     return await reviews_controller.get_reviews_by_user(db, usuario_id)
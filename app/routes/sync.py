@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.controllers import sync as sync_controller
+from app.database import get_read_db
+from app.schemas.sync import SyncOut
+
+router = APIRouter(prefix="/sync", tags=["Sincronización"])
+
+
+# ---------- CAMBIOS DESDE ----------
+@router.get("/", response_model=SyncOut)
+async def get_sync(
+    since: str = Query(
+        "0", pattern=r"^\d+(:\d+)?$", description="next_since de la respuesta anterior (0 = todo el catálogo)"
+    ),
+    limit: int = Query(500, ge=1, le=1000, description="Máximo de entradas del registro de cambios por página"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Catálogo creado, modificado o borrado desde `since`, por páginas"""
+    return await sync_controller.get_changes(db, since, limit)
@@ -0,0 +1,23 @@
+from typing import Any, List, Optional
+from pydantic import BaseModel, Field
+
+
+class SubRequest(BaseModel):
+    # Identificador libre del cliente para casar la respuesta (si no, vale la posición)
+    id: Optional[str] = None
+    method: str = "GET"
+    # Ruta de la API con su query string, p. ej. /reservas/usuario/1?limit=5
+    path: str = Field(..., pattern=r"^/[^/]")
+
+class BatchIn(BaseModel):
+    requests: List[SubRequest] = Field(..., min_length=1)
+
+class SubResponse(BaseModel):
+    id: Optional[str] = None
+    status: int
+    # JSON de la respuesta (o texto si no es JSON)
+    body: Any = None
+
+class BatchOut(BaseModel):
+    # En el mismo orden que las subpeticiones
+    results: List[SubResponse]
@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import Optional, List
 
 class DishBase(BaseModel):
     menu_id: int
@@ -20,4 +21,31 @@ class DishUpdate(BaseModel):
 
 class DishOut(DishBase):
     dish_id: int
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class DishBatchOut(BaseModel):
+    """Platos en el orden pedido y los IDs que no existen"""
+    items: List[DishOut]
+    missing: List[int]
+
+class DishSearchItem(DishOut):
+    establishment_id: Optional[int] = None
+    category_ids: List[int] = []
+    allergen_ids: List[int] = []
+
+class DishSearchOut(BaseModel):
+    items: List[DishSearchItem]
+    total: int
+    limit: int
+    offset: int
+class DishRecommendation(DishOut):
+    establishment_id: Optional[int] = None
+    # Sin puntuación en las recomendaciones por popularidad
+    score: Optional[float] = None
+
+class DishRecommendationsOut(BaseModel):
+    user_id: int
+    # "personal" (según sus reseñas y reservas) o "popular" (usuario sin interacciones)
+    source: str
+    items: List[DishRecommendation]
+    built_at: datetime
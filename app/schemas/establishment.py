@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
 from datetime import datetime, time
 
 class EstablishmentBase(BaseModel):
@@ -33,4 +33,30 @@ class EstablishmentUpdate(BaseModel):
 
 class EstablishmentOut(EstablishmentBase):
     establishment_id: int
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+class EstablishmentBatchIn(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+class EstablishmentBatchOut(BaseModel):
+    """Establecimientos en el orden pedido y los IDs que no existen"""
+    items: List[EstablishmentOut]
+    missing: List[int]
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    establishment_id: int
+    name: str
+    sustainability_points: int
+
+class LeaderboardOut(BaseModel):
+    category_id: Optional[int] = None
+    total: int
+    items: List[LeaderboardEntry]
+
+class EstablishmentRankOut(BaseModel):
+    establishment_id: int
+    category_id: Optional[int] = None
+    rank: int
+    total: int
+    sustainability_points: int
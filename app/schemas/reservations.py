@@ -28,6 +28,8 @@ class ReservationsOut(ReservationsBase):
     status: ReservationStatusEnum
     created_at: datetime
     updated_at: datetime
+    # True para las reservas que vienen de reservations_archive (?historial=true)
+    archived: bool = False
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -0,0 +1,40 @@
+from typing import List
+from pydantic import BaseModel
+
+from app.schemas.allergens import AllergenOut
+from app.schemas.category import CategoryOut
+from app.schemas.dishes import DishOut
+from app.schemas.establishment import EstablishmentOut
+from app.schemas.menus import MenuOut
+
+
+class SyncEstablishment(EstablishmentOut):
+    category_ids: List[int] = []
+
+class SyncDish(DishOut):
+    category_ids: List[int] = []
+    allergen_ids: List[int] = []
+
+class SyncChanges(BaseModel):
+    """Filas creadas o modificadas, con su estado actual"""
+    establishments: List[SyncEstablishment] = []
+    menus: List[MenuOut] = []
+    dishes: List[SyncDish] = []
+    categories: List[CategoryOut] = []
+    allergens: List[AllergenOut] = []
+
+class SyncDeleted(BaseModel):
+    """IDs borrados (lápidas)"""
+    establishments: List[int] = []
+    menus: List[int] = []
+    dishes: List[int] = []
+    categories: List[int] = []
+    allergens: List[int] = []
+
+class SyncOut(BaseModel):
+    changes: SyncChanges
+    deleted: SyncDeleted
+    # Valor de since para la siguiente petición
+    next_since: str
+    # Quedan más cambios: pedir otra página con since=next_since
+    has_more: bool
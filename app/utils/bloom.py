@@ -0,0 +1,49 @@
+"""
+Filtro de Bloom: conjunto probabilístico de tamaño fijo.
+
+`key in bloom` nunca da un falso negativo (si se añadió, está) y da falsos positivos con
+probabilidad ~error_rate mientras no se superen `capacity` claves. No admite borrados: una
+clave borrada sigue "pudiendo existir" hasta que se reconstruye el filtro.
+
+Las k posiciones salen de un solo hash (blake2b) por doble hashing: h1 + i·h2.
+"""
+import hashlib
+import math
+from typing import Hashable, Iterable, Iterator
+
+
+def _digest(key: Hashable) -> bytes:
+    data = key if isinstance(key, bytes) else str(key).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.01, keys: Iterable[Hashable] = ()):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        for key in keys:
+            self.add(key)
+
+    def _positions(self, key: Hashable) -> Iterator[int]:
+        digest = _digest(key)
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: Hashable) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __len__(self) -> int:
+        """Claves añadidas (con repeticiones)"""
+        return self.count
@@ -0,0 +1,178 @@
+"""
+Núcleo de las cachés con TTL, protegido contra estampidas cuando caduca una clave popular.
+
+- TTL con variación aleatoria (CACHE_TTL_JITTER): las claves cargadas a la vez no caducan a la vez.
+- Refresco anticipado probabilístico (XFetch): cada lectura de una clave aún válida la refresca
+  con una probabilidad que crece al acercarse la caducidad y con lo que tardó en cargarse
+  (CACHE_XFETCH_BETA), así una clave muy leída se recarga antes de caducar.
+- stale-while-revalidate: durante `stale_seconds` tras caducar se sirve el valor anterior
+  mientras una tarea en segundo plano lo recarga.
+- Un solo refresco por clave: las cargas pasan por un SingleFlight, así que los fallos
+  concurrentes de una clave y su refresco en segundo plano hacen una sola consulta.
+
+Los refrescos en segundo plano abren su propia sesión contra el primario (sobreviven a la
+petición que los disparó); un fallo de caché puede cargar con la sesión de la petición. Las
+cargas deben devolver datos planos o esquemas pydantic, no objetos ORM:
+
+    MENUS = Cache("menus", load_menu, ttl=60, stale_seconds=30)
+    menu = await MENUS.get(menu_id)        # o MENUS.get(menu_id, db)
+"""
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database
+from app.config import settings
+from app.utils import metrics
+from app.utils.singleflight import SingleFlight
+
+logger = logging.getLogger("app.cache")
+
+REQUESTS = metrics.counter(
+    "cache_requests_total",
+    "Lecturas de caché (hit, early = hit que dispara un refresco anticipado, stale = valor caducado servido, miss)",
+    ["cache", "result"],
+)
+LOADS = metrics.counter("cache_loads_total", "Cargas desde la base de datos por resultado", ["cache", "result"])
+
+Loader = Callable[[AsyncSession, Hashable], Awaitable[Any]]
+
+# nombre -> caché, para las métricas y para vaciarlas todas
+_caches: Dict[str, "Cache"] = {}
+
+metrics.gauge(
+    "cache_entries", "Entradas guardadas en cada caché", ["cache"],
+    function=lambda: {(name,): len(cache._entries) for name, cache in _caches.items()},
+)
+
+
+class _Entry:
+    __slots__ = ("value", "delta", "expires", "stale_until")
+
+    def __init__(self, value: Any, delta: float, expires: float, stale_until: float):
+        self.value = value
+        # Segundos que tardó la carga (XFetch refresca antes lo que es caro de recalcular)
+        self.delta = delta
+        self.expires = expires
+        self.stale_until = stale_until
+
+
+class Cache:
+    def __init__(
+        self,
+        name: str,
+        loader: Loader,
+        ttl: float,
+        stale_seconds: float = 0.0,
+        jitter: Optional[float] = None,
+        beta: Optional[float] = None,
+        max_entries: int = 1024,
+        sessions: Optional[Callable[[], AsyncSession]] = None,
+    ):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_seconds = stale_seconds
+        self.jitter = settings.CACHE_TTL_JITTER if jitter is None else jitter
+        self.beta = settings.CACHE_XFETCH_BETA if beta is None else beta
+        self.max_entries = max_entries
+        self._sessions = sessions
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._flight = SingleFlight(f"cache.{name}")
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        self._generation = 0
+        _caches[name] = self
+
+    def _jittered_ttl(self) -> float:
+        return self.ttl * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _open_session(self) -> AsyncSession:
+        return (self._sessions or database.session_router.write_sessions)()
+
+    async def _load(self, key: Hashable, db: Optional[AsyncSession] = None) -> Any:
+        generation = self._generation
+        start = time.monotonic()
+        try:
+            if db is not None:
+                value = await self.loader(db, key)
+            else:
+                async with self._open_session() as session:
+                    value = await self.loader(session, key)
+        except Exception:
+            LOADS.inc(cache=self.name, result="error")
+            raise
+        LOADS.inc(cache=self.name, result="ok")
+        now = time.monotonic()
+        # Si se invalidó mientras se cargaba, el valor se devuelve pero no se guarda. El TTL cuenta
+        # desde que empezó la carga: el valor puede ser de entonces
+        if generation == self._generation:
+            expires = start + self._jittered_ttl()
+            self._entries[key] = _Entry(value, now - start, expires, expires + self.stale_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def _should_refresh_early(self, entry: _Entry, now: float) -> bool:
+        # XFetch: now - delta·beta·ln(U) >= expires, con U en (0, 1]
+        return self.beta > 0 and now - entry.delta * self.beta * math.log(1.0 - random.random()) >= entry.expires
+
+    def _refresh_in_background(self, key: Hashable) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing[key] = asyncio.create_task(self._refresh(key))
+
+    async def _refresh(self, key: Hashable) -> None:
+        try:
+            await self._flight.do(key, lambda: self._load(key))
+        except Exception:
+            # Se sigue sirviendo el valor anterior hasta que caduque del todo
+            logger.exception("No se pudo refrescar la clave %r de la caché %s", key, self.name)
+        finally:
+            self._refreshing.pop(key, None)
+
+    async def get(self, key: Hashable, db: Optional[AsyncSession] = None) -> Any:
+        """Valor de la clave; si hay que cargarlo ya, con `db` (la sesión de la petición) si se pasa"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = time.monotonic()
+            if now < entry.expires:
+                if self._should_refresh_early(entry, now):
+                    REQUESTS.inc(cache=self.name, result="early")
+                    self._refresh_in_background(key)
+                else:
+                    REQUESTS.inc(cache=self.name, result="hit")
+                self._entries.move_to_end(key)
+                return entry.value
+            if now < entry.stale_until:
+                REQUESTS.inc(cache=self.name, result="stale")
+                self._refresh_in_background(key)
+                return entry.value
+        REQUESTS.inc(cache=self.name, result="miss")
+        return await self._flight.do(key, lambda: self._load(key, db))
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Olvidar una clave (o todas); las cargas en curso no guardarán su resultado"""
+        self._generation += 1
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    async def close(self) -> None:
+        """Cancelar los refrescos en segundo plano pendientes (al parar la app)"""
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def reset() -> None:
+    for cache in _caches.values():
+        cache.invalidate()
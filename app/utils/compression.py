@@ -0,0 +1,189 @@
+"""
+Compresión de respuestas (brotli si está instalado, gzip si no) negociada con Accept-Encoding.
+
+- Solo se comprimen respuestas de al menos `minimum_size` bytes y de tipos de texto/JSON.
+- Las respuestas en streaming (SSE, descargas por partes) pasan sin comprimir.
+- Las respuestas GET de las rutas de catálogo se guardan ya comprimidas, indexadas por el
+  hash del cuerpo: si el catálogo no ha cambiado, repetir la petición no vuelve a comprimir.
+"""
+import gzip
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se ofrece gzip
+    brotli = None
+
+from app.utils import metrics
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+SKIP_STATUS = {204, 304}
+
+BYTES_SAVED = metrics.counter(
+    "http_compression_bytes_saved_total", "Bytes ahorrados al comprimir respuestas", ["route", "encoding"]
+)
+COMPRESSION_SECONDS = metrics.summary(
+    "http_compression_seconds", "Tiempo empleado en comprimir respuestas", ["route", "encoding"]
+)
+PRECOMPRESSED_HITS = metrics.counter(
+    "http_compression_precompressed_hits_total",
+    "Respuestas servidas desde la caché de cuerpos ya comprimidos",
+    ["route", "encoding"],
+)
+
+
+def available_encodings() -> List[str]:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate(accept_encoding: str, supported: Iterable[str]) -> Optional[str]:
+    """Mejor codificación soportada según Accept-Encoding (respeta q=0); None = sin comprimir"""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        fields = part.strip().split(";")
+        coding = fields[0].strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        cache_paths: Iterable[str] = (),
+        cache_entries: int = 256,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_paths = tuple(path for path in cache_paths if path)
+        self.cache_entries = cache_entries
+        # (codificación, sha1 del cuerpo) -> cuerpo comprimido, en orden LRU
+        self._cache: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def _cacheable(self, scope) -> bool:
+        if not self.cache_paths:
+            return False
+        return scope["method"] == "GET" and scope["path"].startswith(self.cache_paths)
+
+    def _compress_cached(self, body: bytes, encoding: str, cacheable: bool, route: str) -> bytes:
+        key = (encoding, hashlib.sha1(body).digest()) if cacheable else None
+        if key is not None:
+            compressed = self._cache.get(key)
+            if compressed is not None:
+                self._cache.move_to_end(key)
+                PRECOMPRESSED_HITS.inc(route=route, encoding=encoding)
+                return compressed
+
+        started = time.perf_counter()
+        compressed = self.compress(body, encoding)
+        COMPRESSION_SECONDS.observe(time.perf_counter() - started, route=route, encoding=encoding)
+
+        if key is not None:
+            self._cache[key] = compressed
+            if len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return compressed
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate(accept_encoding, available_encodings())
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            headers = list(start_message.get("headers", []))
+            header_names = {name.lower(): value for name, value in headers}
+            content_type = header_names.get(b"content-type", b"").decode("latin-1")
+            body = message.get("body", b"")
+
+            if (
+                message.get("more_body", False)
+                or start_message["status"] in SKIP_STATUS
+                or b"content-encoding" in header_names
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+                or len(body) < self.minimum_size
+            ):
+                # Streaming, ya codificada, tipo binario o demasiado pequeña: tal cual
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or scope["path"]
+            compressed = self._compress_cached(body, encoding, self._cacheable(scope), route_label)
+            if len(compressed) >= len(body):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+            BYTES_SAVED.inc(len(body) - len(compressed), route=route_label, encoding=encoding)
+
+            headers = [(name, value) for name, value in headers if name.lower() not in (b"content-length", b"vary")]
+            vary = header_names.get(b"vary")
+            headers += [
+                (b"content-encoding", encoding.encode("latin-1")),
+                (b"content-length", str(len(compressed)).encode("latin-1")),
+                (b"vary", (vary + b", Accept-Encoding") if vary else b"Accept-Encoding"),
+            ]
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
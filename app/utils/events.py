@@ -0,0 +1,206 @@
+"""
+Pub/sub de eventos en vivo para los streams SSE (GET /establishments/{id}/events).
+
+Cada suscriptor tiene una cola acotada: si un cliente lento la llena, se vacía y recibe un
+evento `resync` (debe volver a pedir el listado completo) en lugar de frenar al resto o de
+acumular memoria sin límite.
+
+El reparto entre procesos lo hace un backend intercambiable (EVENTS_BACKEND):
+- "local": solo los suscriptores del mismo proceso (un único worker);
+- "postgres": LISTEN/NOTIFY de PostgreSQL; cada proceso publica con NOTIFY y reparte a sus
+  suscriptores lo que le llega por LISTEN, también lo que publicó él mismo.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from app.utils import metrics
+
+logger = logging.getLogger("app.events")
+
+PUBLISHED = metrics.counter("events_published_total", "Eventos en vivo publicados por tipo", ["type"])
+RESYNCS = metrics.counter("events_resync_total", "Suscriptores que llenaron su cola y tuvieron que resincronizar")
+
+RESYNC = {"type": "resync", "data": {}}
+
+Deliver = Callable[[str, dict], None]
+
+
+class Subscription:
+    def __init__(self, channel: str, max_queue: int):
+        self.channel = channel
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue(max_queue)
+
+    def deliver(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Cliente lento: se descarta lo pendiente y se le pide que vuelva a cargar
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({**RESYNC, "id": event["id"]})
+            RESYNCS.inc()
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """Siguiente evento, o None si no llega ninguno en `timeout` segundos (toca latido)"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LocalBackend:
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, channel: str, event: dict) -> None:
+        self._deliver(channel, event)
+
+
+class PostgresBackend:
+    """LISTEN/NOTIFY con asyncpg: una conexión escucha y otra publica (los NOTIFY van en orden)"""
+
+    NOTIFY_CHANNEL = "gastroeje_events"
+
+    def __init__(self, url: str):
+        self.dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._listener = None
+        self._publisher = None
+        self._lock = asyncio.Lock()
+
+    async def start(self, deliver: Deliver) -> None:
+        import asyncpg
+
+        def on_notification(connection, pid, channel, payload):
+            message = json.loads(payload)
+            deliver(message["channel"], message["event"])
+
+        self._listener = await asyncpg.connect(self.dsn)
+        await self._listener.add_listener(self.NOTIFY_CHANNEL, on_notification)
+        self._publisher = await asyncpg.connect(self.dsn)
+
+    async def stop(self) -> None:
+        for connection in (self._listener, self._publisher):
+            if connection is not None:
+                await connection.close()
+        self._listener = self._publisher = None
+
+    async def publish(self, channel: str, event: dict) -> None:
+        payload = json.dumps({"channel": channel, "event": event}, default=str)
+        async with self._lock:
+            await self._publisher.execute("SELECT pg_notify($1, $2)", self.NOTIFY_CHANNEL, payload)
+
+
+class EventHub:
+    def __init__(self, backend=None, max_queue: int = 100):
+        self.backend = backend or LocalBackend()
+        self.max_queue = max_queue
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        # Callbacks internos del proceso (p. ej. cachés que se actualizan con lo que hacen otros workers)
+        self._listeners: Dict[str, List[Callable[[dict], None]]] = defaultdict(list)
+        self._ids = count(1)
+        self._started = False
+        self._start_lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        async with self._start_lock:
+            if not self._started:
+                await self.backend.start(self._deliver)
+                self._started = True
+
+    async def stop(self) -> None:
+        self._started = False
+        await self.backend.stop()
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(channel, self.max_queue)
+        self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.channel]
+
+    def add_listener(self, channel: str, callback: Callable[[dict], None]) -> None:
+        self._listeners[channel].append(callback)
+
+    def remove_listener(self, channel: str, callback: Callable[[dict], None]) -> None:
+        listeners = self._listeners.get(channel)
+        if listeners is not None and callback in listeners:
+            listeners.remove(callback)
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def _deliver(self, channel: str, event: dict) -> None:
+        # ID por proceso, para el campo id: del stream
+        event = {**event, "id": next(self._ids)}
+        for subscription in list(self._subscribers.get(channel, ())):
+            subscription.deliver(event)
+        for callback in list(self._listeners.get(channel, ())):
+            try:
+                callback(event)
+            except Exception:
+                logger.exception("Fallo en un listener del canal %s", channel)
+
+    async def publish(self, channel: str, event_type: str, data: Any) -> None:
+        """Publicar tras el commit; un fallo del backend no afecta a la escritura ya confirmada"""
+        try:
+            await self.start()
+            await self.backend.publish(channel, {"type": event_type, "data": data})
+            PUBLISHED.inc(type=event_type)
+        except Exception:
+            logger.exception("No se pudo publicar el evento %s en %s", event_type, channel)
+
+
+def create_backend(name: str):
+    if name == "postgres":
+        return PostgresBackend(settings.DATABASE_URL)
+    return LocalBackend()
+
+
+hub = EventHub(create_backend(settings.EVENTS_BACKEND), settings.EVENTS_QUEUE_SIZE)
+
+metrics.gauge(
+    "events_subscribers", "Streams SSE abiertos en este proceso",
+    function=lambda: {(): hub.subscriber_count()},
+)
+
+
+def establishment_channel(establishment_id: int) -> str:
+    return f"establishment:{establishment_id}"
+
+
+async def publish_to_establishment(establishment_id: Optional[int], event_type: str, data: Any) -> None:
+    if establishment_id is not None:
+        await hub.publish(establishment_channel(establishment_id), event_type, data)
+
+
+def format_sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+async def sse_stream(channel: str, heartbeat_seconds: float, retry_ms: int = 3000):
+    """Cuerpo text/event-stream: eventos según llegan y un comentario de latido si no hay ninguno"""
+    # Se suscribe al empezar a enviar: si el cliente se va antes, no queda ninguna cola huérfana
+    await hub.start()
+    subscription = hub.subscribe(channel)
+    try:
+        yield f"retry: {retry_ms}\n\n"
+        while True:
+            event = await subscription.get(heartbeat_seconds)
+            yield format_sse(event) if event is not None else ": ping\n\n"
+    finally:
+        hub.unsubscribe(subscription)
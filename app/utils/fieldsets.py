@@ -0,0 +1,70 @@
+"""
+Sparse fieldsets: ?fields=establishment_id,name,logo en los endpoints de lectura.
+
+El mismo conjunto de campos reduce la consulta (solo esas columnas, con queries.narrow) y la
+respuesta (un modelo de salida con solo esos campos). Los modelos se crean con create_model y
+se guardan por (esquema, campos), así que cada combinación se construye una sola vez:
+
+    selected = fieldsets.parse(fields, DishOut, "dish_id")
+    rows = await get_all_dishes(db, selected)
+    return fieldsets.respond(DishOut, selected, rows)
+"""
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+# Combinaciones distintas de campos que se guardan (los clientes reales usan unas pocas)
+CACHE_SIZE = 256
+
+Fields = Optional[Tuple[str, ...]]
+
+
+def parse(value: Optional[str], schema: Type[BaseModel], key: str) -> Fields:
+    """Campos de ?fields=a,b en el orden del esquema y siempre con la clave; None = todos"""
+    if not value:
+        return None
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = sorted(requested - schema.model_fields.keys())
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}",
+        )
+    requested.add(key)
+    return tuple(name for name in schema.model_fields if name in requested)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def sparse_model(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Modelo con solo `fields` del esquema (mismos tipos y valores por defecto)"""
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields},
+    )
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _list_adapter(schema: Type[BaseModel], fields: Tuple[str, ...]) -> TypeAdapter:
+    return TypeAdapter(List[sparse_model(schema, fields)])
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _batch_adapter(schema: Type[BaseModel], fields: Tuple[str, ...]) -> TypeAdapter:
+    # Misma forma que los *BatchOut del multi-get
+    return TypeAdapter(create_model(
+        f"{schema.__name__}FieldsBatch",
+        items=(List[sparse_model(schema, fields)], ...),
+        missing=(List[int], ...),
+    ))
+
+
+def respond(schema: Type[BaseModel], fields: Fields, content: Any) -> Any:
+    """Sin fields, el contenido tal cual (lo valida el response_model); con fields, JSON ya reducido"""
+    if fields is None:
+        return content
+    adapter = _batch_adapter(schema, fields) if isinstance(content, dict) else _list_adapter(schema, fields)
+    return Response(adapter.dump_json(adapter.validate_python(content)), media_type="application/json")
+
@@ -0,0 +1,28 @@
+from app.worker.queue import _request_jobs, dispatch_request_jobs
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class JobDispatchMiddleware:
+    """
+    Ejecuta las tareas encoladas por una escritura en cuanto se ha enviado la respuesta (como
+    las BackgroundTasks de Starlette), sin esperar al siguiente sondeo del pool de workers.
+    Si fallan o el proceso cae, siguen en la tabla jobs y las recoge el pool.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        token = _request_jobs.set([])
+        try:
+            await self.app(scope, receive, send)
+            enqueued = _request_jobs.get()
+        finally:
+            _request_jobs.reset(token)
+        if enqueued:
+            await dispatch_request_jobs(enqueued)
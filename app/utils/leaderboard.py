@@ -0,0 +1,64 @@
+"""
+Ranking en memoria con estadísticos de orden: una SortedList de (-puntos, id) permite
+actualizar una entrada, pedir el top N y el puesto de una entrada en O(log n).
+
+Los empates comparten puesto (1, 2, 2, 4) y dentro del empate se ordena por ID.
+"""
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+
+class Leaderboard:
+    def __init__(self, entries: Iterable[Tuple[Hashable, int]] = ()):
+        self._points: Dict[Hashable, int] = dict(entries)
+        self._ranked = SortedList((-points, key) for key, points in self._points.items())
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._points
+
+    def points(self, key: Hashable) -> Optional[int]:
+        return self._points.get(key)
+
+    def update(self, key: Hashable, points: int) -> None:
+        old = self._points.get(key)
+        if old == points:
+            return
+        if old is not None:
+            self._ranked.remove((-old, key))
+        self._points[key] = points
+        self._ranked.add((-points, key))
+
+    def remove(self, key: Hashable) -> None:
+        old = self._points.pop(key, None)
+        if old is not None:
+            self._ranked.remove((-old, key))
+
+    def rank_of_points(self, points: int) -> int:
+        """Puesto que ocupa una puntuación: 1 + cuántas entradas tienen más puntos"""
+        return self._ranked.bisect_left((-points,)) + 1
+
+    def rank(self, key: Hashable) -> Optional[int]:
+        points = self._points.get(key)
+        if points is None:
+            return None
+        return self.rank_of_points(points)
+
+    def top(self, limit: int, offset: int = 0) -> List[Tuple[int, Hashable, int]]:
+        """(puesto, id, puntos) de las entradas offset..offset+limit"""
+        entries = []
+        previous_points, previous_rank = None, None
+        for position, (negative, key) in enumerate(self._ranked.islice(offset, offset + limit), start=offset):
+            points = -negative
+            if points == previous_points:
+                rank = previous_rank
+            elif previous_points is None:
+                rank = self.rank_of_points(points)
+            else:
+                rank = position + 1
+            entries.append((rank, key, points))
+            previous_points, previous_rank = points, rank
+        return entries
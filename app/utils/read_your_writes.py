@@ -0,0 +1,56 @@
+import time
+
+from app import database
+from app.config import settings
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# POST de solo lectura (el cuerpo lleva la consulta): no cuentan como escritura. Sin barra
+# final: se comparan con la ruta normalizada (POST /batch y POST /batch/ son la misma)
+READ_ONLY_PATHS = {"/establishments/batch", "/batch"}
+
+
+def route_path(scope) -> str:
+    """Ruta de la petición sin root_path ni barra final"""
+    path = scope["path"]
+    root_path = scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    return path.rstrip("/") or "/"
+
+
+class ReadYourWritesMiddleware:
+    """
+    Tras una escritura correcta (POST/PUT/PATCH/DELETE con respuesta 2xx) marca al cliente para
+    que sus lecturas vayan al primario durante READ_YOUR_WRITES_SECONDS: cookie para navegadores
+    y cabecera X-Read-Your-Writes que los clientes sin cookies pueden reenviar. Una redirección
+    (p. ej. el 307 que añade la barra final) no ha escrito nada y no marca.
+    """
+
+    def __init__(self, app, seconds: float = settings.READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.seconds = seconds
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+            or route_path(scope) in READ_ONLY_PATHS
+            or not database.session_router.replicas
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_marker(message):
+            if message["type"] == "http.response.start" and 200 <= message["status"] < 300:
+                deadline = f"{time.time() + self.seconds:.3f}"
+                cookie = (
+                    f"{database.READ_YOUR_WRITES_COOKIE}={deadline}; Max-Age={int(self.seconds) or 1}; "
+                    f"Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode("latin-1")),
+                    (database.READ_YOUR_WRITES_HEADER.lower().encode("latin-1"), deadline.encode("latin-1")),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_marker)
@@ -0,0 +1,157 @@
+"""
+Agrupación de peticiones (single-flight) para lecturas calientes.
+
+Las lecturas idénticas que llegan a la vez a un mismo worker comparten una sola llamada a la
+base de datos: la primera ejecuta la consulta y el resto espera su resultado. Opcionalmente el
+resultado se reutiliza durante `grace_seconds` tras terminar (0 = sin caché).
+
+El resultado compartido se convierte antes a su esquema pydantic: los objetos ORM pertenecen
+a la sesión de la petición que hizo la consulta y no se pueden repartir entre peticiones.
+
+Tras una escritura (`invalidate`), las lecturas que empiecen ya no se unen a las consultas en
+curso, que pueden haber leído antes del commit. Solo se comparten consultas contra la misma base
+de datos: una petición fijada al primario (read-your-writes) no espera a una de réplica.
+"""
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+from pydantic import TypeAdapter
+
+from app.utils import metrics
+
+SINGLEFLIGHT_CALLS = metrics.counter(
+    "singleflight_calls_total",
+    "Lecturas agrupadas según el resultado (leader = consulta real, coalesced = esperó a otra, grace = caché)",
+    ["name", "result"],
+)
+
+# grupo -> flights, para invalidar todas las lecturas de una entidad tras escribirla
+_groups: Dict[str, List["SingleFlight"]] = {}
+
+
+def _inflight() -> Dict[Tuple[str, ...], float]:
+    return {
+        (flight.name,): len(flight._calls)
+        for flights in _groups.values()
+        for flight in flights
+    }
+
+
+metrics.gauge("singleflight_inflight", "Consultas compartidas en curso", ["name"], function=_inflight)
+
+
+class SingleFlight:
+    def __init__(self, name: str, grace_seconds: float = 0.0, max_entries: int = 1024):
+        self.name = name
+        self.grace_seconds = grace_seconds
+        self.max_entries = max_entries
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        # clave -> (caduca, resultado), en orden LRU
+        self._recent: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._generation = 0
+
+    def _cached(self, key: Hashable):
+        entry = self._recent.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._recent[key]
+            return None
+        self._recent.move_to_end(key)
+        return entry
+
+    def _remember(self, key: Hashable, result: Any) -> None:
+        self._recent[key] = (time.monotonic() + self.grace_seconds, result)
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.max_entries:
+            self._recent.popitem(last=False)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Ejecutar `fn` o esperar a la llamada en curso con la misma clave"""
+        while True:
+            if self.grace_seconds > 0:
+                entry = self._cached(key)
+                if entry is not None:
+                    SINGLEFLIGHT_CALLS.inc(name=self.name, result="grace")
+                    return entry[1]
+
+            call = self._calls.get(key)
+            if call is None:
+                break
+            SINGLEFLIGHT_CALLS.inc(name=self.name, result="coalesced")
+            try:
+                return await asyncio.shield(call)
+            except asyncio.CancelledError:
+                # Si se canceló la petición que hacía la consulta, otra toma el relevo
+                if call.cancelled():
+                    continue
+                raise
+
+        call = asyncio.get_running_loop().create_future()
+        self._calls[key] = call
+        generation = self._generation
+        SINGLEFLIGHT_CALLS.inc(name=self.name, result="leader")
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except BaseException as exc:
+            call.set_exception(exc)
+            call.exception()  # marcada como consumida aunque nadie más la espere
+            raise
+        else:
+            call.set_result(result)
+            # Si hubo una escritura mientras tanto, el resultado ya no vale para la caché
+            if self.grace_seconds > 0 and generation == self._generation:
+                self._remember(key, result)
+            return result
+        finally:
+            # Tras clear() la clave puede ser ya de otra llamada
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def clear(self) -> None:
+        """Olvidar los resultados guardados y las llamadas en curso (tras una escritura)"""
+        self._generation += 1
+        self._recent.clear()
+        # Quien ya esperaba recibe su resultado; las lecturas nuevas hacen su propia consulta
+        self._calls.clear()
+
+
+def coalesce(controller: Callable[..., Awaitable[Any]], schema: Any, group: str, grace_seconds: float = 0.0):
+    """
+    Versión compartida de un controlador de lectura `controller(db, *args)`: las llamadas
+    concurrentes con los mismos argumentos hacen una sola consulta y reciben `schema`.
+    """
+    name = f"{controller.__module__.rsplit('.', 1)[-1]}.{controller.__name__}"
+    flight = SingleFlight(name, grace_seconds)
+    _groups.setdefault(group, []).append(flight)
+    adapter = TypeAdapter(schema)
+
+    async def load(db, *args):
+        return adapter.validate_python(await controller(db, *args), from_attributes=True)
+
+    @functools.wraps(controller)
+    async def shared(db, *args):
+        # El motor forma parte de la clave: primario y réplicas no se mezclan
+        return await flight.do((db.get_bind(), *args), lambda: load(db, *args))
+
+    shared.flight = flight
+    return shared
+
+
+def invalidate(*groups: str) -> None:
+    """Invalidar las lecturas compartidas de los grupos indicados en este worker"""
+    for group in groups:
+        for flight in _groups.get(group, []):
+            flight.clear()
+
+
+def reset() -> None:
+    for flights in _groups.values():
+        for flight in flights:
+            flight.clear()
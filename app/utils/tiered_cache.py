@@ -0,0 +1,270 @@
+"""
+Caché de dos niveles con invalidación entre workers.
+
+- L1: caché en memoria de cada proceso (app.utils.cache.Cache: LRU, TTL con variación,
+  XFetch, stale-while-revalidate y una sola carga por clave).
+- L2: almacén compartido por todos los workers detrás de una interfaz (get/set/delete). "local"
+  es un dict en memoria para tests y un solo proceso; "redis" lo comparten todos los procesos.
+
+Un fallo de L1 pregunta a L2 y, si tampoco está, carga del primario con una sesión propia
+(nunca de la réplica de la petición, que puede ir retrasada) y rellena L2.
+
+Cada entrada de L2 lleva la versión de su clave y de su espacio de nombres que había antes de
+cargarla; una lectura que no coincide con la versión actual es un fallo. Al escribir, el worker
+cambia la versión en L2 (así ninguna carga empezada antes, en este worker o en otro, sirve lo que
+rellene), borra la clave de L2 y de su L1 y publica la invalidación en el hub de eventos (canal
+"cache"; con EVENTS_BACKEND=postgres llega a los demás workers por NOTIFY), que la borran de su L1
+al recibirla. Si un mensaje se pierde, la entrada de L1 caduca igualmente (su TTL cuenta desde que
+empezó la carga): tras la invalidación, ningún worker sirve un valor anterior más de
+CACHE_L1_TTL_SECONDS · (1 + CACHE_TTL_JITTER) + CACHE_L1_STALE_SECONDS.
+"""
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.utils import events, metrics
+from app.utils.cache import REQUESTS as L1_REQUESTS, Cache
+
+logger = logging.getLogger("app.tiered_cache")
+
+CHANNEL = "cache"
+
+L2_REQUESTS = metrics.counter("cache_l2_requests_total", "Lecturas del almacén compartido (L2)", ["cache", "result"])
+INVALIDATIONS = metrics.counter(
+    "cache_invalidations_total", "Invalidaciones aplicadas (local = escritura de este worker, remote = recibida)",
+    ["cache", "origin"],
+)
+
+
+# ---------- ALMACÉN COMPARTIDO (L2) ----------
+class LocalStore:
+    """Sustituto en memoria del almacén compartido: solo lo ve este proceso"""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[float, bytes]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._values[key]
+            return None
+        return entry[1]
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._values[key] = (time.monotonic() + ttl, value)
+
+    async def delete(self, key: str) -> None:
+        self._values.pop(key, None)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [key for key in self._values if key.startswith(prefix)]:
+            del self._values[key]
+
+    async def close(self) -> None:
+        self._values.clear()
+
+
+class RedisStore:
+    """Redis compartido por todos los workers (redis.asyncio)"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis.asyncio as redis
+
+            self._client = redis.from_url(self.url)
+        return self._client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return await self.client.mget(keys)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(key)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        batch = []
+        async for key in self.client.scan_iter(match=f"{prefix}*", count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                await self.client.unlink(*batch)
+                batch = []
+        if batch:
+            await self.client.unlink(*batch)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def create_store(name: str):
+    if name == "redis":
+        return RedisStore(settings.CACHE_L2_URL)
+    return LocalStore()
+
+
+store = create_store(settings.CACHE_L2_BACKEND)
+
+
+# ---------- CACHÉ DE DOS NIVELES ----------
+# espacio de nombres -> caché, para aplicar las invalidaciones recibidas y para las métricas
+_caches: Dict[str, "TieredCache"] = {}
+
+
+class TieredCache:
+    def __init__(
+        self,
+        namespace: str,
+        loader: Callable[[AsyncSession, Hashable], Awaitable[Any]],
+        schema: Any,
+        sessions: Optional[Callable[[], AsyncSession]] = None,
+    ):
+        self.namespace = namespace
+        self.loader = loader
+        self.adapter = TypeAdapter(schema)
+        # Las cargas de L1 abren su propia sesión contra el primario (`sessions` o session_router)
+        self.l1 = Cache(
+            namespace, self._load_through_l2, ttl=settings.CACHE_L1_TTL_SECONDS,
+            stale_seconds=settings.CACHE_L1_STALE_SECONDS, max_entries=settings.CACHE_L1_MAX_ENTRIES,
+            sessions=sessions,
+        )
+        _caches[namespace] = self
+
+    @property
+    def enabled(self) -> bool:
+        return self.l1.ttl > 0
+
+    def _l2_key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _version_keys(self, key: Hashable) -> Tuple[str, str]:
+        # Fuera del prefijo de los valores: invalidar el espacio de nombres no las borra
+        return f"version:{self.namespace}", f"version:{self.namespace}:{key}"
+
+    async def _load_through_l2(self, db: AsyncSession, key: Hashable) -> Any:
+        l2_key = self._l2_key(key)
+        try:
+            cached, *versions = await store.get_many([l2_key, *self._version_keys(key)])
+        except Exception:
+            logger.exception("L2 no disponible (lectura de %s)", l2_key)
+            L2_REQUESTS.inc(cache=self.namespace, result="error")
+            return self.adapter.validate_python(await self.loader(db, key), from_attributes=True)
+
+        # Versión con la que se guarda lo que se cargue ahora: si cambia antes, nadie lo leerá
+        tag = b"/".join(version or b"-" for version in versions)
+        if cached is not None:
+            cached_tag, _, payload = cached.partition(b"\n")
+            if cached_tag == tag:
+                L2_REQUESTS.inc(cache=self.namespace, result="hit")
+                return self.adapter.validate_json(payload)
+        L2_REQUESTS.inc(cache=self.namespace, result="miss")
+
+        value = self.adapter.validate_python(await self.loader(db, key), from_attributes=True)
+        try:
+            await store.set(l2_key, tag + b"\n" + self.adapter.dump_json(value), settings.CACHE_L2_TTL_SECONDS)
+        except Exception:
+            logger.exception("L2 no disponible (escritura de %s)", l2_key)
+        return value
+
+    async def get(self, key: Hashable, db: AsyncSession) -> Any:
+        """Con la caché activa, `db` no se usa: las cargas van al primario con su propia sesión"""
+        if not self.enabled:
+            return await self.loader(db, key)
+        return await self.l1.get(key)
+
+    def _forget(self, key: Optional[Hashable]) -> None:
+        self.l1.invalidate(key)
+
+    async def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Tras escribir (después del commit): nueva versión y borrado en L2, borrar de L1 y avisar a los demás workers"""
+        self._forget(key)
+        INVALIDATIONS.inc(cache=self.namespace, origin="local")
+        if not self.enabled:
+            return
+        namespace_version, key_version = self._version_keys(key)
+        # La versión dura más que cualquier valor guardado con la anterior (CACHE_L2_TTL_SECONDS desde
+        # que termina su carga, que dura mucho menos), así al caducar no vuelve a coincidir con ninguno
+        version_ttl = 2 * settings.CACHE_L2_TTL_SECONDS
+        try:
+            if key is None:
+                await store.set(namespace_version, uuid.uuid4().hex.encode(), version_ttl)
+                await store.delete_prefix(f"{self.namespace}:")
+            else:
+                await store.set(key_version, uuid.uuid4().hex.encode(), version_ttl)
+                await store.delete(self._l2_key(key))
+        except Exception:
+            logger.exception("L2 no disponible (invalidación de %s:%s)", self.namespace, key)
+        await events.hub.publish(CHANNEL, f"{CHANNEL}.{self.namespace}", {"key": key, "pid": _PROCESS_ID})
+
+
+# Identifica los mensajes de este proceso (con EVENTS_BACKEND=postgres también le llegan)
+_PROCESS_ID = f"{id(store):x}-{time.time_ns():x}"
+
+
+def _on_event(event: dict) -> None:
+    if event["data"].get("pid") == _PROCESS_ID:
+        return
+    cache = _caches.get(event["type"].removeprefix(f"{CHANNEL}."))
+    if cache is not None:
+        cache._forget(event["data"]["key"])
+        INVALIDATIONS.inc(cache=cache.namespace, origin="remote")
+
+
+events.hub.add_listener(CHANNEL, _on_event)
+
+
+async def invalidate(*namespaces: str) -> None:
+    """Vaciar por completo las cachés de esos espacios de nombres (los que no tienen caché se ignoran)"""
+    for namespace in namespaces:
+        cache = _caches.get(namespace)
+        if cache is not None:
+            await cache.invalidate()
+
+
+def _hit_ratios() -> dict:
+    ratios = {}
+    for namespace in _caches:
+        l1_hits = sum(L1_REQUESTS.value(cache=namespace, result=result) for result in ("hit", "early", "stale"))
+        l1_total = l1_hits + L1_REQUESTS.value(cache=namespace, result="miss")
+        l2_hits = L2_REQUESTS.value(cache=namespace, result="hit")
+        l2_total = l2_hits + L2_REQUESTS.value(cache=namespace, result="miss")
+        if l1_total:
+            ratios[(namespace, "l1")] = l1_hits / l1_total
+        if l2_total:
+            ratios[(namespace, "l2")] = l2_hits / l2_total
+    return ratios
+
+
+metrics.gauge("cache_hit_ratio", "Proporción de aciertos por caché y nivel", ["cache", "tier"], function=_hit_ratios)
+
+
+async def close() -> None:
+    for cache in _caches.values():
+        await cache.l1.close()
+    await store.close()
+
+
+async def reset() -> None:
+    for cache in _caches.values():
+        cache._forget(None)
+    await store.delete_prefix("")
@@ -0,0 +1,18 @@
+"""
+Tareas en segundo plano con la tabla jobs como outbox: los controladores las encolan en la
+misma transacción que la escritura (enqueue) y se ejecutan después, por lotes y con
+reintentos, en el pool de workers del proceso de la API o en python -m app.worker.
+"""
+from app.worker.queue import HANDLERS, enqueue, handler, run_jobs
+from app.worker.pool import Worker
+from app.worker.handlers import publish_later, refresh_dish_search_later  # registra los manejadores
+
+__all__ = [
+    "HANDLERS",
+    "Worker",
+    "enqueue",
+    "handler",
+    "publish_later",
+    "refresh_dish_search_later",
+    "run_jobs",
+]
@@ -0,0 +1,56 @@
+"""
+Worker de tareas en segundo plano fuera del proceso de la API:
+
+    python -m app.worker --workers 4 --batch-size 100
+    python -m app.worker --once
+"""
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+from typing import List, Optional
+
+from app.config import settings
+from app.database import engine
+from app.worker import Worker
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description="Worker de tareas de GastroEje")
+    parser.add_argument("--workers", type=int, default=settings.JOBS_WORKERS, help="Tareas asyncio en paralelo")
+    parser.add_argument("--batch-size", type=int, default=settings.JOBS_BATCH_SIZE)
+    parser.add_argument("--poll", type=float, default=settings.JOBS_POLL_SECONDS, help="Segundos entre consultas con la cola vacía")
+    parser.add_argument("--once", action="store_true", help="Vaciar la cola y salir")
+    return parser.parse_args(argv)
+
+
+async def run_command(args: argparse.Namespace) -> int:
+    worker = Worker(concurrency=args.workers, batch_size=args.batch_size, poll_seconds=args.poll)
+    try:
+        if args.once:
+            print(f"Tareas ejecutadas: {await worker.drain()}")
+            return 0
+
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stopping.set)
+        worker.start()
+        logging.getLogger("app.worker").info("Worker iniciado (%s en paralelo)", args.workers)
+        await stopping.wait()
+        await worker.stop()
+    finally:
+        await engine.dispose()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    engine.echo = False
+    return asyncio.run(run_command(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
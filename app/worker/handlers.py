@@ -0,0 +1,32 @@
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.controllers import dish_search as dish_search_controller
+from app.utils import events
+from app.worker.queue import enqueue, handler
+
+
+@handler("dish_search.refresh")
+async def refresh_dish_search(db: AsyncSession, payloads: List[Dict[str, Any]]) -> None:
+    """Documentos de búsqueda de los platos creados o cambiados (uno por lote, no uno por plato)"""
+    await dish_search_controller.refresh_dish_documents(db, [payload["dish_id"] for payload in payloads])
+
+
+def refresh_dish_search_later(db: AsyncSession, dish_ids) -> None:
+    """Encolar la regeneración de los documentos de búsqueda de `dish_ids` (sin hacer commit)"""
+    for dish_id in sorted(set(dish_ids)):
+        enqueue(db, "dish_search.refresh", {"dish_id": dish_id})
+
+
+@handler("events.publish")
+async def publish_events(db: AsyncSession, payloads: List[Dict[str, Any]]) -> None:
+    """Eventos en vivo de escrituras ya confirmadas, en el orden en que se encolaron"""
+    for payload in payloads:
+        await events.publish_to_establishment(payload["establishment_id"], payload["type"], payload["data"])
+
+
+def publish_later(db: AsyncSession, establishment_id: Optional[int], event_type: str, data: Any) -> None:
+    """Encolar un evento en vivo en la transacción de `db`: solo sale si la escritura se confirma"""
+    if establishment_id is not None:
+        enqueue(db, "events.publish", {"establishment_id": establishment_id, "type": event_type, "data": data})
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import database
+from app.config import settings
+from app.worker.queue import refresh_queue_stats, release_stale, run_jobs
+
+logger = logging.getLogger("app.worker")
+
+
+class Worker:
+    """
+    Pool de `concurrency` tareas asyncio que vacían la tabla jobs por lotes, más una que
+    devuelve a la cola las tareas colgadas y actualiza las métricas de la cola.
+    """
+
+    def __init__(
+        self,
+        sessions: Optional[async_sessionmaker] = None,
+        concurrency: int = settings.JOBS_WORKERS,
+        batch_size: int = settings.JOBS_BATCH_SIZE,
+        poll_seconds: float = settings.JOBS_POLL_SECONDS,
+        lock_timeout_seconds: float = settings.JOBS_LOCK_TIMEOUT_SECONDS,
+    ):
+        self._sessions = sessions
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def sessions(self) -> async_sessionmaker:
+        # Por defecto, el primario del router vigente
+        return self._sessions or database.session_router.write_sessions
+
+    async def run_once(self) -> int:
+        return await run_jobs(self.sessions, self.batch_size)
+
+    async def drain(self) -> int:
+        """Ejecutar lotes hasta que no quede ninguna tarea lista; devuelve cuántas se ejecutaron"""
+        total = 0
+        while processed := await self.run_once():
+            total += processed
+        return total
+
+    async def maintain(self) -> None:
+        async with self.sessions() as db:
+            await release_stale(db, self.lock_timeout_seconds)
+            await refresh_queue_stats(db)
+
+    async def _consume(self) -> None:
+        while True:
+            try:
+                processed = await self.run_once()
+            except Exception:
+                logger.exception("Error al reservar tareas")
+                processed = 0
+            if not processed:
+                await asyncio.sleep(self.poll_seconds)
+
+    async def _monitor(self) -> None:
+        while True:
+            try:
+                await self.maintain()
+            except Exception:
+                logger.exception("Error al revisar la cola de tareas")
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._monitor()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,206 @@
+import json
+import logging
+import random
+import uuid
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models.jobs import Job, JobStatus
+from app.utils import metrics
+
+logger = logging.getLogger("app.worker")
+
+JOBS_PROCESSED = metrics.counter(
+    "jobs_processed_total", "Tareas en segundo plano ejecutadas por tipo y resultado", ["kind", "result"]
+)
+JOBS_WAIT = metrics.summary(
+    "jobs_wait_seconds", "Segundos entre que se encola una tarea y empieza a ejecutarse", ["kind"]
+)
+QUEUE_DEPTH = metrics.gauge("jobs_queue_depth", "Tareas en la tabla jobs por estado", ["status"])
+QUEUE_LAG = metrics.gauge("jobs_queue_lag_seconds", "Antigüedad de la tarea lista más antigua sin ejecutar")
+
+# Manejadores por tipo: reciben los payloads de un lote entero de tareas del mismo tipo
+Handler = Callable[[AsyncSession, List[Dict[str, Any]]], Awaitable[None]]
+HANDLERS: Dict[str, Handler] = {}
+
+# Tareas encoladas durante la petición en curso (JobDispatchMiddleware las ejecuta tras responder)
+_request_jobs: ContextVar[Optional[List[Tuple[AsyncEngine, Job]]]] = ContextVar("request_jobs", default=None)
+
+
+def handler(kind: str) -> Callable[[Handler], Handler]:
+    def decorator(fn: Handler) -> Handler:
+        if kind in HANDLERS:
+            raise ValueError(f"Ya existe un manejador para las tareas '{kind}'")
+        HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite devuelve las fechas sin zona horaria
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def enqueue(db: AsyncSession, kind: str, payload: Dict[str, Any], delay_seconds: float = 0.0) -> Job:
+    """Encolar una tarea en la transacción de `db` (sin commit): solo existe si la escritura se confirma"""
+    now = _now()
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload),
+        status=JobStatus.pending,
+        attempts=0,
+        created_at=now,
+        run_at=now + timedelta(seconds=delay_seconds),
+    )
+    db.add(job)
+    pending = _request_jobs.get()
+    if pending is not None:
+        pending.append((db.bind, job))
+    return job
+
+
+def retry_delay(attempts: int) -> float:
+    """Espera exponencial con jitter antes del reintento número `attempts`"""
+    delay = min(settings.JOBS_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.JOBS_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def claim(db: AsyncSession, batch_size: int, job_ids: Optional[Sequence[int]] = None) -> List[Job]:
+    """Reservar hasta batch_size tareas listas; el UPDATE condicionado evita que dos workers cojan la misma"""
+    now = _now()
+    query = (
+        select(Job.job_id)
+        .where(Job.status == JobStatus.pending, Job.run_at <= now)
+        .order_by(Job.run_at, Job.job_id)
+        .limit(batch_size)
+    )
+    if job_ids is not None:
+        query = query.where(Job.job_id.in_(job_ids))
+    if db.bind.dialect.name == "postgresql":
+        query = query.with_for_update(skip_locked=True)
+    ids = list((await db.execute(query)).scalars())
+    if not ids:
+        await db.rollback()
+        return []
+
+    token = uuid.uuid4().hex
+    await db.execute(
+        update(Job)
+        .where(Job.job_id.in_(ids), Job.status == JobStatus.pending)
+        .values(status=JobStatus.running, locked_by=token, locked_at=now, attempts=Job.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    result = await db.execute(select(Job).where(Job.locked_by == token).order_by(Job.job_id))
+    return list(result.scalars())
+
+
+async def _fail(db: AsyncSession, job: Job, error: Exception) -> None:
+    """Reintentar más tarde o, agotados los intentos, dejarla en 'failed'"""
+    values = {"locked_by": None, "locked_at": None, "last_error": f"{type(error).__name__}: {error}"[:2000]}
+    if job.attempts >= settings.JOBS_MAX_ATTEMPTS:
+        values["status"] = JobStatus.failed
+        result = "failed"
+        logger.error("Tarea %s (%s) fallida tras %s intentos: %s", job.job_id, job.kind, job.attempts, error)
+    else:
+        values["status"] = JobStatus.pending
+        values["run_at"] = _now() + timedelta(seconds=retry_delay(job.attempts))
+        result = "retry"
+        logger.warning("Tarea %s (%s) falló (intento %s), se reintentará: %s", job.job_id, job.kind, job.attempts, error)
+    await db.execute(update(Job).where(Job.job_id == job.job_id).values(**values))
+    await db.commit()
+    JOBS_PROCESSED.inc(kind=job.kind, result=result)
+
+
+async def _run_group(sessions: async_sessionmaker, kind: str, jobs: List[Job]) -> None:
+    async with sessions() as db:
+        try:
+            run = HANDLERS.get(kind)
+            if run is None:
+                raise LookupError(f"No hay manejador para las tareas '{kind}'")
+            await run(db, [json.loads(job.payload) for job in jobs])
+            # La tarea se borra en la misma transacción que sus efectos
+            await db.execute(delete(Job).where(Job.job_id.in_([job.job_id for job in jobs])))
+            await db.commit()
+        except Exception as exc:
+            await db.rollback()
+            if len(jobs) > 1:
+                # Un lote falla entero: cada tarea por separado para que solo se reintente la culpable
+                for job in jobs:
+                    await _run_group(sessions, kind, [job])
+                return
+            await _fail(db, jobs[0], exc)
+            return
+    JOBS_PROCESSED.inc(len(jobs), kind=kind, result="done")
+
+
+async def process(sessions: async_sessionmaker, jobs: List[Job]) -> None:
+    """Ejecutar las tareas reservadas, en un lote por tipo"""
+    groups: Dict[str, List[Job]] = defaultdict(list)
+    now = _now()
+    for job in jobs:
+        groups[job.kind].append(job)
+        JOBS_WAIT.observe((now - _aware(job.created_at)).total_seconds(), kind=job.kind)
+    for kind, group in groups.items():
+        await _run_group(sessions, kind, group)
+
+
+async def run_jobs(
+    sessions: async_sessionmaker, batch_size: int, job_ids: Optional[Sequence[int]] = None
+) -> int:
+    """Reservar y ejecutar un lote; devuelve cuántas tareas se han ejecutado"""
+    async with sessions() as db:
+        jobs = await claim(db, batch_size, job_ids)
+    if jobs:
+        await process(sessions, jobs)
+    return len(jobs)
+
+
+async def release_stale(db: AsyncSession, timeout_seconds: float) -> int:
+    """Devolver a la cola las tareas reservadas por un worker que no terminó (caído o reiniciado)"""
+    result = await db.execute(
+        update(Job)
+        .where(Job.status == JobStatus.running, Job.locked_at < _now() - timedelta(seconds=timeout_seconds))
+        .values(status=JobStatus.pending, locked_by=None, locked_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if result.rowcount:
+        logger.warning("%s tareas colgadas devueltas a la cola", result.rowcount)
+    return result.rowcount
+
+
+async def refresh_queue_stats(db: AsyncSession) -> None:
+    """Actualizar jobs_queue_depth y jobs_queue_lag_seconds"""
+    counts = dict((await db.execute(select(Job.status, func.count()).group_by(Job.status))).all())
+    for status in JobStatus:
+        QUEUE_DEPTH.set(counts.get(status, 0), status=status.value)
+    oldest = await db.scalar(
+        select(func.min(Job.run_at)).where(Job.status == JobStatus.pending, Job.run_at <= _now())
+    )
+    QUEUE_LAG.set(max((_now() - _aware(oldest)).total_seconds(), 0.0) if oldest else 0.0)
+    await db.rollback()
+
+
+async def dispatch_request_jobs(jobs: List[Tuple[AsyncEngine, Job]]) -> None:
+    """Ejecutar ya las tareas encoladas en una petición (las que no se confirmaron no existen)"""
+    by_bind: Dict[AsyncEngine, List[int]] = defaultdict(list)
+    for bind, job in jobs:
+        if inspect(job).has_identity:
+            by_bind[bind].append(job.job_id)
+    for bind, ids in by_bind.items():
+        try:
+            await run_jobs(async_sessionmaker(bind=bind, expire_on_commit=False), len(ids), ids)
+        except Exception:
+            # Quedan en la tabla: las recogerá el pool de workers
+            logger.exception("No se pudieron ejecutar las tareas de la petición %s", ids)
@@ -0,0 +1,118 @@
+"""
+Database load around cache expiry: a plain TTL cache vs app.utils.cache.Cache.
+
+--clients concurrent readers hit one popular key for --seconds. The "database" is a coroutine
+that sleeps --load-ms and counts concurrent calls. The plain cache reloads on every read that
+finds the key expired, so every reader that arrives during a reload also goes to the database.
+The cache core coalesces reloads, refreshes early (XFetch) and serves the stale value while
+revalidating. For each, prints the loads per --window-ms window and the peak concurrent loads.
+
+Usage:
+    python -m benchmarks.cache_stampede
+    python -m benchmarks.cache_stampede --clients 500 --ttl 0.5 --load-ms 50
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, List, Optional
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.utils.cache import Cache
+
+
+class Database:
+    def __init__(self, load_seconds: float):
+        self.load_seconds = load_seconds
+        self.calls: List[float] = []
+        self.running = 0
+        self.peak = 0
+
+    async def load(self, db, key) -> dict:
+        self.calls.append(time.monotonic())
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.load_seconds)
+            return {"key": key}
+        finally:
+            self.running -= 1
+
+
+class PlainTTLCache:
+    """Lo habitual sin protección: si la clave caducó, cada lectura la recarga"""
+
+    def __init__(self, loader: Callable[[Any, Any], Awaitable[Any]], ttl: float):
+        self.loader = loader
+        self.ttl = ttl
+        self.entries = {}
+
+    async def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        value = await self.loader(None, key)
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        return value
+
+
+async def run(cache, args: argparse.Namespace) -> float:
+    deadline = time.monotonic() + args.seconds
+
+    async def client():
+        while time.monotonic() < deadline:
+            await cache.get("popular")
+            await asyncio.sleep(random.uniform(0, args.think_ms / 1000))
+
+    start = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(args.clients)))
+    return start
+
+
+def report(name: str, database: Database, start: float, args: argparse.Namespace) -> None:
+    window = args.window_ms / 1000
+    windows = Counter(int((call - start) / window) for call in database.calls)
+    series = [windows.get(index, 0) for index in range(int(args.seconds / window) + 1)]
+    print(f"{name:<12} cargas={len(database.calls):>5}  pico simultáneas={database.peak:>4}  "
+          f"máx. por ventana={max(series):>4}")
+    print(f"{'':<12} por ventana de {args.window_ms} ms: {' '.join(str(count) for count in series)}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Carga de la base de datos al caducar una clave popular")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--ttl", type=float, default=0.5)
+    parser.add_argument("--load-ms", type=float, default=30.0)
+    parser.add_argument("--think-ms", type=float, default=10.0)
+    parser.add_argument("--window-ms", type=int, default=100)
+    return parser.parse_args(argv)
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    plain_db = Database(args.load_ms / 1000)
+    start = await run(PlainTTLCache(plain_db.load, args.ttl), args)
+    report("TTL simple", plain_db, start, args)
+
+    core_db = Database(args.load_ms / 1000)
+    core = Cache(
+        "benchmark", core_db.load, ttl=args.ttl, stale_seconds=args.ttl,
+        sessions=lambda: contextlib.nullcontext(None),
+    )
+    start = await run(core, args)
+    await core.close()
+    report("Cache", core_db, start, args)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    asyncio.run(main_async(parse_args(argv)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
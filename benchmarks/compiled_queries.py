@@ -0,0 +1,163 @@
+"""
+CPU per request of the hot primary-key lookups with and without precompiled statements.
+
+For get_dish_by_id, get_establishment_by_id and get_reservation_by_id it runs the same
+lookup three ways against a seeded database:
+
+- no_cache:    select(...) built per call, SQLAlchemy compiled cache disabled
+- inline:      select(...) built per call (what the controllers did before app/queries.py)
+- precompiled: the controller as it is now, executing the app/queries.py statement
+
+and reports CPU time per call (time.process_time, all threads), wall time per call and the
+compiled-cache hits/misses observed.
+
+Usage:
+    python -m benchmarks.compiled_queries [--iterations 2000] [--database-url ...]
+
+WARNING: with --database-url all tables of that database are dropped and recreated!
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import Base, engine_options
+from app.models import Dish, Establishment, Reservation
+from app.controllers import (
+    dishes as dishes_controller,
+    establishment as establishment_controller,
+    reservations as reservations_controller,
+)
+from benchmarks.controllers import DEFAULT_DATABASE_URL, SeedSize, seed
+
+Lookup = Callable[[AsyncSession, int], Awaitable[object]]
+MODES = ("no_cache", "inline", "precompiled")
+
+
+async def _inline(db: AsyncSession, query, **execution_options):
+    result = await db.execute(query, execution_options=execution_options)
+    return result.scalar_one_or_none()
+
+
+def build_lookups(counts: Dict[str, int]) -> Dict[str, Dict[str, Lookup]]:
+    """Por consulta: (modo -> llamada(db, i)); i recorre los IDs existentes"""
+    n_dish, n_est, n_res = counts["dishes"], counts["establishments"], counts["reservations"]
+    no_cache = {"compiled_cache": None}
+    return {
+        "get_dish_by_id": {
+            "no_cache": lambda db, i: _inline(db, select(Dish).where(Dish.dish_id == i % n_dish + 1), **no_cache),
+            "inline": lambda db, i: _inline(db, select(Dish).where(Dish.dish_id == i % n_dish + 1)),
+            "precompiled": lambda db, i: dishes_controller.get_dish_by_id(db, i % n_dish + 1),
+        },
+        "get_establishment_by_id": {
+            "no_cache": lambda db, i: _inline(
+                db, select(Establishment).where(Establishment.establishment_id == i % n_est + 1), **no_cache
+            ),
+            "inline": lambda db, i: _inline(
+                db, select(Establishment).where(Establishment.establishment_id == i % n_est + 1)
+            ),
+            "precompiled": lambda db, i: establishment_controller.get_establishment_by_id(db, i % n_est + 1),
+        },
+        "get_reservation_by_id": {
+            "no_cache": lambda db, i: _inline(
+                db, select(Reservation).where(Reservation.reservation_id == i % n_res + 1), **no_cache
+            ),
+            "inline": lambda db, i: _inline(
+                db, select(Reservation).where(Reservation.reservation_id == i % n_res + 1)
+            ),
+            "precompiled": lambda db, i: reservations_controller.get_reservation_by_id(db, i % n_res + 1),
+        },
+    }
+
+
+async def measure(
+    session_factory: async_sessionmaker, cache_results: Dict[str, int], lookup: Lookup, iterations: int, warmup: int
+) -> Dict[str, float]:
+    async with session_factory() as db:
+        for i in range(warmup):
+            await lookup(db, i)
+            db.expunge_all()
+        cache_results.clear()
+
+        cpu_started = time.process_time()
+        wall_started = time.perf_counter()
+        for i in range(iterations):
+            await lookup(db, i)
+            # Sin identity map: cada llamada materializa el objeto como en una petición nueva
+            db.expunge_all()
+        wall = time.perf_counter() - wall_started
+        cpu = time.process_time() - cpu_started
+
+    return {
+        "cpu_us": cpu / iterations * 1e6,
+        "wall_us": wall / iterations * 1e6,
+        "cache_hits": cache_results.get("cache_hit", 0),
+        "cache_misses": cache_results.get("cache_miss", 0),
+        "cache_disabled": cache_results.get("caching_disabled", 0),
+    }
+
+
+async def run(database_url: str, iterations: int, warmup: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    engine = create_async_engine(database_url, **engine_options(database_url))
+    cache_results: Dict[str, int] = {}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_cache_result(conn, cursor, statement, parameters, context, executemany):
+        name = context.cache_hit.name.lower()
+        cache_results[name] = cache_results.get(name, 0) + 1
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    counts = await seed(session_factory, SeedSize())
+
+    report = {}
+    for name, modes in build_lookups(counts).items():
+        report[name] = {}
+        for mode in MODES:
+            report[name][mode] = await measure(session_factory, cache_results, modes[mode], iterations, warmup)
+    await engine.dispose()
+    return report
+
+
+def print_report(report: Dict[str, Dict[str, Dict[str, float]]]) -> None:
+    print(f"{'consulta':26} {'modo':12} {'CPU µs':>9} {'wall µs':>9} {'hits':>7} {'misses':>7} {'sin caché':>9}")
+    for name, modes in report.items():
+        for mode in MODES:
+            m = modes[mode]
+            print(
+                f"{name:26} {mode:12} {m['cpu_us']:9.1f} {m['wall_us']:9.1f} "
+                f"{m['cache_hits']:7d} {m['cache_misses']:7d} {m['cache_disabled']:9d}"
+            )
+        saved_inline = modes["inline"]["cpu_us"] - modes["precompiled"]["cpu_us"]
+        saved_no_cache = modes["no_cache"]["cpu_us"] - modes["precompiled"]["cpu_us"]
+        print(
+            f"{'':26} CPU ahorrada por petición: {saved_inline:.1f} µs frente a inline, "
+            f"{saved_no_cache:.1f} µs frente a sin caché\n"
+        )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="CPU por petición con sentencias precompiladas")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    print_report(asyncio.run(run(args.database_url, args.iterations, args.warmup)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,463 @@
+"""
+Micro-benchmark suite for the controller layer.
+
+Calls the controller functions directly against a seeded database (in-memory
+SQLite by default, or any async URL such as postgresql+asyncpg://...) and
+reports, per controller: mean / p50 / p99 latency, SQL statements issued per
+call and bytes allocated per call (tracemalloc peak).
+
+Usage:
+    python -m benchmarks.controllers                          # run and print
+    python -m benchmarks.controllers --save baseline.json     # write a baseline
+    python -m benchmarks.controllers --compare baseline.json  # flag regressions
+    python -m benchmarks.controllers --database-url postgresql+asyncpg://... --only get_dish_by_id
+
+WARNING: with --database-url all tables of that database are dropped and recreated!
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, time as dtime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# Los módulos de app leen DATABASE_URL al importarse
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import Base
+from app.models import *
+from app.models.reservations import ReservationStatus
+from app.models.reviews import RatingEnum
+from app.models.users import UserRole, UserStatus
+from app.controllers import (
+    categories as categories_controller,
+    dish_search as dish_search_controller,
+    dishes as dishes_controller,
+    establishment as establishment_controller,
+    menu as menu_controller,
+    recommendations as recommendations_controller,
+    reservations as reservations_controller,
+    reviews as reviews_controller,
+)
+from app.schemas.reservations import ReservationsUpdate
+from app.schemas.review import ReviewCreate
+
+DEFAULT_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+METRICS = ("mean_ms", "p99_ms", "statements", "alloc_bytes")
+
+
+@dataclass
+class SeedSize:
+    establishments: int = 50
+    menus_per_establishment: int = 2
+    dishes_per_menu: int = 20
+    users: int = 400
+    categories: int = 12
+    allergens: int = 14
+    reservations_per_user: int = 5
+
+
+@dataclass
+class Scenario:
+    """Una llamada a un controlador; `call(db, i)` recibe el número de iteración"""
+    name: str
+    call: Callable[[AsyncSession, int], Awaitable[object]]
+
+
+@dataclass
+class Result:
+    name: str
+    iterations: int
+    mean_ms: float
+    p50_ms: float
+    p99_ms: float
+    statements: float
+    alloc_bytes: float
+    samples_ms: List[float] = field(default_factory=list, repr=False)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "iterations": self.iterations,
+            "mean_ms": round(self.mean_ms, 4),
+            "p50_ms": round(self.p50_ms, 4),
+            "p99_ms": round(self.p99_ms, 4),
+            "statements": round(self.statements, 2),
+            "alloc_bytes": round(self.alloc_bytes),
+        }
+
+
+# ---------- SEMILLA ----------
+async def seed(session_factory: async_sessionmaker, size: SeedSize) -> Dict[str, int]:
+    """Poblar la base de datos con un conjunto de datos determinista"""
+    n_menus = size.establishments * size.menus_per_establishment
+    n_dishes = n_menus * size.dishes_per_menu
+
+    async with session_factory() as db:
+        await db.execute(insert(Establishment), [
+            {
+                "establishment_id": i,
+                "NIT": f"NIT{i:08d}",
+                "name": f"Restaurante {i}",
+                "description": "Restaurante de prueba",
+                "sustainability_points": (i * 37) % 1000,
+                "address": f"Calle {i}",
+                "opening_hour": dtime(8, 0),
+                "closing_hour": dtime(22, 0),
+            }
+            for i in range(1, size.establishments + 1)
+        ])
+        await db.execute(insert(Category), [
+            {"category_id": i, "name": f"Categoria {i}"} for i in range(1, size.categories + 1)
+        ])
+        await db.execute(insert(Allergens), [
+            {"allergen_id": i, "name": f"Alergeno {i}"} for i in range(1, size.allergens + 1)
+        ])
+        await db.execute(insert(Menu), [
+            {"menu_id": i, "establishment_id": (i - 1) // size.menus_per_establishment + 1, "title": f"Menu {i}"}
+            for i in range(1, n_menus + 1)
+        ])
+        await db.execute(insert(Dish), [
+            {
+                "dish_id": i,
+                "menu_id": (i - 1) // size.dishes_per_menu + 1,
+                "name": f"Plato {i} {'pasta' if i % 7 == 0 else 'sopa'}",
+                "description": "Plato de prueba",
+                "price": 5 + (i % 40),
+            }
+            for i in range(1, n_dishes + 1)
+        ])
+        await db.execute(insert(DishCategory), [
+            {"dish_id": i, "category_id": c}
+            for i in range(1, n_dishes + 1)
+            for c in {i % size.categories + 1, (i * 5) % size.categories + 1}
+        ])
+        await db.execute(insert(DishAllergen), [
+            {"dish_id": i, "allergen_id": i % size.allergens + 1}
+            for i in range(1, n_dishes + 1)
+        ])
+        await db.execute(insert(EstablishmentCategory), [
+            {"establishment_id": e, "category_id": c}
+            for e in range(1, size.establishments + 1)
+            for c in {e % size.categories + 1, (e * 3) % size.categories + 1}
+        ])
+        await db.execute(insert(User), [
+            {
+                "user_id": i,
+                "role": UserRole.user,
+                "name": f"Usuario {i}",
+                "email": f"user{i}@bench.test",
+                "password": "x",
+                "status": UserStatus.active,
+            }
+            for i in range(1, size.users + 1)
+        ])
+        base_date = datetime(2025, 1, 1, 20, 0)
+        await db.execute(insert(Reservation), [
+            {
+                "user_id": u,
+                "establishment_id": (u * 7 + r) % size.establishments + 1,
+                "date": base_date + timedelta(days=(u + r * 11) % 365),
+                "people_count": 2 + r % 4,
+                "status": ReservationStatus.pending,
+            }
+            for u in range(1, size.users + 1)
+            for r in range(size.reservations_per_user)
+        ])
+        # Solo la mitad de los usuarios reseña; el resto queda libre para create_review
+        await db.execute(insert(Review), [
+            {
+                "user_id": u,
+                "establishment_id": e,
+                "rating": RatingEnum.FOUR,
+                "comment": "Muy bueno",
+            }
+            for u in range(1, size.users // 2 + 1)
+            for e in {u % size.establishments + 1, (u * 3) % size.establishments + 1}
+        ])
+        await db.commit()
+        await dish_search_controller.rebuild_dish_documents(db)
+
+    return {
+        "establishments": size.establishments,
+        "menus": n_menus,
+        "dishes": n_dishes,
+        "users": size.users,
+        "categories": size.categories,
+        "allergens": size.allergens,
+        "reservations": size.users * size.reservations_per_user,
+    }
+
+
+# ---------- ESCENARIOS ----------
+def build_scenarios(counts: Dict[str, int]) -> List[Scenario]:
+    """Escenarios por controlador; los IDs rotan para no medir siempre la misma fila"""
+    n_est = counts["establishments"]
+    n_menus = counts["menus"]
+    n_dishes = counts["dishes"]
+    n_users = counts["users"]
+    n_cat = counts["categories"]
+    n_res = counts["reservations"]
+
+    def rot(i: int, n: int) -> int:
+        return (i * 7919) % n + 1
+
+    async def create_review(db: AsyncSession, i: int):
+        # Usuarios de la segunda mitad, que no tienen reseñas sembradas
+        user_id = n_users // 2 + 1 + i % (n_users // 2)
+        establishment_id = (i // (n_users // 2)) % n_est + 1
+        return await reviews_controller.create_review(db, ReviewCreate(
+            user_id=user_id, establishment_id=establishment_id, rating="5", comment="bench"
+        ))
+
+    async def update_reservation(db: AsyncSession, i: int):
+        return await reservations_controller.update_reservation(
+            db, rot(i, n_res), ReservationsUpdate(people_count=2 + i % 6)
+        )
+
+    return [
+        Scenario("get_all_dishes", lambda db, i: dishes_controller.get_all_dishes(db)),
+        Scenario("get_dish_by_id", lambda db, i: dishes_controller.get_dish_by_id(db, rot(i, n_dishes))),
+        Scenario("search_dishes_by_name", lambda db, i: dishes_controller.search_dishes_by_name(db, "pasta")),
+        Scenario(
+            "search_dishes",
+            lambda db, i: dish_search_controller.search_dishes(
+                db, q="pasta", max_price=30, category_ids=[rot(i, n_cat)], exclude_allergen_ids=[1]
+            ),
+        ),
+        Scenario("get_dishes_price_gt", lambda db, i: dishes_controller.get_dishes_price_gt(db, 40)),
+        Scenario("get_allergens_by_dish", lambda db, i: dishes_controller.get_allergens_by_dish(db, rot(i, n_dishes))),
+        Scenario("get_dishes_by_menu", lambda db, i: menu_controller.get_dishes_by_menu(db, rot(i, n_menus))),
+        Scenario(
+            "get_dishes_by_menu_and_category",
+            lambda db, i: menu_controller.get_dishes_by_menu_and_category(db, rot(i, n_menus), rot(i, n_cat)),
+        ),
+        Scenario(
+            "get_menus_by_establishment",
+            lambda db, i: menu_controller.get_menus_by_establishment(db, rot(i, n_est)),
+        ),
+        Scenario("get_establishments", lambda db, i: establishment_controller.get_establishments(db)),
+        Scenario(
+            "get_establishment_by_id",
+            lambda db, i: establishment_controller.get_establishment_by_id(db, rot(i, n_est)),
+        ),
+        Scenario(
+            "get_establishments_by_category",
+            lambda db, i: categories_controller.get_establishments_by_category(db, rot(i, n_cat)),
+        ),
+        Scenario(
+            "get_dishes_by_category",
+            lambda db, i: categories_controller.get_dishes_by_category(db, rot(i, n_cat)),
+        ),
+        Scenario("get_all_reservations", lambda db, i: reservations_controller.get_all_reservations(db)),
+        Scenario(
+            "get_reservation_by_id",
+            lambda db, i: reservations_controller.get_reservation_by_id(db, rot(i, n_res)),
+        ),
+        Scenario(
+            "get_reservations_by_user",
+            lambda db, i: reservations_controller.get_reservations_by_user(db, rot(i, n_users)),
+        ),
+        Scenario(
+            "get_reservations_by_establishment",
+            lambda db, i: reservations_controller.get_reservations_by_establishment(db, rot(i, n_est)),
+        ),
+        Scenario(
+            "get_reviews_by_establishment",
+            lambda db, i: reviews_controller.get_reviews_by_establishment(db, rot(i, n_est)),
+        ),
+        Scenario(
+            "get_dish_recommendations",
+            lambda db, i: recommendations_controller.get_dish_recommendations(db, rot(i, n_users), 10),
+        ),
+        Scenario("update_reservation", update_reservation),
+        Scenario("create_review", create_review),
+    ]
+
+
+# ---------- MEDICIÓN ----------
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_scenario(
+    session_factory: async_sessionmaker,
+    statement_counter: List[int],
+    scenario: Scenario,
+    iterations: int,
+    warmup: int,
+    memory_iterations: int,
+) -> Result:
+    """Tiempo y sentencias SQL en una pasada; memoria (tracemalloc) en otra"""
+    offset = 0
+
+    async def call_once(i: int) -> float:
+        async with session_factory() as db:
+            start = time.perf_counter()
+            await scenario.call(db, i)
+            return (time.perf_counter() - start) * 1000
+
+    for _ in range(warmup):
+        await call_once(offset)
+        offset += 1
+
+    samples = []
+    statements_before = statement_counter[0]
+    for _ in range(iterations):
+        samples.append(await call_once(offset))
+        offset += 1
+    statements = (statement_counter[0] - statements_before) / iterations
+
+    # tracemalloc distorsiona los tiempos, por eso va en una pasada aparte
+    allocations = []
+    tracemalloc.start()
+    try:
+        for _ in range(memory_iterations):
+            async with session_factory() as db:
+                tracemalloc.reset_peak()
+                current, _ = tracemalloc.get_traced_memory()
+                await scenario.call(db, offset)
+                _, peak = tracemalloc.get_traced_memory()
+            allocations.append(peak - current)
+            offset += 1
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        name=scenario.name,
+        iterations=iterations,
+        mean_ms=statistics.fmean(samples),
+        p50_ms=percentile(samples, 50),
+        p99_ms=percentile(samples, 99),
+        statements=statements,
+        alloc_bytes=statistics.fmean(allocations) if allocations else 0.0,
+        samples_ms=samples,
+    )
+
+
+async def run_suite(
+    database_url: str,
+    size: SeedSize,
+    iterations: int,
+    warmup: int,
+    memory_iterations: int,
+    only: Optional[List[str]] = None,
+) -> Dict[str, object]:
+    engine = create_async_engine(database_url)
+    statement_counter = [0]
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statements(conn, cursor, statement, parameters, context, executemany):
+        statement_counter[0] += 1
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    counts = await seed(session_factory, size)
+
+    results = {}
+    for scenario in build_scenarios(counts):
+        if only and scenario.name not in only:
+            continue
+        result = await run_scenario(
+            session_factory, statement_counter, scenario, iterations, warmup, memory_iterations
+        )
+        results[scenario.name] = result.as_dict()
+        print(format_row(scenario.name, result.as_dict()), flush=True)
+
+    await engine.dispose()
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "database": engine.dialect.name,
+            "python": platform.python_version(),
+            "iterations": iterations,
+            "seed": counts,
+        },
+        "results": results,
+    }
+
+
+# ---------- COMPARACIÓN ----------
+def compare(baseline: Dict[str, object], current: Dict[str, object], threshold: float) -> List[str]:
+    """Devuelve las regresiones de `current` frente a `baseline` por encima del umbral"""
+    regressions = []
+    base_results = baseline.get("results", {})
+    for name, metrics in current["results"].items():
+        previous = base_results.get(name)
+        if not previous:
+            continue
+        for metric in METRICS:
+            old, new = previous.get(metric), metrics.get(metric)
+            if old is None or new is None:
+                continue
+            # Cualquier sentencia SQL extra es una regresión; el resto admite ruido
+            limit = old if metric == "statements" else old * (1 + threshold)
+            if new > limit + 1e-9:
+                change = (new - old) / old * 100 if old else float("inf")
+                regressions.append(f"{name}.{metric}: {old} -> {new} (+{change:.1f}%)")
+    return regressions
+
+
+def format_row(name: str, metrics: Dict[str, float]) -> str:
+    return (
+        f"{name:<36} mean={metrics['mean_ms']:>9.3f}ms  p50={metrics['p50_ms']:>9.3f}ms  "
+        f"p99={metrics['p99_ms']:>9.3f}ms  sql={metrics['statements']:>5.1f}  "
+        f"alloc={metrics['alloc_bytes'] / 1024:>9.1f}KiB"
+    )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks de controladores de GastroEje")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--memory-iterations", type=int, default=20)
+    parser.add_argument("--establishments", type=int, default=SeedSize.establishments)
+    parser.add_argument("--users", type=int, default=SeedSize.users)
+    parser.add_argument("--only", nargs="*", help="Nombres de escenarios a ejecutar")
+    parser.add_argument("--save", metavar="PATH", help="Guardar los resultados como baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Comparar contra un baseline existente")
+    parser.add_argument("--threshold", type=float, default=0.20, help="Tolerancia relativa (0.20 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    size = SeedSize(establishments=args.establishments, users=args.users)
+    report = asyncio.run(run_suite(
+        args.database_url, size, args.iterations, args.warmup, args.memory_iterations, args.only
+    ))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Baseline guardado en {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regresion(es) por encima del {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\nSin regresiones frente a {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Fetching N records one request at a time vs a single multi-get request.
+
+Seeds an in-memory SQLite database and drives the real HTTP app through httpx's ASGI
+transport, so routing, validation and serialization are included. For dishes it compares
+--ids sequential GET /platos/{id} calls with one GET /platos?ids=...; for establishments,
+GET /establishments/{id} calls with one POST /establishments/batch.
+
+Usage:
+    python -m benchmarks.multi_get                 # 100 IDs
+    python -m benchmarks.multi_get --ids 50 --repeat 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import time as dtime
+from typing import Awaitable, Callable, List, Optional
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, get_db, get_read_db
+from app.main import app
+from app.models import *
+
+
+async def seed(db: AsyncSession, rows: int) -> None:
+    await db.execute(insert(Establishment), [
+        {"establishment_id": i, "NIT": f"NIT{i}", "name": f"Restaurante {i}", "address": f"Calle {i}",
+         "opening_hour": dtime(8), "closing_hour": dtime(22)}
+        for i in range(1, rows + 1)
+    ])
+    await db.execute(insert(Menu), [{"menu_id": 1, "establishment_id": 1, "title": "Carta"}])
+    await db.execute(insert(Dish), [
+        {"dish_id": i, "menu_id": 1, "name": f"Plato {i}", "price": 10.0 + i % 20}
+        for i in range(1, rows + 1)
+    ])
+    await db.commit()
+
+
+async def measure(run: Callable[[], Awaitable[None]], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await run()
+        samples.append(time.perf_counter() - start)
+    return min(samples) * 1000
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Peticiones individuales frente a multi-get")
+    parser.add_argument("--ids", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args(argv)
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessions() as db:
+        await seed(db, args.ids)
+
+    async def override_get_db():
+        async with sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    ids = list(range(1, args.ids + 1))
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        async def one_by_one(path: str) -> None:
+            for item_id in ids:
+                (await client.get(f"{path}/{item_id}")).raise_for_status()
+
+        async def dishes_batch() -> None:
+            (await client.get("/platos/", params={"ids": ",".join(map(str, ids))})).raise_for_status()
+
+        async def establishments_batch() -> None:
+            (await client.post("/establishments/batch", json={"ids": ids})).raise_for_status()
+
+        cases = [
+            ("platos", lambda: one_by_one("/platos"), dishes_batch),
+            ("establecimientos", lambda: one_by_one("/establishments"), establishments_batch),
+        ]
+        print(f"{'recurso':<18} {'modo':<16} {'ms':>8}")
+        for name, single, batch in cases:
+            single_ms = await measure(single, args.repeat)
+            batch_ms = await measure(batch, args.repeat)
+            print(f"{name:<18} {f'{args.ids} × GET':<16} {single_ms:>8.2f}")
+            print(f"{name:<18} {'1 lote':<16} {batch_ms:>8.2f}  ({single_ms / batch_ms:.0f}x más rápido)")
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    asyncio.run(main_async(parse_args(argv)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
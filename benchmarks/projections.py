@@ -0,0 +1,110 @@
+"""
+Per-row CPU and memory of the read-only list endpoints: ORM entities vs column projections.
+
+Seeds an in-memory SQLite database with --rows dishes and establishments and, for each list,
+times the whole path the endpoint follows (query, fetch, validation against the *Out schema
+and JSON serialization) loading full entities (select(Model)) and loading the projection
+from app.queries. Memory is the tracemalloc peak of a separate run, divided by the rows.
+
+Usage:
+    python -m benchmarks.projections                  # 100k rows
+    python -m benchmarks.projections --rows 20000 --repeat 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from datetime import time as dtime
+from typing import Awaitable, Callable, List, Optional
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import queries
+from app.database import Base
+from app.models import *
+from app.schemas.dishes import DishOut
+from app.schemas.establishment import EstablishmentOut
+
+
+async def seed(db: AsyncSession, rows: int) -> None:
+    await db.execute(insert(Establishment), [
+        {"establishment_id": i, "NIT": f"NIT{i}", "name": f"Restaurante {i}", "address": f"Calle {i}",
+         "description": "Cocina de temporada", "sustainability_points": i % 100,
+         "opening_hour": dtime(8), "closing_hour": dtime(22)}
+        for i in range(1, rows + 1)
+    ])
+    await db.execute(insert(Menu), [{"menu_id": 1, "establishment_id": 1, "title": "Carta"}])
+    await db.execute(insert(Dish), [
+        {"dish_id": i, "menu_id": 1, "name": f"Plato {i}", "description": "Con verduras de la huerta",
+         "price": 10.0 + i % 20}
+        for i in range(1, rows + 1)
+    ])
+    await db.commit()
+
+
+def list_path(sessions: async_sessionmaker, statement, adapter: TypeAdapter, entities: bool) -> Callable:
+    async def run() -> int:
+        async with sessions() as db:
+            result = await db.execute(statement)
+            items = result.scalars().all() if entities else queries.as_dicts(result)
+            body = adapter.dump_json(adapter.validate_python(items))
+        return len(body)
+    return run
+
+
+async def measure(run: Callable[[], Awaitable[int]], rows: int, repeat: int) -> tuple:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await run()
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    await run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(samples) / rows * 1e6, peak / rows
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Entidades ORM frente a proyecciones en los listados")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    return parser.parse_args(argv)
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessions() as db:
+        await seed(db, args.rows)
+
+    lists = [
+        ("get_all_dishes", Dish, queries.DISHES_ROWS, TypeAdapter(List[DishOut])),
+        ("get_establishments", Establishment, queries.ESTABLISHMENTS_ROWS, TypeAdapter(List[EstablishmentOut])),
+    ]
+    print(f"{'listado':<20} {'modo':<12} {'µs/fila':>8} {'bytes/fila':>11}")
+    for name, model, projection, adapter in lists:
+        baseline = None
+        for mode, statement, entities in (("entidades", select(model), True), ("proyección", projection, False)):
+            cpu, memory = await measure(list_path(sessions, statement, adapter, entities), args.rows, args.repeat)
+            note = "" if baseline is None else f"  ({cpu / baseline[0]:.0%} CPU, {memory / baseline[1]:.0%} memoria)"
+            baseline = baseline or (cpu, memory)
+            print(f"{name:<20} {mode:<12} {cpu:>8.2f} {memory:>11.0f}{note}")
+    await engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    asyncio.run(main_async(parse_args(argv)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Full rebuild time and lookup latency of the dish recommendations at production scale.
+
+Generates synthetic interactions (users x establishments, with a popularity skew so the
+co-occurrence matrix is realistic), a catalog of dishes with categories and allergens,
+and times app.recommendations.build_index plus the in-memory top-N lookup.
+
+Usage:
+    python -m benchmarks.recommendations                                  # 2M interactions
+    python -m benchmarks.recommendations --users 500000 --interactions 5000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import List, Optional
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+import numpy as np
+
+from app.recommendations import Catalog, Interactions, build_index
+
+
+def synthetic_data(args: argparse.Namespace) -> tuple:
+    rng = np.random.default_rng(args.seed)
+    # Zipf: pocos establecimientos concentran la mayoría de interacciones
+    establishments = np.minimum(rng.zipf(1.3, args.interactions), args.establishments)
+    interactions = Interactions(
+        user_ids=rng.integers(1, args.users + 1, args.interactions),
+        establishment_ids=establishments.astype(np.int64),
+        weights=rng.choice(np.array([1.0, 1.0, 2.0], dtype=np.float32), args.interactions),
+    )
+    n_dishes = args.establishments * args.dishes_per_establishment
+    dish_ids = np.arange(1, n_dishes + 1, dtype=np.int64)
+    dish_establishments = (dish_ids - 1) // args.dishes_per_establishment + 1
+    dish_categories = (np.repeat(dish_ids, 2), rng.integers(1, args.categories + 1, n_dishes * 2))
+    allergen_dishes = rng.choice(dish_ids, n_dishes // 3, replace=False)
+    allergic_users = rng.choice(np.arange(1, args.users + 1), args.users // 10, replace=False)
+    catalog = Catalog(
+        dish_ids=dish_ids,
+        dish_establishment_ids=dish_establishments,
+        dish_categories=dish_categories,
+        dish_allergens=(allergen_dishes, rng.integers(1, 15, len(allergen_dishes))),
+        user_allergens=(allergic_users, rng.integers(1, 15, len(allergic_users))),
+    )
+    return interactions, catalog
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Reconstrucción y consulta de recomendaciones a escala")
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--establishments", type=int, default=5_000)
+    parser.add_argument("--dishes-per-establishment", type=int, default=20)
+    parser.add_argument("--categories", type=int, default=30)
+    parser.add_argument("--interactions", type=int, default=2_000_000)
+    parser.add_argument("--top-n", type=int, default=50)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    started = time.perf_counter()
+    interactions, catalog = synthetic_data(args)
+    print(f"datos sintéticos: {args.interactions} interacciones en {time.perf_counter() - started:.1f}s")
+
+    index = build_index(interactions, catalog, top_n=args.top_n)
+    print(f"reconstrucción: {len(index.by_user)} usuarios en {index.build_seconds:.1f}s")
+
+    user_ids = np.random.default_rng(args.seed).integers(1, args.users + 1, args.lookups)
+    samples = []
+    for user_id in user_ids.tolist():
+        start = time.perf_counter()
+        index.ranked(user_id)
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    print(
+        f"consulta en memoria: media {statistics.fmean(samples):.2f}µs, "
+        f"p99 {samples[int(len(samples) * 0.99) - 1]:.2f}µs"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Operaciones de migración seguras para ejecutar con la aplicación en línea.
+
+En PostgreSQL:
+- los índices se crean/eliminan con CONCURRENTLY (sin bloquear escrituras), fuera de la
+  transacción de la migración;
+- las claves foráneas se añaden NOT VALID y se validan después (sin bloquear escrituras).
+
+lock_timeout (MIGRATION_LOCK_TIMEOUT) lo fija migrations/env.py para toda la migración; los
+backfills de tablas grandes van fuera de las migraciones, con app/backfill.
+
+En otros motores (SQLite en desarrollo y tests) se degradan a la operación normal.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def create_index_concurrently(name: str, table: str, columns: List[str], unique: bool = False, **kw) -> None:
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS en PostgreSQL; create_index normal en otros motores"""
+    if is_postgresql():
+        # CONCURRENTLY no puede ejecutarse dentro de una transacción
+        with op.get_context().autocommit_block():
+            op.create_index(
+                name, table, columns, unique=unique,
+                postgresql_concurrently=True, if_not_exists=True, **kw
+            )
+    else:
+        op.create_index(name, table, columns, unique=unique, **kw)
+
+
+def drop_index_concurrently(name: str, table: str) -> None:
+    """DROP INDEX CONCURRENTLY IF EXISTS en PostgreSQL; drop_index normal en otros motores"""
+    if is_postgresql():
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(name, table_name=table)
+
+
+def replace_foreign_keys(
+    table: str,
+    foreign_keys: Sequence[Tuple[str, str, str]],
+    ondelete: Optional[str] = None,
+) -> None:
+    """
+    Volver a crear las claves foráneas (columna, tabla referida, columna referida) de `table`
+    con otro ON DELETE. Los nombres son los que PostgreSQL da por defecto: <tabla>_<columna>_fkey.
+
+    En PostgreSQL la nueva clave se añade NOT VALID (solo un lock breve) y se valida después
+    fuera de la transacción, sin bloquear las escrituras de la tabla. En SQLite se recrea la tabla.
+    """
+    names = [(f"{table}_{column}_fkey", column, ref_table, ref_column) for column, ref_table, ref_column in foreign_keys]
+    if is_postgresql():
+        for name, column, ref_table, ref_column in names:
+            op.drop_constraint(name, table, type_="foreignkey")
+            op.create_foreign_key(
+                name, table, ref_table, [column], [ref_column], ondelete=ondelete, postgresql_not_valid=True
+            )
+        with op.get_context().autocommit_block():
+            for name, *_ in names:
+                op.execute(sa.text(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}"))
+        return
+
+    naming_convention = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+    with op.batch_alter_table(table, naming_convention=naming_convention) as batch_op:
+        for name, column, ref_table, ref_column in names:
+            batch_op.drop_constraint(name, type_="foreignkey")
+            batch_op.create_foreign_key(name, ref_table, [column], [ref_column], ondelete=ondelete)
+
@@ -0,0 +1,189 @@
+"""baseline schema
+
+Esquema tal como lo creaba Base.metadata.create_all. Las bases de datos existentes
+creadas con create_all / recreate_tables.py se adoptan con: alembic stamp 0001
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 07:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('allergens',
+    sa.Column('allergen_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.PrimaryKeyConstraint('allergen_id')
+    )
+    op.create_index(op.f('ix_allergens_allergen_id'), 'allergens', ['allergen_id'], unique=False)
+    op.create_table('categories',
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('category_id')
+    )
+    op.create_index(op.f('ix_categories_category_id'), 'categories', ['category_id'], unique=False)
+    op.create_table('establishments',
+    sa.Column('establishment_id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('NIT', sa.String(length=16), nullable=False),
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('sustainability_points', sa.Integer(), nullable=True),
+    sa.Column('address', sa.Text(), nullable=True),
+    sa.Column('mean_waiting_time', sa.Float(), nullable=True),
+    sa.Column('opening_hour', sa.Time(), nullable=True),
+    sa.Column('closing_hour', sa.Time(), nullable=True),
+    sa.Column('phone_number', sa.String(length=30), nullable=True),
+    sa.Column('website', sa.String(length=255), nullable=True),
+    sa.Column('logo', sa.String(length=255), nullable=True),
+    sa.PrimaryKeyConstraint('establishment_id')
+    )
+    op.create_index(op.f('ix_establishments_NIT'), 'establishments', ['NIT'], unique=True)
+    op.create_index(op.f('ix_establishments_establishment_id'), 'establishments', ['establishment_id'], unique=False)
+    op.create_table('users',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('role', sa.Enum('admin', 'user', name='userrole'), nullable=False),
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('last_name', sa.String(length=32), nullable=True),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('password', sa.String(length=255), nullable=False),
+    sa.Column('phone', sa.String(length=13), nullable=True),
+    sa.Column('status', sa.Enum('active', 'inactive', 'not_verified', 'banned', name='userstatus'), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_user_id'), 'users', ['user_id'], unique=False)
+    op.create_table('accessibility_features',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('establishment_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['establishment_id'], ['establishments.establishment_id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_accessibility_features_id'), 'accessibility_features', ['id'], unique=False)
+    op.create_table('establishment_category',
+    sa.Column('establishment_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.category_id'], ),
+    sa.ForeignKeyConstraint(['establishment_id'], ['establishments.establishment_id'], ),
+    sa.PrimaryKeyConstraint('establishment_id', 'category_id')
+    )
+    op.create_table('menus',
+    sa.Column('menu_id', sa.Integer(), nullable=False),
+    sa.Column('establishment_id', sa.Integer(), nullable=True),
+    sa.Column('title', sa.String(length=32), nullable=False),
+    sa.ForeignKeyConstraint(['establishment_id'], ['establishments.establishment_id'], ),
+    sa.PrimaryKeyConstraint('menu_id')
+    )
+    op.create_index(op.f('ix_menus_menu_id'), 'menus', ['menu_id'], unique=False)
+    op.create_table('reservations',
+    sa.Column('reservation_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('establishment_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=False),
+    sa.Column('people_count', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Enum('pending', 'confirmed', 'cancelled', name='reservationstatus'), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['establishment_id'], ['establishments.establishment_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('reservation_id')
+    )
+    op.create_index(op.f('ix_reservations_reservation_id'), 'reservations', ['reservation_id'], unique=False)
+    op.create_table('reviews',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('establishment_id', sa.Integer(), nullable=False),
+    sa.Column('rating', sa.Enum('ONE', 'TWO', 'THREE', 'FOUR', 'FIVE', name='ratingenum'), nullable=False),
+    sa.Column('comment', sa.Text(), nullable=True),
+    sa.Column('img', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['establishment_id'], ['establishments.establishment_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'establishment_id')
+    )
+    op.create_table('user_allergen',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('allergen_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['allergen_id'], ['allergens.allergen_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'allergen_id')
+    )
+    op.create_index(op.f('ix_user_allergen_allergen_id'), 'user_allergen', ['allergen_id'], unique=False)
+    op.create_index(op.f('ix_user_allergen_user_id'), 'user_allergen', ['user_id'], unique=False)
+    op.create_table('dishes',
+    sa.Column('dish_id', sa.Integer(), nullable=False),
+    sa.Column('menu_id', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('img', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['menu_id'], ['menus.menu_id'], ),
+    sa.PrimaryKeyConstraint('dish_id')
+    )
+    op.create_index(op.f('ix_dishes_dish_id'), 'dishes', ['dish_id'], unique=False)
+    op.create_table('dish_allergen',
+    sa.Column('dish_id', sa.Integer(), nullable=False),
+    sa.Column('allergen_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['allergen_id'], ['allergens.allergen_id'], ),
+    sa.ForeignKeyConstraint(['dish_id'], ['dishes.dish_id'], ),
+    sa.PrimaryKeyConstraint('dish_id', 'allergen_id')
+    )
+    op.create_index(op.f('ix_dish_allergen_allergen_id'), 'dish_allergen', ['allergen_id'], unique=False)
+    op.create_index(op.f('ix_dish_allergen_dish_id'), 'dish_allergen', ['dish_id'], unique=False)
+    op.create_table('dish_category',
+    sa.Column('dish_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.category_id'], ),
+    sa.ForeignKeyConstraint(['dish_id'], ['dishes.dish_id'], ),
+    sa.PrimaryKeyConstraint('dish_id', 'category_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('dish_category')
+    op.drop_index(op.f('ix_dish_allergen_dish_id'), table_name='dish_allergen')
+    op.drop_index(op.f('ix_dish_allergen_allergen_id'), table_name='dish_allergen')
+    op.drop_table('dish_allergen')
+    op.drop_index(op.f('ix_dishes_dish_id'), table_name='dishes')
+    op.drop_table('dishes')
+    op.drop_index(op.f('ix_user_allergen_user_id'), table_name='user_allergen')
+    op.drop_index(op.f('ix_user_allergen_allergen_id'), table_name='user_allergen')
+    op.drop_table('user_allergen')
+    op.drop_table('reviews')
+    op.drop_index(op.f('ix_reservations_reservation_id'), table_name='reservations')
+    op.drop_table('reservations')
+    op.drop_index(op.f('ix_menus_menu_id'), table_name='menus')
+    op.drop_table('menus')
+    op.drop_table('establishment_category')
+    op.drop_index(op.f('ix_accessibility_features_id'), table_name='accessibility_features')
+    op.drop_table('accessibility_features')
+    op.drop_index(op.f('ix_users_user_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_establishments_establishment_id'), table_name='establishments')
+    op.drop_index(op.f('ix_establishments_NIT'), table_name='establishments')
+    op.drop_table('establishments')
+    op.drop_index(op.f('ix_categories_category_id'), table_name='categories')
+    op.drop_table('categories')
+    op.drop_index(op.f('ix_allergens_allergen_id'), table_name='allergens')
+    op.drop_table('allergens')
+    # En PostgreSQL los tipos ENUM sobreviven a drop_table
+    for enum_name in ("ratingenum", "reservationstatus", "userstatus", "userrole"):
+        sa.Enum(name=enum_name).drop(op.get_bind(), checkfirst=True)
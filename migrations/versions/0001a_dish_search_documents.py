@@ -0,0 +1,142 @@
+"""dish search documents
+
+Tabla desnormalizada de la búsqueda de platos (GET /platos/buscar). No formaba parte del
+esquema de create_all que adopta 0001, así que una base de datos marcada con
+alembic stamp 0001 la crea aquí; después se rellena con los platos existentes.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-19 07:42:00
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001a'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+BATCH_SIZE = 1000
+
+# Copia de la tabla tal como la deja esta revisión: la migración no depende de los modelos
+# ni del código de la aplicación, que pueden cambiar después
+documents = sa.table(
+    'dish_search_documents',
+    sa.column('dish_id', sa.Integer),
+    sa.column('menu_id', sa.Integer),
+    sa.column('establishment_id', sa.Integer),
+    sa.column('name', sa.String),
+    sa.column('description', sa.Text),
+    sa.column('price', sa.Float),
+    sa.column('img', sa.String),
+    sa.column('search_text', sa.Text),
+    sa.column('category_ids', sa.String),
+    sa.column('allergen_ids', sa.String),
+    sa.column('opening_hour', sa.Time),
+    sa.column('closing_hour', sa.Time),
+)
+
+DISHES_SQL = sa.text(
+    "SELECT d.dish_id, d.menu_id, d.name, d.description, d.price, d.img, m.establishment_id, "
+    "e.name AS establishment_name, e.opening_hour, e.closing_hour "
+    "FROM dishes d "
+    "LEFT JOIN menus m ON m.menu_id = d.menu_id "
+    "LEFT JOIN establishments e ON e.establishment_id = m.establishment_id "
+    "WHERE d.dish_id > :after ORDER BY d.dish_id LIMIT :batch_size"
+).columns(opening_hour=sa.Time, closing_hour=sa.Time)
+CATEGORIES_SQL = sa.text(
+    "SELECT dc.dish_id, c.category_id, c.name FROM dish_category dc "
+    "JOIN categories c ON c.category_id = dc.category_id "
+    "WHERE dc.dish_id IN :dish_ids"
+).bindparams(sa.bindparam('dish_ids', expanding=True))
+ALLERGENS_SQL = sa.text(
+    "SELECT dish_id, allergen_id FROM dish_allergen WHERE dish_id IN :dish_ids"
+).bindparams(sa.bindparam('dish_ids', expanding=True))
+
+
+def encode_ids(ids) -> str:
+    """[4, 1] -> ",1,4," (formato de category_ids/allergen_ids en esta revisión)"""
+    return "," + "".join(f"{i}," for i in sorted(set(ids)))
+
+
+def backfill_documents() -> None:
+    """Un documento por plato existente, por lotes de BATCH_SIZE en orden de dish_id"""
+    bind = op.get_bind()
+    total = 0
+    after = 0
+    while True:
+        dishes = bind.execute(DISHES_SQL, {"after": after, "batch_size": BATCH_SIZE}).all()
+        if not dishes:
+            break
+        dish_ids = [dish.dish_id for dish in dishes]
+        categories = {}
+        for dish_id, category_id, category_name in bind.execute(CATEGORIES_SQL, {"dish_ids": dish_ids}):
+            categories.setdefault(dish_id, []).append((category_id, category_name))
+        allergens = {}
+        for dish_id, allergen_id in bind.execute(ALLERGENS_SQL, {"dish_ids": dish_ids}):
+            allergens.setdefault(dish_id, []).append(allergen_id)
+
+        rows = []
+        for dish in dishes:
+            dish_categories = categories.get(dish.dish_id, [])
+            text_parts = [dish.name, dish.description, dish.establishment_name]
+            text_parts.extend(category_name for _, category_name in dish_categories)
+            rows.append({
+                "dish_id": dish.dish_id,
+                "menu_id": dish.menu_id,
+                "establishment_id": dish.establishment_id,
+                "name": dish.name,
+                "description": dish.description,
+                "price": dish.price,
+                "img": dish.img,
+                "search_text": " ".join(part for part in text_parts if part).lower(),
+                "category_ids": encode_ids(category_id for category_id, _ in dish_categories),
+                "allergen_ids": encode_ids(allergens.get(dish.dish_id, [])),
+                "opening_hour": dish.opening_hour,
+                "closing_hour": dish.closing_hour,
+            })
+        bind.execute(documents.delete().where(documents.c.dish_id.in_(dish_ids)))
+        bind.execute(documents.insert(), rows)
+        total += len(rows)
+        after = dish_ids[-1]
+    logger.info("Documentos de búsqueda: %s platos", total)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Las bases de datos creadas con create_all después de la búsqueda ya la tienen
+    if not sa.inspect(op.get_bind()).has_table('dish_search_documents'):
+        op.create_table('dish_search_documents',
+        sa.Column('dish_id', sa.Integer(), nullable=False),
+        sa.Column('menu_id', sa.Integer(), nullable=True),
+        sa.Column('establishment_id', sa.Integer(), nullable=True),
+        sa.Column('name', sa.String(length=32), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('img', sa.String(length=255), nullable=True),
+        sa.Column('search_text', sa.Text(), nullable=False),
+        sa.Column('category_ids', sa.String(length=255), nullable=False),
+        sa.Column('allergen_ids', sa.String(length=255), nullable=False),
+        sa.Column('opening_hour', sa.Time(), nullable=True),
+        sa.Column('closing_hour', sa.Time(), nullable=True),
+        sa.ForeignKeyConstraint(['dish_id'], ['dishes.dish_id'], ),
+        sa.PrimaryKeyConstraint('dish_id')
+        )
+        op.create_index(op.f('ix_dish_search_documents_establishment_id'), 'dish_search_documents', ['establishment_id'], unique=False)
+        op.create_index(op.f('ix_dish_search_documents_price'), 'dish_search_documents', ['price'], unique=False)
+    backfill_documents()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_dish_search_documents_price'), table_name='dish_search_documents')
+    op.drop_index(op.f('ix_dish_search_documents_establishment_id'), table_name='dish_search_documents')
+    op.drop_table('dish_search_documents')
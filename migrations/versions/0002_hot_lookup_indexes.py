@@ -0,0 +1,46 @@
+"""hot lookup indexes
+
+Índices para las columnas por las que filtran los controladores y que no
+estaban indexadas (FKs y la segunda columna de las PKs compuestas).
+En PostgreSQL se crean con CREATE INDEX CONCURRENTLY (sin bloquear la tabla).
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-19 07:45:00
+
+"""
+from typing import Sequence, Union
+
+from migrations.online import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, tabla, columnas)
+INDEXES = [
+    ('ix_dishes_menu_id', 'dishes', ['menu_id']),
+    ('ix_menus_establishment_id', 'menus', ['establishment_id']),
+    ('ix_reservations_user_id', 'reservations', ['user_id']),
+    ('ix_reservations_date', 'reservations', ['date']),
+    ('ix_reservations_establishment_id_date', 'reservations', ['establishment_id', 'date']),
+    ('ix_reviews_establishment_id', 'reviews', ['establishment_id']),
+    ('ix_accessibility_features_establishment_id_name', 'accessibility_features', ['establishment_id', 'name']),
+    ('ix_dish_category_category_id_dish_id', 'dish_category', ['category_id', 'dish_id']),
+    ('ix_establishment_category_category_id_establishment_id', 'establishment_category', ['category_id', 'establishment_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        create_index_concurrently(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        drop_index_concurrently(name, table)
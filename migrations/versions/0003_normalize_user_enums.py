@@ -0,0 +1,56 @@
+"""normalize user enums
+
+Sustituye a migrate_enums.py: las bases de datos antiguas tenían las etiquetas
+del ENUM userstatus en mayúsculas ('ACTIVE', ...). Añade las etiquetas en
+minúsculas y migra las filas. En bases de datos creadas con 0001 no hace nada.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 08:05:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online import is_postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATUSES = ['active', 'inactive', 'not_verified', 'banned']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not is_postgresql():
+        return
+
+    labels = set(op.get_bind().execute(sa.text(
+        "SELECT e.enumlabel FROM pg_enum e JOIN pg_type t ON t.oid = e.enumtypid "
+        "WHERE t.typname = 'userstatus'"
+    )).scalars())
+    legacy = [status for status in STATUSES if status.upper() in labels]
+    if not legacy:
+        return
+
+    # ALTER TYPE ... ADD VALUE no puede usarse en la misma transacción que la nueva etiqueta
+    with op.get_context().autocommit_block():
+        for status in STATUSES:
+            op.execute(sa.text(f"ALTER TYPE userstatus ADD VALUE IF NOT EXISTS '{status}'"))
+
+    for status in legacy:
+        op.execute(sa.text(
+            f"UPDATE users SET status = '{status}' WHERE status = '{status.upper()}'"
+        ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # PostgreSQL no permite quitar etiquetas de un ENUM; las filas quedan en minúsculas
+    pass
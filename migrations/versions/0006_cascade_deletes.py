@@ -0,0 +1,50 @@
+"""cascade deletes
+
+ON DELETE CASCADE en las claves foráneas hacia establecimientos, menús, platos, usuarios,
+alérgenos y categorías: borrar la fila padre borra sus hijas en la base de datos, sin que
+el ORM tenga que cargarlas. En PostgreSQL las claves se validan sin bloquear escrituras.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from migrations.online import replace_foreign_keys
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tabla -> [(columna, tabla referida, columna referida)]
+FOREIGN_KEYS = {
+    'menus': [('establishment_id', 'establishments', 'establishment_id')],
+    'dishes': [('menu_id', 'menus', 'menu_id')],
+    'dish_allergen': [('dish_id', 'dishes', 'dish_id'), ('allergen_id', 'allergens', 'allergen_id')],
+    'dish_category': [('dish_id', 'dishes', 'dish_id'), ('category_id', 'categories', 'category_id')],
+    'dish_search_documents': [('dish_id', 'dishes', 'dish_id')],
+    'accessibility_features': [('establishment_id', 'establishments', 'establishment_id')],
+    'establishment_category': [
+        ('establishment_id', 'establishments', 'establishment_id'),
+        ('category_id', 'categories', 'category_id'),
+    ],
+    'reservations': [('user_id', 'users', 'user_id'), ('establishment_id', 'establishments', 'establishment_id')],
+    'reviews': [('user_id', 'users', 'user_id'), ('establishment_id', 'establishments', 'establishment_id')],
+    'user_allergen': [('user_id', 'users', 'user_id'), ('allergen_id', 'allergens', 'allergen_id')],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, foreign_keys in FOREIGN_KEYS.items():
+        replace_foreign_keys(table, foreign_keys, ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, foreign_keys in reversed(list(FOREIGN_KEYS.items())):
+        replace_foreign_keys(table, foreign_keys)
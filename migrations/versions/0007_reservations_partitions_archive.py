@@ -0,0 +1,166 @@
+"""reservations partitions and archive
+
+- Tabla reservations_archive para las reservas antiguas (python -m app.archive run).
+- En PostgreSQL, reservations pasa a estar particionada por rango de `date` (PARTITION BY
+  RANGE): la tabla existente se adjunta entera como la partición reservations_legacy (sin
+  copiar filas), con una partición DEFAULT y una por mes desde el final de la legacy hasta
+  MONTHS_AHEAD meses vista (las siguientes las crea la aplicación al arrancar, según
+  RESERVATIONS_PARTITION_MONTHS_AHEAD). La PK pasa a ser (reservation_id, date),
+  como exige el particionado; los IDs siguen saliendo de la misma secuencia.
+- En SQLite no hay particiones: solo se crea la tabla de archivo.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 10:10:00
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migrations.online import is_postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Meses con partición propia por delante del actual al migrar
+MONTHS_AHEAD = 3
+
+# Índices de reservations (se recrean en la tabla particionada)
+INDEXES = [
+    ('ix_reservations_reservation_id', ['reservation_id']),
+    ('ix_reservations_user_id', ['user_id']),
+    ('ix_reservations_date', ['date']),
+    ('ix_reservations_establishment_id_date', ['establishment_id', 'date']),
+]
+
+COLUMNS_DDL = """
+    reservation_id INTEGER NOT NULL DEFAULT nextval('reservations_reservation_id_seq'),
+    user_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+    establishment_id INTEGER NOT NULL REFERENCES establishments (establishment_id) ON DELETE CASCADE,
+    date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    people_count INTEGER,
+    status reservationstatus,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE
+"""
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_monthly_partition(month: date) -> None:
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS reservations_{month:%Y_%m} PARTITION OF reservations "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def partition_reservations() -> None:
+    bind = op.get_bind()
+
+    # 1. La tabla actual será la partición con todo lo existente
+    op.execute("ALTER TABLE reservations RENAME TO reservations_legacy")
+    op.execute("ALTER INDEX reservations_pkey RENAME TO reservations_legacy_pkey")
+    for name, _ in INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name.replace('reservations', 'reservations_legacy', 1)}")
+    op.execute("ALTER TABLE reservations_legacy DROP CONSTRAINT reservations_user_id_fkey")
+    op.execute("ALTER TABLE reservations_legacy DROP CONSTRAINT reservations_establishment_id_fkey")
+    # La clave de partición tiene que formar parte de la PK
+    op.execute("ALTER TABLE reservations_legacy DROP CONSTRAINT reservations_legacy_pkey")
+    op.execute("ALTER TABLE reservations_legacy ADD CONSTRAINT reservations_legacy_pkey PRIMARY KEY (reservation_id, date)")
+
+    # 2. Tabla particionada con las mismas columnas
+    op.execute(
+        f"CREATE TABLE reservations ({COLUMNS_DDL}, PRIMARY KEY (reservation_id, date)) PARTITION BY RANGE (date)"
+    )
+    op.execute("ALTER SEQUENCE reservations_reservation_id_seq OWNED BY reservations.reservation_id")
+    for name, columns in INDEXES:
+        op.create_index(name, 'reservations', columns)
+
+    # 3. Adjuntar la tabla antigua hasta el mes siguiente a su última reserva
+    last_date = bind.execute(sa.text("SELECT max(date) FROM reservations_legacy")).scalar()
+    this_month = month_start(datetime.now().date())
+    legacy_end = max(add_months(month_start(last_date.date()), 1), this_month) if last_date else this_month
+    # Un CHECK igual al rango de la partición, validado antes (VALIDATE no bloquea las lecturas ni
+    # las escrituras): así ATTACH PARTITION no vuelve a recorrer la tabla. Después sobra
+    op.execute(
+        f"ALTER TABLE reservations_legacy ADD CONSTRAINT reservations_legacy_range "
+        f"CHECK (date IS NOT NULL AND date < '{legacy_end.isoformat()}') NOT VALID"
+    )
+    op.execute("ALTER TABLE reservations_legacy VALIDATE CONSTRAINT reservations_legacy_range")
+    op.execute(
+        f"ALTER TABLE reservations ATTACH PARTITION reservations_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{legacy_end.isoformat()}')"
+    )
+    op.execute("ALTER TABLE reservations_legacy DROP CONSTRAINT reservations_legacy_range")
+
+    # 4. Meses siguientes y DEFAULT para lo que quede fuera
+    months = (this_month.year - legacy_end.year) * 12 + this_month.month - legacy_end.month
+    months += MONTHS_AHEAD + 1
+    for i in range(max(months, 0)):
+        create_monthly_partition(add_months(legacy_end, i))
+    op.execute("CREATE TABLE reservations_default PARTITION OF reservations DEFAULT")
+
+
+def unpartition_reservations() -> None:
+    op.execute(f"CREATE TABLE reservations_plain ({COLUMNS_DDL})")
+    op.execute("INSERT INTO reservations_plain SELECT * FROM reservations")
+    op.execute("ALTER SEQUENCE reservations_reservation_id_seq OWNED BY reservations_plain.reservation_id")
+    op.execute("DROP TABLE reservations")
+    op.execute("ALTER TABLE reservations_plain RENAME TO reservations")
+    op.execute("ALTER TABLE reservations ADD CONSTRAINT reservations_pkey PRIMARY KEY (reservation_id)")
+    op.execute("ALTER TABLE reservations RENAME CONSTRAINT reservations_plain_user_id_fkey TO reservations_user_id_fkey")
+    op.execute(
+        "ALTER TABLE reservations RENAME CONSTRAINT reservations_plain_establishment_id_fkey "
+        "TO reservations_establishment_id_fkey"
+    )
+    for name, columns in INDEXES:
+        op.create_index(name, 'reservations', columns)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('reservations_archive',
+    sa.Column('reservation_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('establishment_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=False),
+    sa.Column('people_count', sa.Integer(), nullable=True),
+    # El tipo reservationstatus ya existe (lo usa reservations)
+    sa.Column('status', postgresql.ENUM('pending', 'confirmed', 'cancelled', name='reservationstatus', create_type=False), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['establishment_id'], ['establishments.establishment_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('reservation_id')
+    )
+    op.create_index('ix_reservations_archive_establishment_id_date', 'reservations_archive', ['establishment_id', 'date'], unique=False)
+    op.create_index('ix_reservations_archive_user_id_date', 'reservations_archive', ['user_id', 'date'], unique=False)
+
+    if is_postgresql():
+        partition_reservations()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if is_postgresql():
+        unpartition_reservations()
+
+    op.drop_index('ix_reservations_archive_user_id_date', table_name='reservations_archive')
+    op.drop_index('ix_reservations_archive_establishment_id_date', table_name='reservations_archive')
+    op.drop_table('reservations_archive')
@@ -0,0 +1,131 @@
+"""change log
+
+- Tabla change_log: registro de altas, modificaciones y bajas del catálogo (establishments,
+  menus, dishes, categories, allergens y sus tablas de asociación) para GET /sync?since=.
+- Triggers que la rellenan en cada escritura (en PostgreSQL, con el xid de la transacción en
+  txid: /sync no pasa de la transacción más antigua en curso, sin bloquear las escrituras).
+- Una entrada por cada fila ya existente, para que la primera sincronización (since=0) lo
+  traiga todo.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 11:10:00
+
+"""
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copia de app/models/change_log.py tal como estaba en esta revisión: cambiar allí las tablas
+# o los triggers pide una migración nueva, no editar esta
+TRACKED = {
+    "establishments": ("establishments", "establishment_id"),
+    "menus": ("menus", "menu_id"),
+    "dishes": ("dishes", "dish_id"),
+    "categories": ("categories", "category_id"),
+    "allergens": ("allergens", "allergen_id"),
+}
+LINKS = {
+    "dish_category": ("dishes", "dish_id"),
+    "dish_allergen": ("dishes", "dish_id"),
+    "establishment_category": ("establishments", "establishment_id"),
+}
+TARGETS = [(table, entity, column, False) for table, (entity, column) in TRACKED.items()] + [
+    (table, entity, column, True) for table, (entity, column) in LINKS.items()
+]
+
+POSTGRESQL_FUNCTION = """
+    CREATE OR REPLACE FUNCTION change_log_row() RETURNS trigger AS $$
+    DECLARE
+        target jsonb;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            target := to_jsonb(OLD);
+        ELSE
+            target := to_jsonb(NEW);
+        END IF;
+        -- Tercer argumento 'link': tabla de asociación, la entidad padre sigue existiendo
+        INSERT INTO change_log (entity, entity_id, deleted, txid)
+        VALUES (
+            TG_ARGV[0], (target ->> TG_ARGV[1])::integer, TG_OP = 'DELETE' AND TG_NARGS = 2,
+            pg_current_xact_id()::text::bigint
+        );
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+
+def create_triggers_ddl(dialect: str) -> List[str]:
+    statements = []
+    if dialect == "postgresql":
+        statements.append(POSTGRESQL_FUNCTION)
+        for table, entity, column, link in TARGETS:
+            arguments = f"'{entity}', '{column}'" + (", 'link'" if link else "")
+            statements.append(
+                f"CREATE TRIGGER {table}_change_log AFTER INSERT OR UPDATE OR DELETE ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION change_log_row({arguments})"
+            )
+    elif dialect == "sqlite":
+        for table, entity, column, link in TARGETS:
+            for operation, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+                deleted = int(operation == "DELETE" and not link)
+                statements.append(
+                    f"CREATE TRIGGER {table}_change_log_{operation.lower()} AFTER {operation} ON {table} "
+                    f"BEGIN INSERT INTO change_log (entity, entity_id, deleted) "
+                    f"VALUES ('{entity}', {row}.{column}, {deleted}); END"
+                )
+    return statements
+
+
+def drop_triggers_ddl(dialect: str) -> List[str]:
+    statements = []
+    if dialect == "postgresql":
+        for table, *_ in TARGETS:
+            statements.append(f"DROP TRIGGER IF EXISTS {table}_change_log ON {table}")
+        statements.append("DROP FUNCTION IF EXISTS change_log_row()")
+    elif dialect == "sqlite":
+        for table, *_ in TARGETS:
+            for operation in ("insert", "update", "delete"):
+                statements.append(f"DROP TRIGGER IF EXISTS {table}_change_log_{operation}")
+    return statements
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('change_log',
+    sa.Column('change_id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=32), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('deleted', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('txid', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.PrimaryKeyConstraint('change_id')
+    )
+    op.create_index('ix_change_log_entity_entity_id', 'change_log', ['entity', 'entity_id', 'change_id'], unique=False)
+    op.create_index('ix_change_log_txid_change_id', 'change_log', ['txid', 'change_id'], unique=False)
+    for statement in create_triggers_ddl(op.get_bind().dialect.name):
+        op.execute(statement)
+    # Después de los triggers: una escritura concurrente queda registrada dos veces, nunca ninguna
+    for table, (entity, column) in TRACKED.items():
+        op.execute(
+            f"INSERT INTO change_log (entity, entity_id, deleted) "
+            f"SELECT '{entity}', {column}, false FROM {table} ORDER BY {column}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for statement in drop_triggers_ddl(op.get_bind().dialect.name):
+        op.execute(statement)
+    op.drop_index('ix_change_log_txid_change_id', table_name='change_log')
+    op.drop_index('ix_change_log_entity_entity_id', table_name='change_log')
+    op.drop_table('change_log')
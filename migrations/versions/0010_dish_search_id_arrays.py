@@ -0,0 +1,68 @@
+"""dish search id arrays
+
+category_ids y allergen_ids de dish_search_documents dejan de ser VARCHAR(255) (",1,4,"),
+que se desbordaba con muchas categorías o alérgenos y obligaba a filtrar con LIKE '%,4,%'
+recorriendo la tabla:
+- en PostgreSQL pasan a integer[] con un índice GIN cada una (filtros con &&);
+- en otros motores pasan a TEXT, con el mismo formato.
+
+En PostgreSQL el cambio de tipo reescribe la tabla con un lock exclusivo (una fila por plato);
+los índices se crean después con CONCURRENTLY.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 13:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online import create_index_concurrently, drop_index_concurrently, is_postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, Sequence[str], None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ['category_ids', 'allergen_ids']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if is_postgresql():
+        for column in COLUMNS:
+            # ",1,4," -> {1,4}; "," -> {}
+            op.execute(
+                f"ALTER TABLE dish_search_documents ALTER COLUMN {column} DROP DEFAULT, "
+                f"ALTER COLUMN {column} TYPE integer[] "
+                f"USING string_to_array(trim(both ',' from {column}), ',')::integer[]"
+            )
+    else:
+        with op.batch_alter_table('dish_search_documents') as batch_op:
+            for column in COLUMNS:
+                batch_op.alter_column(column, existing_type=sa.String(length=255), type_=sa.Text(), existing_nullable=False)
+    for column in COLUMNS:
+        create_index_concurrently(
+            f'ix_dish_search_documents_{column}', 'dish_search_documents', [column], postgresql_using='gin'
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in COLUMNS:
+        drop_index_concurrently(f'ix_dish_search_documents_{column}', 'dish_search_documents')
+    if is_postgresql():
+        for column in COLUMNS:
+            # Vuelven a caber en 255 caracteres solo si no había listas largas
+            op.execute(
+                f"ALTER TABLE dish_search_documents ALTER COLUMN {column} TYPE varchar(255) "
+                f"USING ',' || array_to_string({column}, ',') || CASE WHEN cardinality({column}) > 0 THEN ',' ELSE '' END"
+            )
+    else:
+        with op.batch_alter_table('dish_search_documents') as batch_op:
+            for column in COLUMNS:
+                batch_op.alter_column(column, existing_type=sa.Text(), type_=sa.String(length=255), existing_nullable=False)
@@ -1,45 +1,31 @@
 """
-Script to drop and recreate all database tables.
+Script to drop and recreate all database tables through the Alembic migrations
+(alembic downgrade base + alembic upgrade head).
 WARNING: This will delete all existing data!
+
+For schema changes on a live database use the migrations instead:
+    alembic revision --autogenerate -m "..."   # new migration in migrations/versions
+    alembic upgrade head                       # apply pending migrations
 """
-import asyncio
-from sqlalchemy.ext.asyncio import create_async_engine
-from app.config import settings
-from app.database import Base
+from alembic import command
+from app.database import get_alembic_config
+
+def recreate_database():
+    config = get_alembic_config()
 
-# Import all models to ensure they're registered with Base
-from app.models.users import User
-from app.models.establishments import Establishment
-from app.models.dishes import Dish
-from app.models.categories import Category
-from app.models.allergens import Allergens
-from app.models.menus import Menu
-from app.models.reservations import Reservation
-from app.models.reviews import Review
-from app.models.accessibility_features import AccessibilityFeature
-from app.models.dish_allergen import DishAllergen
-from app.models.dish_category import DishCategory
-from app.models.establishment_category import EstablishmentCategory
-from app.models.user_allergen import UserAllergen
+    print("Dropping all tables...")
+    command.downgrade(config, "base")
+
+    print("Creating all tables...")
+    command.upgrade(config, "head")
 
-async def recreate_database():
-    engine = create_async_engine(settings.DATABASE_URL, echo=True)
-    
-    async with engine.begin() as conn:
-        print("Dropping all tables...")
-        await conn.run_sync(Base.metadata.drop_all)
-        
-        print("Creating all tables...")
-        await conn.run_sync(Base.metadata.create_all)
-        
-    await engine.dispose()
     print("Database recreated successfully!")
 
 if __name__ == "__main__":
     print("WARNING: This will delete all existing data!")
     response = input("Do you want to continue? (yes/no): ")
-    
+
     if response.lower() == 'yes':
-        asyncio.run(recreate_database())
+        recreate_database()
     else:
         print("Operation cancelled.")
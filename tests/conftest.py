@@ -2,7 +2,10 @@ import pytest
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from app.main import app
-from app.database import get_db, Base
+from app.database import get_db, get_read_db, Base, enable_sqlite_foreign_keys
+from app.utils.metrics import REGISTRY
+from app.utils import cache, singleflight, tiered_cache
+from app.controllers import existence, leaderboard, warmup
 from typing import AsyncGenerator
 
 # Use in-memory SQLite for testing
@@ -12,8 +15,41 @@ engine = create_async_engine(
     TEST_DATABASE_URL,
     connect_args={"check_same_thread": False},
 )
+# Igual que en la app: las claves foráneas y los ON DELETE CASCADE se aplican
+enable_sqlite_foreign_keys(engine)
 TestingSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    REGISTRY.reset()
+    yield
+
+@pytest.fixture(autouse=True)
+def reset_singleflight():
+    singleflight.reset()
+    yield
+
+@pytest.fixture(autouse=True)
+def reset_leaderboard():
+    leaderboard.reset()
+    yield
+
+@pytest.fixture(autouse=True)
+def reset_existence():
+    existence.reset()
+    yield
+
+@pytest.fixture(autouse=True)
+def reset_warmup():
+    warmup.reset()
+    yield
+
+@pytest.fixture(autouse=True)
+async def reset_caches():
+    cache.reset()
+    await tiered_cache.reset()
+    yield
+
 @pytest.fixture(scope="function")
 async def db_session() -> AsyncGenerator[AsyncSession, None]:
     async with engine.begin() as conn:
@@ -31,6 +67,7 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
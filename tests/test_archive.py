@@ -0,0 +1,165 @@
+import pytest
+from datetime import date, datetime, time
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.archive import archive_cutoff, archive_reservations, ensure_partitions, planned_partitions
+from app.archive.partitions import add_months, partition_ddl, partition_month, partition_steps
+from app.archive.reservations import ARCHIVED_ROWS
+from app.models import Establishment, Reservation, ReservationArchive, User
+from app.models.reservations import ReservationStatus
+from app.models.users import UserRole, UserStatus
+
+TODAY = date(2026, 10, 19)
+
+
+async def seed(db: AsyncSession):
+    """Helper: un usuario y un establecimiento con reservas antiguas, recientes y futuras"""
+    db.add(User(user_id=1, role=UserRole.user, name="Ana", email="ana@test.com", password="x", status=UserStatus.active))
+    db.add(Establishment(
+        establishment_id=1, NIT="NIT1", name="Rest", address="x", opening_hour=time(8), closing_hour=time(22)
+    ))
+    reservations = [
+        (1, datetime(2024, 3, 1, 20), ReservationStatus.confirmed),
+        (2, datetime(2025, 1, 15, 21), ReservationStatus.cancelled),
+        (3, datetime(2025, 9, 30, 23), ReservationStatus.confirmed),
+        (4, datetime(2025, 10, 1, 20), ReservationStatus.confirmed),  # dentro de los últimos 12 meses
+        (5, datetime(2026, 11, 1, 20), ReservationStatus.pending),
+    ]
+    for reservation_id, when, status in reservations:
+        db.add(Reservation(
+            reservation_id=reservation_id, user_id=1, establishment_id=1, date=when, people_count=2, status=status
+        ))
+    await db.commit()
+
+
+def sessions_for(db: AsyncSession) -> async_sessionmaker:
+    return async_sessionmaker(bind=db.bind, expire_on_commit=False)
+
+
+def test_partition_plan():
+    """Test nombres y rangos de las particiones mensuales"""
+    assert add_months(date(2026, 11, 19), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 5), -1) == date(2025, 12, 1)
+    assert planned_partitions(TODAY, 3) == [
+        ("reservations_2026_10", date(2026, 10, 1), date(2026, 11, 1)),
+        ("reservations_2026_11", date(2026, 11, 1), date(2026, 12, 1)),
+        ("reservations_2026_12", date(2026, 12, 1), date(2027, 1, 1)),
+    ]
+    assert partition_month("reservations_2026_11") == date(2026, 11, 1)
+    assert partition_month("reservations_legacy") is None
+    assert partition_ddl("reservations_2026_11", date(2026, 11, 1), date(2026, 12, 1)) == (
+        "CREATE TABLE IF NOT EXISTS reservations_2026_11 PARTITION OF reservations "
+        "FOR VALUES FROM ('2026-11-01') TO ('2026-12-01')"
+    )
+    assert archive_cutoff(12, TODAY) == date(2025, 10, 1)
+
+
+@pytest.mark.asyncio
+async def test_partitions_are_emulated_on_sqlite(db_session: AsyncSession):
+    """Test en SQLite no se crea nada: solo se devuelve el plan"""
+    created = await ensure_partitions(db_session, months_ahead=1, today=TODAY)
+    assert created == ["reservations_2026_10", "reservations_2026_11"]
+
+
+class FakePostgres:
+    """Helper: sesión que imita un reservations particionado (con DEFAULT) y registra las sentencias"""
+
+    def __init__(self, default_rows_in=(), failing=()):
+        self.bind = type("Bind", (), {"dialect": type("Dialect", (), {"name": "postgresql"})()})()
+        self.default_rows_in = set(default_rows_in)
+        self.failing = set(failing)
+        self.statements, self.commits, self.rollbacks = [], 0, 0
+
+    async def scalar(self, statement, parameters=None):
+        if "relkind" in str(statement):
+            return "p"
+        return parameters["start"] in self.default_rows_in
+
+    async def execute(self, statement, parameters=None):
+        sql = str(statement)
+        if "pg_inherits" in sql:
+            return type("Result", (), {"scalars": lambda self: ["reservations_default", "reservations_legacy"]})()
+        if any(name in sql for name in self.failing):
+            raise RuntimeError(f"falló {sql}")
+        self.statements.append(sql)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.mark.asyncio
+async def test_partitions_created_one_transaction_each_moving_default_rows():
+    """Test cada partición va en su transacción; si la DEFAULT tiene filas de su rango se separa,
+    se le pasan esas filas y se vuelve a adjuntar; un fallo no impide crear las demás"""
+    assert partition_steps("reservations_2027_01", date(2027, 1, 1), date(2027, 2, 1), True) == [
+        "ALTER TABLE reservations DETACH PARTITION reservations_default",
+        partition_ddl("reservations_2027_01", date(2027, 1, 1), date(2027, 2, 1)),
+        "INSERT INTO reservations SELECT * FROM reservations_default "
+        "WHERE date >= '2027-01-01' AND date < '2027-02-01'",
+        "DELETE FROM reservations_default WHERE date >= '2027-01-01' AND date < '2027-02-01'",
+        "ALTER TABLE reservations ATTACH PARTITION reservations_default DEFAULT",
+    ]
+
+    db = FakePostgres(default_rows_in=[date(2026, 12, 1)], failing=["reservations_2026_11 "])
+    created = await ensure_partitions(db, months_ahead=3, today=TODAY)
+
+    assert created == ["reservations_2026_10", "reservations_2026_12", "reservations_2027_01"]
+    assert (db.commits, db.rollbacks) == (3, 1)
+    assert "ALTER TABLE reservations DETACH PARTITION reservations_default" in db.statements
+    assert sum("DETACH" in statement for statement in db.statements) == 1
+
+@pytest.mark.asyncio
+async def test_archive_moves_old_reservations_in_batches(db_session: AsyncSession):
+    """Test el archivado mueve por lotes las reservas anteriores al corte y nada más"""
+    await seed(db_session)
+
+    result = await archive_reservations(sessions_for(db_session), older_than_months=12, batch_size=2, today=TODAY)
+
+    assert result.completed
+    assert (result.rows, result.batches) == (3, 2)
+    assert ARCHIVED_ROWS.value() == 3
+    active = (await db_session.execute(select(Reservation.reservation_id).order_by(Reservation.reservation_id))).scalars().all()
+    archived = (await db_session.execute(select(ReservationArchive).order_by(ReservationArchive.reservation_id))).scalars().all()
+    assert active == [4, 5]
+    assert [reservation.reservation_id for reservation in archived] == [1, 2, 3]
+    assert archived[1].status == ReservationStatus.cancelled
+    assert all(reservation.archived_at is not None for reservation in archived)
+
+    # Repetirlo no hace nada
+    again = await archive_reservations(sessions_for(db_session), older_than_months=12, batch_size=2, today=TODAY)
+    assert again.rows == 0 and again.completed
+
+
+@pytest.mark.asyncio
+async def test_archive_can_stop_and_resume(db_session: AsyncSession):
+    """Test con max_batches se detiene y la siguiente ejecución sigue donde se quedó"""
+    await seed(db_session)
+    sessions = sessions_for(db_session)
+
+    first = await archive_reservations(sessions, older_than_months=12, batch_size=1, max_batches=2, today=TODAY)
+    assert (first.rows, first.completed) == (2, False)
+
+    second = await archive_reservations(sessions, older_than_months=12, batch_size=1, today=TODAY)
+    assert (second.rows, second.completed) == (1, True)
+    assert await db_session.scalar(select(func.count()).select_from(ReservationArchive)) == 3
+
+
+@pytest.mark.asyncio
+async def test_history_flag_includes_archive(client: AsyncClient, db_session: AsyncSession):
+    """Test las reservas archivadas solo aparecen con ?historial=true"""
+    await seed(db_session)
+    await archive_reservations(sessions_for(db_session), older_than_months=12, today=TODAY)
+
+    for path in ("/reservas/usuario/1", "/reservas/establecimiento/1"):
+        recent = (await client.get(path)).json()
+        assert [item["reservation_id"] for item in recent] == [4, 5]
+        assert not any(item["archived"] for item in recent)
+
+        history = (await client.get(path, params={"historial": "true"})).json()
+        assert [item["reservation_id"] for item in history] == [1, 2, 3, 4, 5]
+        assert [item["archived"] for item in history] == [True, True, True, False, False]
@@ -0,0 +1,149 @@
+import pytest
+from datetime import time
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.backfill import Backfill, BackfillRunner, Throttle, get_checkpoint, get_job
+from app.models import *
+from app.models.reviews import RatingEnum
+from app.models.users import UserRole, UserStatus
+
+
+async def seed(db: AsyncSession):
+    """Helper para sembrar establecimientos, platos y reseñas"""
+    for e in range(1, 4):
+        db.add(Establishment(
+            establishment_id=e, NIT=f"NIT{e}", name=f"Rest {e}", address="x",
+            opening_hour=time(8), closing_hour=time(22)
+        ))
+        db.add(Menu(menu_id=e, establishment_id=e, title=f"Menu {e}"))
+        for d in range(4):
+            db.add(Dish(dish_id=e * 10 + d, menu_id=e, name=f"Plato {e}{d}", price=10 + d))
+    for u in range(1, 4):
+        db.add(User(
+            user_id=u, role=UserRole.user, name=f"User {u}", email=f"u{u}@test.com",
+            password="x", status=UserStatus.active
+        ))
+        for e in range(1, 4):
+            db.add(Review(user_id=u, establishment_id=e, rating=RatingEnum.FOUR))
+    await db.commit()
+
+
+def session_factory(db: AsyncSession) -> async_sessionmaker:
+    return async_sessionmaker(bind=db.bind, expire_on_commit=False)
+
+
+def recording_job(name, model, seen):
+    """Helper: backfill que solo anota las claves de cada lote"""
+    async def apply(db, keys):
+        seen.append(list(keys))
+        return len(keys)
+    return Backfill(name=name, model=model, apply=apply)
+
+
+@pytest.mark.asyncio
+async def test_backfill_rebuilds_dish_documents(db_session: AsyncSession):
+    """Test el backfill de documentos de búsqueda recorre todos los platos por lotes"""
+    await seed(db_session)
+    runner = BackfillRunner(session_factory(db_session), batch_size=5)
+
+    progress = await runner.run(get_job("dish_search_documents"))
+
+    assert progress.completed
+    assert progress.rows_processed == 12
+    assert progress.batches == 3
+    assert progress.last_key == [33]
+    documents = await db_session.scalar(select(func.count()).select_from(DishSearchDocument))
+    assert documents == 12
+
+    checkpoint = await get_checkpoint(session_factory(db_session), "dish_search_documents")
+    assert checkpoint.completed_at is not None
+    assert checkpoint.rows_processed == 12
+
+
+@pytest.mark.asyncio
+async def test_backfill_resumes_from_checkpoint(db_session: AsyncSession):
+    """Test un backfill interrumpido continúa desde la última clave confirmada"""
+    await seed(db_session)
+    seen = []
+    job = recording_job("dishes_resume", Dish, seen)
+    factory = session_factory(db_session)
+
+    first = await BackfillRunner(factory, batch_size=5, max_batches=1).run(job)
+    assert not first.completed
+    assert seen == [[10, 11, 12, 13, 20]]
+
+    second = await BackfillRunner(factory, batch_size=5).run(job)
+    assert second.completed
+    assert second.rows_processed == 12
+    assert seen[1:] == [[21, 22, 23, 30, 31], [32, 33]]
+
+    # Con --restart vuelve a empezar desde el principio
+    seen.clear()
+    third = await BackfillRunner(factory, batch_size=100).run(job, restart=True)
+    assert third.rows_processed == 12
+    assert seen == [[10, 11, 12, 13, 20, 21, 22, 23, 30, 31, 32, 33]]
+
+
+@pytest.mark.asyncio
+async def test_backfill_composite_primary_key(db_session: AsyncSession):
+    """Test el recorrido por keyset funciona con claves primarias compuestas (reseñas)"""
+    await seed(db_session)
+    seen = []
+    progress = await BackfillRunner(session_factory(db_session), batch_size=4).run(
+        recording_job("reviews_keys", Review, seen)
+    )
+
+    assert progress.completed
+    keys = [key for batch in seen for key in batch]
+    assert keys == [(u, e) for u in range(1, 4) for e in range(1, 4)]
+    assert [len(batch) for batch in seen] == [4, 4, 1]
+
+
+@pytest.mark.asyncio
+async def test_backfill_only_touches_pending_rows(db_session: AsyncSession):
+    """Test los backfills con condición solo actualizan las filas pendientes"""
+    await seed(db_session)
+    # Filas antiguas sin valor, salvo la 2
+    await db_session.execute(Establishment.__table__.update().values(sustainability_points=None))
+    await db_session.execute(
+        Establishment.__table__.update().where(Establishment.establishment_id == 2).values(sustainability_points=7)
+    )
+    await db_session.commit()
+
+    progress = await BackfillRunner(session_factory(db_session), batch_size=1).run(
+        get_job("establishment_sustainability_points")
+    )
+
+    assert progress.rows_processed == 2
+    result = await db_session.execute(
+        select(Establishment.establishment_id, Establishment.sustainability_points).order_by(Establishment.establishment_id)
+    )
+    assert result.all() == [(1, 0), (2, 7), (3, 0)]
+
+
+class FakeThrottle(Throttle):
+    def __init__(self, usages, **kwargs):
+        super().__init__(poll_seconds=0.01, **kwargs)
+        self.usages = list(usages)
+
+    async def connection_usage(self, db):
+        return self.usages.pop(0) if self.usages else 0.0
+
+
+@pytest.mark.asyncio
+async def test_backfill_throttles_on_server_load(db_session: AsyncSession):
+    """Test el backfill espera mientras el servidor está cargado y aborta si no se libera"""
+    await seed(db_session)
+    throttle = FakeThrottle([0.95, 0.95, 0.1], max_connection_usage=0.8)
+    progress = await BackfillRunner(session_factory(db_session), batch_size=100, throttle=throttle).run(
+        recording_job("throttled", Dish, [])
+    )
+    assert progress.completed
+    assert progress.throttled_seconds == pytest.approx(0.02)
+
+    saturated = FakeThrottle([1.0] * 100, max_connection_usage=0.8, max_wait_seconds=0.03)
+    with pytest.raises(TimeoutError):
+        await BackfillRunner(session_factory(db_session), throttle=saturated).run(
+            recording_job("saturated", Dish, [])
+        )
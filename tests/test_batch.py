@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from datetime import time
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app import database
+from app.config import settings
+from app.controllers.batch import SUBREQUESTS
+from app.database import Base, SessionRouter, get_db
+from app.main import app
+from app.models import Allergens, Category, Dish, Establishment, Menu
+
+
+@pytest.fixture
+async def sessions(tmp_path, monkeypatch):
+    """SQLite en fichero y get_read_db real, contando las sesiones que se abren"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'batch.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    opened = []
+
+    def counting_factory():
+        opened.append(1)
+        return factory()
+
+    counting_factory.opened = opened
+    monkeypatch.setattr(database, "session_router", SessionRouter(counting_factory))
+    yield counting_factory
+    await engine.dispose()
+
+
+@pytest.fixture
+async def batch_client(sessions):
+    async def override_get_db():
+        async with sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.clear()
+
+
+async def seed(sessions):
+    """Helper: un establecimiento con un plato, una categoría y un alérgeno"""
+    async with sessions() as db:
+        await db.execute(insert(Establishment), [{
+            "establishment_id": 1, "NIT": "NIT1", "name": "Rest", "address": "x",
+            "opening_hour": time(8), "closing_hour": time(22),
+        }])
+        await db.execute(insert(Menu), [{"menu_id": 1, "establishment_id": 1, "title": "Carta"}])
+        await db.execute(insert(Dish), [{"dish_id": 1, "menu_id": 1, "name": "Sopa", "price": 8.5}])
+        await db.execute(insert(Category), [{"category_id": 1, "name": "Vegana"}])
+        await db.execute(insert(Allergens), [{"allergen_id": 1, "name": "Gluten"}])
+        await db.commit()
+    sessions.opened.clear()
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_sub_requests_with_shared_sessions(batch_client: AsyncClient, sessions, monkeypatch):
+    """Test las respuestas vuelven en orden, con sus errores, y cada carril comparte una sesión"""
+    await seed(sessions)
+    monkeypatch.setattr(settings, "BATCH_CONCURRENCY", 2)
+    requests = [
+        {"id": "categorias", "path": "/categorias/list"},
+        {"id": "alergenos", "path": "/allergen/"},
+        {"id": "plato", "path": "/platos/?ids=1,2"},
+        {"id": "no-existe", "path": "/establishments/99"},
+        {"path": "/establishments/"},
+    ]
+
+    response = await batch_client.post("/batch/", json={"requests": requests})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["id"] for result in results] == ["categorias", "alergenos", "plato", "no-existe", None]
+    assert [result["status"] for result in results] == [200, 200, 200, 404, 200]
+    assert results[1]["body"] == [{"allergen_id": 1, "name": "Gluten"}]
+    assert results[2]["body"]["missing"] == [2]
+    assert results[4]["body"][0]["name"] == "Rest"
+    # Cinco lecturas, dos carriles: dos sesiones en total
+    assert len(sessions.opened) == 2
+    assert SUBREQUESTS.value(status="200") == 4 and SUBREQUESTS.value(status="404") == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_limits(batch_client: AsyncClient, sessions, monkeypatch):
+    """Test solo GET, número máximo de subpeticiones y tiempo total del lote"""
+    await seed(sessions)
+    write = {"requests": [{"method": "DELETE", "path": "/platos/1"}]}
+    assert (await batch_client.post("/batch/", json=write)).status_code == 400
+    assert (await batch_client.post("/batch/", json={"requests": [{"path": "http://x/"}]})).status_code == 422
+
+    monkeypatch.setattr(settings, "BATCH_MAX_REQUESTS", 2)
+    too_many = {"requests": [{"path": "/allergen/"}] * 3}
+    assert (await batch_client.post("/batch/", json=too_many)).status_code == 400
+
+    # Una subpetición lenta agota el tiempo del lote: la otra se devuelve igualmente
+    async def slow_allergens(db):
+        await asyncio.sleep(1)
+
+    monkeypatch.setattr("app.routes.allergens.get_allergens", slow_allergens)
+    monkeypatch.setattr(settings, "BATCH_TIMEOUT_SECONDS", 0.2)
+    body = {"requests": [{"path": "/categorias/list"}, {"path": "/allergen/"}]}
+    results = (await batch_client.post("/batch/", json=body)).json()["results"]
+    assert [result["status"] for result in results] == [200, 504]
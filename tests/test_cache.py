@@ -0,0 +1,93 @@
+import asyncio
+import contextlib
+import random
+import time
+
+import pytest
+
+from app.utils.cache import LOADS, REQUESTS, Cache
+
+
+class SlowSource:
+    """Helper: origen de datos que tarda `delay` segundos y registra cuándo y cuántas cargas hubo"""
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.version = 0
+        self.started = []
+        self.running = 0
+        self.max_running = 0
+
+    async def load(self, db, key):
+        self.started.append(time.monotonic())
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            self.version += 1
+            return {"key": key, "version": self.version}
+        finally:
+            self.running -= 1
+
+
+def no_database():
+    return contextlib.nullcontext(None)
+
+
+@pytest.mark.asyncio
+async def test_no_stampede_around_expiry():
+    """Test estrés: 200 clientes leyendo una clave durante varias caducidades → cargas de una en una y espaciadas"""
+    source = SlowSource(delay=0.01)
+    cache = Cache("stress", source.load, ttl=0.3, stale_seconds=0.3, beta=1.0, sessions=no_database)
+
+    async def client(deadline: float):
+        while time.monotonic() < deadline:
+            assert (await cache.get("popular"))["key"] == "popular"
+            await asyncio.sleep(random.uniform(0, 0.01))
+
+    start = time.monotonic()
+    await asyncio.gather(*(client(start + 1.2) for _ in range(200)))
+    await cache.close()
+
+    # Nunca dos cargas a la vez, ni ráfagas al caducar: como mucho una por cada 100 ms
+    assert source.max_running == 1
+    buckets = [int((started - start) / 0.1) for started in source.started]
+    assert max(buckets.count(bucket) for bucket in set(buckets)) == 1
+    assert 3 <= len(source.started) <= 8
+    # Solo las 200 primeras lecturas esperaron a la base de datos; el resto salió de la caché
+    assert REQUESTS.value(cache="stress", result="miss") == 200
+
+
+@pytest.mark.asyncio
+async def test_stale_value_kept_when_refresh_fails_and_invalidation():
+    """Test si el refresco falla se sigue sirviendo el valor anterior; invalidate obliga a recargar"""
+    source = SlowSource(delay=0)
+    cache = Cache("fragile", source.load, ttl=0.05, stale_seconds=10, beta=0, jitter=0, sessions=no_database)
+    assert (await cache.get(1))["version"] == 1
+
+    async def broken(db, key):
+        raise RuntimeError("base de datos caída")
+
+    cache.loader = broken
+    await asyncio.sleep(0.06)
+    assert (await cache.get(1))["version"] == 1  # caducado: valor anterior y refresco en segundo plano
+    await asyncio.sleep(0)
+    await cache.close()
+    assert LOADS.value(cache="fragile", result="error") == 1
+    assert (await cache.get(1))["version"] == 1
+
+    cache.loader = source.load
+    cache.invalidate(1)
+    assert (await cache.get(1))["version"] == 2
+    assert REQUESTS.value(cache="fragile", result="miss") == 2
+
+
+@pytest.mark.asyncio
+async def test_ttl_jitter_spreads_expiry():
+    """Test las claves cargadas a la vez caducan en momentos distintos dentro de ±jitter"""
+    source = SlowSource(delay=0)
+    cache = Cache("jitter", source.load, ttl=100, jitter=0.2, sessions=no_database)
+    await asyncio.gather(*(cache.get(key) for key in range(50)))
+    lifetimes = [entry.expires - time.monotonic() for entry in cache._entries.values()]
+    assert all(79 < lifetime <= 120 for lifetime in lifetimes)
+    assert max(lifetimes) - min(lifetimes) > 10
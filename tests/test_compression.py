@@ -0,0 +1,94 @@
+import gzip
+import json
+import uuid
+from datetime import time
+import brotli
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Dish, Establishment, Menu
+from app.utils.compression import negotiate, BYTES_SAVED, COMPRESSION_SECONDS, PRECOMPRESSED_HITS
+
+
+async def seed_dishes(db: AsyncSession, count: int = 60) -> str:
+    """Helper para sembrar platos con un nombre único (cuerpo de respuesta distinto en cada test)"""
+    tag = uuid.uuid4().hex[:8]
+    db.add(Establishment(establishment_id=1, NIT="900000001", name="Casa", address="x",
+                         opening_hour=time(8), closing_hour=time(22)))
+    db.add(Menu(menu_id=1, establishment_id=1, title="Carta"))
+    await db.flush()
+    for i in range(1, count + 1):
+        db.add(Dish(dish_id=i, menu_id=1, name=f"Plato {tag} {i}", description="Descripción larga " * 5, price=10 + i))
+    await db.commit()
+    return tag
+
+
+def test_negotiate_accept_encoding():
+    """Test la negociación respeta las preferencias y q=0"""
+    assert negotiate("gzip, deflate, br", ["br", "gzip"]) == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate("br;q=0, gzip", ["br", "gzip"]) == "gzip"
+    assert negotiate("*", ["br", "gzip"]) == "br"
+    assert negotiate("identity", ["br", "gzip"]) is None
+    assert negotiate("", ["br", "gzip"]) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+async def test_large_catalog_response_is_compressed(client: AsyncClient, db_session: AsyncSession, encoding):
+    """Test las listas grandes se comprimen con la codificación negociada"""
+    await seed_dishes(db_session)
+
+    response = await client.get("/platos/list", headers={"Accept-Encoding": encoding})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    raw = response.content
+    assert len(response.json()) == 60
+    assert int(response.headers["content-length"]) < len(raw)
+    assert BYTES_SAVED.value(route="/platos/list", encoding=encoding) > 0
+
+
+@pytest.mark.asyncio
+async def test_compressed_body_round_trips(client: AsyncClient, db_session: AsyncSession):
+    """Test el cuerpo comprimido se descomprime al JSON original"""
+    await seed_dishes(db_session)
+    plain = await client.get("/platos/list", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    async with client.stream("GET", "/platos/list", headers={"Accept-Encoding": "br"}) as response:
+        compressed = b"".join([chunk async for chunk in response.aiter_raw()])
+    assert json.loads(brotli.decompress(compressed)) == plain.json()
+
+    async with client.stream("GET", "/platos/list", headers={"Accept-Encoding": "gzip"}) as response:
+        compressed = b"".join([chunk async for chunk in response.aiter_raw()])
+    assert json.loads(gzip.decompress(compressed)) == plain.json()
+
+
+@pytest.mark.asyncio
+async def test_small_responses_are_not_compressed(client: AsyncClient):
+    """Test las respuestas por debajo del umbral salen sin comprimir"""
+    response = await client.get("/platos/list", headers={"Accept-Encoding": "gzip, br"})
+    assert response.json() == []
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_repeated_catalog_hits_reuse_precompressed_body(client: AsyncClient, db_session: AsyncSession):
+    """Test repetir una respuesta de catálogo sin cambios no vuelve a comprimir"""
+    await seed_dishes(db_session)
+
+    for _ in range(3):
+        response = await client.get("/platos/list", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+
+    assert COMPRESSION_SECONDS.count(route="/platos/list", encoding="gzip") == 1
+    assert PRECOMPRESSED_HITS.value(route="/platos/list", encoding="gzip") == 2
+
+    # Al cambiar el catálogo el cuerpo es otro y se comprime de nuevo
+    db_session.add(Dish(dish_id=1000, menu_id=1, name="Nuevo", price=1))
+    await db_session.commit()
+    await client.get("/platos/list", headers={"Accept-Encoding": "gzip"})
+    assert COMPRESSION_SECONDS.count(route="/platos/list", encoding="gzip") == 2
@@ -0,0 +1,170 @@
+import pytest
+from datetime import datetime, time
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app import database
+from app.config import settings
+from app.controllers import deletion
+from app.controllers.users import delete_user_controller
+from app.database import Base, SessionRouter, enable_sqlite_foreign_keys, get_db, get_read_db
+from app.main import app
+from app.models import (
+    Allergens, Category, Dish, DishAllergen, DishCategory, DishSearchDocument, Establishment,
+    EstablishmentCategory, Menu, Reservation, Review, User, UserAllergen,
+)
+from app.models.reviews import RatingEnum
+from app.models.users import UserRole, UserStatus
+
+
+@pytest.fixture
+async def sessions(tmp_path, monkeypatch):
+    """SQLite en fichero con las claves foráneas activas (ON DELETE CASCADE) y las sesiones de escritura"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cascade.db'}")
+    enable_sqlite_foreign_keys(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    monkeypatch.setattr(database, "session_router", SessionRouter(factory))
+    monkeypatch.setattr(settings, "DELETE_BATCH_PAUSE_SECONDS", 0.0)
+    yield factory
+    await deletion.wait_for_deletes()
+    await engine.dispose()
+
+
+@pytest.fixture
+async def cascade_client(sessions):
+    async def override_get_db():
+        async with sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.clear()
+
+
+async def seed(sessions, dishes: int = 6, users: int = 3):
+    """Helper: un establecimiento con dos menús, platos con enlaces y documento, reservas y reseñas"""
+    async with sessions() as db:
+        db.add(Allergens(allergen_id=1, name="Gluten"))
+        db.add(Category(category_id=1, name="Pasta"))
+        db.add(Establishment(
+            establishment_id=1, NIT="NIT1", name="Rest", address="x", opening_hour=time(8), closing_hour=time(22)
+        ))
+        db.add(EstablishmentCategory(establishment_id=1, category_id=1))
+        db.add_all([Menu(menu_id=1, establishment_id=1, title="Carta"), Menu(menu_id=2, establishment_id=1, title="Bebidas")])
+        await db.flush()
+        for dish_id in range(1, dishes + 1):
+            db.add(Dish(dish_id=dish_id, menu_id=1 + dish_id % 2, name=f"Plato {dish_id}", price=10))
+        await db.flush()
+        for dish_id in range(1, dishes + 1):
+            db.add(DishAllergen(dish_id=dish_id, allergen_id=1))
+            db.add(DishCategory(dish_id=dish_id, category_id=1))
+            db.add(DishSearchDocument(dish_id=dish_id, menu_id=1, establishment_id=1, name="x", price=10))
+        for user_id in range(1, users + 1):
+            db.add(User(
+                user_id=user_id, role=UserRole.user, name="Ana", email=f"u{user_id}@test.com",
+                password="x", status=UserStatus.active,
+            ))
+        await db.flush()
+        for user_id in range(1, users + 1):
+            db.add(UserAllergen(user_id=user_id, allergen_id=1))
+            db.add(Reservation(user_id=user_id, establishment_id=1, date=datetime(2026, 11, 1, 20), people_count=2))
+            db.add(Review(user_id=user_id, establishment_id=1, rating=RatingEnum.FIVE))
+        await db.commit()
+
+
+async def counts(sessions, *models):
+    async with sessions() as db:
+        return [await db.scalar(select(func.count()).select_from(model)) for model in models]
+
+
+@pytest.mark.asyncio
+async def test_small_establishment_is_deleted_in_one_statement(cascade_client: AsyncClient, sessions):
+    """Test borrar un establecimiento borra en cascada todo lo que cuelga de él"""
+    await seed(sessions)
+
+    response = await cascade_client.delete("/establishments/1")
+
+    assert response.status_code == 200
+    assert await counts(
+        sessions, Establishment, Menu, Dish, DishAllergen, DishCategory, DishSearchDocument,
+        Reservation, Review, EstablishmentCategory,
+    ) == [0] * 9
+    # Lo que no pertenece al establecimiento sigue ahí
+    assert await counts(sessions, User, UserAllergen, Allergens, Category) == [3, 3, 1, 1]
+    assert (await cascade_client.get("/establishments/1")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_large_establishment_is_deleted_in_background_batches(
+    cascade_client: AsyncClient, sessions, monkeypatch
+):
+    """Test un subárbol grande se borra en segundo plano por lotes acotados"""
+    await seed(sessions, dishes=10)
+    monkeypatch.setattr(settings, "DELETE_SYNC_MAX_ROWS", 5)
+    monkeypatch.setattr(settings, "DELETE_BATCH_SIZE", 4)
+    deleted = []
+    original_delete_batch = deletion.delete_batch
+
+    async def recording_delete_batch(db, step, root_id, batch_size):
+        rows = await original_delete_batch(db, step, root_id, batch_size)
+        deleted.append((step.model.__tablename__, rows))
+        return rows
+
+    monkeypatch.setattr(deletion, "delete_batch", recording_delete_batch)
+
+    response = await cascade_client.delete("/establishments/1")
+    assert response.status_code == 202
+    await deletion.wait_for_deletes()
+
+    assert all(rows <= 4 for _, rows in deleted)
+    assert [rows for table, rows in deleted if table == "dishes"] == [4, 4, 2, 0]
+    assert await counts(sessions, Establishment, Menu, Dish, DishAllergen, Reservation, Review) == [0] * 6
+    assert deletion.DELETED_ROWS.value(table="dishes") == 10
+    assert deletion.DELETED_ROWS.value(table="establishments") == 1
+
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_background_deletes_then_cancels(sessions, monkeypatch):
+    """Test al parar la app se esperan los borrados en curso y se cancelan los que no terminan a tiempo"""
+    await seed(sessions, dishes=10)
+    monkeypatch.setattr(settings, "DELETE_BATCH_SIZE", 1)
+    finished = deletion.schedule_delete("menu", 2)
+    await deletion.stop(5.0)
+    assert finished.done() and not finished.cancelled()
+
+    monkeypatch.setattr(settings, "DELETE_BATCH_PAUSE_SECONDS", 1.0)
+    slow = deletion.schedule_delete("menu", 1)
+    await deletion.stop(0.1)
+    assert slow.cancelled()
+    assert deletion._running == {}
+    # Cancelado a medias: la raíz sigue ahí y repetir el borrado lo completaría
+    assert await counts(sessions, Menu) == [1]
+
+@pytest.mark.asyncio
+async def test_menu_delete_cascades_to_dishes(cascade_client: AsyncClient, sessions):
+    """Test borrar un menú borra sus platos y sus enlaces, pero no los del otro menú"""
+    await seed(sessions)
+
+    response = await cascade_client.delete("/menu/1")
+
+    assert response.status_code == 200
+    assert response.json() == {"message": "Menú 1 eliminado exitosamente"}
+    assert await counts(sessions, Menu, Dish, DishAllergen, DishCategory, DishSearchDocument) == [1, 3, 3, 3, 3]
+
+
+@pytest.mark.asyncio
+async def test_user_delete_cascades(sessions):
+    """Test borrar un usuario borra sus reservas, reseñas y alérgenos"""
+    await seed(sessions)
+
+    async with sessions() as db:
+        result = await delete_user_controller(1, db)
+    assert result.message == "User deleted successfully"
+    assert await counts(sessions, User, Reservation, Review, UserAllergen) == [2, 2, 2, 2]
+    assert await counts(sessions, Establishment) == [1]
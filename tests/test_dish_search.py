@@ -0,0 +1,176 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.controllers.dish_search import _has_any
+from app.models.dish_search_documents import DishSearchDocument, IdList
+
+
+async def create_restaurant(client: AsyncClient, nit: str, name: str, opening: str = "08:00:00", closing: str = "22:00:00"):
+    """Helper para crear un establecimiento con un menú"""
+    est_response = await client.post("/establishments/", json={
+        "NIT": nit,
+        "name": name,
+        "address": "123 Test St",
+        "opening_hour": opening,
+        "closing_hour": closing
+    })
+    establishment_id = est_response.json()["establishment_id"]
+    menu_response = await client.post(f"/menu/{establishment_id}", json={
+        "establishment_id": establishment_id,
+        "title": "Menu Principal"
+    })
+    return establishment_id, menu_response.json()["menu_id"]
+
+
+async def create_dish(client: AsyncClient, menu_id: int, name: str, price: float, description: str = None):
+    """Helper para crear un plato"""
+    response = await client.post("/platos/", json={
+        "menu_id": menu_id,
+        "name": name,
+        "description": description,
+        "price": price
+    })
+    return response.json()["dish_id"]
+
+
+@pytest.mark.asyncio
+async def test_search_combined_filters(client: AsyncClient):
+    """Test búsqueda vegetariana, bajo precio, sin gluten y en restaurantes abiertos"""
+    _, menu_open = await create_restaurant(client, "100000001", "Verde Vivo", "08:00:00", "22:00:00")
+    _, menu_closed = await create_restaurant(client, "100000002", "Nocturno", "20:00:00", "23:00:00")
+
+    vegetarian = (await client.post("/categorias/", json={"name": "Vegetariano"})).json()["category_id"]
+    gluten = (await client.post("/allergen/", json={"name": "Gluten"})).json()["allergen_id"]
+
+    ensalada = await create_dish(client, menu_open, "Ensalada", 12.0)
+    pasta = await create_dish(client, menu_open, "Pasta verde", 15.0)
+    lasagna = await create_dish(client, menu_open, "Lasagna veggie", 25.0)
+    nocturno = await create_dish(client, menu_closed, "Tofu salteado", 10.0)
+    for dish_id in (ensalada, pasta, lasagna, nocturno):
+        await client.post(f"/categorias/plato/{dish_id}/categoria/{vegetarian}")
+    await client.post(f"/platos/{pasta}/alergenos/{gluten}")
+
+    response = await client.get("/platos/buscar", params={
+        "category_ids": [vegetarian],
+        "exclude_allergen_ids": [gluten],
+        "max_price": 20,
+        "open_at": "13:00",
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert [item["dish_id"] for item in data["items"]] == [ensalada]
+    assert data["items"][0]["category_ids"] == [vegetarian]
+
+
+@pytest.mark.asyncio
+async def test_search_text_ranking_and_pagination(client: AsyncClient):
+    """Test búsqueda por texto: coincidencias en el nombre primero, total y paginación"""
+    _, menu_id = await create_restaurant(client, "200000001", "Casa Taco")
+    await create_dish(client, menu_id, "Burrito", 9.0, description="Relleno como un taco")
+    await create_dish(client, menu_id, "Taco al pastor", 8.0)
+    await create_dish(client, menu_id, "Mini taco", 5.0)
+    await create_dish(client, menu_id, "Sopa", 4.0)
+
+    response = await client.get("/platos/buscar", params={"q": "taco", "limit": 2})
+    assert response.status_code == 200
+    data = response.json()
+    # "Casa Taco" hace que todos coincidan por el nombre del establecimiento
+    assert data["total"] == 4
+    assert [item["name"] for item in data["items"]] == ["Taco al pastor", "Mini taco"]
+
+    response = await client.get("/platos/buscar", params={"q": "taco", "limit": 2, "offset": 2})
+    assert [item["name"] for item in response.json()["items"]] == ["Sopa", "Burrito"]
+
+
+@pytest.mark.asyncio
+async def test_search_documents_follow_updates(client: AsyncClient):
+    """Test los documentos se mantienen al actualizar y eliminar platos"""
+    establishment_id, menu_id = await create_restaurant(client, "300000001", "Parrilla")
+    dish_id = await create_dish(client, menu_id, "Churrasco", 30.0)
+
+    await client.put(f"/platos/{dish_id}", json={"price": 18.0})
+    response = await client.get("/platos/buscar", params={"max_price": 20, "establishment_id": establishment_id})
+    assert [item["dish_id"] for item in response.json()["items"]] == [dish_id]
+    assert response.json()["items"][0]["price"] == 18.0
+
+    await client.patch(f"/establishments/{establishment_id}", json={"closing_hour": "12:00:00"})
+    response = await client.get("/platos/buscar", params={"open_at": "13:00"})
+    assert response.json()["total"] == 0
+
+    await client.delete(f"/platos/{dish_id}")
+    response = await client.get("/platos/buscar", params={"q": "churrasco"})
+    assert response.json()["total"] == 0
+
+
+@pytest.mark.asyncio
+async def test_search_invalid_price_range(client: AsyncClient):
+    """Test rango de precio inválido retorna 400"""
+    response = await client.get("/platos/buscar", params={"min_price": 20, "max_price": 10})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_documents_follow_allergen_delete(client: AsyncClient):
+    """Test al eliminar un alérgeno sus platos dejan de quedar excluidos por él"""
+    _, menu_id = await create_restaurant(client, "400000001", "Trigal")
+    gluten = (await client.post("/allergen/", json={"name": "Gluten"})).json()["allergen_id"]
+    pan = await create_dish(client, menu_id, "Pan de masa madre", 6.0)
+    await client.post(f"/platos/{pan}/alergenos/{gluten}")
+
+    response = await client.get("/platos/buscar", params={"exclude_allergen_ids": [gluten]})
+    assert response.json()["total"] == 0
+
+    assert (await client.delete(f"/allergen/{gluten}")).status_code == 200
+    response = await client.get("/platos/buscar", params={"exclude_allergen_ids": [gluten]})
+    assert [item["dish_id"] for item in response.json()["items"]] == [pan]
+    assert response.json()["items"][0]["allergen_ids"] == []
+
+
+@pytest.mark.asyncio
+async def test_search_documents_follow_category_delete(client: AsyncClient):
+    """Test al eliminar una categoría sus platos dejan de encontrarse por ella"""
+    _, menu_id = await create_restaurant(client, "500000001", "Huerta")
+    vegetarian = (await client.post("/categorias/", json={"name": "Vegetariano"})).json()["category_id"]
+    dish_id = await create_dish(client, menu_id, "Berenjenas", 11.0)
+    await client.post(f"/categorias/plato/{dish_id}/categoria/{vegetarian}")
+    assert (await client.get("/platos/buscar", params={"q": "vegetariano"})).json()["total"] == 1
+
+    assert (await client.delete(f"/categorias/{vegetarian}")).status_code == 200
+    assert (await client.get("/platos/buscar", params={"category_ids": [vegetarian]})).json()["total"] == 0
+    assert (await client.get("/platos/buscar", params={"q": "vegetariano"})).json()["total"] == 0
+    response = await client.get("/platos/buscar", params={"q": "berenjenas"})
+    assert response.json()["items"][0]["category_ids"] == []
+
+
+def test_id_lists_are_arrays_on_postgresql():
+    """Test las listas de IDs son integer[] filtrados con && en PostgreSQL y texto ",1,4," en SQLite"""
+    id_list = IdList()
+    assert id_list.process_bind_param([4, 1, 4], postgresql.dialect()) == [1, 4]
+    assert id_list.process_bind_param([4, 1, 4], sqlite.dialect()) == ",1,4,"
+    assert id_list.process_result_value(",1,4,", sqlite.dialect()) == [1, 4]
+    assert id_list.process_result_value(",", sqlite.dialect()) == []
+
+    doc = DishSearchDocument
+    query = select(doc.dish_id).where(_has_any(doc.category_ids, [4, 1], "postgresql"))
+    assert "dish_search_documents.category_ids && CAST(" in str(query.compile(dialect=postgresql.dialect()))
+    query = select(doc.dish_id).where(_has_any(doc.category_ids, [4, 1], "sqlite"))
+    assert str(query.compile(dialect=sqlite.dialect())).count("LIKE") == 2
+
+
+@pytest.mark.asyncio
+async def test_search_dish_with_many_categories(client: AsyncClient):
+    """Test un plato con más categorías de las que cabían en 255 caracteres se encuentra por cualquiera"""
+    _, menu_id = await create_restaurant(client, "500000002", "Surtido")
+    dish_id = await create_dish(client, menu_id, "Degustación", 40.0)
+    category_ids = []
+    for n in range(60):
+        category_id = (await client.post("/categorias/", json={"name": f"Categoría {n}"})).json()["category_id"]
+        await client.post(f"/categorias/plato/{dish_id}/categoria/{category_id}")
+        category_ids.append(category_id)
+
+    response = await client.get("/platos/buscar", params={"category_ids": [category_ids[-1]]})
+    assert [item["dish_id"] for item in response.json()["items"]] == [dish_id]
+    assert response.json()["items"][0]["category_ids"] == sorted(category_ids)
@@ -0,0 +1,84 @@
+import asyncio
+import json
+import pytest
+from datetime import time
+from httpx import AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.controllers.live_events import stream_establishment_events
+from app.models import Establishment, Menu, User
+from app.models.users import UserRole, UserStatus
+from app.utils import events
+
+
+def parse(chunk: str) -> tuple:
+    """Helper: (evento, datos) de un mensaje SSE"""
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+def test_slow_subscriber_gets_resync():
+    """Test una cola llena se vacía y se sustituye por un evento resync"""
+    subscription = events.Subscription("establishment:1", max_queue=2)
+    for event_id in (1, 2, 3):
+        subscription.deliver({"type": "reservation.created", "data": {}, "id": event_id})
+
+    assert subscription.queue.qsize() == 1
+    assert subscription.queue.get_nowait() == {"type": "resync", "data": {}, "id": 3}
+    assert events.RESYNCS.value() == 1
+
+
+async def seed(db: AsyncSession):
+    """Helper: dos establecimientos con un menú y un usuario"""
+    await db.execute(insert(Establishment), [
+        {"establishment_id": i, "NIT": f"NIT{i}", "name": f"Rest {i}", "address": "x",
+         "opening_hour": time(8), "closing_hour": time(22)}
+        for i in (1, 2)
+    ])
+    await db.execute(insert(Menu), [{"menu_id": 1, "establishment_id": 1, "title": "Carta"}])
+    await db.execute(insert(User), [{
+        "user_id": 1, "role": UserRole.user, "name": "U", "email": "u@test.com", "password": "x",
+        "status": UserStatus.active,
+    }])
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_stream_pushes_establishment_changes(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch
+):
+    """Test el stream del establecimiento recibe sus reservas y platos, solo los suyos, y latidos"""
+    await seed(db_session)
+    monkeypatch.setattr(settings, "EVENTS_HEARTBEAT_SECONDS", 0.05)
+    response = await stream_establishment_events(db_session, 1)
+    assert response.media_type == "text/event-stream"
+    stream = response.body_iterator
+
+    assert await anext(stream) == "retry: 3000\n\n"
+    assert events.hub.subscriber_count() == 1
+    # Sin actividad: comentario de latido
+    assert await anext(stream) == ": ping\n\n"
+
+    reservation = {"user_id": 1, "establishment_id": 1, "date": "2026-11-01T20:00:00", "people_count": 2}
+    await client.post("/reservas/", json={**reservation, "establishment_id": 2})
+    created = (await client.post("/reservas/", json=reservation)).json()
+    await client.patch(f"/reservas/{created['reservation_id']}/cancelar")
+    await client.post("/platos/", json={"menu_id": 1, "name": "Sopa", "price": 8.5})
+
+    received = [parse(await asyncio.wait_for(anext(stream), 1)) for _ in range(3)]
+    assert [event for event, _ in received] == ["reservation.created", "reservation.cancelled", "dish.created"]
+    assert received[0][1]["reservation_id"] == created["reservation_id"]
+    assert received[1][1]["status"] == "cancelled"
+    assert received[2][1]["name"] == "Sopa"
+    assert events.PUBLISHED.value(type="reservation.created") == 2
+
+    await stream.aclose()
+    assert events.hub.subscriber_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_unknown_establishment(client: AsyncClient, db_session: AsyncSession):
+    """Test el stream de un establecimiento inexistente es un 404"""
+    assert (await client.get("/establishments/999/events")).status_code == 404
@@ -0,0 +1,147 @@
+import pytest
+from datetime import time
+from httpx import AsyncClient
+from sqlalchemy import delete, event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.controllers import existence
+from app.controllers.existence import CHECKS
+from app.models import Dish, Establishment, Menu, User
+from app.models.users import UserRole
+from app.utils import events
+from app.utils.bloom import BloomFilter
+from app.utils.jwt import create_access_token
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test todo lo añadido está y los falsos positivos rondan la tasa pedida"""
+    bloom = BloomFilter(5000, 0.01, range(5000))
+    assert all(key in bloom for key in range(5000))
+    false_positives = sum(key in bloom for key in range(100_000, 110_000))
+    assert false_positives < 200
+    assert "a@b.com" not in bloom
+    bloom.add("a@b.com")
+    assert "a@b.com" in bloom
+
+
+async def seed(db: AsyncSession):
+    """Helper: establecimientos 1 y 3 y platos 1, 2 y 4 (con huecos por debajo del máximo)"""
+    await db.execute(insert(Establishment), [
+        {"establishment_id": i, "NIT": f"NIT{i}", "name": f"Rest {i}", "address": "x",
+         "opening_hour": time(8), "closing_hour": time(22)}
+        for i in (1, 3)
+    ])
+    await db.execute(insert(Menu), [{"menu_id": 1, "establishment_id": 1, "title": "Carta"}])
+    await db.execute(insert(Dish), [
+        {"dish_id": i, "menu_id": 1, "name": f"Plato {i}", "price": 10.0} for i in (1, 2, 4)
+    ])
+    await db.commit()
+
+
+class capture_sql:
+    """Helper: sentencias SQL ejecutadas dentro del bloque"""
+
+    def __init__(self, db: AsyncSession):
+        self.engine = db.bind.sync_engine
+        self.statements = []
+
+    def _capture(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._capture)
+        return self.statements
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._capture)
+
+
+@pytest.mark.asyncio
+async def test_missing_ids_answered_without_database(client: AsyncClient, db_session: AsyncSession):
+    """Test los IDs fuera del filtro y los 404 recientes no consultan; las altas se ven enseguida"""
+    await seed(db_session)
+    await existence.rebuild(db_session)
+
+    with capture_sql(db_session) as statements:
+        assert (await client.get("/platos/2")).status_code == 200
+        # Por debajo del máximo cargado y fuera del filtro: seguro que no existe
+        assert (await client.get("/platos/3")).status_code == 404
+        assert (await client.get("/establishments/2")).status_code == 404
+    assert len(statements) == 1
+    assert CHECKS.value(filter="dishes", result="bloom") == 1
+    assert CHECKS.value(filter="establishments", result="bloom") == 1
+
+    # Un ID mayor que el máximo cargado (alta de otro proceso) sí va a la base de datos
+    await db_session.execute(insert(Dish), [{"dish_id": 50, "menu_id": 1, "name": "Nuevo", "price": 9.0}])
+    await db_session.commit()
+    assert (await client.get("/platos/50")).status_code == 200
+
+    # Borrado: el filtro aún lo tiene, la base de datos confirma el 404 y se recuerda
+    await db_session.execute(delete(Dish).where(Dish.dish_id == 4))
+    await db_session.commit()
+    assert (await client.get("/platos/4")).status_code == 404
+    with capture_sql(db_session) as statements:
+        assert (await client.get("/platos/4")).status_code == 404
+    assert statements == []
+    assert CHECKS.value(filter="dishes", result="negative") == 1
+
+    # El alta de otro worker llega por el hub y olvida el 404
+    await db_session.execute(insert(Dish), [{"dish_id": 4, "menu_id": 1, "name": "Otra vez", "price": 9.0}])
+    await db_session.commit()
+    await events.hub.publish(existence.CHANNEL, "existence.dishes", 4)
+    assert (await client.get("/platos/4")).status_code == 200
+
+    created = (await client.post("/establishments/", json={
+        "NIT": "NIT2", "name": "Nuevo", "address": "y", "opening_hour": "08:00:00", "closing_hour": "22:00:00",
+    })).json()
+    assert (await client.get(f"/establishments/{created['establishment_id']}")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_register_skips_email_lookup_for_new_emails(client: AsyncClient, db_session: AsyncSession):
+    """Test el alta de un email nuevo no consulta por email; uno repetido sigue dando 400"""
+    await existence.rebuild(db_session)
+    user = {
+        "name": "Ana", "last_name": "Gil", "email": "ana@test.com", "password": "Password123!",
+        "role": "user", "status": "active",
+    }
+
+    with capture_sql(db_session) as statements:
+        assert (await client.post("/usuarios/register", json=user)).status_code == 201
+    assert not any("WHERE users.email" in statement for statement in statements)
+    assert CHECKS.value(filter="user_emails", result="bloom") == 1
+
+    response = await client.post("/usuarios/register", json=user)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+
+
+@pytest.mark.asyncio
+async def test_inserts_from_other_workers_never_answered_404(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch
+):
+    """Test sin el evento del alta: un ID por encima del máximo no se recuerda como 404 y los emails
+    solo se responden desde el filtro con EVENTS_BACKEND=postgres"""
+    await seed(db_session)
+    await existence.rebuild(db_session)
+
+    assert (await client.get("/platos/60")).status_code == 404
+    await db_session.execute(insert(Dish), [{"dish_id": 60, "menu_id": 1, "name": "Nuevo", "price": 9.0}])
+    await db_session.commit()
+    assert (await client.get("/platos/60")).status_code == 200
+
+    client.headers["Authorization"] = f"Bearer {create_access_token({'sub': 'admin@test.com'})}"
+    assert (await client.get("/usuarios/email/eva@test.com")).status_code == 404
+    await db_session.execute(insert(User), [
+        {"email": "eva@test.com", "password": "x", "name": "Eva", "role": UserRole.user}
+    ])
+    await db_session.commit()
+    assert (await client.get("/usuarios/email/eva@test.com")).status_code == 200
+    assert CHECKS.value(filter="user_emails", result="bloom") == 0
+
+    monkeypatch.setattr(settings, "EVENTS_BACKEND", "postgres")
+    with capture_sql(db_session) as statements:
+        assert (await client.get("/usuarios/email/nadie@test.com")).status_code == 404
+    assert statements == []
+    assert CHECKS.value(filter="user_emails", result="bloom") == 1
@@ -0,0 +1,73 @@
+import pytest
+from datetime import time
+from httpx import AsyncClient
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Dish, Establishment, Menu
+from app.schemas.dishes import DishOut
+from app.utils import fieldsets
+
+
+async def seed(db: AsyncSession):
+    """Helper: 2 establecimientos y 3 platos"""
+    await db.execute(insert(Establishment), [
+        {"establishment_id": i, "NIT": f"NIT{i}", "name": f"Rest {i}", "address": "x",
+         "description": "Larga descripción", "logo": f"logo{i}.png",
+         "opening_hour": time(8), "closing_hour": time(22)}
+        for i in (1, 2)
+    ])
+    await db.execute(insert(Menu), [{"menu_id": 1, "establishment_id": 1, "title": "Carta"}])
+    await db.execute(insert(Dish), [
+        {"dish_id": i, "menu_id": 1, "name": f"Plato {i}", "price": 10.0 + i} for i in (1, 2, 3)
+    ])
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_list_fields_narrow_query_and_payload(client: AsyncClient, db_session: AsyncSession):
+    """Test ?fields= devuelve solo esos campos (y la clave) y solo los consulta"""
+    await seed(db_session)
+    statements = []
+    sync_engine = db_session.bind.sync_engine
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        response = await client.get("/establishments/", params={"fields": "logo,name"})
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"name": "Rest 1", "logo": "logo1.png", "establishment_id": 1},
+        {"name": "Rest 2", "logo": "logo2.png", "establishment_id": 2},
+    ]
+    assert "description" not in statements[0] and "address" not in statements[0]
+
+    # Sin fields, el listado completo de siempre
+    full = (await client.get("/platos/list")).json()
+    assert full[0]["name"] == "Plato 1" and "description" in full[0]
+    assert (await client.get("/platos/list", params={"fields": "price"})).json()[0] == {"price": 11.0, "dish_id": 1}
+
+    response = await client.get("/establishments/", params={"fields": "name,password"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: password"
+
+
+@pytest.mark.asyncio
+async def test_multi_get_fields_and_model_cache(client: AsyncClient, db_session: AsyncSession):
+    """Test ?fields= en los multi-get y un solo modelo por combinación de campos"""
+    await seed(db_session)
+
+    body = (await client.get("/platos/", params={"ids": "3,9", "fields": "name"})).json()
+    assert body == {"items": [{"dish_id": 3, "name": "Plato 3"}], "missing": [9]}
+
+    response = await client.post("/establishments/batch", params={"fields": "name"}, json={"ids": [2]})
+    assert response.json() == {"items": [{"establishment_id": 2, "name": "Rest 2"}], "missing": []}
+
+    fields = fieldsets.parse("price,name", DishOut, "dish_id")
+    assert fields == fieldsets.parse("name, price", DishOut, "dish_id") == ("name", "price", "dish_id")
+    assert fieldsets.sparse_model(DishOut, fields) is fieldsets.sparse_model(DishOut, fields)
+    assert list(fieldsets.sparse_model(DishOut, fields).model_fields) == ["name", "price", "dish_id"]
@@ -0,0 +1,172 @@
+import asyncio
+import pytest
+from datetime import datetime, time, timedelta, timezone
+from httpx import AsyncClient
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.controllers.idempotency import purge_expired_keys, IDEMPOTENT_REQUESTS
+from app.models import Establishment, IdempotencyKey, Reservation, Review, User
+from app.models.users import UserRole, UserStatus
+
+
+async def seed(db: AsyncSession):
+    """Helper para sembrar un usuario y un establecimiento"""
+    db.add(User(
+        user_id=1, role=UserRole.user, name="Ana", email="ana@test.com", password="x", status=UserStatus.active
+    ))
+    db.add(Establishment(
+        establishment_id=1, NIT="NIT1", name="Rest", address="x", opening_hour=time(8), closing_hour=time(22)
+    ))
+    await db.commit()
+
+
+RESERVATION = {"user_id": 1, "establishment_id": 1, "date": "2026-11-01T20:00:00", "people_count": 2}
+REVIEW = {"user_id": 1, "establishment_id": 1, "rating": "5", "comment": "Muy bueno"}
+
+
+async def count(db: AsyncSession, model) -> int:
+    return await db.scalar(select(func.count()).select_from(model))
+
+
+@pytest.mark.asyncio
+async def test_retried_reservation_is_replayed(client: AsyncClient, db_session: AsyncSession):
+    """Test un reintento con la misma Idempotency-Key repite la respuesta sin crear otra reserva"""
+    await seed(db_session)
+    headers = {"Idempotency-Key": "abc-123"}
+
+    first = await client.post("/reservas/", json=RESERVATION, headers=headers)
+    retry = await client.post("/reservas/", json=RESERVATION, headers=headers)
+
+    assert first.status_code == 201
+    assert "idempotent-replayed" not in first.headers
+    assert retry.status_code == 201
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+    assert await count(db_session, Reservation) == 1
+
+    # Otra clave es otra reserva
+    other = await client.post("/reservas/", json=RESERVATION, headers={"Idempotency-Key": "abc-456"})
+    assert other.json()["reservation_id"] != first.json()["reservation_id"]
+    assert await count(db_session, Reservation) == 2
+
+
+@pytest.mark.asyncio
+async def test_retried_review_is_replayed_instead_of_400(client: AsyncClient, db_session: AsyncSession):
+    """Test reintentar una reseña devuelve la respuesta original en lugar del 400 por duplicado"""
+    await seed(db_session)
+    headers = {"Idempotency-Key": "review-1"}
+
+    first = await client.post("/resenas/", json=REVIEW, headers=headers)
+    retry = await client.post("/resenas/", json=REVIEW, headers=headers)
+
+    assert first.status_code == 201
+    assert retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert await count(db_session, Review) == 1
+
+    # Sin clave se mantiene el comportamiento anterior
+    duplicate = await client.post("/resenas/", json=REVIEW)
+    assert duplicate.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_are_serialized(client: AsyncClient, db_session: AsyncSession):
+    """Test peticiones simultáneas con la misma clave crean una sola reserva"""
+    await seed(db_session)
+    headers = {"Idempotency-Key": "concurrent"}
+
+    responses = await asyncio.gather(*[
+        client.post("/reservas/", json=RESERVATION, headers=headers) for _ in range(5)
+    ])
+
+    assert {response.status_code for response in responses} == {201}
+    assert len({response.json()["reservation_id"] for response in responses}) == 1
+    assert sum(response.headers.get("idempotent-replayed") == "true" for response in responses) == 4
+    assert await count(db_session, Reservation) == 1
+    assert IDEMPOTENT_REQUESTS.value(scope="reservas", result="new") == 1
+    assert IDEMPOTENT_REQUESTS.value(scope="reservas", result="replayed") == 4
+
+
+@pytest.mark.asyncio
+async def test_key_reused_with_different_body(client: AsyncClient, db_session: AsyncSession):
+    """Test reutilizar la clave con otro cuerpo es un error del cliente"""
+    await seed(db_session)
+    headers = {"Idempotency-Key": "reused"}
+    await client.post("/reservas/", json=RESERVATION, headers=headers)
+
+    response = await client.post("/reservas/", json={**RESERVATION, "people_count": 6}, headers=headers)
+    assert response.status_code == 422
+    assert await count(db_session, Reservation) == 1
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_replayed(client: AsyncClient, db_session: AsyncSession):
+    """Test un 404 se guarda y se repite sin volver a ejecutar las comprobaciones"""
+    headers = {"Idempotency-Key": "missing-user"}
+
+    first = await client.post("/reservas/", json=RESERVATION, headers=headers)
+    assert first.status_code == 404
+
+    # Aunque el usuario exista ahora, el reintento repite la respuesta original
+    await seed(db_session)
+    retry = await client.post("/reservas/", json=RESERVATION, headers=headers)
+    assert retry.status_code == 404
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert await count(db_session, Reservation) == 0
+
+
+@pytest.mark.asyncio
+async def test_expired_keys_are_purged_and_reusable(client: AsyncClient, db_session: AsyncSession):
+    """Test las claves caducadas se pueden reutilizar y se borran con la limpieza"""
+    await seed(db_session)
+    past = datetime.now(timezone.utc) - timedelta(days=2)
+    db_session.add(IdempotencyKey(
+        scope="reservas", user_id=1, key="old", request_hash="x", status_code=201, response_body="{}",
+        created_at=past, expires_at=past + timedelta(days=1),
+    ))
+    db_session.add(IdempotencyKey(
+        scope="reservas", user_id=1, key="older", request_hash="x", status_code=201, response_body="{}",
+        created_at=past, expires_at=past + timedelta(days=1),
+    ))
+    await db_session.commit()
+
+    response = await client.post("/reservas/", json=RESERVATION, headers={"Idempotency-Key": "old"})
+    assert response.status_code == 201
+    assert "idempotent-replayed" not in response.headers
+
+    assert await purge_expired_keys(db_session) == 1
+    assert await count(db_session, IdempotencyKey) == 1
+
+
+@pytest.mark.asyncio
+async def test_abandoned_key_is_taken_over_after_lease(client: AsyncClient, db_session: AsyncSession):
+    """Test una clave reservada sin respuesta da 409 durante el plazo y después la ejecuta un reintento"""
+    await seed(db_session)
+    headers = {"Idempotency-Key": "crashed"}
+    # Reserva de una petición cuyo worker cayó antes de guardar la respuesta
+    await client.post("/reservas/", json=RESERVATION, headers=headers)
+    await db_session.execute(
+        update(IdempotencyKey).values(status_code=None, response_body=None, created_at=datetime.now(timezone.utc))
+    )
+    await db_session.execute(delete(Reservation))
+    await db_session.commit()
+
+    in_progress = await client.post("/reservas/", json=RESERVATION, headers=headers)
+    assert in_progress.status_code == 409
+    assert 0 < int(in_progress.headers["retry-after"]) <= settings.IDEMPOTENCY_LEASE_SECONDS
+
+    await db_session.execute(update(IdempotencyKey).values(
+        created_at=datetime.now(timezone.utc) - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS + 1)
+    ))
+    await db_session.commit()
+    retry = await client.post("/reservas/", json=RESERVATION, headers=headers)
+    assert retry.status_code == 201
+    assert "idempotent-replayed" not in retry.headers
+    assert await count(db_session, Reservation) == 1
+
+    replay = await client.post("/reservas/", json=RESERVATION, headers=headers)
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert replay.json() == retry.json()
@@ -0,0 +1,101 @@
+import pytest
+from datetime import time
+from httpx import AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.controllers import leaderboard
+from app.models import Category, Establishment, EstablishmentCategory
+from app.utils.leaderboard import Leaderboard
+
+
+def test_leaderboard_ranks_ties_and_updates():
+    """Test los empates comparten puesto y una actualización mueve la entrada"""
+    board = Leaderboard([("a", 10), ("b", 30), ("c", 20), ("d", 20)])
+
+    assert board.top(10) == [(1, "b", 30), (2, "c", 20), (2, "d", 20), (4, "a", 10)]
+    assert board.rank("d") == 2 and board.rank("a") == 4
+    # La página siguiente empieza en mitad de un empate y mantiene su puesto
+    assert board.top(2, offset=2) == [(2, "d", 20), (4, "a", 10)]
+
+    board.update("a", 40)
+    board.remove("b")
+    assert board.top(10) == [(1, "a", 40), (2, "c", 20), (2, "d", 20)]
+    assert board.rank("b") is None and len(board) == 3
+
+
+async def seed(db: AsyncSession):
+    """Helper: 4 establecimientos (uno sin puntos) y dos categorías"""
+    await db.execute(insert(Establishment), [
+        {"establishment_id": i, "NIT": f"NIT{i}", "name": f"Rest {i}", "address": "x",
+         "opening_hour": time(8), "closing_hour": time(22), "sustainability_points": points}
+        for i, points in ((1, 50), (2, 80), (3, 20), (4, None))
+    ])
+    await db.execute(insert(Category), [{"category_id": 1, "name": "Vegana"}, {"category_id": 2, "name": "Sopas"}])
+    await db.execute(insert(EstablishmentCategory), [
+        {"establishment_id": 1, "category_id": 1}, {"establishment_id": 3, "category_id": 1},
+    ])
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_ranking_endpoints(client: AsyncClient, db_session: AsyncSession):
+    """Test ranking global y por categoría, y puesto de un establecimiento"""
+    await seed(db_session)
+
+    body = (await client.get("/establishments/ranking", params={"limit": 3})).json()
+    assert body["total"] == 4
+    assert [(item["rank"], item["establishment_id"], item["name"]) for item in body["items"]] == [
+        (1, 2, "Rest 2"), (2, 1, "Rest 1"), (3, 3, "Rest 3"),
+    ]
+
+    body = (await client.get("/establishments/ranking", params={"category_id": 1})).json()
+    assert [item["establishment_id"] for item in body["items"]] == [1, 3]
+    assert (await client.get("/establishments/ranking", params={"category_id": 2})).json()["items"] == []
+    assert (await client.get("/establishments/ranking", params={"category_id": 99})).status_code == 404
+
+    response = await client.get("/establishments/4/ranking")
+    assert response.status_code == 200
+    assert response.json()["rank"] == 4 and response.json()["sustainability_points"] == 0
+    assert (await client.get("/establishments/2/ranking", params={"category_id": 1})).status_code == 404
+    assert (await client.get("/establishments/99/ranking")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_ranking_follows_writes(client: AsyncClient, db_session: AsyncSession):
+    """Test el ranking cargado se actualiza con los cambios de puntos, categorías y borrados"""
+    await seed(db_session)
+    assert (await client.get("/establishments/3/ranking")).json()["rank"] == 3
+
+    response = await client.patch("/establishments/3", json={"sustainability_points": 90})
+    assert response.status_code == 200
+    assert (await client.get("/establishments/3/ranking")).json()["rank"] == 1
+    assert (await client.get("/establishments/3/ranking", params={"category_id": 1})).json()["rank"] == 1
+
+    await client.post("/categorias/establecimiento/2/categoria/1")
+    body = (await client.get("/establishments/ranking", params={"category_id": 1})).json()
+    assert [item["establishment_id"] for item in body["items"]] == [3, 2, 1]
+    await client.delete("/categorias/establecimiento/3/categoria/1")
+    body = (await client.get("/establishments/ranking", params={"category_id": 1})).json()
+    assert [item["establishment_id"] for item in body["items"]] == [2, 1]
+
+    await client.delete("/establishments/2")
+    body = (await client.get("/establishments/ranking")).json()
+    assert body["total"] == 3 and body["items"][0]["establishment_id"] == 3
+
+    # La recarga desde la base de datos da el mismo resultado que los cambios en memoria
+    in_memory = (await client.get("/establishments/ranking")).json()
+    await leaderboard.rebuild(db_session)
+    assert (await client.get("/establishments/ranking")).json() == in_memory
+
+
+@pytest.mark.asyncio
+async def test_ranking_survives_category_update(client: AsyncClient, db_session: AsyncSession):
+    """Test renombrar una categoría no vacía su ranking"""
+    await seed(db_session)
+    before = (await client.get("/establishments/ranking", params={"category_id": 1})).json()
+    assert before["total"] == 2
+
+    response = await client.put("/categorias/1", json={"name": "Vegana y vegetariana"})
+    assert response.status_code == 200
+    assert (await client.get("/establishments/ranking", params={"category_id": 1})).json() == before
@@ -0,0 +1,61 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import database, queries
+from app.database import Base, track_compiled_cache, COMPILED_CACHE_EXECUTIONS
+from app.utils.metrics import Registry
+
+
+def test_registry_renders_prometheus_text():
+    """Test el registro expone contadores, gauges y resúmenes en formato Prometheus"""
+    registry = Registry()
+    requests = registry.counter("requests_total", "Peticiones", ["route"])
+    registry.gauge("queue_depth", "Trabajos pendientes").set(3)
+    latency = registry.summary("latency_seconds", "Latencia", ["route"])
+
+    requests.inc(route="/platos")
+    requests.inc(2, route="/platos")
+    latency.observe(0.25, route="/platos")
+    latency.observe(0.5, route="/platos")
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/platos"} 3' in text
+    assert "queue_depth 3" in text
+    assert 'latency_seconds_count{route="/platos"} 2' in text
+    assert 'latency_seconds_sum{route="/platos"} 0.75' in text
+
+    with pytest.raises(ValueError):
+        requests.inc(path="/platos")
+    with pytest.raises(ValueError):
+        registry.gauge("requests_total", "Otro tipo")
+
+
+@pytest.mark.asyncio
+async def test_precompiled_statements_hit_compiled_cache(tmp_path):
+    """Test una sentencia precompilada solo se compila la primera vez"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}")
+    track_compiled_cache(engine, "test")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as db:
+            for dish_id in range(1, 6):
+                await db.execute(queries.DISH_BY_ID, {"dish_id": dish_id})
+
+        assert COMPILED_CACHE_EXECUTIONS.value(engine="test", result="cache_miss") == 1
+        assert COMPILED_CACHE_EXECUTIONS.value(engine="test", result="cache_hit") == 4
+    finally:
+        database._tracked_engines.pop("test")
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client: AsyncClient):
+    """Test GET /metrics devuelve las métricas en texto plano"""
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE db_compiled_cache_total counter" in response.text
+    assert "# TYPE db_compiled_cache_entries gauge" in response.text
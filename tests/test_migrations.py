@@ -0,0 +1,103 @@
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import Base, get_alembic_config, check_schema_is_current
+from app.models import *
+
+
+def upgrade_head(sync_conn, revision: str = "head"):
+    """Helper para aplicar las migraciones sobre una conexión ya abierta"""
+    config = get_alembic_config()
+    config.attributes["connection"] = sync_conn
+    command.upgrade(config, revision)
+
+
+@pytest.fixture
+async def migrated_engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'migrations.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(upgrade_head)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_migrations_match_models(migrated_engine):
+    """Test las migraciones generan exactamente el esquema declarado en los modelos"""
+    async with migrated_engine.connect() as conn:
+        diff = await conn.run_sync(
+            lambda sync_conn: compare_metadata(MigrationContext.configure(sync_conn), Base.metadata)
+        )
+    assert diff == []
+
+
+@pytest.mark.asyncio
+async def test_migrations_create_the_model_triggers(migrated_engine, tmp_path):
+    """Test los triggers de change_log de las migraciones son los mismos que crea create_all"""
+    triggers = text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' ORDER BY name")
+    async with migrated_engine.connect() as conn:
+        migrated = (await conn.execute(triggers)).all()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'create_all.db'}")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            created = (await conn.execute(triggers)).all()
+    finally:
+        await engine.dispose()
+    assert migrated and migrated == created
+
+
+@pytest.mark.asyncio
+async def test_schema_check_passes_on_migrated_database(migrated_engine):
+    """Test la comprobación de arranque acepta una base de datos en la última migración"""
+    await check_schema_is_current(migrated_engine)
+
+
+@pytest.mark.asyncio
+async def test_schema_check_fails_on_unmigrated_database(tmp_path):
+    """Test la comprobación de arranque rechaza una base de datos sin migrar"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'empty.db'}")
+    try:
+        with pytest.raises(RuntimeError, match="alembic upgrade head"):
+            await check_schema_is_current(engine)
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_baseline_database_gets_search_documents(tmp_path):
+    """Test una base de datos en 0001 (create_all anterior a la búsqueda) crea y rellena los documentos"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'baseline.db'}")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(upgrade_head, "0001")
+            assert "dish_search_documents" not in await conn.run_sync(
+                lambda sync_conn: inspect(sync_conn).get_table_names()
+            )
+            await conn.execute(text(
+                "INSERT INTO establishments (establishment_id, \"NIT\", name, address, opening_hour, closing_hour) "
+                "VALUES (1, 'NIT1', 'Casa Pepe', 'x', '08:00:00', '22:00:00')"
+            ))
+            await conn.execute(text("INSERT INTO menus (menu_id, establishment_id, title) VALUES (1, 1, 'Carta')"))
+            await conn.execute(text("INSERT INTO dishes (dish_id, menu_id, name, price) VALUES (1, 1, 'Paella', 12.0)"))
+            await conn.execute(text("INSERT INTO dishes (dish_id, menu_id, name, price) VALUES (2, 1, 'Flan', 4.0)"))
+            await conn.execute(text("INSERT INTO categories (category_id, name) VALUES (4, 'Arroces')"))
+            await conn.execute(text("INSERT INTO dish_category (dish_id, category_id) VALUES (1, 4)"))
+            await conn.execute(text("INSERT INTO allergens (allergen_id, name) VALUES (7, 'Huevo')"))
+            await conn.execute(text("INSERT INTO dish_allergen (dish_id, allergen_id) VALUES (2, 7)"))
+        async with engine.begin() as conn:
+            await conn.run_sync(upgrade_head)
+            rows = (await conn.execute(text(
+                "SELECT dish_id, search_text, category_ids, allergen_ids, opening_hour "
+                "FROM dish_search_documents ORDER BY dish_id"
+            ))).all()
+        assert rows == [
+            (1, "paella casa pepe arroces", ",4,", ",", "08:00:00.000000"),
+            (2, "flan casa pepe", ",", ",7,", "08:00:00.000000"),
+        ]
+    finally:
+        await engine.dispose()
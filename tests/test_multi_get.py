@@ -0,0 +1,77 @@
+import pytest
+from datetime import time
+from httpx import AsyncClient
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.controllers.dishes import get_dishes_by_ids
+from app.models import Dish, Establishment, Menu
+
+
+async def seed(db: AsyncSession):
+    """Helper: 3 establecimientos y 5 platos"""
+    await db.execute(insert(Establishment), [
+        {"establishment_id": i, "NIT": f"NIT{i}", "name": f"Rest {i}", "address": "x",
+         "opening_hour": time(8), "closing_hour": time(22)}
+        for i in (1, 2, 3)
+    ])
+    await db.execute(insert(Menu), [{"menu_id": 1, "establishment_id": 1, "title": "Carta"}])
+    await db.execute(insert(Dish), [
+        {"dish_id": i, "menu_id": 1, "name": f"Plato {i}", "price": 10.0 + i} for i in range(1, 6)
+    ])
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_dishes_by_ids_keeps_order_and_reports_missing(client: AsyncClient, db_session: AsyncSession):
+    """Test GET /platos?ids= devuelve los platos en el orden pedido y los IDs que no existen"""
+    await seed(db_session)
+
+    response = await client.get("/platos/", params={"ids": "4,99,2,4"})
+    assert response.status_code == 200
+    body = response.json()
+    assert [dish["dish_id"] for dish in body["items"]] == [4, 2]
+    assert body["items"][0]["name"] == "Plato 4"
+    assert body["missing"] == [99]
+
+    # También con el parámetro repetido
+    body = (await client.get("/platos/?ids=1&ids=3,5")).json()
+    assert [dish["dish_id"] for dish in body["items"]] == [1, 3, 5]
+
+    assert (await client.get("/platos/", params={"ids": "1,x"})).status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_dishes_by_ids_single_query(db_session: AsyncSession):
+    """Test los 5 platos se resuelven con una sola consulta"""
+    await seed(db_session)
+    statements = []
+    sync_engine = db_session.bind.sync_engine
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", count)
+    try:
+        result = await get_dishes_by_ids(db_session, [5, 4, 3, 2, 1])
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", count)
+    assert [dish["dish_id"] for dish in result["items"]] == [5, 4, 3, 2, 1]
+    assert len(statements) == 1 and " IN " in statements[0]
+
+
+@pytest.mark.asyncio
+async def test_establishments_batch(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    """Test POST /establishments/batch con el límite de IDs por petición"""
+    await seed(db_session)
+
+    response = await client.post("/establishments/batch", json={"ids": [3, 1, 7]})
+    assert response.status_code == 200
+    body = response.json()
+    assert [est["establishment_id"] for est in body["items"]] == [3, 1]
+    assert body["missing"] == [7]
+
+    assert (await client.post("/establishments/batch", json={"ids": []})).status_code == 422
+    monkeypatch.setattr(settings, "MULTI_GET_MAX_IDS", 2)
+    assert (await client.post("/establishments/batch", json={"ids": [1, 2, 3]})).status_code == 400
@@ -0,0 +1,53 @@
+import pytest
+from datetime import datetime, time
+from httpx import AsyncClient
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import queries
+from app.controllers import establishment as establishment_controller
+from app.models import Establishment, Reservation, Review, User
+from app.models.reviews import RatingEnum
+from app.models.users import UserRole, UserStatus
+from app.schemas.establishment import EstablishmentOut
+from app.schemas.reservations import ReservationsOut
+
+
+def test_projection_selects_schema_columns():
+    """Test la proyección solo lleva las columnas del esquema que existen en el modelo"""
+    assert set(queries.RESERVATIONS_ROWS.selected_columns.keys()) == set(ReservationsOut.model_fields) - {"archived"}
+    assert set(queries.REVIEWS_BY_ESTABLISHMENT_ROWS.selected_columns.keys()) == {
+        "user_id", "establishment_id", "rating", "comment", "img", "created_at",
+    }
+
+
+@pytest.mark.asyncio
+async def test_list_endpoints_return_same_payload(client: AsyncClient, db_session: AsyncSession):
+    """Test los listados con proyección responden lo mismo que con entidades, sin cargarlas en la sesión"""
+    await db_session.execute(insert(Establishment), [
+        {"establishment_id": i, "NIT": f"NIT{i}", "name": f"Rest {i}", "address": "x",
+         "opening_hour": time(8), "closing_hour": time(22), "sustainability_points": i}
+        for i in (1, 2)
+    ])
+    await db_session.execute(insert(User), [{
+        "user_id": 1, "role": UserRole.user, "name": "U", "email": "u@test.com", "password": "x",
+        "status": UserStatus.active,
+    }])
+    await db_session.execute(insert(Review), [{"user_id": 1, "establishment_id": 2, "rating": RatingEnum.FOUR}])
+    await db_session.execute(insert(Reservation), [
+        {"user_id": 1, "establishment_id": 1, "date": datetime(2026, 11, 1, 20), "people_count": 2},
+    ])
+    await db_session.commit()
+
+    rows = await establishment_controller.get_establishments(db_session)
+    assert all(isinstance(row, dict) for row in rows)
+    assert not db_session.identity_map
+
+    entities = (await db_session.execute(select(Establishment))).scalars().all()
+    expected = [EstablishmentOut.model_validate(entity).model_dump(mode="json") for entity in entities]
+    assert (await client.get("/establishments/")).json() == expected
+
+    review = (await client.get("/resenas/establecimiento/2")).json()
+    assert len(review) == 1 and review[0]["rating"] == "4"
+    reservation = (await client.get("/reservas/list")).json()
+    assert reservation[0]["status"] == "pending" and reservation[0]["archived"] is False
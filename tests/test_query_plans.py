@@ -0,0 +1,124 @@
+import pytest
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import *
+from app.models.users import UserRole, UserStatus
+from app.models.reviews import RatingEnum
+from app.controllers import (
+    accessibility_features as accessibility_controller,
+    allergens as allergens_controller,
+    categories as categories_controller,
+    menu as menu_controller,
+    reservations as reservations_controller,
+    reviews as reviews_controller,
+)
+from app.schemas.accessibility_features import AccessibilityFeatureCreate
+
+
+async def seed(db: AsyncSession):
+    """Helper para sembrar un conjunto de datos pequeño pero con varias filas por tabla"""
+    for e in range(1, 11):
+        db.add(Establishment(
+            establishment_id=e, NIT=f"NIT{e}", name=f"Rest {e}", address="x",
+            opening_hour=time(8), closing_hour=time(22)
+        ))
+        db.add(AccessibilityFeature(establishment_id=e, name="Rampa"))
+        for m in range(2):
+            menu_id = e * 10 + m
+            db.add(Menu(menu_id=menu_id, establishment_id=e, title=f"Menu {menu_id}"))
+            for d in range(5):
+                db.add(Dish(dish_id=menu_id * 10 + d, menu_id=menu_id, name=f"Plato {d}", price=10 + d))
+    for c in range(1, 6):
+        db.add(Category(category_id=c, name=f"Cat {c}"))
+        db.add(Allergens(allergen_id=c, name=f"Alergeno {c}"))
+    for u in range(1, 21):
+        db.add(User(
+            user_id=u, role=UserRole.user, name=f"User {u}", email=f"u{u}@test.com",
+            password="x", status=UserStatus.active
+        ))
+    await db.flush()
+    for e in range(1, 11):
+        db.add(EstablishmentCategory(establishment_id=e, category_id=e % 5 + 1))
+        for m in range(2):
+            for d in range(5):
+                dish_id = (e * 10 + m) * 10 + d
+                db.add(DishCategory(dish_id=dish_id, category_id=d + 1))
+                db.add(DishAllergen(dish_id=dish_id, allergen_id=d + 1))
+    for u in range(1, 21):
+        db.add(UserAllergen(user_id=u, allergen_id=u % 5 + 1))
+        for r in range(3):
+            db.add(Reservation(
+                user_id=u, establishment_id=(u + r) % 10 + 1,
+                date=datetime(2025, 1, 1) + timedelta(days=u + r), people_count=2
+            ))
+        db.add(Review(user_id=u, establishment_id=u % 10 + 1, rating=RatingEnum.FIVE))
+    await db.commit()
+
+
+@contextmanager
+def capture_statements(db: AsyncSession):
+    """Capturar las sentencias SELECT (con sus parámetros) que ejecuta un controlador"""
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    sync_engine = db.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", listener)
+    try:
+        yield statements
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", listener)
+
+
+async def query_plans(db: AsyncSession, statements):
+    """EXPLAIN QUERY PLAN de cada sentencia capturada"""
+    conn = await db.connection()
+    plans = []
+    for statement, parameters in statements:
+        result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        plans.append((statement, [row[-1] for row in result.all()]))
+    return plans
+
+
+CONTROLLER_CALLS = [
+    ("get_menus_by_establishment", lambda db: menu_controller.get_menus_by_establishment(db, 3)),
+    ("get_dishes_by_menu", lambda db: menu_controller.get_dishes_by_menu(db, 31)),
+    ("get_dishes_by_menu_and_category", lambda db: menu_controller.get_dishes_by_menu_and_category(db, 31, 2)),
+    ("get_dish_from_menu", lambda db: menu_controller.get_dish_from_menu(db, 31, 311)),
+    ("get_establishments_by_category", lambda db: categories_controller.get_establishments_by_category(db, 2)),
+    ("get_dishes_by_category", lambda db: categories_controller.get_dishes_by_category(db, 2)),
+    ("get_allergens_by_dish", lambda db: allergens_controller.get_allergens_by_dish(db, 311)),
+    ("get_allergens_by_user", lambda db: allergens_controller.get_allergens_by_user(db, 4)),
+    ("get_reservations_by_user", lambda db: reservations_controller.get_reservations_by_user(db, 4)),
+    ("get_reservations_by_establishment", lambda db: reservations_controller.get_reservations_by_establishment(db, 4)),
+    ("get_reviews_by_establishment", lambda db: reviews_controller.get_reviews_by_establishment(db, 4)),
+    ("get_reviews_by_user", lambda db: reviews_controller.get_reviews_by_user(db, 4)),
+    (
+        "create_accessibility_feature",
+        lambda db: accessibility_controller.create_accessibility_feature(
+            db, AccessibilityFeatureCreate(establishment_id=4, name="Baño adaptado")
+        ),
+    ),
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name,call", CONTROLLER_CALLS, ids=[name for name, _ in CONTROLLER_CALLS])
+async def test_controller_queries_use_indexes(db_session: AsyncSession, name, call):
+    """Test cada consulta del controlador se resuelve con búsquedas por índice, sin recorrer tablas"""
+    await seed(db_session)
+    await db_session.execute(text("ANALYZE"))
+
+    with capture_statements(db_session) as statements:
+        await call(db_session)
+    assert statements, f"{name} no ejecutó ninguna consulta"
+
+    for statement, plan in await query_plans(db_session, statements):
+        scans = [step for step in plan if step.startswith("SCAN")]
+        assert not scans, f"{name} recorre una tabla completa: {scans}\n{statement}"
+        assert any(step.startswith("SEARCH") for step in plan), f"{name}: {plan}\n{statement}"
@@ -0,0 +1,143 @@
+import pytest
+from datetime import time
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app import database
+from app.database import Base, SessionRouter, READ_YOUR_WRITES_COOKIE, READ_YOUR_WRITES_HEADER
+from app.main import app
+from app.models import Establishment
+
+
+async def create_database(path, name):
+    """Helper: base de datos SQLite en fichero con un establecimiento que la identifica"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(bind=engine)() as session:
+        session.add(Establishment(
+            establishment_id=1, NIT=f"NIT-{name}", name=name, address="x",
+            opening_hour=time(8), closing_hour=time(22)
+        ))
+        await session.commit()
+    return engine
+
+
+@pytest.fixture
+async def databases(tmp_path, monkeypatch):
+    """Primario y réplica como dos SQLite distintas, enrutadas por un SessionRouter propio"""
+    primary = await create_database(tmp_path / "primary.db", "Primario")
+    replica = await create_database(tmp_path / "replica.db", "Replica")
+    router = SessionRouter(async_sessionmaker(bind=primary, expire_on_commit=False), [replica], retry_seconds=60)
+    monkeypatch.setattr(database, "session_router", router)
+    yield router
+    await primary.dispose()
+    await replica.dispose()
+
+
+@pytest.fixture
+async def routed_client(databases):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+def names(response):
+    return [item["name"] for item in response.json()]
+
+
+NEW_ESTABLISHMENT = {
+    "NIT": "999", "name": "Nuevo", "address": "y",
+    "opening_hour": "08:00:00", "closing_hour": "22:00:00",
+}
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_and_writes_to_primary(routed_client: AsyncClient):
+    """Test los GET leen de la réplica y las escrituras van al primario"""
+    response = await routed_client.get("/establishments/")
+    assert names(response) == ["Replica"]
+
+    response = await routed_client.post("/establishments/", json=NEW_ESTABLISHMENT)
+    assert response.status_code == 200
+
+    # Sin marca de read-your-writes la lectura sigue en la réplica (que no tiene el nuevo)
+    routed_client.cookies.clear()
+    response = await routed_client.get("/establishments/")
+    assert names(response) == ["Replica"]
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes_after_write(routed_client: AsyncClient):
+    """Test tras una escritura el cliente lee del primario (cookie y cabecera)"""
+    response = await routed_client.post("/establishments/", json=NEW_ESTABLISHMENT)
+    assert READ_YOUR_WRITES_COOKIE in response.cookies
+    marker = response.headers[READ_YOUR_WRITES_HEADER]
+
+    # El cliente reenvía la cookie
+    response = await routed_client.get("/establishments/")
+    assert names(response) == ["Primario", "Nuevo"]
+
+    # Clientes sin cookies: reenvían la cabecera
+    routed_client.cookies.clear()
+    response = await routed_client.get("/establishments/", headers={READ_YOUR_WRITES_HEADER: marker})
+    assert names(response) == ["Primario", "Nuevo"]
+
+    # Una marca caducada vuelve a la réplica
+    response = await routed_client.get("/establishments/", headers={READ_YOUR_WRITES_HEADER: "1.0"})
+    assert names(response) == ["Replica"]
+
+
+@pytest.mark.asyncio
+async def test_failed_write_does_not_pin_to_primary(routed_client: AsyncClient):
+    """Test una escritura rechazada no marca al cliente"""
+    response = await routed_client.patch("/establishments/999", json={"name": "x"})
+    assert response.status_code == 404
+    assert READ_YOUR_WRITES_COOKIE not in response.cookies
+    assert READ_YOUR_WRITES_HEADER not in response.headers
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/batch", "/batch/"])
+async def test_batch_read_does_not_pin_to_primary(routed_client: AsyncClient, path: str):
+    """Test POST /batch (con o sin barra final, que redirige) no marca al cliente como escritor"""
+    response = await routed_client.post(
+        path, json={"requests": [{"path": "/establishments/"}]}, follow_redirects=True
+    )
+    assert response.status_code == 200
+    assert response.json()["results"][0]["body"][0]["name"] == "Replica"
+    assert READ_YOUR_WRITES_COOKIE not in routed_client.cookies
+    assert all(READ_YOUR_WRITES_HEADER.lower() not in r.headers for r in [*response.history, response])
+
+
+@pytest.mark.asyncio
+async def test_failover_to_primary_when_replica_is_down(tmp_path, monkeypatch):
+    """Test si la réplica no responde se lee del primario y se aparta la réplica"""
+    primary = await create_database(tmp_path / "primary.db", "Primario")
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    router = SessionRouter(async_sessionmaker(bind=primary, expire_on_commit=False), [broken], retry_seconds=60)
+    monkeypatch.setattr(database, "session_router", router)
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.get("/establishments/")
+        assert names(response) == ["Primario"]
+        assert not router.replicas[0].available
+
+        # La comprobación de salud la mantiene apartada mientras siga caída
+        router.replicas[0].down_until = 0.0
+        await router.check_health()
+        assert not router.replicas[0].available
+    finally:
+        await primary.dispose()
+        await broken.dispose()
+
+
+@pytest.mark.asyncio
+async def test_health_check_restores_replica(databases: SessionRouter):
+    """Test una réplica apartada vuelve al reparto cuando responde de nuevo"""
+    replica = databases.replicas[0]
+    databases.mark_down(replica, "prueba")
+    assert databases.pick_replica() is None
+
+    await databases.check_health()
+    assert replica.available
+    assert databases.pick_replica() is replica
@@ -0,0 +1,157 @@
+import numpy as np
+import pytest
+from datetime import datetime, time
+from httpx import AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Allergens, Category, Dish, DishAllergen, DishCategory, Establishment, Menu, Reservation, Review, User, UserAllergen
+from app.models.reservations import ReservationStatus
+from app.models.reviews import RatingEnum
+from app.models.users import UserRole, UserStatus
+from app.recommendations import Catalog, Interactions, build_index, rebuild, reset
+from app.recommendations.service import SERVED
+
+
+@pytest.fixture(autouse=True)
+def reset_recommendations():
+    reset()
+    yield
+    reset()
+
+
+def arrays(*values, dtype=np.int64):
+    return np.array(values, dtype=dtype)
+
+
+def empty_pairs():
+    return arrays(), arrays()
+
+
+def test_cooccurrence_and_allergens():
+    """Test se recomiendan platos de los establecimientos que comparten clientes, sin alérgenos"""
+    # Usuario 1 solo conoce el 10; los usuarios 2 y 3 van al 10 y al 20; el 4 solo al 30
+    interactions = Interactions(
+        user_ids=arrays(1, 2, 2, 3, 3, 4),
+        establishment_ids=arrays(10, 10, 20, 10, 20, 30),
+        weights=np.ones(6, dtype=np.float32),
+    )
+    catalog = Catalog(
+        dish_ids=arrays(100, 200, 201, 300),
+        dish_establishment_ids=arrays(10, 20, 20, 30),
+        dish_categories=empty_pairs(),
+        dish_allergens=(arrays(201), arrays(7)),
+        user_allergens=(arrays(1), arrays(7)),
+    )
+
+    index = build_index(interactions, catalog, top_n=10)
+
+    source, ranked, scores = index.ranked(1)
+    assert source == "personal"
+    # 200 por co-ocurrencia, 100 por su propia visita; 201 tiene su alérgeno; 300 no tiene relación
+    assert sorted(ranked.tolist()) == [100, 200]
+    assert list(scores) == sorted(scores, reverse=True)
+    assert index.ranked(4)[1].tolist() == [300]
+    # Sin interacciones: platos de los establecimientos con más interacciones
+    assert index.ranked(99)[0] == "popular"
+    assert index.ranked(99)[1].tolist()[:2] == [100, 200]
+
+
+def test_category_affinity_breaks_ties():
+    """Test entre dos establecimientos igual de relacionados gana el de las categorías del usuario"""
+    interactions = Interactions(
+        user_ids=arrays(1, 2, 2, 3, 3),
+        establishment_ids=arrays(10, 10, 20, 10, 30),
+        weights=np.ones(5, dtype=np.float32),
+    )
+    catalog = Catalog(
+        dish_ids=arrays(100, 200, 300),
+        dish_establishment_ids=arrays(10, 20, 30),
+        # El establecimiento 10 (del usuario 1) es vegetariano (categoría 5), igual que el plato 300
+        dish_categories=(arrays(100, 300), arrays(5, 5)),
+        dish_allergens=empty_pairs(),
+        user_allergens=empty_pairs(),
+    )
+
+    ranked = build_index(interactions, catalog, top_n=10, self_weight=0.0).ranked(1)[1].tolist()
+
+    assert ranked[:2] == [300, 200]
+
+
+async def seed(db: AsyncSession):
+    """Helper: 4 establecimientos con un menú y dos platos cada uno"""
+    await db.execute(insert(User), [
+        {"user_id": i, "role": UserRole.user, "name": f"U{i}", "email": f"u{i}@test.com", "password": "x",
+         "status": UserStatus.active}
+        for i in range(1, 6)
+    ])
+    await db.execute(insert(Establishment), [
+        {"establishment_id": i, "NIT": f"NIT{i}", "name": f"Rest {i}", "address": "x",
+         "opening_hour": time(8), "closing_hour": time(22)}
+        for i in range(1, 5)
+    ])
+    await db.execute(insert(Menu), [{"menu_id": i, "establishment_id": i, "title": "Carta"} for i in range(1, 5)])
+    await db.execute(insert(Dish), [
+        {"dish_id": i * 10 + j, "menu_id": i, "name": f"Plato {i}{j}", "price": 10.0 + j}
+        for i in range(1, 5) for j in (1, 2)
+    ])
+    await db.execute(insert(Category), [{"category_id": 1, "name": "Sopas"}])
+    await db.execute(insert(DishCategory), [{"dish_id": 11, "category_id": 1}, {"dish_id": 21, "category_id": 1}])
+    await db.execute(insert(Allergens), [{"allergen_id": 1, "name": "Gluten"}])
+    await db.execute(insert(DishAllergen), [{"dish_id": 22, "allergen_id": 1}])
+    await db.execute(insert(Review), [
+        {"user_id": 1, "establishment_id": 1, "rating": RatingEnum.FIVE},
+        {"user_id": 2, "establishment_id": 1, "rating": RatingEnum.FOUR},
+        {"user_id": 2, "establishment_id": 2, "rating": RatingEnum.FIVE},
+        # Reseña baja: no cuenta
+        {"user_id": 3, "establishment_id": 1, "rating": RatingEnum.TWO},
+    ])
+    await db.execute(insert(Reservation), [
+        {"user_id": 3, "establishment_id": 3, "date": datetime(2026, 11, 1, 20), "people_count": 2,
+         "status": ReservationStatus.confirmed},
+        {"user_id": 3, "establishment_id": 1, "date": datetime(2026, 11, 2, 20), "people_count": 2,
+         "status": ReservationStatus.cancelled},
+    ])
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_rebuild_reads_reviews_and_reservations(db_session: AsyncSession):
+    """Test solo cuentan las reseñas de 4-5 estrellas y las reservas no canceladas"""
+    await seed(db_session)
+
+    index = await rebuild(db_session)
+
+    assert index.interactions == 4
+    assert set(index.by_user) == {1, 2, 3}
+    assert set(index.ranked(3)[1].tolist()) == {31, 32}
+
+
+@pytest.mark.asyncio
+async def test_recommendations_endpoint(client: AsyncClient, db_session: AsyncSession):
+    """Test el endpoint sirve el índice precalculado y aplica los alérgenos actuales del usuario"""
+    await seed(db_session)
+
+    response = await client.get("/platos/recomendados/1", params={"limit": 3})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["source"] == "personal"
+    ids = [item["dish_id"] for item in body["items"]]
+    assert len(ids) == 3 and set(ids) <= {11, 12, 21, 22}
+    assert body["items"][0]["establishment_id"] in (1, 2)
+    assert all(item["score"] > 0 for item in body["items"])
+
+    # Alergia añadida después de calcular el índice: se respeta igualmente
+    db_session.add(UserAllergen(user_id=1, allergen_id=1))
+    await db_session.commit()
+    ids = [item["dish_id"] for item in (await client.get("/platos/recomendados/1")).json()["items"]]
+    assert 22 not in ids and set(ids) == {11, 12, 21}
+
+    # Sin interacciones: populares, sin puntuación
+    body = (await client.get("/platos/recomendados/5")).json()
+    assert body["source"] == "popular"
+    assert body["items"] and all(item["score"] is None for item in body["items"])
+    assert SERVED.value(source="personal") == 2
+    assert SERVED.value(source="popular") == 1
+
+    assert (await client.get("/platos/recomendados/999")).status_code == 404
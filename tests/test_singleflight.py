@@ -0,0 +1,210 @@
+import asyncio
+import pytest
+from datetime import time
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import Base
+from app.models import Establishment, Menu
+from app.controllers.establishment import get_establishment_by_id_shared
+from app.controllers.menu import get_menus_by_establishment_shared
+from app.utils.singleflight import SingleFlight, SINGLEFLIGHT_CALLS
+
+
+async def seed(db: AsyncSession):
+    """Helper para sembrar un establecimiento con dos menús"""
+    db.add(Establishment(
+        establishment_id=1, NIT="NIT1", name="Rest", address="x", opening_hour=time(8), closing_hour=time(22)
+    ))
+    db.add(Menu(menu_id=1, establishment_id=1, title="Carta"))
+    db.add(Menu(menu_id=2, establishment_id=1, title="Bebidas"))
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    """Test las llamadas concurrentes con la misma clave ejecutan la función una sola vez"""
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"id": 1}
+
+    results = await asyncio.gather(*[flight.do(1, load) for _ in range(10)])
+    assert calls == 1
+    assert results == [{"id": 1}] * 10
+    assert SINGLEFLIGHT_CALLS.value(name="test", result="leader") == 1
+    assert SINGLEFLIGHT_CALLS.value(name="test", result="coalesced") == 9
+
+    # Terminada la llamada, sin gracia se vuelve a consultar
+    await flight.do(1, load)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_cached():
+    """Test un error llega a todos los que esperaban y no se guarda"""
+    flight = SingleFlight("test", grace_seconds=60)
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise HTTPException(status_code=404, detail="Establishment not found")
+
+    results = await asyncio.gather(*[flight.do(1, load) for _ in range(3)], return_exceptions=True)
+    assert calls == 1
+    assert all(isinstance(result, HTTPException) and result.status_code == 404 for result in results)
+
+    with pytest.raises(HTTPException):
+        await flight.do(1, load)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_hands_over():
+    """Test si se cancela la petición que consulta, una de las que esperaban repite la consulta"""
+    flight = SingleFlight("test")
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(10)
+
+    async def fast():
+        return "ok"
+
+    leader = asyncio.create_task(flight.do(1, slow))
+    await started.wait()
+    follower = asyncio.create_task(flight.do(1, fast))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "ok"
+    assert leader.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_grace_cache_and_invalidation():
+    """Test el resultado se reutiliza durante la gracia y se descarta al invalidar"""
+    flight = SingleFlight("test", grace_seconds=60)
+    version = 1
+
+    async def load():
+        return version
+
+    assert await flight.do(1, load) == 1
+    version = 2
+    assert await flight.do(1, load) == 1
+    assert SINGLEFLIGHT_CALLS.value(name="test", result="grace") == 1
+
+    flight.clear()
+    assert await flight.do(1, load) == 2
+
+
+@pytest.mark.asyncio
+async def test_write_during_flight_is_not_cached():
+    """Test una escritura durante la consulta impide guardar el resultado ya obsoleto"""
+    flight = SingleFlight("test", grace_seconds=60)
+    version = 1
+
+    async def load():
+        value = version
+        await asyncio.sleep(0.01)
+        return value
+
+    task = asyncio.create_task(flight.do(1, load))
+    await asyncio.sleep(0)
+    version = 2
+    flight.clear()
+    assert await task == 1
+    assert await flight.do(1, load) == 2
+
+
+
+@pytest.mark.asyncio
+async def test_reads_after_invalidation_do_not_join_older_flight():
+    """Test tras invalidar, una lectura nueva no se une a la consulta empezada antes de la escritura"""
+    flight = SingleFlight("test")
+    version = 1
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow():
+        value = version
+        started.set()
+        await release.wait()
+        return value
+
+    async def load():
+        return version
+
+    before = asyncio.create_task(flight.do(1, slow))
+    await started.wait()
+    version = 2
+    flight.clear()
+    assert await flight.do(1, load) == 2
+    release.set()
+    assert await before == 1
+    assert flight._calls == {}
+
+
+@pytest.mark.asyncio
+async def test_primary_and_replica_reads_are_not_coalesced(db_session: AsyncSession, tmp_path):
+    """Test una lectura fijada al primario no se une a la misma consulta contra una réplica"""
+    await seed(db_session)
+    replica_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    async with replica_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    replica = async_sessionmaker(bind=replica_engine, expire_on_commit=False)
+
+    async with replica() as replica_db:
+        results = await asyncio.gather(
+            get_menus_by_establishment_shared(replica_db, 1),
+            get_menus_by_establishment_shared(db_session, 1),
+        )
+    # La réplica aún no tiene los menús
+    assert results[0] == []
+    assert [menu.title for menu in results[1]] == ["Carta", "Bebidas"]
+    await replica_engine.dispose()
+
+@pytest.mark.asyncio
+async def test_concurrent_establishment_requests_are_coalesced(client: AsyncClient, db_session: AsyncSession):
+    """Test las peticiones simultáneas a un establecimiento y sus menús comparten la consulta"""
+    await seed(db_session)
+
+    responses = await asyncio.gather(
+        *[client.get("/establishments/1") for _ in range(10)],
+        *[client.get("/menu/establecimiento/1") for _ in range(10)],
+    )
+
+    assert {response.status_code for response in responses} == {200}
+    assert {response.json()["name"] for response in responses[:10]} == {"Rest"}
+    assert all(len(response.json()) == 2 for response in responses[10:])
+    for name in ("establishment.get_establishment_by_id", "menu.get_menus_by_establishment"):
+        leaders = SINGLEFLIGHT_CALLS.value(name=name, result="leader")
+        coalesced = SINGLEFLIGHT_CALLS.value(name=name, result="coalesced")
+        assert leaders + coalesced == 10
+        assert coalesced > 0
+
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_grace_cache(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    """Test con gracia activada, las escrituras del worker se ven en la siguiente lectura"""
+    await seed(db_session)
+    monkeypatch.setattr(get_establishment_by_id_shared.flight, "grace_seconds", 60)
+    monkeypatch.setattr(get_menus_by_establishment_shared.flight, "grace_seconds", 60)
+
+    assert (await client.get("/establishments/1")).json()["name"] == "Rest"
+    assert len((await client.get("/menu/establecimiento/1")).json()) == 2
+
+    await client.patch("/establishments/1", json={"name": "Nuevo"})
+    created = await client.post("/menu/1", json={"title": "Postres", "establishment_id": 1})
+    assert created.status_code == 201
+
+    assert (await client.get("/establishments/1")).json()["name"] == "Nuevo"
+    assert len((await client.get("/menu/establecimiento/1")).json()) == 3
@@ -0,0 +1,157 @@
+import pytest
+from datetime import time
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app import database
+from app.config import settings
+from app.controllers import deletion
+from app.controllers.sync import COMPACTED, compact_change_log
+from app.database import Base, SessionRouter, enable_sqlite_foreign_keys, get_db, get_read_db
+from app.main import app
+from app.models import Allergens, Category, ChangeLog, Dish, DishAllergen, Establishment, Menu
+
+
+@pytest.fixture
+async def sessions(tmp_path, monkeypatch):
+    """SQLite en fichero con las claves foráneas activas: los borrados en cascada también se registran"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'sync.db'}")
+    enable_sqlite_foreign_keys(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    monkeypatch.setattr(database, "session_router", SessionRouter(factory))
+    monkeypatch.setattr(settings, "DELETE_BATCH_PAUSE_SECONDS", 0.0)
+    yield factory
+    await deletion.wait_for_deletes()
+    await engine.dispose()
+
+
+@pytest.fixture
+async def sync_client(sessions):
+    async def override_get_db():
+        async with sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.clear()
+
+
+async def seed(sessions):
+    """Helper: un establecimiento con un menú de tres platos, una categoría y un alérgeno"""
+    async with sessions() as db:
+        db.add(Allergens(allergen_id=1, name="Gluten"))
+        db.add(Category(category_id=1, name="Pasta"))
+        db.add(Establishment(
+            establishment_id=1, NIT="NIT1", name="Rest", address="x", opening_hour=time(8), closing_hour=time(22)
+        ))
+        await db.flush()
+        db.add(Menu(menu_id=1, establishment_id=1, title="Carta"))
+        await db.flush()
+        db.add_all([Dish(dish_id=i, menu_id=1, name=f"Plato {i}", price=10) for i in (1, 2, 3)])
+        await db.flush()
+        db.add(DishAllergen(dish_id=1, allergen_id=1))
+        await db.commit()
+
+
+async def sync(client: AsyncClient, since: str = "0", limit: int = 500) -> dict:
+    response = await client.get("/sync/", params={"since": since, "limit": limit})
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_sync_returns_only_changes_since_token(sync_client: AsyncClient, sessions):
+    """Test la primera sincronización trae todo y las siguientes solo lo creado, modificado o borrado"""
+    await seed(sessions)
+
+    body = await sync(sync_client)
+    assert [dish["dish_id"] for dish in body["changes"]["dishes"]] == [1, 2, 3]
+    assert body["changes"]["dishes"][0]["allergen_ids"] == [1]
+    assert body["changes"]["establishments"][0]["name"] == "Rest"
+    assert not body["has_more"]
+    since = body["next_since"]
+    assert (await sync(sync_client, since))["changes"]["dishes"] == []
+
+    # Modificación: solo ese plato
+    await sync_client.put("/platos/2", json={"price": 12.5})
+    body = await sync(sync_client, since)
+    assert [(dish["dish_id"], dish["price"]) for dish in body["changes"]["dishes"]] == [(2, 12.5)]
+    assert body["changes"]["establishments"] == [] and body["deleted"]["dishes"] == []
+    since = body["next_since"]
+
+    # Asociación: el plato vuelve con su lista de categorías
+    await sync_client.post("/categorias/plato/3/categoria/1")
+    body = await sync(sync_client, since)
+    assert [(dish["dish_id"], dish["category_ids"]) for dish in body["changes"]["dishes"]] == [(3, [1])]
+    since = body["next_since"]
+
+    # Borrado en cascada del establecimiento: lápidas de todo lo que colgaba de él
+    assert (await sync_client.delete("/establishments/1")).status_code == 200
+    body = await sync(sync_client, since)
+    assert body["deleted"]["establishments"] == [1]
+    assert body["deleted"]["menus"] == [1]
+    assert body["deleted"]["dishes"] == [1, 2, 3]
+    assert body["changes"]["dishes"] == []
+
+
+@pytest.mark.asyncio
+async def test_sync_pages_and_compaction(sync_client: AsyncClient, sessions):
+    """Test las páginas acotadas cubren todos los cambios y la compactación no cambia el resultado"""
+    await seed(sessions)
+    for price in (11, 12, 13):
+        await sync_client.put("/platos/1", json={"price": price})
+
+    dishes, since, pages = {}, "0", 0
+    while True:
+        body = await sync(sync_client, since, limit=2)
+        dishes.update({dish["dish_id"]: dish for dish in body["changes"]["dishes"]})
+        since, pages = body["next_since"], pages + 1
+        if not body["has_more"]:
+            break
+    assert pages > 1
+    assert sorted(dishes) == [1, 2, 3] and dishes[1]["price"] == 13
+
+    async with sessions() as db:
+        before = await db.scalar(select(func.count()).select_from(ChangeLog))
+        compacted = await compact_change_log(db, batch_size=2)
+        after = await db.scalar(select(func.count()).select_from(ChangeLog))
+    assert compacted == before - after > 0
+    assert COMPACTED.value() == compacted
+    # Una entrada por entidad: establecimiento, menú, 3 platos, categoría y alérgeno
+    assert after == 7
+
+    body = await sync(sync_client)
+    assert {dish["dish_id"]: dish["price"] for dish in body["changes"]["dishes"]} == {1: 13, 2: 10, 3: 10}
+    assert body["next_since"] == since
+
+
+@pytest.mark.asyncio
+async def test_sync_follows_transaction_order(sync_client: AsyncClient, sessions):
+    """Test con txid (PostgreSQL) se recorre en orden (txid, change_id): un change_id menor de una
+    transacción posterior no se salta; un since numérico sigue valiendo y uno mal formado es 422"""
+    await seed(sessions)
+    body = await sync(sync_client)
+    since = body["next_since"]
+    last_change_id = int(since.split(":")[1])
+
+    async with sessions() as db:
+        # change_id mayor con un xid menor: llegan en orden de transacción, no de change_id
+        db.add_all([
+            ChangeLog(change_id=last_change_id + 2, entity="dishes", entity_id=1, txid=100),
+            ChangeLog(change_id=last_change_id + 1, entity="dishes", entity_id=2, txid=101),
+        ])
+        await db.commit()
+
+    first = await sync(sync_client, since, limit=1)
+    assert [dish["dish_id"] for dish in first["changes"]["dishes"]] == [1]
+    assert first["next_since"] == f"100:{last_change_id + 2}"
+    second = await sync(sync_client, first["next_since"], limit=1)
+    assert [dish["dish_id"] for dish in second["changes"]["dishes"]] == [2]
+
+    assert (await sync(sync_client, str(last_change_id)))["next_since"] == f"101:{last_change_id + 1}"
+    assert (await sync_client.get("/sync/", params={"since": "x"})).status_code == 422
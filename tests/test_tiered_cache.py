@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.controllers.dishes import DISH_CACHE
+from app.database import Base, SessionRouter
+from app.models import Dish
+from app.utils import events, tiered_cache
+from app.utils.tiered_cache import INVALIDATIONS, L2_REQUESTS
+from tests.test_existence import capture_sql, seed
+
+
+@pytest.fixture
+def l1_enabled(db_session: AsyncSession, monkeypatch):
+    """Helper: L1 de los platos activa (por defecto está desactivada) y cargando del primario de los tests"""
+    monkeypatch.setattr(DISH_CACHE.l1, "ttl", 60.0)
+    primary = async_sessionmaker(bind=db_session.bind, expire_on_commit=False)
+    monkeypatch.setattr(database, "session_router", SessionRouter(primary))
+
+
+@pytest.mark.asyncio
+async def test_l1_then_l2_then_database(client: AsyncClient, db_session: AsyncSession, l1_enabled, monkeypatch):
+    """Test L1 sirve sin consultar, L2 repone la L1 de otro worker y se informa la tasa de aciertos"""
+    await seed(db_session)
+
+    with capture_sql(db_session) as statements:
+        assert (await client.get("/platos/1")).json()["name"] == "Plato 1"
+        assert (await client.get("/platos/1")).json()["name"] == "Plato 1"
+        # Otro worker (L1 vacía) lo encuentra en L2
+        DISH_CACHE.l1.invalidate()
+        assert (await client.get("/platos/1")).json()["name"] == "Plato 1"
+    assert len(statements) == 1
+    assert L2_REQUESTS.value(cache="dishes", result="miss") == 1
+    assert L2_REQUESTS.value(cache="dishes", result="hit") == 1
+
+    text = (await client.get("/metrics")).text
+    assert 'cache_hit_ratio{cache="dishes",tier="l1"} 0.3333333333333333' in text
+    assert 'cache_hit_ratio{cache="dishes",tier="l2"} 0.5' in text
+
+    # Sin L2 se sigue sirviendo desde la base de datos
+    async def unavailable(keys):
+        raise ConnectionError("L2 caída")
+
+    monkeypatch.setattr(tiered_cache.store, "get_many", unavailable)
+    assert (await client.get("/platos/2")).json()["name"] == "Plato 2"
+    assert L2_REQUESTS.value(cache="dishes", result="error") == 1
+
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_every_worker(client: AsyncClient, db_session: AsyncSession, l1_enabled):
+    """Test una escritura borra L1 y L2 y lo publica; la invalidación de otro worker borra la L1 local"""
+    await seed(db_session)
+    assert (await client.get("/platos/1")).json()["name"] == "Plato 1"
+
+    response = await client.put("/platos/1", json={"name": "Renombrado"})
+    assert response.status_code == 200
+    assert (await client.get("/platos/1")).json()["name"] == "Renombrado"
+    assert INVALIDATIONS.value(cache="dishes", origin="local") == 1
+
+    # Otro worker cambia el plato: aquí se sigue viendo la L1 hasta que llega su mensaje
+    await db_session.execute(update(Dish).where(Dish.dish_id == 1).values(name="Desde otro worker"))
+    await db_session.commit()
+    await tiered_cache.store.delete("dishes:1")
+    assert (await client.get("/platos/1")).json()["name"] == "Renombrado"
+    await events.hub.publish(tiered_cache.CHANNEL, "cache.dishes", {"key": 1, "pid": "otro"})
+    assert (await client.get("/platos/1")).json()["name"] == "Desde otro worker"
+    assert INVALIDATIONS.value(cache="dishes", origin="remote") == 1
+
+    # Borrar el menú invalida todos los platos
+    assert (await client.delete("/menu/1")).status_code == 200
+    assert INVALIDATIONS.value(cache="dishes", origin="local") == 2
+    assert await tiered_cache.store.get("dishes:1") is None
+
+
+@pytest.mark.asyncio
+async def test_fills_load_from_primary_not_lagging_replica(
+    client: AsyncClient, db_session: AsyncSession, tmp_path, monkeypatch
+):
+    """Test con la caché activa, L1 y L2 se rellenan del primario aunque la petición lea de una réplica retrasada"""
+    # La base de datos de la petición (get_read_db) hace de réplica que aún no ve el cambio
+    await seed(db_session)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    primary = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with primary() as db:
+        await seed(db)
+        await db.execute(update(Dish).where(Dish.dish_id == 1).values(name="En el primario"))
+        await db.commit()
+    monkeypatch.setattr(database, "session_router", SessionRouter(primary))
+    monkeypatch.setattr(DISH_CACHE.l1, "ttl", 60.0)
+
+    assert (await client.get("/platos/1")).json()["name"] == "En el primario"
+    DISH_CACHE.l1.invalidate()
+    assert (await client.get("/platos/1")).json()["name"] == "En el primario"
+    assert L2_REQUESTS.value(cache="dishes", result="hit") == 1
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_load_started_before_write_does_not_fill_l2(
+    client: AsyncClient, db_session: AsyncSession, l1_enabled, monkeypatch
+):
+    """Test una carga que leyó antes de una escritura no deja su valor en L2 para las siguientes lecturas"""
+    await seed(db_session)
+    loaded, release = asyncio.Event(), asyncio.Event()
+    loader = DISH_CACHE.loader
+
+    async def slow_loader(db, key):
+        value = await loader(db, key)
+        loaded.set()
+        await release.wait()
+        return value
+
+    monkeypatch.setattr(DISH_CACHE, "loader", slow_loader)
+    reading = asyncio.create_task(DISH_CACHE.get(1, db_session))
+    await loaded.wait()
+    monkeypatch.setattr(DISH_CACHE, "loader", loader)
+
+    # Otro worker escribe mientras tanto: cambia la versión de la clave en L2 (su aviso no llega aquí)
+    await db_session.execute(update(Dish).where(Dish.dish_id == 1).values(name="Escrito después"))
+    await db_session.commit()
+    await tiered_cache.store.set("version:dishes:1", b"otro-worker", 60)
+    release.set()
+    assert (await reading).name == "Plato 1"
+
+    # El valor viejo quedó en L2 con la versión anterior: se ignora y se recarga del primario
+    DISH_CACHE.l1.invalidate()
+    assert (await client.get("/platos/1")).json()["name"] == "Escrito después"
@@ -0,0 +1,64 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.controllers import warmup
+from app.controllers.allergens import ALLERGENS_CACHE
+from app.controllers.categories import CATEGORIES_CACHE
+from app.controllers.establishment import ESTABLISHMENT_CACHE
+from app.database import Base, SessionRouter
+from app.models import Allergens, Category
+from tests.test_existence import capture_sql, seed
+
+
+@pytest.fixture
+async def primary(tmp_path):
+    """Helper: base de datos en fichero (varias conexiones ven los mismos datos) con catálogos y establecimientos"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'warmup.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with sessions() as db:
+        await seed(db)
+        await db.execute(insert(Category), [{"name": "Vegana"}, {"name": "Local"}])
+        await db.execute(insert(Allergens), [{"name": "Gluten"}])
+        await db.commit()
+    yield engine, sessions
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_ready_after_warmup_with_phase_timings(
+    client: AsyncClient, db_session: AsyncSession, primary, monkeypatch
+):
+    """Test /health/ready da 503 hasta calentar; después los catálogos se sirven sin consultar"""
+    for cache in (CATEGORIES_CACHE, ALLERGENS_CACHE, ESTABLISHMENT_CACHE):
+        monkeypatch.setattr(cache.l1, "ttl", 60.0)
+    engine, sessions = primary
+    # Con la caché activa las cargas van al primario (database.session_router)
+    monkeypatch.setattr(database, "session_router", SessionRouter(sessions))
+
+    assert (await client.get("/health/live")).status_code == 200
+    response = await client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["ready"] is False
+
+    await warmup.run(engines=[engine], sessions=sessions, connections=3, top=5)
+
+    response = await client.get("/health/ready")
+    assert response.status_code == 200
+    phases = response.json()["phases"]
+    assert list(phases) == ["pool", "statements", "catalog", "total"]
+    assert all(phase["ok"] for phase in phases.values())
+    assert phases["total"]["seconds"] >= phases["catalog"]["seconds"]
+    assert 'warmup_phase_seconds{phase="catalog"}' in (await client.get("/metrics")).text
+
+    # La base de datos de la petición está vacía: todo sale de lo precargado
+    with capture_sql(db_session) as statements:
+        assert len((await client.get("/categorias/list")).json()["items"]) == 2
+        assert [allergen["name"] for allergen in (await client.get("/allergen/")).json()] == ["Gluten"]
+        assert (await client.get("/establishments/3")).status_code == 200
+        assert (await client.get("/establishments/1")).status_code == 200
+    assert statements == []
@@ -0,0 +1,198 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.controllers.categories import update_category
+from app.controllers.dishes import delete_dish
+from app.models import Category, Dish, DishCategory, DishSearchDocument, Job, Menu
+from app.models.jobs import JobStatus
+from app.schemas.category import CategoryUpdate
+from app.utils import events
+from app.worker import HANDLERS, Worker, enqueue
+from app.worker.queue import JOBS_PROCESSED, QUEUE_DEPTH, QUEUE_LAG
+
+
+def worker_for(db: AsyncSession, **options) -> Worker:
+    return Worker(async_sessionmaker(bind=db.bind, expire_on_commit=False), **options)
+
+
+async def jobs_in(db: AsyncSession):
+    db.expire_all()
+    return (await db.execute(select(Job).order_by(Job.job_id))).scalars().all()
+
+
+async def create_dish(client: AsyncClient) -> int:
+    establishment = await client.post("/establishments/", json={
+        "NIT": "900", "name": "Fonda", "address": "Calle 1", "opening_hour": "08:00:00", "closing_hour": "22:00:00"
+    })
+    menu = await client.post(f"/menu/{establishment.json()['establishment_id']}", json={
+        "establishment_id": establishment.json()["establishment_id"], "title": "Carta"
+    })
+    dish = await client.post("/platos/", json={"menu_id": menu.json()["menu_id"], "name": "Bandeja paisa", "price": 30.0})
+    assert dish.status_code == 201
+    return dish.json()["dish_id"]
+
+
+@pytest.mark.asyncio
+async def test_request_jobs_run_after_response(client: AsyncClient, db_session: AsyncSession):
+    """Test la tarea del alta de un plato se escribe con él y se ejecuta tras responder"""
+    dish_id = await create_dish(client)
+
+    assert await jobs_in(db_session) == []
+    assert await db_session.get(DishSearchDocument, dish_id) is not None
+    assert JOBS_PROCESSED.value(kind="dish_search.refresh", result="done") == 1
+
+
+@pytest.mark.asyncio
+async def test_jobs_only_exist_if_write_commits(client: AsyncClient, db_session: AsyncSession):
+    """Test una escritura fallida o deshecha no deja tareas"""
+    enqueue(db_session, "dish_search.refresh", {"dish_id": 1})
+    await db_session.rollback()
+
+    # El menú no existe: la clave foránea falla al escribir y se deshace con su tarea
+    response = await client.post("/platos/", json={"menu_id": 99, "name": "Sin menú", "price": 10.0})
+    assert response.status_code == 500
+    assert await jobs_in(db_session) == []
+
+
+@pytest.mark.asyncio
+async def test_side_effects_wait_for_the_worker(client: AsyncClient, db_session: AsyncSession):
+    """Test renombrar una categoría y borrar un plato dejan sus efectos en la cola, no en la petición"""
+    dish_id = await create_dish(client)
+    db_session.add(Category(category_id=5, name="Típicos"))
+    db_session.add(DishCategory(dish_id=dish_id, category_id=5))
+    await db_session.commit()
+    establishment_id = (await db_session.get(Menu, (await db_session.get(Dish, dish_id)).menu_id)).establishment_id
+    subscription = events.hub.subscribe(events.establishment_channel(establishment_id))
+
+    # Llamando a los controladores sin la API nadie ejecuta las tareas hasta que llega el worker
+    await update_category(db_session, 5, CategoryUpdate(name="Criollos"))
+    assert [job.kind for job in await jobs_in(db_session)] == ["dish_search.refresh"]
+    assert "criollos" not in (await db_session.get(DishSearchDocument, dish_id)).search_text
+    assert await worker_for(db_session).drain() == 1
+    db_session.expire_all()
+    assert "criollos" in (await db_session.get(DishSearchDocument, dish_id)).search_text
+
+    await delete_dish(db_session, dish_id)
+    assert [job.kind for job in await jobs_in(db_session)] == ["events.publish"]
+    assert subscription.queue.empty()
+    assert await worker_for(db_session).drain() == 1
+    assert subscription.queue.get_nowait()["type"] == "dish.deleted"
+    events.hub.unsubscribe(subscription)
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_jobs_in_batches_per_kind(db_session: AsyncSession, monkeypatch):
+    """Test el worker pasa al manejador todas las tareas del mismo tipo de una vez"""
+    calls = []
+
+    async def record(db, payloads):
+        calls.append([payload["n"] for payload in payloads])
+
+    monkeypatch.setitem(HANDLERS, "test.record", record)
+    for n in range(5):
+        enqueue(db_session, "test.record", {"n": n})
+    await db_session.commit()
+
+    assert await worker_for(db_session, batch_size=3).drain() == 5
+    assert calls == [[0, 1, 2], [3, 4]]
+    assert await jobs_in(db_session) == []
+    assert JOBS_PROCESSED.value(kind="test.record", result="done") == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_are_retried_with_backoff(db_session: AsyncSession, monkeypatch):
+    """Test un fallo reprograma la tarea con espera y, agotados los intentos, queda en 'failed'"""
+    monkeypatch.setattr(settings, "JOBS_MAX_ATTEMPTS", 2)
+
+    async def fail(db, payloads):
+        raise RuntimeError("servicio caído")
+
+    monkeypatch.setitem(HANDLERS, "test.fail", fail)
+    enqueue(db_session, "test.fail", {})
+    await db_session.commit()
+    worker = worker_for(db_session)
+
+    assert await worker.drain() == 1
+    [job] = await jobs_in(db_session)
+    assert (job.status, job.attempts) == (JobStatus.pending, 1)
+    assert job.last_error == "RuntimeError: servicio caído"
+    run_at = job.run_at.replace(tzinfo=timezone.utc)
+    assert run_at > datetime.now(timezone.utc) + timedelta(seconds=settings.JOBS_RETRY_BASE_SECONDS * 0.4)
+    # Todavía no toca
+    assert await worker.drain() == 0
+
+    await db_session.execute(update(Job).values(run_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+    await db_session.commit()
+    assert await worker.drain() == 1
+    [job] = await jobs_in(db_session)
+    assert (job.status, job.attempts) == (JobStatus.failed, 2)
+    assert JOBS_PROCESSED.value(kind="test.fail", result="retry") == 1
+    assert JOBS_PROCESSED.value(kind="test.fail", result="failed") == 1
+
+
+@pytest.mark.asyncio
+async def test_one_bad_job_does_not_fail_its_batch(db_session: AsyncSession, monkeypatch):
+    """Test si el lote falla se repite tarea a tarea y solo se reintenta la culpable"""
+    done = []
+
+    async def picky(db, payloads):
+        if any(payload["n"] == 2 for payload in payloads):
+            raise ValueError("n=2 no es válido")
+        done.extend(payload["n"] for payload in payloads)
+
+    monkeypatch.setitem(HANDLERS, "test.picky", picky)
+    for n in range(4):
+        enqueue(db_session, "test.picky", {"n": n})
+    await db_session.commit()
+
+    await worker_for(db_session).drain()
+    assert done == [0, 1, 3]
+    [job] = await jobs_in(db_session)
+    assert (job.payload, job.status) == ('{"n": 2}', JobStatus.pending)
+
+
+@pytest.mark.asyncio
+async def test_stale_jobs_are_released_and_queue_metrics(db_session: AsyncSession):
+    """Test las tareas de un worker caído vuelven a la cola y se publican profundidad y retraso"""
+    long_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    db_session.add(Job(
+        kind="dish_search.refresh", payload='{"dish_id": 1}', status=JobStatus.running, attempts=1,
+        created_at=long_ago, run_at=long_ago, locked_by="muerto", locked_at=long_ago,
+    ))
+    await db_session.commit()
+
+    await worker_for(db_session, lock_timeout_seconds=60).maintain()
+
+    [job] = await jobs_in(db_session)
+    assert (job.status, job.locked_by) == (JobStatus.pending, None)
+    assert QUEUE_DEPTH.value(status="pending") == 1
+    assert QUEUE_DEPTH.value(status="running") == 0
+    assert QUEUE_LAG.value() >= 3500
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_drains_in_background(db_session: AsyncSession, monkeypatch):
+    """Test el pool arrancado recoge las tareas encoladas fuera de una petición"""
+    async def noop(db, payloads):
+        pass
+
+    monkeypatch.setitem(HANDLERS, "test.noop", noop)
+    worker = worker_for(db_session, concurrency=2, poll_seconds=0.01)
+    worker.start()
+    try:
+        for n in range(3):
+            enqueue(db_session, "test.noop", {"n": n})
+        await db_session.commit()
+        for _ in range(200):
+            if JOBS_PROCESSED.value(kind="test.noop", result="done") == 3:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await worker.stop()
+    assert JOBS_PROCESSED.value(kind="test.noop", result="done") == 3
+    assert await jobs_in(db_session) == []